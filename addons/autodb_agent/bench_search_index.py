@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark the search index against the linear egrep scanner.
+
+Runs the same egrep queries two ways and checks they return the same pages:
+- linear: what Tools.egrep did before the search index, i.e. scan every line
+  with the pattern wrapped in make/year lookaheads
+- indexed: trigram prefilter plus the year/make/model partition
+
+Usage:
+    # Synthetic unified index (default 40 vehicles x 100 pages)
+    python -m addons.autodb_agent.bench_search_index
+
+    # An existing index, searching as a given vehicle
+    python -m addons.autodb_agent.bench_search_index --index /tmp/autodb_full_index.tsv \\
+        --make "Jeep Truck" --year 2012
+"""
+
+import argparse
+import logging
+import random
+import re
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from .search_index import build_search_index, sidecar_path
+from .site_index import egrep_index
+
+log = logging.getLogger("bench_search_index")
+
+MAKES = ["Jeep Truck", "Ford", "Ford Truck", "Chevrolet", "Toyota", "Honda", "Dodge", "Nissan"]
+MODELS = ["Liberty 4WD V6-3.7L", "F-150 2WD V8-5.0L", "Camry L4-2.5L", "Civic L4-1.8L", "Ram 1500 V8-5.7L"]
+SECTIONS = [
+    "Repair and Diagnosis/Engine, Cooling and Exhaust/Engine",
+    "Repair and Diagnosis/Brakes and Traction Control/Antilock Brakes",
+    "Specifications/Capacity Specifications",
+    "Specifications/Mechanical Specifications/Torque",
+    "Repair and Diagnosis/Body and Frame/Radio",
+    "Technical Service Bulletins/All Technical Service Bulletins",
+]
+WORDS = (
+    "remove install inspect replace bolt nut torque specification capacity sensor connector "
+    "harness relay fuse module pressure valve pump hose clamp gasket seal bearing bracket "
+    "procedure caution warning note step figure component location diagram circuit ground "
+    "voltage resistance continuity terminal coolant engine transmission differential brake "
+    "caliper rotor pad fluid filter oil drain plug quart liter amplifier speaker antenna"
+).split()
+
+PATTERNS = [
+    "oil",
+    "amplifier|speaker",
+    "torque.*bolt",
+    r"capacity\s+\w+",
+    "radio",
+    "(caliper|rotor) (bolt|nut)",
+    r"\bP0[0-9]{3}\b",
+]
+
+
+def make_synthetic_index(path: Path, vehicles: int, pages: int, seed: int = 0) -> list[tuple[str, int]]:
+    """Write a unified index of ``vehicles`` x ``pages`` lines; returns the (make, year) pairs."""
+    rng = random.Random(seed)
+    written = []
+    with open(path, "w", encoding="utf-8") as f:
+        for v in range(vehicles):
+            make = MAKES[v % len(MAKES)]
+            year = 1985 + (v // len(MAKES)) % 35
+            model = MODELS[v % len(MODELS)]
+            written.append((make, year))
+            for p in range(pages):
+                section = rng.choice(SECTIONS)
+                title = " ".join(rng.choices(WORDS, k=3)).title()
+                content = " ".join(rng.choices(WORDS, k=rng.randint(20, 120)))
+                if rng.random() < 0.01:
+                    content += f" DTC P0{rng.randint(100, 999)}"
+                f.write(f"{make}/{year}/{model}/{section}/{p}\t{title}\t{content}\n")
+    return written
+
+
+def legacy_pattern(make: str, year: int, pattern: str) -> str:
+    """The pattern Tools.egrep used to build for the unified index.
+
+    The user pattern is grouped here; Tools.egrep did not, so a top-level
+    alternation like ``a|b`` escaped the lookahead and missed matches.
+    """
+    make_pattern = re.escape(make).replace('\\ ', '[ _]')
+    return f"(?=.*{make_pattern})(?=.*\\b{year}\\b)(?=.*(?:{pattern}))"
+
+
+def timed(fn, repeat: int) -> tuple[float, object]:
+    times = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), result
+
+
+def run(index: Path, make: str, year: int, repeat: int = 1, max_results: int = 20):
+    started = time.perf_counter()
+    build_search_index(index)
+    build_time = time.perf_counter() - started
+    print(f"Index: {index} ({index.stat().st_size / 1024 / 1024:.1f} MB)")
+    print(f"Sidecar: {sidecar_path(index).stat().st_size / 1024 / 1024:.1f} MB, built in {build_time:.1f}s")
+    print(f"Vehicle: {make} {year}, max_results={max_results}, median of {repeat}\n")
+    print(f"{'pattern':<28} {'linear ms':>10} {'indexed ms':>11} {'speedup':>8} {'hits':>5}  same")
+
+    linear_total = indexed_total = 0.0
+    for pattern in PATTERNS:
+        linear_time, linear = timed(
+            lambda: egrep_index(index, legacy_pattern(make, year, pattern), max_results,
+                                use_search_index=False),
+            repeat,
+        )
+        indexed_time, indexed = timed(
+            lambda: egrep_index(index, pattern, max_results, make=make, year=year),
+            repeat,
+        )
+        same = [r["path"] for r in linear] == [r["path"] for r in indexed]
+        linear_total += linear_time
+        indexed_total += indexed_time
+        print(
+            f"{pattern:<28} {linear_time * 1000:>10.1f} {indexed_time * 1000:>11.2f} "
+            f"{linear_time / max(indexed_time, 1e-9):>7.0f}x {len(indexed):>5}  {'yes' if same else 'NO'}"
+        )
+    print(f"\nTotal: linear {linear_total * 1000:.0f} ms, indexed {indexed_total * 1000:.1f} ms "
+          f"({linear_total / max(indexed_total, 1e-9):.0f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search index vs linear egrep")
+    parser.add_argument("--index", type=Path, help="Existing unified TSV index (default: synthetic)")
+    parser.add_argument("--make", default="Jeep Truck")
+    parser.add_argument("--year", type=int, default=1985)
+    parser.add_argument("--vehicles", type=int, default=40, help="Synthetic vehicles")
+    parser.add_argument("--pages", type=int, default=100, help="Synthetic pages per vehicle")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.index:
+        run(args.index, args.make, args.year, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = Path(tmp) / "autodb_full_index.tsv"
+        started = time.perf_counter()
+        make_synthetic_index(index, args.vehicles, args.pages)
+        print(f"Generated {args.vehicles * args.pages} lines in {time.perf_counter() - started:.1f}s")
+        run(index, args.make, args.year, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
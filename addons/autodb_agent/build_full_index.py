@@ -16,6 +16,9 @@ Usage:
     
     # Specific makes
     python -m addons.autodb_agent.build_full_index --makes "Jeep Truck,Ford,Toyota"
+    
+    # Rebuild only the search sidecar (<index>.sidx) of an existing index
+    python -m addons.autodb_agent.build_full_index --search-index-only
 """
 
 import argparse
@@ -30,6 +33,8 @@ from bs4 import BeautifulSoup
 from urllib.parse import urljoin, unquote, quote
 from datetime import datetime
 
+from .search_index import build_search_index
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -386,6 +391,9 @@ class FullSiteIndexer:
         if self.index_path.exists():
             size_mb = self.index_path.stat().st_size / 1024 / 1024
             log.info(f"Size: {size_mb:.1f} MB")
+            
+            # Searches scan the TSV linearly until the sidecar matches it
+            build_search_index(self.index_path)
 
 
 async def main():
@@ -402,6 +410,8 @@ async def main():
                        help="Max concurrent HTTP requests (default 50)")
     parser.add_argument("--title-only", action="store_true",
                        help="Only index page titles, not content (much faster)")
+    parser.add_argument("--search-index-only", action="store_true",
+                       help="Only (re)build the search sidecar for an existing index")
     
     args = parser.parse_args()
     
@@ -413,6 +423,10 @@ async def main():
     else:
         index_path = DEFAULT_INDEX_PATH
     
+    if args.search_index_only:
+        build_search_index(index_path)
+        return
+    
     # Determine makes to process
     if args.makes:
         makes = [m.strip() for m in args.makes.split(',')]
@@ -0,0 +1,478 @@
+"""
+AutoDB Search Index.
+
+Memory-mapped sidecar index for the grep-friendly TSV site indexes
+(PATH\\tTITLE\\tCONTENT per line) written by site_index and build_full_index.
+
+The sidecar (``<index>.sidx``) holds:
+- the byte offset of every TSV line, so a line is read without scanning
+- a trigram posting list per lowercased 3-byte sequence, so a regex only
+  runs on lines that contain the literals it requires
+- a year/make/model partition of the unified index (paths look like
+  ``Jeep Truck/2012/Liberty 4WD V6-3.7L/...``), so vehicle filtering is a
+  direct lookup instead of a lookahead regex over every line
+
+Both files are opened with mmap, so every worker shares one copy through
+the page cache and opening an index costs nothing. The sidecar records the
+TSV size and mtime; a TSV that has changed since (e.g. a crawl still
+appending) is searched linearly until the sidecar is rebuilt.
+
+Usage:
+    python -m addons.autodb_agent.search_index /tmp/autodb_full_index.tsv
+"""
+
+import argparse
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Optional
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+log = logging.getLogger("autodb_agent.search_index")
+
+MAGIC = b"ADBSIDX1"
+HEADER = struct.Struct("<8sBxxxxxxxQqQQQ")  # magic, byteorder, tsv size/mtime, counts
+SECTIONS = (
+    "line_offsets",      # Q, n_lines + 1
+    "trigram_keys",      # I, sorted
+    "trigram_starts",    # Q, n_trigrams + 1, into postings
+    "postings",          # I, line ids
+    "unfoldable",        # I, lines the trigrams cannot rule out (see below)
+    "vehicle_key_ends",  # Q, end offset of each key in vehicle_keys
+    "vehicle_starts",    # Q, n_vehicles + 1, into vehicle_lines
+    "vehicle_lines",     # I, line ids
+    "vehicle_keys",      # bytes, sorted "year\0make\0model" keys
+)
+SECTION_TABLE = struct.Struct("<" + "QQ" * len(SECTIONS))
+
+# Non-ASCII characters that re.IGNORECASE matches against ASCII letters
+# (dotted/dotless i, long s, Kelvin sign). The trigram index only folds
+# ASCII case, so lines containing them are always candidates.
+ASCII_CASE_FOLDS = ("İ", "ı", "ſ", "K")
+_ASCII_CASE_FOLD_BYTES = tuple(ch.encode("utf-8") for ch in ASCII_CASE_FOLDS)
+
+_YEAR = re.compile(r"(19|20)\d\d")
+
+
+def sidecar_path(index_path: Path) -> Path:
+    index_path = Path(index_path)
+    return index_path.with_name(index_path.name + ".sidx")
+
+
+def normalize_make(make: str) -> str:
+    return re.sub(r"[\s_]+", " ", make).strip().lower()
+
+
+def vehicle_of(path: str) -> Optional[tuple[str, str, str]]:
+    """(year, make, model) of a unified-index path, or None.
+
+    Handles both ``Make/Year/Model/...`` (what build_full_index writes) and
+    ``Make/Model/Year/...``.
+    """
+    parts = path.split("/", 3)
+    for year_at in (1, 2):
+        if len(parts) > year_at and _YEAR.fullmatch(parts[year_at]):
+            model_at = 2 if year_at == 1 else 1
+            model = parts[model_at] if len(parts) > model_at else ""
+            return parts[year_at], normalize_make(parts[0]), model.lower()
+    return None
+
+
+def _trigrams(data: bytes) -> set:
+    return {data[i:i + 3] for i in range(len(data) - 2)}
+
+
+def _sections_layout(sizes: dict) -> tuple[dict, int]:
+    offset = HEADER.size + SECTION_TABLE.size
+    layout = {}
+    for name in SECTIONS:
+        offset = (offset + 7) & ~7
+        layout[name] = (offset, sizes[name])
+        offset += sizes[name]
+    return layout, offset
+
+
+def build_search_index(index_path: Path, out_path: Optional[Path] = None) -> Path:
+    """Build the sidecar for a TSV index and return its path.
+
+    Written to a temporary file and renamed into place, so readers that
+    still have the old sidecar mapped are unaffected.
+    """
+    index_path = Path(index_path)
+    out_path = Path(out_path) if out_path else sidecar_path(index_path)
+    started = time.time()
+    stat = index_path.stat()
+
+    line_offsets = array("Q")
+    postings: dict[bytes, array] = {}
+    unfoldable = array("I")
+    vehicles: dict[str, array] = {}
+
+    with open(index_path, "rb") as f:
+        offset = 0
+        line_id = 0
+        for raw in f:
+            line_offsets.append(offset)
+            offset += len(raw)
+            line = raw.rstrip(b"\r\n")
+
+            for trigram in _trigrams(line.lower()):
+                ids = postings.get(trigram)
+                if ids is None:
+                    ids = postings[trigram] = array("I")
+                ids.append(line_id)
+            if any(b in line for b in _ASCII_CASE_FOLD_BYTES):
+                unfoldable.append(line_id)
+
+            path = line.split(b"\t", 1)[0].decode("utf-8", "replace")
+            vehicle = vehicle_of(path)
+            if vehicle is not None:
+                key = "\0".join(vehicle)
+                ids = vehicles.get(key)
+                if ids is None:
+                    ids = vehicles[key] = array("I")
+                ids.append(line_id)
+            line_id += 1
+        line_offsets.append(offset)
+
+    trigram_keys = array("I")
+    trigram_starts = array("Q", [0])
+    all_postings = array("I")
+    for trigram in sorted(postings):
+        trigram_keys.append(int.from_bytes(trigram, "big"))
+        all_postings.extend(postings[trigram])
+        trigram_starts.append(len(all_postings))
+
+    vehicle_key_ends = array("Q")
+    vehicle_starts = array("Q", [0])
+    vehicle_lines = array("I")
+    vehicle_keys = bytearray()
+    for key in sorted(vehicles):
+        vehicle_keys += key.encode("utf-8")
+        vehicle_key_ends.append(len(vehicle_keys))
+        vehicle_lines.extend(vehicles[key])
+        vehicle_starts.append(len(vehicle_lines))
+
+    data = {
+        "line_offsets": line_offsets.tobytes(),
+        "trigram_keys": trigram_keys.tobytes(),
+        "trigram_starts": trigram_starts.tobytes(),
+        "postings": all_postings.tobytes(),
+        "unfoldable": unfoldable.tobytes(),
+        "vehicle_key_ends": vehicle_key_ends.tobytes(),
+        "vehicle_starts": vehicle_starts.tobytes(),
+        "vehicle_lines": vehicle_lines.tobytes(),
+        "vehicle_keys": bytes(vehicle_keys),
+    }
+    layout, _ = _sections_layout({name: len(blob) for name, blob in data.items()})
+
+    tmp_path = out_path.with_name(out_path.name + f".tmp{os.getpid()}")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC,
+            sys.byteorder == "little",
+            stat.st_size,
+            stat.st_mtime_ns,
+            len(line_offsets) - 1,
+            len(trigram_keys),
+            len(vehicle_key_ends),
+        ))
+        f.write(SECTION_TABLE.pack(*(v for name in SECTIONS for v in layout[name])))
+        for name in SECTIONS:
+            f.write(b"\0" * (layout[name][0] - f.tell()))
+            f.write(data[name])
+    os.replace(tmp_path, out_path)
+
+    log.info(
+        f"Search index written to {out_path}: {len(line_offsets) - 1} lines, "
+        f"{len(trigram_keys)} trigrams, {len(vehicle_key_ends)} vehicles "
+        f"({out_path.stat().st_size / 1024 / 1024:.1f} MB, {time.time() - started:.1f}s)"
+    )
+    return out_path
+
+
+####################
+# Regex -> required trigrams
+####################
+
+# A trigram query is None (no constraint: every line is a candidate), a
+# trigram key (int), or ("and" | "or", [queries]).
+
+
+def _and(parts: list):
+    parts = [p for p in parts if p is not None]
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else ("and", parts)
+
+
+def _literal_query(run: list) -> Optional[tuple]:
+    if len(run) < 3:
+        return None
+    data = bytes(run)
+    return _and([int.from_bytes(t, "big") for t in sorted(_trigrams(data))])
+
+
+_REPEATS = tuple(
+    getattr(sre_constants, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_constants, name)
+)
+_ATOMIC_GROUP = getattr(sre_constants, "ATOMIC_GROUP", None)
+
+
+def _required(items) -> Optional[object]:
+    """Trigram query every line matching the parsed pattern must satisfy.
+
+    Runs of literal characters give the trigrams; groups, alternations,
+    mandatory repeats and positive lookarounds combine them. Anything else
+    (classes, optional parts, backreferences) contributes no constraint,
+    which keeps the filter conservative: it can only let extra lines
+    through to the regex, never drop a match.
+    """
+    parts = []
+    run: list[int] = []
+    for op, av in items:
+        if op is sre_constants.LITERAL and av < 128:
+            run.append(ord(chr(av).lower()))
+            continue
+        parts.append(_literal_query(run))
+        run = []
+        if op is sre_constants.SUBPATTERN:
+            parts.append(_required(av[-1]))
+        elif _ATOMIC_GROUP is not None and op is _ATOMIC_GROUP:
+            parts.append(_required(av))
+        elif op is sre_constants.BRANCH:
+            alternatives = [_required(alt) for alt in av[1]]
+            if all(alt is not None for alt in alternatives):
+                parts.append(("or", alternatives))
+        elif op in _REPEATS and av[0] >= 1:
+            parts.append(_required(av[2]))
+        elif op is sre_constants.ASSERT:
+            parts.append(_required(av[1]))
+    parts.append(_literal_query(run))
+    return _and(parts)
+
+
+def required_trigrams(pattern: str):
+    try:
+        return _required(sre_parse.parse(pattern, re.IGNORECASE))
+    except Exception as e:
+        log.debug(f"Could not analyse pattern {pattern!r}: {e}")
+        return None
+
+
+####################
+# Reader
+####################
+
+
+def _contains(postings, value: int) -> bool:
+    i = bisect_left(postings, value)
+    return i < len(postings) and postings[i] == value
+
+
+class SearchIndex:
+    """A TSV index and its sidecar, both memory-mapped."""
+
+    WIDE_SECTIONS = ("line_offsets", "trigram_starts", "vehicle_key_ends", "vehicle_starts")
+
+    def __init__(self, index_path: Path, sidx_path: Optional[Path] = None):
+        self.index_path = Path(index_path)
+        self.sidx_path = Path(sidx_path) if sidx_path else sidecar_path(self.index_path)
+
+        with open(self.sidx_path, "rb") as f:
+            self._sidx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._tsv = None
+        self._views: list[memoryview] = []
+        self._s: dict[str, memoryview] = {}
+        try:
+            magic, little, self.tsv_size, self.tsv_mtime_ns, self.n_lines, _, _ = (
+                HEADER.unpack_from(self._sidx, 0)
+            )
+            if magic != MAGIC or bool(little) != (sys.byteorder == "little"):
+                raise ValueError(f"{self.sidx_path} is not a search index for this platform")
+            table = SECTION_TABLE.unpack_from(self._sidx, HEADER.size)
+            whole = memoryview(self._sidx)
+            self._views.append(whole)
+            for i, name in enumerate(SECTIONS):
+                start, length = table[2 * i], table[2 * i + 1]
+                section = whole[start:start + length]
+                if name != "vehicle_keys":
+                    section = section.cast("Q" if name in self.WIDE_SECTIONS else "I")
+                self._views.append(section)
+                self._s[name] = section
+
+            with open(self.index_path, "rb") as f:
+                # mmap cannot map an empty file
+                self._tsv = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.tsv_size else b""
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        self._s = {}
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if isinstance(self._tsv, mmap.mmap):
+            self._tsv.close()
+        self._sidx.close()
+
+    def is_fresh(self) -> bool:
+        try:
+            stat = self.index_path.stat()
+        except OSError:
+            return False
+        return stat.st_size == self.tsv_size and stat.st_mtime_ns == self.tsv_mtime_ns
+
+    def line(self, line_id: int) -> str:
+        offsets = self._s["line_offsets"]
+        return self._tsv[offsets[line_id]:offsets[line_id + 1]].decode("utf-8", "replace")
+
+    def postings(self, trigram: int):
+        keys = self._s["trigram_keys"]
+        i = bisect_left(keys, trigram)
+        if i == len(keys) or keys[i] != trigram:
+            return ()
+        starts = self._s["trigram_starts"]
+        return self._s["postings"][starts[i]:starts[i + 1]]
+
+    def _cost(self, query) -> int:
+        if isinstance(query, int):
+            return len(self.postings(query))
+        op, parts = query
+        costs = [self._cost(p) for p in parts]
+        return min(costs) if op == "and" else sum(costs)
+
+    def _evaluate(self, query, within: Optional[list]) -> list:
+        """Sorted line ids satisfying ``query`` (restricted to ``within``)."""
+        if isinstance(query, int):
+            postings = self.postings(query)
+            if within is None:
+                return list(postings)
+            if len(within) * 16 < len(postings):
+                return [i for i in within if _contains(postings, i)]
+            present = set(postings)
+            return [i for i in within if i in present]
+        op, parts = query
+        if op == "and":
+            # Cheapest first, then only check survivors against the rest
+            for part in sorted(parts, key=self._cost):
+                within = self._evaluate(part, within)
+                if not within:
+                    return []
+            return within
+        merged = set()
+        for part in parts:
+            merged.update(self._evaluate(part, within))
+        return sorted(merged)
+
+    def _vehicle_key(self, i: int) -> bytes:
+        ends = self._s["vehicle_key_ends"]
+        return bytes(self._s["vehicle_keys"][ends[i - 1] if i else 0:ends[i]])
+
+    def vehicle_lines(self, make: str, year, model: Optional[str] = None) -> list:
+        """Line ids of every vehicle for ``year`` whose make is ``make`` (or
+        starts with it, so "Jeep" covers "Jeep Truck") and, if given, whose
+        model contains ``model``."""
+        make = normalize_make(make)
+        model = (model or "").lower()
+        prefix = f"{year}\0".encode("utf-8")
+
+        n = len(self._s["vehicle_key_ends"])
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._vehicle_key(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        starts = self._s["vehicle_starts"]
+        lines = []
+        for i in range(lo, n):
+            key = self._vehicle_key(i)
+            if not key.startswith(prefix):
+                break
+            _, v_make, v_model = key.decode("utf-8").split("\0")
+            if v_make != make and not v_make.startswith(make + " "):
+                continue
+            if model and model not in v_model:
+                continue
+            lines.extend(self._s["vehicle_lines"][starts[i]:starts[i + 1]])
+        lines.sort()
+        return lines
+
+    def candidates(self, pattern: str, make: Optional[str] = None, year=None,
+                   model: Optional[str] = None) -> list:
+        """Line ids, in file order, that may match ``pattern`` for the vehicle."""
+        within = self.vehicle_lines(make, year, model) if make and year else None
+        query = required_trigrams(pattern)
+        if query is None:
+            return within if within is not None else range(self.n_lines)
+        found = self._evaluate(query, within)
+        unfoldable = self._s["unfoldable"]
+        if len(unfoldable):
+            allowed = set(within) if within is not None else None
+            extra = [i for i in unfoldable if allowed is None or i in allowed]
+            found = sorted(set(found).union(extra))
+        return found
+
+
+_open_indexes: dict[Path, SearchIndex] = {}
+
+
+def open_search_index(index_path: Path) -> Optional[SearchIndex]:
+    """The SearchIndex for a TSV, or None if it has no up-to-date sidecar.
+
+    Opened indexes are kept per process; a sidecar that was rebuilt or a TSV
+    that changed is noticed on the next call.
+    """
+    index_path = Path(index_path)
+    sidx = sidecar_path(index_path)
+    index = _open_indexes.get(index_path)
+    if index is not None:
+        if index.is_fresh():
+            return index
+        _open_indexes.pop(index_path).close()
+
+    if not sidx.exists():
+        return None
+    try:
+        index = SearchIndex(index_path, sidx)
+    except Exception as e:
+        log.warning(f"Could not open search index {sidx}: {e}")
+        return None
+    if not index.is_fresh():
+        log.info(f"Search index {sidx} is older than {index_path}; scanning linearly")
+        index.close()
+        return None
+    _open_indexes[index_path] = index
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the search sidecar for a TSV site index")
+    parser.add_argument("index", type=Path, help="TSV index file")
+    parser.add_argument("--output", type=Path, help="Sidecar path (default: <index>.sidx)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(name)s] %(levelname)s: %(message)s")
+    build_search_index(args.index, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ from typing import Optional
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, unquote
 
+from .search_index import build_search_index, normalize_make, open_search_index, vehicle_of
+
 log = logging.getLogger("autodb_agent.indexer")
 
 # Index storage location
@@ -227,6 +229,7 @@ class SiteIndexer:
         # Write index
         index_path.write_text('\n'.join(lines), encoding='utf-8')
         log.info(f"Index written to {index_path} ({len(lines)} entries)")
+        build_search_index(index_path)
         
         return index_path
     
@@ -242,10 +245,64 @@ class SiteIndexer:
         return path if path.exists() else None
 
 
-def egrep_index(index_path: Path, pattern: str, max_results: int = 20) -> list[dict]:
+def _format_match(regex: re.Pattern, line: str) -> Optional[dict]:
+    """Result dict for a matching index line, or None if it does not match."""
+    if not regex.search(line):
+        return None
+    parts = line.strip().split('\t', 2)
+    if len(parts) < 2:
+        return None
+    path, title = parts[0], parts[1]
+    content = parts[2] if len(parts) > 2 else ""
+    
+    # Find the actual match with context
+    match = regex.search(content) or regex.search(title)
+    if match:
+        start = max(0, match.start() - 50)
+        end = min(len(content), match.end() + 50)
+        context = content[start:end]
+        if start > 0:
+            context = "..." + context
+        if end < len(content):
+            context = context + "..."
+    else:
+        context = content[:100] + "..." if len(content) > 100 else content
+    
+    return {
+        'path': path,
+        'title': title,
+        'match': context,
+    }
+
+
+def _matches_vehicle(line: str, make: str, year, model: Optional[str]) -> bool:
+    """Linear-scan equivalent of the search index's vehicle partition."""
+    vehicle = vehicle_of(line.split('\t', 1)[0])
+    if vehicle is None or vehicle[0] != str(year):
+        return False
+    make = normalize_make(make)
+    if vehicle[1] != make and not vehicle[1].startswith(make + " "):
+        return False
+    return not model or model.lower() in vehicle[2]
+
+
+def egrep_index(
+    index_path: Path,
+    pattern: str,
+    max_results: int = 20,
+    make: Optional[str] = None,
+    year: Optional[int] = None,
+    model: Optional[str] = None,
+    use_search_index: bool = True,
+) -> list[dict]:
     """
     Search index with extended regex.
     
+    With ``make`` and ``year`` only lines for that vehicle (by index path,
+    see search_index.vehicle_of) are searched. When the index has an
+    up-to-date search sidecar the regex only runs on candidate lines;
+    otherwise every line is scanned.
+    
     Returns list of {path, title, match} dicts.
     """
     results = []
@@ -255,35 +312,27 @@ def egrep_index(index_path: Path, pattern: str, max_results: int = 20) -> list[d
     except re.error as e:
         return [{"error": f"Invalid regex: {e}"}]
     
+    vehicle_filter = bool(make and year)
+    index = open_search_index(index_path) if use_search_index else None
+    
+    if index is not None:
+        for line_id in index.candidates(pattern, make, year, model):
+            result = _format_match(regex, index.line(line_id))
+            if result:
+                results.append(result)
+                if len(results) >= max_results:
+                    break
+        return results
+    
     with open(index_path, 'r', encoding='utf-8') as f:
         for line in f:
-            if regex.search(line):
-                parts = line.strip().split('\t', 2)
-                if len(parts) >= 2:
-                    path, title = parts[0], parts[1]
-                    content = parts[2] if len(parts) > 2 else ""
-                    
-                    # Find the actual match with context
-                    match = regex.search(content) or regex.search(title)
-                    if match:
-                        start = max(0, match.start() - 50)
-                        end = min(len(content), match.end() + 50)
-                        context = content[start:end]
-                        if start > 0:
-                            context = "..." + context
-                        if end < len(content):
-                            context = context + "..."
-                    else:
-                        context = content[:100] + "..." if len(content) > 100 else content
-                    
-                    results.append({
-                        'path': path,
-                        'title': title,
-                        'match': context,
-                    })
-                    
-                    if len(results) >= max_results:
-                        break
+            if vehicle_filter and not _matches_vehicle(line, make, year, model):
+                continue
+            result = _format_match(regex, line)
+            if result:
+                results.append(result)
+                if len(results) >= max_results:
+                    break
     
     return results
 
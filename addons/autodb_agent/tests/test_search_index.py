@@ -0,0 +1,101 @@
+"""Tests for the trigram/vehicle search index behind egrep_index."""
+
+import os
+
+import pytest
+
+from addons.autodb_agent import search_index
+from addons.autodb_agent.bench_search_index import legacy_pattern, make_synthetic_index
+from addons.autodb_agent.search_index import (
+    build_search_index,
+    open_search_index,
+    required_trigrams,
+    sidecar_path,
+)
+from addons.autodb_agent.site_index import egrep_index
+
+PATTERNS = [
+    "oil",
+    "OIL drain",
+    "amplifier|speaker",
+    "torque.*bolt",
+    r"capacity\s+\w+",
+    "(caliper|rotor) (bolt|nut)",
+    r"\bP0[0-9]{3}\b",
+    "(?=.*quart)(?=.*liter)",
+    "ca?liper",
+    "zzzz-not-there",
+    "x*",
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "autodb_full_index.tsv"
+    make_synthetic_index(path, vehicles=24, pages=40, seed=1)
+    with open(path, "a", encoding="utf-8") as f:
+        # re.IGNORECASE matches "k" against the Kelvin sign; trigrams cannot
+        f.write("Ford/1987/Camry L4-2.5L/Specifications/Temp\tTemp\tcoolant 300 Kelvin torque\n")
+        f.write("Toyota/Camry/1988/L4-2.5L/Specifications\tSpecs\toil capacity 4 quart\n")
+    build_search_index(path)
+    yield path
+    search_index._open_indexes.pop(path, None)
+
+
+def _paths(results):
+    return [r["path"] for r in results]
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_indexed_search_matches_linear_scan(index, pattern):
+    assert open_search_index(index) is not None
+    for max_results in (5, 1000):
+        assert egrep_index(index, pattern, max_results) == egrep_index(
+            index, pattern, max_results, use_search_index=False
+        )
+        for make, year in (("Ford", 1985), ("Jeep", 1985), ("Ford", 1987), ("Toyota", 1988)):
+            assert egrep_index(index, pattern, max_results, make=make, year=year) == egrep_index(
+                index, pattern, max_results, make=make, year=year, use_search_index=False
+            )
+
+
+@pytest.mark.parametrize("pattern", ["oil", "amplifier|speaker", r"\bP0[0-9]{3}\b"])
+def test_vehicle_filter_matches_old_lookahead_pattern(index, pattern):
+    # The lookahead pattern is slow (quadratic per line), so only a few here
+    for make, year in (("Jeep", 1985), ("Toyota", 1988)):
+        legacy = egrep_index(index, legacy_pattern(make, year, pattern), 1000, use_search_index=False)
+        assert _paths(egrep_index(index, pattern, 1000, make=make, year=year)) == _paths(legacy)
+
+
+def test_kelvin_sign_line_is_not_filtered_out(index):
+    results = egrep_index(index, "kelvin", make="Ford", year=1987)
+    assert _paths(results) == ["Ford/1987/Camry L4-2.5L/Specifications/Temp"]
+
+
+def test_candidates_touch_only_the_vehicle_and_literal_lines(index):
+    opened = open_search_index(index)
+    everything = opened.n_lines
+    vehicle = opened.vehicle_lines("Jeep", 1985)
+    # "Jeep" covers "Jeep Truck"; 24 vehicles over 8 makes and 3 years
+    assert len(vehicle) == 40
+    candidates = opened.candidates("amplifier", "Jeep", 1985)
+    assert set(candidates) <= set(vehicle)
+    assert len(opened.candidates("amplifier")) < everything
+    assert required_trigrams("ab|cd") is None
+    assert required_trigrams("a+|bc") is None
+
+
+def test_stale_sidecar_falls_back_to_linear_scan(index):
+    before = egrep_index(index, "quart", 1000)
+    with open(index, "a", encoding="utf-8") as f:
+        f.write("Honda/1990/Civic/Specifications\tSpecs\tnew quart entry\n")
+    assert open_search_index(index) is None
+    after = egrep_index(index, "quart", 1000)
+    assert len(after) == len(before) + 1
+
+    build_search_index(index)
+    assert open_search_index(index) is not None
+    assert egrep_index(index, "quart", 1000) == after
+    os.remove(sidecar_path(index))
+    search_index._open_indexes.pop(index, None)
+    assert open_search_index(index) is None
@@ -504,29 +504,22 @@ Use go_back() to try a different path if this isn't what you need.""",
                 error=f"Index file not found at {index_path}. It may still be building.",
             )
         
-        # For unified index, build vehicle-specific pattern
-        search_pattern = pattern
+        # For unified index, only search the current vehicle's pages
+        make = year = None
         vehicle_prefix = None
         
         if self._unified_index and self.vehicle:
-            # Unified index paths vary but typically include make, year, and model/engine
-            # Format examples:
+            # Unified index paths start with make and year, e.g.
             #   Jeep Truck/1985/L4-150 2.5L VIN U 1-bbl/Repair/...
-            #   Toyota/Camry/2020/L4-2.5L/Specifications/...
-            # We'll match on make and year which should be present
+            # The search index partitions lines by them, so filtering is a
+            # lookup rather than a lookahead regex over every line
             make = self.vehicle.make
             year = self.vehicle.year
-            
-            # Build filter: line must contain make AND year
-            # Use \b for word boundaries to avoid partial matches
-            make_pattern = re.escape(make).replace('\\ ', '[ _]')  # Allow space or underscore
             vehicle_prefix = f"{make}.*{year}"  # For display
-            # Combine: line must match vehicle filter AND user pattern
-            search_pattern = f"(?=.*{make_pattern})(?=.*\\b{year}\\b)(?=.*{pattern})"
-            log.info(f"Unified index search: make='{make}', year='{year}', combined_pattern='{search_pattern}'")
+            log.info(f"Unified index search: make='{make}', year='{year}', pattern='{pattern}'")
         
         try:
-            matches = egrep_index(index_path, search_pattern)
+            matches = egrep_index(index_path, pattern, make=make, year=year)
         except Exception as e:
             log.error(f"egrep_index error: {e}")
             return ToolResult(
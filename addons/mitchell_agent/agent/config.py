@@ -52,6 +52,10 @@ class AgentConfig(BaseModel):
         default=10.0,
         description="Seconds to wait after an error before retrying"
     )
+    push_enabled: bool = Field(
+        default=True,
+        description="Subscribe to the server's request stream instead of polling"
+    )
     headless: bool = Field(
         default=True,
         description="Run browser in headless mode (true=invisible, false=visible)"
@@ -114,6 +118,14 @@ class AgentConfig(BaseModel):
         default=9222,
         description="Starting CDP port number for Chrome instances"
     )
+    pool_session_linger: int = Field(
+        default=60,
+        description="Seconds a worker stays logged in with its vehicle selected after a request (0 = logout immediately)"
+    )
+    pool_acquire_timeout: int = Field(
+        default=30,
+        description="Seconds a request waits for a free worker before failing"
+    )
     
     # Navigation timing settings (milliseconds)
     nav_delay_short: int = Field(
@@ -180,6 +192,7 @@ def load_config(config_path: Optional[str] = None) -> AgentConfig:
         "MITCHELL_PASSWORD": "mitchell_password",
         "MITCHELL_POLL_INTERVAL": "poll_interval",
         "MITCHELL_ERROR_BACKOFF": "error_backoff",
+        "MITCHELL_PUSH": "push_enabled",
         "MITCHELL_HEADLESS": "headless",
         "MITCHELL_LOG_LEVEL": "log_level",
         "MITCHELL_LOG_FILE": "log_file",
@@ -195,6 +208,8 @@ def load_config(config_path: Optional[str] = None) -> AgentConfig:
         "MITCHELL_POOL_MAX_WORKERS": "pool_max_workers",
         "MITCHELL_POOL_IDLE_TIMEOUT": "pool_idle_timeout",
         "MITCHELL_POOL_BASE_PORT": "pool_base_port",
+        "MITCHELL_POOL_SESSION_LINGER": "pool_session_linger",
+        "MITCHELL_POOL_ACQUIRE_TIMEOUT": "pool_acquire_timeout",
         # Navigation timing options
         "MITCHELL_NAV_DELAY_SHORT": "nav_delay_short",
         "MITCHELL_NAV_DELAY_MEDIUM": "nav_delay_medium",
@@ -210,10 +225,10 @@ def load_config(config_path: Optional[str] = None) -> AgentConfig:
             # Type conversion
             if config_key in ("poll_interval", "error_backoff", "nav_delay_step", "nav_delay_modal"):
                 value = float(value)
-            elif config_key in ("headless", "debug_screenshots"):
+            elif config_key in ("headless", "debug_screenshots", "push_enabled"):
                 # Support multiple truthy/falsy values for user-friendliness
                 value = value.lower() in ("true", "1", "yes", "on", "headless")
-            elif config_key in ("pool_min_workers", "pool_max_workers", "pool_idle_timeout", "pool_base_port", "nav_delay_short", "nav_delay_medium", "nav_delay_long", "nav_delay_ajax"):
+            elif config_key in ("pool_min_workers", "pool_max_workers", "pool_idle_timeout", "pool_base_port", "pool_session_linger", "pool_acquire_timeout", "nav_delay_short", "nav_delay_medium", "nav_delay_long", "nav_delay_ajax"):
                 value = int(value)
             config_dict[config_key] = value
     
@@ -17,9 +17,11 @@ Environment:
     MITCHELL_POOL_MAX_WORKERS=3
     MITCHELL_POOL_IDLE_TIMEOUT=300
     MITCHELL_POOL_BASE_PORT=9222
+    MITCHELL_PUSH=true|false  (subscribe to /api/mitchell/stream instead of polling)
 """
 
 import asyncio
+import json
 import os
 import sys
 import time
@@ -39,6 +41,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger("mitchell-pooled-agent")
 
+# Claim attempts per request before it is left to the server's expiry
+MAX_CLAIM_ATTEMPTS = 5
+
 
 class PooledMitchellAgent:
     """
@@ -56,6 +61,8 @@ class PooledMitchellAgent:
         
         # Track request processing
         self._active_requests: set = set()
+        self._dispatched: set = set()  # received but not finished (incl. waiting for a slot)
+        self._tasks: set = set()
         self._request_semaphore: Optional[asyncio.Semaphore] = None
     
     async def start(self):
@@ -91,7 +98,7 @@ class PooledMitchellAgent:
         
         self._running = True
         
-        # Start polling
+        # Start receiving work
         await self._poll_loop()
         
         return True
@@ -120,61 +127,114 @@ class PooledMitchellAgent:
         logger.info("Pooled agent stopped")
     
     async def _poll_loop(self):
-        """Main polling loop that dispatches requests to workers."""
+        """Receive work from every server concurrently and dispatch it to workers."""
+        mode = "push" if self.config.push_enabled else "polling"
+        logger.info(f"🔄 Pooled agent ready ({mode}) for requests...")
+        
+        await asyncio.gather(
+            *(self._server_loop(server_url) for server_url in self.config.server_urls)
+        )
+        self._running = False
+    
+    def _dispatch(self, request: dict, server_url: str):
+        """Hand a request to a worker (async, don't wait)."""
+        if request["id"] in self._dispatched:
+            return
+        self._dispatched.add(request["id"])
+        # Tag request with source server
+        request['_source_server'] = server_url
+        task = asyncio.create_task(self._process_request_with_worker(request))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    def _dispatch_later(self, request: dict, server_url: str):
+        """Dispatch a request again after error_backoff.
+        
+        A pushed request is sent once per stream, so if its claim fails for
+        a reason other than being taken, nothing else would bring it back.
+        """
+        async def retry():
+            await asyncio.sleep(self.config.error_backoff)
+            if self._running:
+                self._dispatch(request, server_url)
+        
+        task = asyncio.create_task(retry())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _server_loop(self, server_url: str):
+        """Stream (or poll) one server until the agent stops."""
         consecutive_errors = 0
         max_consecutive_errors = 10
-        
-        logger.info("🔄 Pooled agent ready and polling for requests...")
+        push = self.config.push_enabled
         
         while self._running:
             try:
-                # Poll ALL servers for pending requests
-                found_work = False
-                tasks = []
-                
-                for server_url in self.config.server_urls:
-                    pending = await self._get_pending_requests(server_url)
-                    
-                    if pending:
-                        logger.info(f"Got {len(pending)} pending request(s) from {server_url}")
-                        for request in pending:
-                            # Tag request with source server
-                            request['_source_server'] = server_url
-                            
-                            # Dispatch to worker (async, don't wait)
-                            task = asyncio.create_task(
-                                self._process_request_with_worker(request)
-                            )
-                            tasks.append(task)
-                        found_work = True
-                        consecutive_errors = 0
+                if push:
+                    await self._stream_requests(server_url)
+                    consecutive_errors = 0
+                    continue  # server closed the stream; reconnect
                 
-                if not found_work:
+                pending = await self._get_pending_requests(server_url)
+                consecutive_errors = 0
+                if pending:
+                    logger.info(f"Got {len(pending)} pending request(s) from {server_url}")
+                    for request in pending:
+                        self._dispatch(request, server_url)
+                else:
                     # No work, sleep before next poll
                     await asyncio.sleep(self.config.poll_interval)
-                    consecutive_errors = 0
-                else:
-                    # Don't wait for tasks to complete, let them run in background
-                    # This allows parallel processing
-                    pass
                     
+            except httpx.HTTPStatusError as e:
+                if push and e.response.status_code == 404:
+                    logger.info(f"{server_url} has no request stream, polling instead")
+                    push = False
+                    continue
+                consecutive_errors += 1
+                logger.warning(f"HTTP error from {server_url}: {e}")
             except httpx.HTTPError as e:
                 consecutive_errors += 1
-                logger.warning(f"HTTP error polling server: {e}")
-                if consecutive_errors >= max_consecutive_errors:
-                    logger.error("Too many consecutive errors, stopping agent")
-                    self._running = False
-                else:
-                    await asyncio.sleep(self.config.error_backoff)
-                    
+                logger.warning(f"HTTP error from {server_url}: {e}")
             except Exception as e:
                 consecutive_errors += 1
-                logger.exception(f"Error in poll loop: {e}")
-                if consecutive_errors >= max_consecutive_errors:
-                    logger.error("Too many consecutive errors, stopping agent")
-                    self._running = False
-                else:
-                    await asyncio.sleep(self.config.error_backoff)
+                logger.exception(f"Error receiving work from {server_url}: {e}")
+            else:
+                continue
+            
+            if consecutive_errors >= max_consecutive_errors:
+                logger.error(f"Too many consecutive errors from {server_url}, giving up on it")
+                return
+            await asyncio.sleep(self.config.error_backoff)
+    
+    async def _stream_requests(self, server_url: str):
+        """Receive requests pushed by the server as server-sent events."""
+        client = self._http_clients.get(server_url)
+        if not client:
+            logger.warning(f"No HTTP client for {server_url}")
+            await asyncio.sleep(self.config.error_backoff)
+            return
+        
+        async with client.stream(
+            "GET",
+            f"/api/mitchell/stream/{self.config.shop_id}",
+            timeout=httpx.Timeout(30.0, read=None),
+        ) as response:
+            response.raise_for_status()
+            logger.info(f"Subscribed to requests from {server_url}")
+            event, data = None, []
+            async for line in response.aiter_lines():
+                if not self._running:
+                    return
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    data.append(line[5:].strip())
+                elif not line:
+                    if event == "request" and data:
+                        request = json.loads("\n".join(data))
+                        logger.info(f"Pushed request {request['id']} from {server_url}")
+                        self._dispatch(request, server_url)
+                    event, data = None, []
     
     async def _get_pending_requests(self, server_url: str) -> list:
         """Get pending requests from a specific server."""
@@ -260,6 +320,7 @@ class PooledMitchellAgent:
                 await self._do_process_request(request)
             finally:
                 self._active_requests.discard(request_id)
+                self._dispatched.discard(request_id)
     
     async def _do_process_request(self, request: dict):
         """Actually process the request with a worker."""
@@ -272,14 +333,26 @@ class PooledMitchellAgent:
         logger.info(f"[{request_id}] Processing: {tool} for {vehicle.get('year')} {vehicle.get('make')} {vehicle.get('model')}")
         
         # Claim the request
-        if not await self._claim_request(request_id, source_server):
+        try:
+            claimed = await self._claim_request(request_id, source_server)
+        except Exception as e:
+            # Still pending on the server; try again unless it has been retried enough
+            attempts = request.get("_claim_attempts", 0) + 1
+            if attempts >= MAX_CLAIM_ATTEMPTS:
+                logger.error(f"[{request_id}] Claim failed {attempts} times, dropping: {e}")
+                return
+            request["_claim_attempts"] = attempts
+            logger.warning(f"[{request_id}] Claim failed ({e}), retrying in {self.config.error_backoff}s")
+            self._dispatch_later(request, source_server)
+            return
+        if not claimed:
             return
         
         start_time = time.time()
         
         try:
             # Acquire a worker from the pool
-            async with self._pool.acquire() as worker:
+            async with self._pool.acquire(vehicle) as worker:
                 logger.info(f"[{request_id}] Using Worker-{worker.worker_id}")
                 
                 # Execute the request
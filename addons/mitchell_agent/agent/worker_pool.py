@@ -8,28 +8,59 @@ Scaling Modes:
 - pool: Fixed pool of workers, requests queued when all busy
 - ondemand: Spawn Chrome per request, kill when done (cold start penalty)
 
+Workers stay logged in for ``pool_session_linger`` seconds after a request
+with the vehicle still selected. Requests for the same vehicle are routed to
+that worker and skip vehicle selection, the most expensive step of a lookup.
+Idle workers wait on a queue (no sleep polling), and the pool spawns workers
+ahead of demand from the queue depth and recent arrival rate.
+
 Usage:
     pool = WorkerPool(config)
     await pool.start()
     
-    # Get a worker (blocks until one available)
-    async with pool.acquire() as worker:
-        result = await worker.execute(request)
+    # Get a worker (blocks until one available), preferring one that
+    # already has this vehicle selected
+    async with pool.acquire(vehicle) as worker:
+        result = await worker.execute(tool, vehicle, params)
     
     await pool.stop()
 """
 
 import asyncio
 import logging
+import math
+import re
 import time
 import socket
+from collections import deque
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Deque, Set, Tuple
 from contextlib import asynccontextmanager
 
 logger = logging.getLogger(__name__)
 
+# Scaler wake-up interval when nothing is waiting (seconds)
+SCALER_TICK = 1.0
+
+# Window for the request arrival rate used to pre-spawn workers (seconds)
+ARRIVAL_WINDOW = 60.0
+
+# Smoothing for the service and vehicle-selection time averages
+EWMA_ALPHA = 0.3
+
+
+def vehicle_key(vehicle: Optional[dict]) -> Optional[Tuple[str, ...]]:
+    """Identity of a vehicle selection, or None if the vehicle is incomplete.
+    
+    Year/make/model/engine plus the trim fields that change what gets
+    selected, normalized so "5.0L V8" and " 5.0l  v8" match.
+    """
+    if not vehicle or not all(vehicle.get(k) for k in ("year", "make", "model")):
+        return None
+    fields = ("year", "make", "model", "engine", "submodel", "body_style", "drive_type")
+    return tuple(re.sub(r"\s+", " ", str(vehicle.get(k) or "")).strip().lower() for k in fields)
+
 
 class WorkerState(Enum):
     """Worker lifecycle states."""
@@ -53,6 +84,9 @@ class WorkerStats:
     requests_completed: int = 0
     requests_failed: int = 0
     total_processing_time: float = 0.0
+    vehicle_selections: int = 0
+    vehicle_reuses: int = 0
+    total_selection_time: float = 0.0
     last_active: float = field(default_factory=time.time)
     created_at: float = field(default_factory=time.time)
     
@@ -99,6 +133,12 @@ class Worker:
         self._navigator = None
         self._logged_in = False
         
+        # Vehicle currently selected in the browser (see vehicle_key), and
+        # how the last request got to it
+        self.current_vehicle: Optional[Tuple[str, ...]] = None
+        self.vehicle_reused = False
+        self.selection_time: Optional[float] = None
+        
         # Lock for this worker
         self._lock = asyncio.Lock()
         
@@ -150,6 +190,7 @@ class Worker:
             logger.warning(f"Worker-{self.worker_id} cleanup error: {e}")
         
         self._logged_in = False
+        self.current_vehicle = None
         self.state = WorkerState.IDLE  # Mark as stopped
         logger.info(f"Worker-{self.worker_id} stopped")
     
@@ -171,6 +212,29 @@ class Worker:
             logger.error(f"Worker-{self.worker_id} connection failed: {e}")
             return False
     
+    async def warm(self) -> bool:
+        """Log in ahead of the first request so it does not pay for it."""
+        self.state = WorkerState.STARTING
+        try:
+            return await self._ensure_connected()
+        finally:
+            self.state = WorkerState.IDLE
+            self.stats.last_active = time.time()
+    
+    async def release_session(self):
+        """Log out of ShopKeyPro (frees the session seat) but keep Chrome."""
+        try:
+            if self._api and self._logged_in:
+                await self._api.logout()
+        except Exception as e:
+            logger.warning(f"Worker-{self.worker_id} logout error: {e}")
+        self._logged_in = False
+        self.current_vehicle = None
+    
+    @property
+    def session_linger(self) -> float:
+        return getattr(self.config, 'pool_session_linger', 0) or 0
+    
     async def execute(self, tool: str, vehicle: dict, params: dict) -> dict:
         """Execute a request on this worker.
         
@@ -179,13 +243,18 @@ class Worker:
         
         Flow:
         1. Ensure connected and logged in
-        2. Navigate to vehicle (open selector, select year/make/model/engine)
+        2. Navigate to vehicle (open selector, select year/make/model/engine),
+           unless this worker already has the vehicle selected
         3. Run AI Navigator to find and extract data
-        4. Logout
+        4. Logout, or stay logged in for ``pool_session_linger`` seconds so
+           the next request for this vehicle can reuse the selection
         """
         start_time = time.time()
         self.state = WorkerState.BUSY
         self.stats.last_active = time.time()
+        self.vehicle_reused = False
+        self.selection_time = None
+        key = vehicle_key(vehicle)
         
         try:
             # Ensure connected and logged in
@@ -194,13 +263,24 @@ class Worker:
             
             # Step 1: Navigate to vehicle FIRST
             # The AI Navigator expects to start from Quick Lookups page with vehicle selected
-            nav_result = await self._navigate_to_vehicle(vehicle)
-            if not nav_result.get("success"):
-                return {
-                    "success": False,
-                    "error": nav_result.get("error", "Vehicle navigation failed"),
-                    "data": nav_result.get("missing_info"),
-                }
+            if key is not None and key == self.current_vehicle and await self._return_to_landing():
+                self.vehicle_reused = True
+                self.stats.vehicle_reuses += 1
+                logger.info(f"Worker-{self.worker_id} reusing selected vehicle")
+            else:
+                self.current_vehicle = None
+                nav_start = time.time()
+                nav_result = await self._navigate_to_vehicle(vehicle)
+                if not nav_result.get("success"):
+                    return {
+                        "success": False,
+                        "error": nav_result.get("error", "Vehicle navigation failed"),
+                        "data": nav_result.get("missing_info"),
+                    }
+                self.selection_time = time.time() - nav_start
+                self.stats.vehicle_selections += 1
+                self.stats.total_selection_time += self.selection_time
+                self.current_vehicle = key
             
             # Step 2: Now run the AI Navigator to find the data
             from ..ai_navigator.autonomous_navigator import query_mitchell_autonomous
@@ -227,6 +307,8 @@ class Worker:
             
         except Exception as e:
             self.stats.requests_failed += 1
+            # The page is in an unknown state; select the vehicle again next time
+            self.current_vehicle = None
             logger.error(f"Worker-{self.worker_id} execution error: {e}")
             return {"success": False, "error": str(e)}
             
@@ -234,13 +316,43 @@ class Worker:
             self.state = WorkerState.IDLE
             self.stats.last_active = time.time()
             
-            # Logout after request (clean state for next request)
-            try:
-                if self._api and self._logged_in:
-                    await self._api.logout()
-                    self._logged_in = False
-            except Exception as e:
-                logger.warning(f"Worker-{self.worker_id} logout error: {e}")
+            # Logout after request (clean state for next request). With a
+            # session linger the pool logs the worker out once it has been
+            # idle that long instead.
+            if self.session_linger <= 0:
+                await self.release_session()
+    
+    async def _return_to_landing(self) -> bool:
+        """Get back to the landing page without losing the selected vehicle.
+        
+        Closes whatever modal the last query left open and leaves search
+        results via Home. Returns False if the page is not usable, in which
+        case the caller selects the vehicle again.
+        """
+        try:
+            page = self._api._page
+            if page is None:
+                return False
+            modal = page.locator('.modalDialogView')
+            for _ in range(3):
+                if await modal.count() == 0:
+                    break
+                close_btn = page.locator('.modalDialogView .close, .modal .close, button:has-text("Close")')
+                if await close_btn.count() == 0:
+                    return False
+                await close_btn.first.click(timeout=3000)
+                await page.wait_for_timeout(500)
+            else:
+                return False
+            
+            home_link = page.locator('a:text-is("Home")')
+            if await home_link.count() > 0:
+                await home_link.first.click(timeout=3000)
+                await page.wait_for_timeout(500)
+            return True
+        except Exception as e:
+            logger.info(f"Worker-{self.worker_id} could not return to landing page: {e}")
+            return False
     
     async def _create_navigator(self):
         """Create a Navigator for vehicle selection."""
@@ -398,6 +510,11 @@ class WorkerPool:
     - single: One worker, queue requests (current behavior)
     - pool: Fixed pool of N workers with auto-scaling
     - ondemand: Create/destroy workers per request
+    
+    In single and pool mode idle workers sit on a queue that ``acquire``
+    waits on. Workers that still have a vehicle selected are handed to
+    requests for that vehicle first (affinity); other requests get a worker
+    with nothing selected, then the least recently used one.
     """
     
     def __init__(self, config: Any):
@@ -410,6 +527,8 @@ class WorkerPool:
         - pool_max_workers: Maximum workers allowed
         - pool_idle_timeout: Seconds before killing idle worker
         - pool_base_port: Starting CDP port number
+        - pool_session_linger: Seconds a worker stays logged in after a request
+        - pool_acquire_timeout: Seconds to wait for a worker before giving up
         """
         self.config = config
         self.mode = ScalingMode(getattr(config, 'scaling_mode', 'single'))
@@ -419,12 +538,33 @@ class WorkerPool:
         self.max_workers = getattr(config, 'pool_max_workers', 3)
         self.idle_timeout = getattr(config, 'pool_idle_timeout', 300)  # 5 min
         self.base_port = getattr(config, 'pool_base_port', 9222)
+        self.session_linger = getattr(config, 'pool_session_linger', 0) or 0
+        self.acquire_timeout = getattr(config, 'pool_acquire_timeout', 30)
+        if self.mode == ScalingMode.SINGLE:
+            self.min_workers = self.max_workers = 1
         
         # Worker management
         self._workers: Dict[int, Worker] = {}
         self._worker_id_counter = 0
         self._available_ports: List[int] = []
-        self._request_queue: asyncio.Queue = asyncio.Queue()
+        
+        # Idle workers, oldest first, and the condition acquire() waits on
+        self._idle: List[Worker] = []
+        self._available = asyncio.Condition()
+        self._waiting = 0
+        
+        # Demand tracking for predictive scaling
+        self._arrivals: Deque[float] = deque()
+        self._service_time = 0.0
+        self._spawning = 0
+        self._spawn_tasks: Set[asyncio.Task] = set()
+        self._scale_event = asyncio.Event()
+        
+        # Vehicle affinity
+        self._affinity_hits = 0
+        self._affinity_misses = 0
+        self._selection_time = 0.0
+        self._time_saved = 0.0
         
         # Locks
         self._pool_lock = asyncio.Lock()
@@ -453,23 +593,18 @@ class WorkerPool:
         """Start the worker pool."""
         self._running = True
         
-        if self.mode == ScalingMode.SINGLE:
-            # Single worker mode - create one worker
-            self._acquire_semaphore = asyncio.Semaphore(1)
-            await self._spawn_worker()
-            
-        elif self.mode == ScalingMode.POOL:
-            # Pool mode - create min_workers, start scaler
+        if self.mode == ScalingMode.ONDEMAND:
+            # On-demand mode - no workers started initially
             self._acquire_semaphore = asyncio.Semaphore(self.max_workers)
+        else:
+            # Single/Pool mode - create min_workers, start scaler
             for _ in range(self.min_workers):
-                await self._spawn_worker()
+                worker = await self._spawn_worker()
+                if worker:
+                    await self._checkin(worker)
             
-            # Start auto-scaler task
+            # The scaler also logs out workers whose session linger ran out
             self._scaler_task = asyncio.create_task(self._scaler_loop())
-            
-        elif self.mode == ScalingMode.ONDEMAND:
-            # On-demand mode - no workers started initially
-            self._acquire_semaphore = asyncio.Semaphore(self.max_workers)
         
         logger.info(f"WorkerPool started with {len(self._workers)} workers")
     
@@ -477,11 +612,13 @@ class WorkerPool:
         """Stop all workers and cleanup."""
         self._running = False
         
-        # Cancel scaler
-        if self._scaler_task:
-            self._scaler_task.cancel()
+        # Cancel scaler and pending pre-spawns
+        tasks = [t for t in [self._scaler_task, *self._spawn_tasks] if t]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
             try:
-                await self._scaler_task
+                await task
             except asyncio.CancelledError:
                 pass
         
@@ -490,6 +627,7 @@ class WorkerPool:
             for worker in list(self._workers.values()):
                 await worker.stop()
             self._workers.clear()
+        self._idle.clear()
         
         logger.info("WorkerPool stopped")
     
@@ -520,96 +658,215 @@ class WorkerPool:
                 logger.error(f"Failed to spawn worker on port {port}")
                 return None
     
-    async def _kill_worker(self, worker_id: int):
-        """Stop and remove a worker."""
+    async def _kill_worker(self, worker_id: int, idle_only: bool = False):
+        """Stop and remove a worker.
+        
+        With ``idle_only`` the worker is left alone if it is no longer on
+        the idle queue: the pool lock may only be granted after a spawn,
+        and acquire() can check the worker out in the meantime.
+        """
         async with self._pool_lock:
             if worker_id in self._workers:
                 worker = self._workers[worker_id]
+                if worker in self._idle:
+                    self._idle.remove(worker)
+                elif idle_only:
+                    return
                 await worker.stop()
                 del self._workers[worker_id]
                 logger.info(f"Killed Worker-{worker_id}")
     
-    async def _get_idle_worker(self) -> Optional[Worker]:
-        """Get an idle worker from the pool."""
-        async with self._pool_lock:
-            for worker in self._workers.values():
-                if worker.state == WorkerState.IDLE:
-                    return worker
-        return None
+    async def _checkin(self, worker: Worker):
+        """Put a worker on the idle queue and wake a waiting request."""
+        async with self._available:
+            if worker.worker_id in self._workers and worker not in self._idle:
+                self._idle.append(worker)
+                self._available.notify_all()
+    
+    def _take_idle(self, key: Optional[Tuple[str, ...]]) -> Worker:
+        """Remove and return the best idle worker for vehicle ``key``.
+        
+        A worker with the vehicle already selected wins; otherwise prefer
+        one with nothing selected, so warm selections survive for the
+        requests that can use them, and fall back to the least recently
+        used worker.
+        """
+        worker = None
+        if key is not None:
+            worker = next((w for w in self._idle if w.current_vehicle == key), None)
+        if worker is None:
+            worker = next((w for w in self._idle if w.current_vehicle is None), None)
+        if worker is None:
+            worker = min(self._idle, key=lambda w: w.stats.last_active)
+        self._idle.remove(worker)
+        return worker
+    
+    async def _checkout(self, key: Optional[Tuple[str, ...]]) -> Optional[Worker]:
+        """Wait up to ``acquire_timeout`` for an idle worker."""
+        async with self._available:
+            if not self._idle:
+                self._waiting += 1
+                self._scale_event.set()
+                try:
+                    await asyncio.wait_for(
+                        self._available.wait_for(lambda: self._idle),
+                        timeout=self.acquire_timeout,
+                    )
+                except asyncio.TimeoutError:
+                    return None
+                finally:
+                    self._waiting -= 1
+            return self._take_idle(key)
+    
+    def _record_arrival(self):
+        now = time.monotonic()
+        self._arrivals.append(now)
+        while self._arrivals and self._arrivals[0] < now - ARRIVAL_WINDOW:
+            self._arrivals.popleft()
+        self._scale_event.set()
+    
+    def _record_release(self, worker: Worker, held: float):
+        """Update service time and affinity stats after a request."""
+        self._service_time = (
+            held if not self._service_time
+            else EWMA_ALPHA * held + (1 - EWMA_ALPHA) * self._service_time
+        )
+        if worker.selection_time is not None:
+            self._affinity_misses += 1
+            self._selection_time = (
+                worker.selection_time if not self._selection_time
+                else EWMA_ALPHA * worker.selection_time + (1 - EWMA_ALPHA) * self._selection_time
+            )
+        elif worker.vehicle_reused:
+            self._affinity_hits += 1
+            self._time_saved += self._selection_time
+    
+    @property
+    def arrival_rate(self) -> float:
+        """Requests per second over the last ARRIVAL_WINDOW seconds."""
+        cutoff = time.monotonic() - ARRIVAL_WINDOW
+        return sum(1 for t in self._arrivals if t >= cutoff) / ARRIVAL_WINDOW
+    
+    def _target_workers(self) -> int:
+        """Workers the pool should have right now.
+        
+        Everything busy or waiting needs a worker. On top of that, Little's
+        law (arrival rate x service time) predicts how many requests will be
+        in flight, and while traffic is flowing one spare is kept warm so
+        the next request does not pay for a Chrome launch and login.
+        """
+        busy = len(self._workers) - len(self._idle)
+        demand = busy + self._waiting
+        if self._service_time and self.arrival_rate:
+            demand = max(demand, math.ceil(self.arrival_rate * self._service_time) + 1)
+        return min(self.max_workers, max(self.min_workers, demand))
+    
+    async def _prespawn(self):
+        """Spawn and log in a worker ahead of demand."""
+        try:
+            worker = await self._spawn_worker()
+            if worker:
+                await worker.warm()
+                await self._checkin(worker)
+        except Exception as e:
+            logger.error(f"Pre-spawn error: {e}")
+        finally:
+            self._spawning -= 1
+    
+    async def _scale(self):
+        """One scaler pass: pre-spawn, scale down, expire idle sessions."""
+        # Scale up: start workers for the predicted demand
+        missing = self._target_workers() - len(self._workers) - self._spawning
+        for _ in range(max(0, missing)):
+            self._spawning += 1
+            task = asyncio.create_task(self._prespawn())
+            self._spawn_tasks.add(task)
+            task.add_done_callback(self._spawn_tasks.discard)
+        if missing > 0:
+            logger.info(f"Scaling up by {missing} (waiting={self._waiting}, "
+                       f"rate={self.arrival_rate * 60:.1f}/min)")
+        
+        # Scale down: Kill idle workers over target (respecting idle_timeout)
+        if len(self._workers) > self._target_workers():
+            for worker in list(self._idle):
+                if worker.stats.idle_time > self.idle_timeout:
+                    logger.info(f"Worker-{worker.worker_id} idle for "
+                               f"{worker.stats.idle_time:.0f}s, scaling down...")
+                    await self._kill_worker(worker.worker_id, idle_only=True)
+                    break  # Kill one at a time
+        
+        # Log out workers whose session linger ran out. They leave the idle
+        # queue while logging out so nobody is handed a half-closed session.
+        if self.session_linger > 0:
+            async with self._available:
+                expired = [w for w in self._idle
+                           if w._logged_in and w.stats.idle_time > self.session_linger]
+                for worker in expired:
+                    self._idle.remove(worker)
+            for worker in expired:
+                await worker.release_session()
+                await self._checkin(worker)
     
     async def _scaler_loop(self):
         """Background task that manages pool size."""
         while self._running:
             try:
-                await asyncio.sleep(10)  # Check every 10 seconds
-                
-                async with self._pool_lock:
-                    idle_workers = [w for w in self._workers.values() 
-                                   if w.state == WorkerState.IDLE]
-                    busy_workers = [w for w in self._workers.values() 
-                                   if w.state == WorkerState.BUSY]
-                
-                # Scale up: If all workers busy and under max
-                if len(idle_workers) == 0 and len(self._workers) < self.max_workers:
-                    logger.info("All workers busy, scaling up...")
-                    await self._spawn_worker()
-                
-                # Scale down: Kill idle workers over min (respecting idle_timeout)
-                if len(self._workers) > self.min_workers:
-                    for worker in idle_workers:
-                        if worker.stats.idle_time > self.idle_timeout:
-                            logger.info(f"Worker-{worker.worker_id} idle for "
-                                       f"{worker.stats.idle_time:.0f}s, scaling down...")
-                            await self._kill_worker(worker.worker_id)
-                            break  # Kill one at a time
-                            
+                # Wake on new demand, or every tick for the timers
+                try:
+                    await asyncio.wait_for(self._scale_event.wait(), timeout=SCALER_TICK)
+                except asyncio.TimeoutError:
+                    pass
+                self._scale_event.clear()
+                await self._scale()
+            
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Scaler error: {e}")
     
     @asynccontextmanager
-    async def acquire(self):
+    async def acquire(self, vehicle: Optional[dict] = None):
         """
         Acquire a worker for processing.
         
+        ``vehicle`` routes the request to a worker that already has it
+        selected, when one is idle.
+        
         Usage:
-            async with pool.acquire() as worker:
+            async with pool.acquire(vehicle) as worker:
                 result = await worker.execute(...)
         """
-        await self._acquire_semaphore.acquire()
-        worker = None
-        
-        try:
-            if self.mode == ScalingMode.ONDEMAND:
+        if self.mode == ScalingMode.ONDEMAND:
+            await self._acquire_semaphore.acquire()
+            worker = None
+            try:
                 # On-demand: spawn new worker
                 worker = await self._spawn_worker()
                 if not worker:
                     raise RuntimeError("Failed to spawn on-demand worker")
-                    
-            else:
-                # Single/Pool: get existing idle worker, or wait
-                for _ in range(30):  # Wait up to 30 seconds
-                    worker = await self._get_idle_worker()
-                    if worker:
-                        break
-                    await asyncio.sleep(1)
-                
-                if not worker:
-                    # Try to spawn if under max
-                    worker = await self._spawn_worker()
-                    
-                if not worker:
-                    raise RuntimeError("No workers available")
-            
+                yield worker
+            finally:
+                if worker:
+                    # On-demand: kill worker after use
+                    await self._kill_worker(worker.worker_id)
+                self._acquire_semaphore.release()
+            return
+        
+        # Single/Pool: take an idle worker, or wait for one
+        self._record_arrival()
+        worker = await self._checkout(vehicle_key(vehicle))
+        if not worker:
+            # Try to spawn if under max
+            worker = await self._spawn_worker()
+        if not worker:
+            raise RuntimeError("No workers available")
+        
+        started = time.monotonic()
+        try:
             yield worker
-            
         finally:
-            if self.mode == ScalingMode.ONDEMAND and worker:
-                # On-demand: kill worker after use
-                await self._kill_worker(worker.worker_id)
-            
-            self._acquire_semaphore.release()
+            self._record_release(worker, time.monotonic() - started)
+            await self._checkin(worker)
     
     def get_stats(self) -> dict:
         """Get pool statistics."""
@@ -619,17 +876,30 @@ class WorkerPool:
                 "id": w.worker_id,
                 "port": w.cdp_port,
                 "state": w.state.value,
+                "vehicle": " ".join(p for p in w.current_vehicle if p) if w.current_vehicle else None,
                 "requests_completed": w.stats.requests_completed,
                 "requests_failed": w.stats.requests_failed,
+                "vehicle_reuses": w.stats.vehicle_reuses,
                 "avg_time": round(w.stats.avg_processing_time, 2),
                 "idle_time": round(w.stats.idle_time, 1),
             })
         
+        lookups = self._affinity_hits + self._affinity_misses
         return {
             "mode": self.mode.value,
             "total_workers": len(self._workers),
             "idle_workers": len([w for w in self._workers.values() if w.state == WorkerState.IDLE]),
             "busy_workers": len([w for w in self._workers.values() if w.state == WorkerState.BUSY]),
+            "waiting_requests": self._waiting,
+            "arrival_rate_per_min": round(self.arrival_rate * 60, 2),
+            "target_workers": self._target_workers() if self.mode != ScalingMode.ONDEMAND else None,
+            "vehicle_affinity": {
+                "hits": self._affinity_hits,
+                "misses": self._affinity_misses,
+                "hit_rate": round(self._affinity_hits / lookups, 3) if lookups else 0.0,
+                "avg_selection_time": round(self._selection_time, 2),
+                "time_saved_seconds": round(self._time_saved, 1),
+            },
             "workers": workers_info,
         }
     
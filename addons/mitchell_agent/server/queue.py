@@ -3,11 +3,23 @@ Mitchell Request Queue
 ======================
 In-memory queue for request/result management.
 For production, swap with Redis or database-backed implementation.
+
+Pending requests are kept per shop in FIFO order, so an agent poll only
+touches its own shop's work. Request deadlines sit in a timing wheel and
+finished requests in a completion-ordered deque, so expiry and cleanup cost
+is proportional to what actually expires rather than to the whole table.
+All mutations are synchronous (no await inside), which makes them atomic on
+the event loop; reads of status and results need no lock.
+Agents can subscribe() to a shop and are pushed new requests as they are
+created instead of polling.
 """
 
 import asyncio
+import math
+import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Deque, Dict, List, Optional, Set, Tuple
 from .models import (
     MitchellRequest,
     MitchellResult,
@@ -20,6 +32,55 @@ from .models import (
 )
 
 
+class TimingWheel:
+    """
+    Hashed timing wheel for request deadlines (``time.time()`` seconds).
+    
+    A deadline lands in slot ``floor(deadline / tick) % slots``; advancing
+    the wheel visits only the slots for ticks that have fully elapsed since
+    the last advance, so keys fire at most one tick late. Keys more than one
+    revolution out stay in their slot until their round comes up.
+    """
+    
+    def __init__(self, tick: float = 1.0, slots: int = 512):
+        self._tick = tick
+        self._slots: List[Dict[str, int]] = [dict() for _ in range(slots)]
+        self._ticks: Dict[str, int] = {}
+        self._cursor = math.floor(time.time() / tick) - 1  # last tick processed
+    
+    def __len__(self) -> int:
+        return len(self._ticks)
+    
+    def add(self, key: str, deadline: float):
+        self.discard(key)
+        tick = max(math.floor(deadline / self._tick), self._cursor + 1)
+        self._slots[tick % len(self._slots)][key] = tick
+        self._ticks[key] = tick
+    
+    def discard(self, key: str):
+        tick = self._ticks.pop(key, None)
+        if tick is not None:
+            self._slots[tick % len(self._slots)].pop(key, None)
+    
+    def advance(self, now: float) -> List[str]:
+        """Return (and forget) every key whose tick has fully elapsed by now."""
+        target = math.floor(now / self._tick) - 1
+        if target <= self._cursor:
+            return []
+        
+        expired = []
+        # One revolution covers every slot, so a long gap needs no more
+        for tick in range(max(self._cursor + 1, target - len(self._slots) + 1), target + 1):
+            slot = self._slots[tick % len(self._slots)]
+            for key, key_tick in list(slot.items()):
+                if key_tick <= target:
+                    del slot[key]
+                    del self._ticks[key]
+                    expired.append(key)
+        self._cursor = target
+        return expired
+
+
 class RequestQueue:
     """
     In-memory request queue.
@@ -34,92 +95,133 @@ class RequestQueue:
         self._requests: Dict[str, MitchellRequest] = {}
         self._results: Dict[str, MitchellResult] = {}
         self._clarifications: Dict[str, ClarificationRequest] = {}
-        self._lock = asyncio.Lock()
+        self._lock = asyncio.Lock()  # clarification bookkeeping only
         self._default_ttl = default_ttl_seconds
         self._result_events: Dict[str, asyncio.Event] = {}
         self._clarification_events: Dict[str, asyncio.Event] = {}
+        
+        # shop_id -> {request_id: request}, oldest first
+        self._pending: Dict[str, "OrderedDict[str, MitchellRequest]"] = {}
+        self._expiry = TimingWheel()
+        # (updated_at, request_id) each time a request leaves the pending
+        # queue (claimed or finished), oldest first
+        self._retired: Deque[Tuple[datetime, str]] = deque()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+    
+    # -------------------------------------------------------------------------
+    # Internal bookkeeping (synchronous, so atomic on the event loop)
+    # -------------------------------------------------------------------------
+    
+    def _retire(self, request: MitchellRequest, status: RequestStatus):
+        """Take a request off the pending queue with a new status (claimed or terminal)."""
+        request.status = status
+        request.updated_at = datetime.utcnow()
+        shop = self._pending.get(request.shop_id)
+        if shop is not None:
+            shop.pop(request.id, None)
+            if not shop:
+                del self._pending[request.shop_id]
+        self._expiry.discard(request.id)
+        self._retired.append((request.updated_at, request.id))
+    
+    def _expire_due(self):
+        for request_id in self._expiry.advance(time.time()):
+            request = self._requests.get(request_id)
+            if request and request.status == RequestStatus.PENDING:
+                self._retire(request, RequestStatus.EXPIRED)
+    
+    def subscribe(self, shop_id: str) -> asyncio.Queue:
+        """
+        Register for new requests for a shop.
+        
+        Every request created for the shop after this call is put on the
+        returned queue. Call unsubscribe() when done.
+        """
+        subscriber: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(shop_id, set()).add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, shop_id: str, subscriber: asyncio.Queue):
+        subscribers = self._subscribers.get(shop_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[shop_id]
+    
+    # -------------------------------------------------------------------------
+    # Requests
+    # -------------------------------------------------------------------------
     
     async def create_request(self, payload: CreateRequestPayload) -> MitchellRequest:
         """Create a new request and add to queue."""
-        async with self._lock:
-            request = MitchellRequest(
-                shop_id=payload.shop_id,
-                user_id=payload.user_id,  # For billing when using server-side navigation
-                tool=payload.tool,
-                vehicle=payload.vehicle,
-                params=payload.params,
-                status=RequestStatus.PENDING,
-                expires_at=datetime.utcnow() + timedelta(seconds=payload.timeout_seconds or self._default_ttl)
-            )
-            self._requests[request.id] = request
-            self._result_events[request.id] = asyncio.Event()
-            return request
+        ttl = payload.timeout_seconds or self._default_ttl
+        request = MitchellRequest(
+            shop_id=payload.shop_id,
+            user_id=payload.user_id,  # For billing when using server-side navigation
+            tool=payload.tool,
+            vehicle=payload.vehicle,
+            params=payload.params,
+            status=RequestStatus.PENDING,
+            expires_at=datetime.utcnow() + timedelta(seconds=ttl)
+        )
+        self._expire_due()
+        self._requests[request.id] = request
+        self._result_events[request.id] = asyncio.Event()
+        self._pending.setdefault(request.shop_id, OrderedDict())[request.id] = request
+        self._expiry.add(request.id, time.time() + ttl)
+        
+        # Push to connected agents for this shop
+        for subscriber in self._subscribers.get(request.shop_id, ()):
+            subscriber.put_nowait(request)
+        return request
     
     async def get_pending_requests(self, shop_id: str, limit: int = 10) -> List[MitchellRequest]:
         """Get pending requests for a shop."""
-        async with self._lock:
-            now = datetime.utcnow()
-            pending = []
-            
-            for req in self._requests.values():
-                # Check if belongs to shop and is pending
-                if req.shop_id != shop_id:
-                    continue
-                if req.status != RequestStatus.PENDING:
-                    continue
-                    
-                # Check expiration
-                if req.expires_at and req.expires_at < now:
-                    req.status = RequestStatus.EXPIRED
-                    req.updated_at = now
-                    continue
-                
-                pending.append(req)
-                if len(pending) >= limit:
-                    break
-            
-            return pending
+        self._expire_due()
+        pending = []
+        for request in self._pending.get(shop_id, {}).values():
+            pending.append(request)
+            if len(pending) >= limit:
+                break
+        return pending
     
     async def claim_request(self, request_id: str) -> Optional[MitchellRequest]:
         """Mark a request as being processed."""
-        async with self._lock:
-            request = self._requests.get(request_id)
-            if not request:
-                return None
-            if request.status != RequestStatus.PENDING:
-                return None
-            
-            request.status = RequestStatus.PROCESSING
-            request.updated_at = datetime.utcnow()
-            return request
+        self._expire_due()
+        request = self._requests.get(request_id)
+        if not request:
+            return None
+        if request.status != RequestStatus.PENDING:
+            return None
+        
+        self._retire(request, RequestStatus.PROCESSING)
+        return request
     
     async def submit_result(self, request_id: str, payload: SubmitResultPayload) -> Optional[MitchellResult]:
         """Submit result for a request."""
-        async with self._lock:
-            request = self._requests.get(request_id)
-            if not request:
-                return None
-            
-            result = MitchellResult(
-                request_id=request_id,
-                success=payload.success,
-                data=payload.data,
-                error=payload.error,
-                tool_used=payload.tool_used,
-                execution_time_ms=payload.execution_time_ms,
-                images=payload.images,
-                tokens_used=payload.tokens_used,
-            )
-            
-            self._results[request_id] = result
-            request.status = RequestStatus.COMPLETED if payload.success else RequestStatus.FAILED
-            request.updated_at = datetime.utcnow()
-            
-            # Signal waiters
-            if request_id in self._result_events:
-                self._result_events[request_id].set()
-            
-            return result
+        request = self._requests.get(request_id)
+        if not request:
+            return None
+        
+        result = MitchellResult(
+            request_id=request_id,
+            success=payload.success,
+            data=payload.data,
+            error=payload.error,
+            tool_used=payload.tool_used,
+            execution_time_ms=payload.execution_time_ms,
+            images=payload.images,
+            tokens_used=payload.tokens_used,
+        )
+        
+        self._results[request_id] = result
+        self._retire(request, RequestStatus.COMPLETED if payload.success else RequestStatus.FAILED)
+        
+        # Signal waiters
+        if request_id in self._result_events:
+            self._result_events[request_id].set()
+        
+        return result
     
     async def get_result(self, request_id: str) -> Optional[MitchellResult]:
         """Get result for a request (non-blocking)."""
@@ -136,11 +238,9 @@ class RequestQueue:
             return self._results.get(request_id)
         except asyncio.TimeoutError:
             # Mark as expired
-            async with self._lock:
-                request = self._requests.get(request_id)
-                if request and request.status == RequestStatus.PENDING:
-                    request.status = RequestStatus.EXPIRED
-                    request.updated_at = datetime.utcnow()
+            request = self._requests.get(request_id)
+            if request and request.status == RequestStatus.PENDING:
+                self._retire(request, RequestStatus.EXPIRED)
             return None
     
     async def get_request_status(self, request_id: str) -> Optional[MitchellRequest]:
@@ -149,21 +249,19 @@ class RequestQueue:
     
     async def cleanup_expired(self, max_age_seconds: int = 3600) -> int:
         """Remove old requests and results."""
-        async with self._lock:
-            now = datetime.utcnow()
-            cutoff = now - timedelta(seconds=max_age_seconds)
-            
-            to_remove = [
-                rid for rid, req in self._requests.items()
-                if req.updated_at < cutoff
-            ]
-            
-            for rid in to_remove:
-                del self._requests[rid]
-                self._results.pop(rid, None)
-                self._result_events.pop(rid, None)
-            
-            return len(to_remove)
+        self._expire_due()
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+        removed = 0
+        while self._retired and self._retired[0][0] < cutoff:
+            _, rid = self._retired.popleft()
+            request = self._requests.get(rid)
+            if request is None or request.updated_at >= cutoff:
+                continue  # already removed, or retired again more recently
+            del self._requests[rid]
+            self._results.pop(rid, None)
+            self._result_events.pop(rid, None)
+            removed += 1
+        return removed
     
     # =========================================================================
     # Clarification Methods (AI Employee request_info flow)
@@ -6,6 +6,7 @@ FastAPI endpoints for request/result queue between Open WebUI tool and remote po
 Endpoints:
     POST /api/mitchell/request          - Create new request (tool calls this)
     GET  /api/mitchell/pending/{shop_id} - Get pending requests (agent polls this)
+    GET  /api/mitchell/stream/{shop_id}  - Server-sent events: pending + new requests (agent subscribes)
     POST /api/mitchell/claim/{request_id} - Claim a request (agent calls this)
     POST /api/mitchell/result/{request_id} - Submit result (agent calls this)
     GET  /api/mitchell/status/{request_id} - Check status (tool polls this)
@@ -18,7 +19,10 @@ Clarification Flow (AI Employee request_info):
     GET  /api/mitchell/clarify/pending/{request_id} - Get pending clarifications for a request
 """
 
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
 
 from .models import (
@@ -84,6 +88,49 @@ async def get_pending_requests(
     )
 
 
+# Comment line sent on idle streams so proxies keep the connection open
+STREAM_KEEPALIVE_SECONDS = 15.0
+
+
+@router.get("/stream/{shop_id}")
+async def stream_requests(shop_id: str, http_request: Request):
+    """
+    Stream requests for a shop as server-sent events.
+    
+    Sends every currently pending request first, then each new request the
+    moment it is created. Agents still claim each request before working
+    on it, so several agents can share one stream safely.
+    """
+    queue = get_queue()
+    subscriber = queue.subscribe(shop_id)
+    
+    async def events():
+        try:
+            sent = set()
+            for request in await queue.get_pending_requests(shop_id, limit=100):
+                sent.add(request.id)
+                yield f"event: request\ndata: {request.model_dump_json()}\n\n"
+            while True:
+                try:
+                    request = await asyncio.wait_for(subscriber.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await http_request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if request.id in sent:
+                    continue  # created between subscribe() and the snapshot
+                yield f"event: request\ndata: {request.model_dump_json()}\n\n"
+        finally:
+            queue.unsubscribe(shop_id, subscriber)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/claim/{request_id}", response_model=MitchellRequest)
 async def claim_request(request_id: str):
     """
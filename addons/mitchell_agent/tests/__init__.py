@@ -0,0 +1 @@
+"""Tests package for the Mitchell agent add-on."""
@@ -0,0 +1,70 @@
+"""
+Tests for request dispatch in the pooled Mitchell agent.
+
+The HTTP claim is replaced with a fake, so no server or worker pool is
+needed; the agent package itself still needs playwright to import.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from addons.mitchell_agent.agent import pooled_agent
+from addons.mitchell_agent.agent.pooled_agent import PooledMitchellAgent
+
+REQUEST = {
+    "id": "req-1",
+    "tool": "get_fluid_capacities",
+    "vehicle": {"year": 2018, "make": "Ford", "model": "F-150"},
+}
+
+
+def _agent(claims):
+    config = SimpleNamespace(server_urls=["http://server"], error_backoff=0.01, push_enabled=True)
+    agent = PooledMitchellAgent(config)
+    agent._request_semaphore = asyncio.Semaphore(1)
+    agent._running = True
+    calls = []
+
+    async def claim(request_id, server_url):
+        calls.append(request_id)
+        outcome = claims[min(len(calls), len(claims)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    agent._claim_request = claim
+    return agent, calls
+
+
+async def _settle(agent):
+    while agent._tasks:
+        await asyncio.gather(*list(agent._tasks))
+
+
+def test_failed_claim_is_dispatched_again():
+    async def scenario():
+        # Claim errors out once, then the request turns out to be taken (404)
+        agent, calls = _agent([RuntimeError("502 Bad Gateway"), False])
+        agent._dispatch(dict(REQUEST), "http://server")
+        await _settle(agent)
+        return calls, agent._dispatched
+
+    calls, dispatched = asyncio.run(scenario())
+    assert calls == ["req-1", "req-1"]
+    assert not dispatched
+
+
+def test_claim_retries_are_bounded(monkeypatch):
+    monkeypatch.setattr(pooled_agent, "MAX_CLAIM_ATTEMPTS", 3)
+
+    async def scenario():
+        agent, calls = _agent([RuntimeError("connection reset")])
+        agent._dispatch(dict(REQUEST), "http://server")
+        await _settle(agent)
+        return calls
+
+    assert len(asyncio.run(scenario())) == 3
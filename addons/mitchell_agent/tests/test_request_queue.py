@@ -0,0 +1,151 @@
+"""
+Tests for the standalone Mitchell server request queue.
+
+Runs the queue and the stream endpoint in-process; no agent or browser.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from addons.mitchell_agent.server import queue as queue_module
+from addons.mitchell_agent.server.models import (
+    CreateRequestPayload,
+    RequestStatus,
+    SubmitResultPayload,
+)
+from addons.mitchell_agent.server.queue import RequestQueue, TimingWheel
+
+
+def _payload(shop_id="shop-a", timeout_seconds=60):
+    return CreateRequestPayload(
+        shop_id=shop_id,
+        tool="get_fluid_capacities",
+        vehicle={"year": 2018, "make": "Ford", "model": "F-150"},
+        timeout_seconds=timeout_seconds,
+    )
+
+
+class TestTimingWheel:
+    def test_fires_each_key_once_after_its_tick(self):
+        wheel = TimingWheel(tick=1.0, slots=8)
+        now = time.time()
+        wheel.add("a", now + 2.2)
+        wheel.add("b", now + 5.5)
+        wheel.add("far", now + 30)  # several revolutions out
+        wheel.add("gone", now + 3)
+        wheel.discard("gone")
+
+        assert wheel.advance(now + 1) == []
+        assert wheel.advance(now + 4.1) == ["a"]
+        assert sorted(wheel.advance(now + 20)) == ["b"]
+        assert wheel.advance(now + 32) == ["far"]
+        assert len(wheel) == 0
+
+
+class TestRequestQueue:
+    def test_pending_is_per_shop_fifo_and_claim_removes(self):
+        async def scenario():
+            q = RequestQueue()
+            a1 = await q.create_request(_payload("shop-a"))
+            b1 = await q.create_request(_payload("shop-b"))
+            a2 = await q.create_request(_payload("shop-a"))
+
+            assert [r.id for r in await q.get_pending_requests("shop-a")] == [a1.id, a2.id]
+            assert [r.id for r in await q.get_pending_requests("shop-b")] == [b1.id]
+            assert await q.claim_request(a1.id) is not None
+            assert await q.claim_request(a1.id) is None
+            assert [r.id for r in await q.get_pending_requests("shop-a")] == [a2.id]
+
+            await q.submit_result(a1.id, SubmitResultPayload(success=True, data={"oil": "8 qt"}))
+            assert (await q.get_request_status(a1.id)).status == RequestStatus.COMPLETED
+            assert (await q.wait_for_result(a1.id, timeout=0.1)).data == {"oil": "8 qt"}
+
+        asyncio.run(scenario())
+
+    def test_deadlines_expire_through_the_wheel(self, monkeypatch):
+        async def scenario():
+            q = RequestQueue()
+            short = await q.create_request(_payload(timeout_seconds=1))
+            long = await q.create_request(_payload(timeout_seconds=600))
+
+            later = time.time() + 5
+            monkeypatch.setattr(queue_module.time, "time", lambda: later)
+            assert [r.id for r in await q.get_pending_requests("shop-a")] == [long.id]
+            assert (await q.get_request_status(short.id)).status == RequestStatus.EXPIRED
+
+        asyncio.run(scenario())
+
+    def test_cleanup_only_visits_retired_requests(self):
+        async def scenario():
+            q = RequestQueue()
+            old = await q.create_request(_payload())
+            fresh = await q.create_request(_payload())
+            waiting = await q.create_request(_payload())
+            await q.claim_request(old.id)
+            await q.submit_result(old.id, SubmitResultPayload(success=False, error="timeout"))
+            await q.claim_request(fresh.id)
+
+            # Age the first request's retirement past the cutoff
+            aged = datetime.utcnow() - timedelta(hours=2)
+            q._requests[old.id].updated_at = aged
+            q._retired = type(q._retired)((aged, rid) for _, rid in q._retired if rid == old.id)
+            q._retired.append((datetime.utcnow(), fresh.id))
+
+            assert await q.cleanup_expired(max_age_seconds=3600) == 1
+            assert await q.get_request_status(old.id) is None
+            assert await q.get_result(old.id) is None
+            assert await q.get_request_status(fresh.id) is not None
+            assert await q.get_request_status(waiting.id) is not None
+
+        asyncio.run(scenario())
+
+    def test_subscribers_get_new_requests_for_their_shop(self):
+        async def scenario():
+            q = RequestQueue()
+            sub = q.subscribe("shop-a")
+            mine = await q.create_request(_payload("shop-a"))
+            await q.create_request(_payload("shop-b"))
+            assert (await asyncio.wait_for(sub.get(), 1)).id == mine.id
+            assert sub.empty()
+            q.unsubscribe("shop-a", sub)
+            await q.create_request(_payload("shop-a"))
+            assert sub.empty()
+
+        asyncio.run(scenario())
+
+
+def test_stream_endpoint_sends_backlog_then_pushes(monkeypatch):
+    import importlib
+
+    router = importlib.import_module("addons.mitchell_agent.server.router")
+
+    class FakeHTTPRequest:
+        async def is_disconnected(self):
+            return False
+
+    async def scenario():
+        q = RequestQueue()
+        monkeypatch.setattr(router, "get_queue", lambda: q)
+        backlog = await q.create_request(_payload())
+
+        response = await router.stream_requests("shop-a", FakeHTTPRequest())
+        events = response.body_iterator
+        first = await events.__anext__()
+        assert first.startswith("event: request\n")
+        assert json.loads(first.split("data: ", 1)[1])["id"] == backlog.id
+
+        nxt = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0.01)
+        assert not nxt.done()
+        pushed = await q.create_request(_payload())
+        second = await asyncio.wait_for(nxt, 1)
+        assert json.loads(second.split("data: ", 1)[1])["id"] == pushed.id
+
+        await events.aclose()
+        assert not q._subscribers
+
+    asyncio.run(scenario())
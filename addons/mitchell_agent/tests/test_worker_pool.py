@@ -0,0 +1,270 @@
+"""
+Tests for the Mitchell agent worker pool.
+
+Workers are replaced with fakes (or get a stub page), so no Chrome is
+launched; the agent package itself still needs playwright to import.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from addons.mitchell_agent.agent import worker_pool
+from addons.mitchell_agent.agent.worker_pool import WorkerPool, vehicle_key
+
+F150 = {"year": 2018, "make": "Ford", "model": "F-150", "engine": "5.0L V8"}
+CIVIC = {"year": 2016, "make": "Honda", "model": "Civic", "engine": "2.0L"}
+
+
+class FakeWorker(worker_pool.Worker):
+    SELECTION_TIME = 0.05
+
+    async def start(self):
+        self.state = worker_pool.WorkerState.IDLE
+        return True
+
+    async def stop(self):
+        self.current_vehicle = None
+
+    async def warm(self):
+        self._logged_in = True
+        return True
+
+    async def release_session(self):
+        self._logged_in = False
+        self.current_vehicle = None
+
+    async def execute(self, tool, vehicle, params):
+        self._logged_in = True
+        self.vehicle_reused = False
+        self.selection_time = None
+        key = vehicle_key(vehicle)
+        if key == self.current_vehicle:
+            self.vehicle_reused = True
+        else:
+            await asyncio.sleep(self.SELECTION_TIME)
+            self.selection_time = self.SELECTION_TIME
+            self.current_vehicle = key
+        await asyncio.sleep(params.get("work", 0))
+        self.stats.last_active = time.time()
+        return {"success": True, "worker": self.worker_id}
+
+
+@pytest.fixture
+def fake_workers(monkeypatch):
+    monkeypatch.setattr(worker_pool, "Worker", FakeWorker)
+    monkeypatch.setattr(worker_pool, "SCALER_TICK", 0.01)
+
+
+def _config(**overrides):
+    settings = dict(
+        scaling_mode="pool",
+        pool_min_workers=2,
+        pool_max_workers=4,
+        pool_idle_timeout=300,
+        pool_base_port=19222,
+        pool_session_linger=60,
+        pool_acquire_timeout=5,
+    )
+    settings.update(overrides)
+    return SimpleNamespace(**settings)
+
+
+async def _ask(pool, vehicle, work=0.0):
+    async with pool.acquire(vehicle) as worker:
+        return await worker.execute("query_autonomous", vehicle, {"work": work})
+
+
+def test_vehicle_key_normalizes_and_requires_basics():
+    assert vehicle_key(F150) == vehicle_key({**F150, "make": " ford ", "engine": "5.0l  V8"})
+    assert vehicle_key(F150) != vehicle_key({**F150, "engine": "3.5L V6"})
+    assert vehicle_key({"year": 2018, "make": "Ford"}) is None
+
+
+def test_same_vehicle_is_routed_to_the_warm_worker(fake_workers):
+    async def scenario():
+        pool = WorkerPool(_config())
+        await pool.start()
+        try:
+            first = await _ask(pool, F150)
+            other = await _ask(pool, CIVIC)
+            again = await _ask(pool, F150)
+            civic_again = await _ask(pool, CIVIC)
+            return first, other, again, civic_again, pool.get_stats()
+        finally:
+            await pool.stop()
+
+    first, other, again, civic_again, stats = asyncio.run(scenario())
+    assert again["worker"] == first["worker"]
+    assert civic_again["worker"] == other["worker"] != first["worker"]
+    affinity = stats["vehicle_affinity"]
+    assert affinity["hits"] == 2 and affinity["misses"] == 2 and affinity["hit_rate"] == 0.5
+    assert affinity["time_saved_seconds"] > 0 and affinity["avg_selection_time"] > 0
+
+
+def test_waiting_request_wakes_as_soon_as_a_worker_frees(fake_workers):
+    async def scenario():
+        pool = WorkerPool(_config(scaling_mode="single", pool_session_linger=0))
+        await pool.start()
+        try:
+            slow = asyncio.create_task(_ask(pool, F150, work=0.2))
+            await asyncio.sleep(0.01)
+            started = time.monotonic()
+            await _ask(pool, CIVIC)
+            waited = time.monotonic() - started
+            await slow
+            return waited, len(pool._workers)
+        finally:
+            await pool.stop()
+
+    waited, workers = asyncio.run(scenario())
+    assert workers == 1
+    # Woken by the release, not by a one-second poll
+    assert waited < 0.5
+
+
+def test_burst_prespawns_up_to_max(fake_workers):
+    async def scenario():
+        pool = WorkerPool(_config(pool_min_workers=1, pool_max_workers=3))
+        await pool.start()
+        try:
+            assert len(pool._workers) == 1
+            await asyncio.gather(*(_ask(pool, F150, work=0.1) for _ in range(6)))
+            return len(pool._workers), pool.get_stats()
+        finally:
+            await pool.stop()
+
+    workers, stats = asyncio.run(scenario())
+    assert workers == 3
+    assert stats["arrival_rate_per_min"] == 6.0 and stats["waiting_requests"] == 0
+
+
+def test_lingering_sessions_are_released(fake_workers):
+    async def scenario():
+        pool = WorkerPool(_config(pool_min_workers=1, pool_max_workers=1, pool_session_linger=0.05))
+        await pool.start()
+        try:
+            await _ask(pool, F150)
+            worker = next(iter(pool._workers.values()))
+            assert worker.current_vehicle == vehicle_key(F150)
+            await asyncio.sleep(0.2)
+            return worker.current_vehicle, worker._logged_in, len(pool._idle)
+        finally:
+            await pool.stop()
+
+    vehicle, logged_in, idle = asyncio.run(scenario())
+    assert vehicle is None and not logged_in and idle == 1
+
+
+def test_idle_kill_skips_a_worker_checked_out_meanwhile(fake_workers):
+    async def scenario():
+        pool = WorkerPool(_config(pool_min_workers=1, pool_max_workers=1))
+        await pool.start()
+        try:
+            worker = next(iter(pool._workers.values()))
+            # A spawn holds the pool lock while the scaler decides to kill
+            await pool._pool_lock.acquire()
+            kill = asyncio.create_task(pool._kill_worker(worker.worker_id, idle_only=True))
+            await asyncio.sleep(0)
+            async with pool.acquire(F150) as busy:
+                pool._pool_lock.release()
+                await kill
+                return busy is worker, busy.state, list(pool._workers.values())
+        finally:
+            await pool.stop()
+
+    checked_out, state, workers = asyncio.run(scenario())
+    assert checked_out and state != worker_pool.WorkerState.STOPPING
+    assert len(workers) == 1
+
+
+class StubLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+        self.first = self
+
+    async def count(self):
+        if self.page.broken:
+            raise RuntimeError("Target page has been closed")
+        if self.selector == ".modalDialogView":
+            return self.page.modals
+        return 1
+
+    async def click(self, timeout=None):
+        self.page.clicks.append(self.selector)
+        if "close" in self.selector.lower():
+            self.page.modals -= 1
+
+
+class StubPage:
+    def __init__(self):
+        self.modals = 0
+        self.broken = False
+        self.clicks = []
+
+    def locator(self, selector):
+        return StubLocator(self, selector)
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+
+class StubbedWorker(worker_pool.Worker):
+    """Real Worker.execute; only Chrome and the vehicle selector are stubbed."""
+
+    async def start(self):
+        async def done(*args, **kwargs):
+            return True
+
+        self._api = SimpleNamespace(_page=StubPage(), connect=done, logout=done, disconnect=done)
+        self.selections = []
+        self.state = worker_pool.WorkerState.IDLE
+        return True
+
+    async def _navigate_to_vehicle(self, vehicle):
+        self.selections.append(vehicle_key(vehicle))
+        await asyncio.sleep(0.01)
+        return {"success": True}
+
+
+def test_execute_reuses_the_selected_vehicle(monkeypatch):
+    from addons.mitchell_agent.ai_navigator import autonomous_navigator
+
+    async def query(page, goal, vehicle, context):
+        page.modals = 1  # queries tend to leave a modal open
+        return {"success": True}
+
+    monkeypatch.setattr(worker_pool, "Worker", StubbedWorker)
+    monkeypatch.setattr(autonomous_navigator, "query_mitchell_autonomous", query)
+
+    async def scenario():
+        pool = WorkerPool(_config(scaling_mode="single"))
+        await pool.start()
+        try:
+            worker = next(iter(pool._workers.values()))
+            page = worker._api._page
+            await _ask(pool, F150)
+            await _ask(pool, F150)
+            reused = worker.vehicle_reused
+            await _ask(pool, CIVIC)
+            page.broken = True  # landing page unusable: select the vehicle again
+            await _ask(pool, CIVIC)
+            return worker, page, reused, pool.get_stats()
+        finally:
+            await pool.stop()
+
+    worker, page, reused, stats = asyncio.run(scenario())
+    assert reused
+    assert worker.selections == [vehicle_key(F150), vehicle_key(CIVIC), vehicle_key(CIVIC)]
+    assert worker.stats.vehicle_reuses == 1
+    assert page.clicks[:2] == [
+        '.modalDialogView .close, .modal .close, button:has-text("Close")',
+        'a:text-is("Home")',
+    ]
+    affinity = stats["vehicle_affinity"]
+    assert affinity["hits"] == 1 and affinity["misses"] == 3
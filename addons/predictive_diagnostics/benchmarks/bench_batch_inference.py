@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-row vs. batched inference with the models shipped in models/.
+
+Scores N synthetic vehicles (random feature dicts over each model's feature
+list) with the RF predictor and the hierarchical per-system networks. The
+"per-row" column runs the previous one-row-at-a-time predict() code, the
+"batched" column a single predict_batch() over all vehicles. Top-k failure
+modes must agree.
+
+The two-stage XGBoost and chrono RF predictors go through the same
+predict_batch path, but their model files are not in the repo, so they are
+not timed here.
+
+Usage: python addons/predictive_diagnostics/benchmarks/bench_batch_inference.py [--vehicles 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+warnings.filterwarnings("ignore")
+
+from addons.predictive_diagnostics.inference_engine import InferenceEngine, TORCH_AVAILABLE
+
+
+# ---------------------------------------------------------------------------
+# Previous per-row implementations, kept here as the baseline
+# ---------------------------------------------------------------------------
+
+def legacy_rf_predict(predictor, features, top_k):
+    X = np.zeros((1, len(predictor.feature_names)))
+    for i, fname in enumerate(predictor.feature_names):
+        X[0, i] = features.get(fname, 0.0)
+    probs = predictor.model.predict_proba(predictor.scaler.transform(X))[0]
+    sorted_indices = np.argsort(probs)[::-1]
+    return [(predictor.class_names[idx], float(probs[idx])) for idx in sorted_indices[:top_k]]
+
+
+def legacy_hierarchical_predict(predictor, features, top_k):
+    import torch
+
+    all_predictions = []
+    for system in predictor.systems:
+        model = predictor.models[system]
+        meta = predictor.metadata[system]
+        labels = meta.get('labels', [])
+        if len(labels) <= 1:
+            continue
+        values = [float(features.get(name, 0.0) or 0.0) for name in meta.get('features', [])]
+        x = torch.tensor([values], dtype=torch.float32)
+        with torch.no_grad():
+            probs = torch.softmax(model(x), dim=1)[0]
+        for i, label in enumerate(labels):
+            all_predictions.append((str(label), probs[i].item(), system))
+    all_predictions.sort(key=lambda x: x[1], reverse=True)
+    return all_predictions[:top_k]
+
+
+# ---------------------------------------------------------------------------
+
+def feature_names(predictor):
+    if hasattr(predictor, "feature_names"):
+        return list(predictor.feature_names)
+    names = []
+    for meta in predictor.metadata.values():
+        names.extend(n for n in meta.get('features', []) if n not in names)
+    return names
+
+
+def synthetic_fleet(names, n, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(0.0, 50.0, size=(n, len(names)))
+    # Sparse dicts, like real extractors that skip missing PIDs
+    mask = rng.random((n, len(names))) < 0.8
+    return [
+        {name: float(v) for name, v, keep in zip(names, row, keep_row) if keep}
+        for row, keep_row in zip(values, mask)
+    ]
+
+
+def same_topk(a, b):
+    """Same probabilities in order; labels may only differ among ties at the cut."""
+    pa, pb = [p[1] for p in a], [p[1] for p in b]
+    if len(pa) != len(pb) or not np.allclose(pa, pb, atol=1e-5):
+        return False
+    cut = pa[-1] + 1e-5 if pa else 0.0
+    return {l for l, p in a if p > cut} == {l for l, p in b if p > cut}
+
+
+def bench(name, engine, legacy, fleet, top_k):
+    predictor = engine.predictor
+
+    start = time.perf_counter()
+    per_row = [legacy(predictor, f, top_k) for f in fleet]
+    t_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = engine.diagnose_batch(fleet, top_k)
+    t_batch = time.perf_counter() - start
+
+    as_tuples = [[(r.failure_mode, r.probability) for r in rows] for rows in batched]
+    mismatches = sum(
+        not same_topk([p[:2] for p in a], b) for a, b in zip(per_row, as_tuples)
+    )
+    # float32 scaling may flip an exact tie or a split at the threshold
+    assert mismatches <= len(fleet) * 0.01, f"{name}: {mismatches} rows differ"
+
+    n = len(fleet)
+    print(
+        f"{name:14}{n:>7}{n / t_row:>14.0f}{n / t_batch:>14.0f}"
+        f"{t_row / t_batch:>9.1f}x{mismatches:>10}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vehicles", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'model':14}{'rows':>7}{'per-row /s':>14}{'batched /s':>14}{'speedup':>10}{'differ':>10}")
+
+    rf = InferenceEngine(model_type="rf")
+    bench("rf", rf, legacy_rf_predict, synthetic_fleet(feature_names(rf.predictor), args.vehicles), args.top_k)
+
+    if TORCH_AVAILABLE:
+        hier = InferenceEngine(model_type="hierarchical")
+        fleet = synthetic_fleet(feature_names(hier.predictor), args.vehicles)
+        bench("hierarchical", hier, legacy_hierarchical_predict, fleet, args.top_k)
+
+
+if __name__ == "__main__":
+    main()
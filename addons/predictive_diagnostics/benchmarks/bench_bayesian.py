@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark: BayesianReasoner update/get_best_test over the full knowledge registry.
+
+Builds a prior over every failure mode in FAILURE_REGISTRY (weighted by
+relative_frequency) plus the reasoner's own failure IDs, then replays a
+diagnostic session: recommend a test, observe it, repeat. The "before" row
+runs the previous dict-based update / per-test information-gain loop, the
+"after" row the array-backed reasoner. Both must pick the same tests.
+
+Usage: python addons/predictive_diagnostics/benchmarks/bench_bayesian.py [--steps 8] [--repeat 5]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from addons.predictive_diagnostics.knowledge.registry import get_all_failure_modes
+from addons.predictive_diagnostics.reasoning.bayesian import BayesianReasoner
+
+
+# ---------------------------------------------------------------------------
+# Previous dict-based implementation, kept here as the baseline
+# ---------------------------------------------------------------------------
+
+def _normalize(probs):
+    total = sum(probs.values())
+    if total > 0:
+        return {k: v / total for k, v in probs.items()}
+    return probs
+
+
+def _entropy(probs):
+    return -sum(p * math.log2(p) for p in probs.values() if p > 0)
+
+
+def legacy_update(likelihood_tables, probs, evidence, evidence_type, observed=True):
+    likelihoods = likelihood_tables.get(evidence_type, {})
+    if not likelihoods:
+        return dict(probs), evidence + [evidence_type]
+
+    new_probs = {}
+    for failure, prior in probs.items():
+        likelihood = likelihoods.get(failure, 0.1)
+        if not observed:
+            likelihood = 1.0 - likelihood
+        new_probs[failure] = likelihood * prior
+    new_probs = _normalize(new_probs)
+
+    if observed and evidence_type in ("insulation_resistance_low", "dtc_insulation_resistance_low"):
+        has_other = any(e in ("insulation_resistance_low", "dtc_insulation_resistance_low") for e in evidence)
+        isolation = ("hv_isolation_fault", "tesla_hv_isolation_fault")
+        if has_other:
+            if "hv_isolation_fault" in new_probs:
+                new_probs["hv_isolation_fault"] = 0.995
+            if "tesla_hv_isolation_fault" in new_probs:
+                new_probs["tesla_hv_isolation_fault"] = 0.99
+            for f in list(new_probs):
+                if f not in isolation and not f.startswith("normal"):
+                    new_probs[f] = 0.0
+        else:
+            if "hv_isolation_fault" in new_probs:
+                new_probs["hv_isolation_fault"] = max(new_probs["hv_isolation_fault"], 0.99)
+            if "tesla_hv_isolation_fault" in new_probs:
+                new_probs["tesla_hv_isolation_fault"] = max(new_probs["tesla_hv_isolation_fault"], 0.95)
+            for f in list(new_probs):
+                if f not in isolation and not f.startswith("normal"):
+                    new_probs[f] = min(new_probs[f], 0.0001)
+        new_probs = _normalize(new_probs)
+
+    return new_probs, evidence + [evidence_type]
+
+
+def legacy_best_test(likelihood_tables, probs, evidence):
+    current_entropy = _entropy(probs)
+    best_test, best_gain = None, 0.0
+    for evidence_type, likelihoods in likelihood_tables.items():
+        if evidence_type in evidence or not likelihoods:
+            continue
+        p_evidence = sum(likelihoods.get(f, 0.1) * p for f, p in probs.items())
+        expected = 0.0
+        for observed, p_outcome in ((True, p_evidence), (False, 1.0 - p_evidence)):
+            if p_outcome <= 0:
+                continue
+            posterior, _ = legacy_update(likelihood_tables, probs, evidence, evidence_type, observed)
+            expected += p_outcome * _entropy(posterior)
+        gain = current_entropy - expected
+        if gain > best_gain:
+            best_test, best_gain = evidence_type, gain
+    return best_test
+
+
+# ---------------------------------------------------------------------------
+
+def registry_prior(reasoner):
+    prior = {f.id: f.relative_frequency for f in get_all_failure_modes()}
+    for failure in reasoner.create_initial_state().probabilities:
+        prior.setdefault(failure, 0.5)
+    return prior
+
+
+def run_before(reasoner, prior, steps):
+    probs, evidence, tests = _normalize(dict(prior)), [], []
+    for _ in range(steps):
+        test = legacy_best_test(reasoner._likelihoods, probs, evidence)
+        if test is None:
+            break
+        tests.append(test)
+        probs, evidence = legacy_update(reasoner._likelihoods, probs, evidence, test, observed=True)
+    return tests
+
+
+def run_after(reasoner, prior, steps):
+    state, tests = reasoner.create_initial_state(prior), []
+    for _ in range(steps):
+        test = reasoner.get_best_test(state)
+        if test is None:
+            break
+        tests.append(test["test"])
+        state = reasoner.update(state, test["test"], observed=True)
+    return tests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=8, help="tests recommended per session")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    reasoner = BayesianReasoner()
+    prior = registry_prior(reasoner)
+
+    results = {}
+    for name, run in (("before", run_before), ("after", run_after)):
+        run(reasoner, prior, 1)  # warm-up (compiles the likelihood matrix)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            tests = run(reasoner, prior, args.steps)
+        results[name] = ((time.perf_counter() - start) / args.repeat, tests)
+
+    assert results["before"][1] == results["after"][1], "recommended tests differ"
+
+    print(f"{len(prior)} failures, {len(reasoner._likelihoods)} evidence types, {args.steps} steps/session")
+    print(f"{'':8}{'ms/session':>12}{'ms/step':>10}")
+    for name, (elapsed, tests) in results.items():
+        print(f"{name:8}{elapsed * 1000:>12.1f}{elapsed * 1000 / max(1, len(tests)):>10.2f}")
+    print(f"speedup  {results['before'][0] / results['after'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
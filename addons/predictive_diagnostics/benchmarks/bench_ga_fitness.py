@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-example vs. compiled GA fitness evaluation.
+
+Runs GeneticRuleDiscovery.evolve on synthetic TrainingExamples twice with
+the same random seed. "per-example" swaps in the previous
+_evaluate_population, which calls Condition.evaluate for every rule and
+example; "compiled" is the current vectorized, memoized path (optionally
+with --workers processes). Both runs must evolve identical rules.
+
+Usage: python addons/predictive_diagnostics/benchmarks/bench_ga_fitness.py [--examples 5000] [--generations 15] [--workers 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from addons.predictive_diagnostics.classifier import TrainingExample
+from addons.predictive_diagnostics.genetic import GeneticRuleDiscovery
+
+
+# ---------------------------------------------------------------------------
+# Previous per-example implementation, kept here as the baseline
+# ---------------------------------------------------------------------------
+
+def legacy_compute_fitness(rule, examples):
+    rule.true_positives = rule.false_positives = rule.false_negatives = 0
+    total_positive = total_fires = 0
+    for ex in examples:
+        is_positive = ex.fault_label == rule.diagnosis
+        fires = rule.evaluate(ex)
+        if is_positive:
+            total_positive += 1
+            if fires:
+                rule.true_positives += 1
+            else:
+                rule.false_negatives += 1
+        elif fires:
+            rule.false_positives += 1
+        if fires:
+            total_fires += 1
+    rule.apply_confusion(rule.true_positives, rule.false_positives, rule.false_negatives, len(examples))
+
+
+class LegacyGA(GeneticRuleDiscovery):
+    def _evaluate_population(self, examples):
+        for rule in self.population:
+            legacy_compute_fitness(rule, examples)
+
+
+# ---------------------------------------------------------------------------
+
+LABELS = ["normal", "thermostat_stuck_open", "thermostat_stuck_closed", "vacuum_leak",
+          "fuel_pump_weak", "alternator_failure"]
+PIDS = ["coolant_temp", "engine_rpm", "stft_b1", "ltft_b1", "fuel_pressure",
+        "battery_voltage", "maf", "map", "engine_load", "iat"]
+DTCS = ["P0171", "P0128", "P0217", "P0087", "P0562", "P0300"]
+
+
+def synthetic_examples(n, seed=0):
+    rnd = random.Random(seed)
+    examples = []
+    for i in range(n):
+        label = LABELS[i % len(LABELS)]
+        offset = LABELS.index(label)
+        pids = {pid: rnd.gauss(10 * j + 5 * offset * (j % 3 == offset % 3), 5) for j, pid in enumerate(PIDS)}
+        for pid in rnd.sample(PIDS, rnd.randint(0, 2)):
+            del pids[pid]
+        dtcs = [d for j, d in enumerate(DTCS) if (j == offset and rnd.random() < 0.6) or rnd.random() < 0.03]
+        examples.append(TrainingExample(str(i), 2020, "Make", "Model", pids, dtcs, label))
+    return examples
+
+
+def run(cls, examples, generations, workers=1):
+    random.seed(42)
+    ga = cls(population_size=100, max_generations=generations, workers=workers)
+    start = time.perf_counter()
+    rules = ga.evolve(examples)
+    elapsed = time.perf_counter() - start
+    return elapsed, len(ga.generation_history), {d: (r.to_string(), round(r.fitness, 9)) for d, r in rules.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--examples", type=int, default=5000)
+    parser.add_argument("--generations", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    examples = synthetic_examples(args.examples)
+    t_old, gens, old_rules = run(LegacyGA, examples, args.generations)
+    t_new, _, new_rules = run(GeneticRuleDiscovery, examples, args.generations, args.workers)
+    assert old_rules == new_rules, "evolved rules differ"
+
+    print(f"{args.examples} examples, {gens} generations, population 100")
+    print(f"{'path':14}{'seconds':>10}{'gen/s':>10}")
+    for name, elapsed in (("per-example", t_old), (f"compiled x{args.workers}", t_new)):
+        print(f"{name:14}{elapsed:>10.2f}{gens / elapsed:>10.2f}")
+    print(f"speedup       {t_old / t_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
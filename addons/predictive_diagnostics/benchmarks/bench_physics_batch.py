@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-sample vs. batched physics simulation for training data.
+
+Generates N training samples (simulation + feature extraction) for a mix
+of failure modes. "scalar" runs simulate_failure/extract_features once per
+sample (PhysicsBasedGenerator.generate_sample); "batched" advances all
+vehicles together with simulate_batch/extract_features_batch. Per-mode
+feature means of the two paths must agree within the sample spread.
+
+Usage: python addons/predictive_diagnostics/benchmarks/bench_physics_batch.py [--samples 1000] [--batch-size 256]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from addons.predictive_diagnostics.physics_simulator import PhysicsSimulator, SimulationConfig
+
+MODES = ["normal", "thermostat_stuck_open", "thermostat_stuck_closed", "vacuum_leak",
+         "fuel_pump_weak", "o2_sensor_lazy", "alternator_failure", "maf_sensor_failure"]
+CHECK = ["coolant_temp_final", "stft_b1_mean", "fuel_pressure_final", "voltage_mean"]
+
+
+def workload(n, seed=0):
+    rnd = random.Random(seed)
+    modes = [MODES[i % len(MODES)] for i in range(n)]
+    configs = [
+        SimulationConfig(
+            duration_sec=rnd.uniform(180, 600),
+            ambient_temp_f=rnd.uniform(40, 95),
+            initial_coolant_f=rnd.uniform(40, 95),
+            noise_level=rnd.uniform(0.01, 0.05),
+        )
+        for _ in modes
+    ]
+    return modes, configs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--scalar-samples", type=int, default=200,
+                        help="scalar path is timed on a subset (it is slow)")
+    args = parser.parse_args()
+
+    sim = PhysicsSimulator()
+    modes, configs = workload(args.samples)
+
+    n_scalar = min(args.scalar_samples, args.samples)
+    random.seed(1)
+    start = time.perf_counter()
+    scalar = [sim.extract_features(sim.simulate_failure(m, c)) for m, c in zip(modes[:n_scalar], configs)]
+    t_scalar = (time.perf_counter() - start) / n_scalar
+
+    start = time.perf_counter()
+    batched = []
+    for i in range(0, args.samples, args.batch_size):
+        result = sim.simulate_batch(modes[i:i + args.batch_size], configs[i:i + args.batch_size], seed=i)
+        batched.extend(sim.extract_features_batch(result))
+    t_batch = (time.perf_counter() - start) / args.samples
+
+    for mode in MODES:
+        for key in CHECK:
+            a = [f[key] for f, m in zip(scalar, modes) if m == mode]
+            b = [f[key] for f, m in zip(batched, modes) if m == mode]
+            spread = max(np.std(a), np.std(b), 1e-3)
+            assert abs(np.mean(a) - np.mean(b)) < spread, f"{mode} {key}: {np.mean(a)} vs {np.mean(b)}"
+
+    print(f"{'path':10}{'samples':>9}{'samples/s':>12}{'20k dataset':>14}")
+    for name, n, per in (("scalar", n_scalar, t_scalar), ("batched", args.samples, t_batch)):
+        print(f"{name:10}{n:>9}{1 / per:>12.0f}{20000 * per / 60:>12.1f} m")
+    print(f"speedup   {t_scalar / t_batch:.1f}x (batch size {args.batch_size})")
+
+
+if __name__ == "__main__":
+    main()
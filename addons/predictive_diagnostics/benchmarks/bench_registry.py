@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: failure registry lookups, linear scan vs. index.
+
+Times get_failure_by_id, get_failures_for_dtc, get_failures_for_symptom and
+get_failure_modes_for_system over every ID, DTC and system in the registry
+plus a set of symptom keywords. The "before" row uses the previous
+implementations (rebuild the flat list, scan it), the "after" row the
+indexed functions in knowledge.registry. Results must be identical.
+
+Usage: python addons/predictive_diagnostics/benchmarks/bench_registry.py [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from addons.predictive_diagnostics.knowledge import registry
+
+
+# ---------------------------------------------------------------------------
+# Previous linear-scan implementation, kept here as the baseline
+# ---------------------------------------------------------------------------
+
+def legacy_all():
+    all_failures = []
+    for system_failures in registry.FAILURE_REGISTRY.values():
+        for component_failures in system_failures.values():
+            all_failures.extend(component_failures)
+    return all_failures
+
+
+def legacy_by_id(failure_id):
+    for failure in legacy_all():
+        if failure.id == failure_id:
+            return failure
+    return None
+
+
+def legacy_for_dtc(dtc):
+    return [f for f in legacy_all() if dtc in f.expected_dtcs]
+
+
+def legacy_for_symptom(symptom_keyword):
+    keyword = symptom_keyword.lower()
+    matching = []
+    for failure in legacy_all():
+        for symptom in failure.symptoms:
+            if keyword in symptom.description.lower():
+                matching.append(failure)
+                break
+    return matching
+
+
+def legacy_for_system(system_id):
+    all_failures = []
+    for component_failures in registry.FAILURE_REGISTRY.get(system_id, {}).values():
+        all_failures.extend(component_failures)
+    return all_failures
+
+
+# ---------------------------------------------------------------------------
+
+KEYWORDS = [
+    "overheat", "no start", "rough idle", "misfire", "noise", "leak", "smell",
+    "warning light", "vibration", "stall", "hesitat", "won't", "brake", "Pulls",
+    "check engine", "battery", "coolant", "ready", "hum", "xyzzy",
+]
+
+
+def workloads():
+    failures = legacy_all()
+    ids = [f.id for f in failures] + ["no_such_failure"]
+    dtcs = sorted({d for f in failures for d in f.expected_dtcs}) + ["P9999"]
+    systems = list(registry.FAILURE_REGISTRY) + ["no_such_system"]
+    return [
+        ("by_id", ids, legacy_by_id, registry.get_failure_by_id),
+        ("for_dtc", dtcs, legacy_for_dtc, registry.get_failures_for_dtc),
+        ("for_symptom", KEYWORDS, legacy_for_symptom, registry.get_failures_for_symptom),
+        ("for_system", systems, legacy_for_system, registry.get_failure_modes_for_system),
+    ]
+
+
+def timed(fn, args, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for arg in args:
+            fn(arg)
+    return (time.perf_counter() - start) / (repeat * len(args))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    registry.invalidate_registry_index()
+    registry.get_failure_by_id("warm-up")
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{len(legacy_all())} failure modes, index build {build_ms:.1f} ms")
+    print(f"{'lookup':14}{'n':>6}{'before us':>12}{'after us':>11}{'speedup':>9}")
+    for name, inputs, before, after in workloads():
+        for arg in inputs:
+            assert before(arg) == after(arg), f"{name}({arg!r}) differs"
+        t_before = timed(before, inputs, args.repeat)
+        t_after = timed(after, inputs, args.repeat)
+        print(
+            f"{name:14}{len(inputs):>6}{t_before * 1e6:>12.1f}{t_after * 1e6:>11.2f}"
+            f"{t_before / t_after:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
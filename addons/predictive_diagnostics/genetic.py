@@ -22,16 +22,23 @@ GA Components:
 - Selection: Tournament selection
 - Crossover: Rule combination
 - Mutation: Threshold/operator changes
+
+Fitness is computed on CompiledExamples: the training examples as a dense
+PID matrix plus a DTC presence bitmap, so each condition is a boolean
+column mask and each rule the AND of its masks.
 """
 
 import random
 import logging
-from typing import Dict, List, Optional, Tuple, Any, Callable
+import multiprocessing as mp
+from typing import Dict, List, Optional, Tuple, Any, Callable, Union
 from dataclasses import dataclass, field
 from datetime import datetime
 from copy import deepcopy
 import json
 
+import numpy as np
+
 from .classifier import TrainingExample, COMMON_PID_FEATURES, PIDFeature
 
 logger = logging.getLogger(__name__)
@@ -97,6 +104,10 @@ class Condition:
         
         return False
     
+    def key(self) -> Tuple:
+        """Hashable identity of this condition (for fitness memoization)."""
+        return (self.feature, self.operator, self.threshold, self.threshold_high)
+    
     def to_string(self) -> str:
         """Human-readable condition string."""
         if self.operator == Operator.IN_RANGE:
@@ -124,6 +135,107 @@ class Condition:
         )
 
 
+class CompiledExamples:
+    """
+    Training examples compiled for vectorized rule evaluation.
+    
+    PID values become a dense (n_examples, n_pids) float matrix with NaN for
+    missing readings, DTCs a boolean (n_examples, n_dtcs) presence bitmap.
+    condition_mask() gives the same answer as Condition.evaluate() for every
+    example at once: NaN fails every comparison, like missing data does.
+    """
+    
+    def __init__(self, examples: List[TrainingExample]):
+        self.labels = np.array([ex.fault_label for ex in examples], dtype=object)
+        
+        self.pid_index: Dict[str, int] = {}
+        self.dtc_index: Dict[str, int] = {}
+        for ex in examples:
+            for pid in ex.pid_values:
+                self.pid_index.setdefault(pid, len(self.pid_index))
+            for dtc in ex.dtc_codes:
+                self.dtc_index.setdefault(dtc, len(self.dtc_index))
+        
+        n = len(examples)
+        # Column-major so each condition reads one contiguous column
+        self.pid_matrix = np.full((n, len(self.pid_index)), np.nan, order="F")
+        self.dtc_bitmap = np.zeros((n, len(self.dtc_index)), dtype=bool, order="F")
+        for i, ex in enumerate(examples):
+            for pid, value in ex.pid_values.items():
+                self.pid_matrix[i, self.pid_index[pid]] = value
+            for dtc in ex.dtc_codes:
+                self.dtc_bitmap[i, self.dtc_index[dtc]] = True
+        
+        self._positives: Dict[str, np.ndarray] = {}
+    
+    def __len__(self) -> int:
+        return len(self.labels)
+    
+    def positives(self, diagnosis: str) -> np.ndarray:
+        """Mask of examples labelled with this diagnosis."""
+        mask = self._positives.get(diagnosis)
+        if mask is None:
+            mask = self._positives[diagnosis] = self.labels == diagnosis
+        return mask
+    
+    def condition_mask(self, cond: Condition) -> np.ndarray:
+        """Vectorized Condition.evaluate() over all examples."""
+        n = len(self)
+        
+        # Handle DTC conditions
+        if cond.feature.startswith("DTC_"):
+            col = self.dtc_index.get(cond.feature[4:])
+            has_dtc = self.dtc_bitmap[:, col] if col is not None else np.zeros(n, dtype=bool)
+            if cond.operator == Operator.EQUAL:
+                return has_dtc
+            elif cond.operator == Operator.NOT_EQUAL:
+                return ~has_dtc
+            return np.zeros(n, dtype=bool)
+        
+        # Handle PID conditions
+        col = self.pid_index.get(cond.feature)
+        if col is None:
+            return np.zeros(n, dtype=bool)  # Missing data = condition fails
+        
+        values = self.pid_matrix[:, col]
+        high = cond.threshold_high or cond.threshold
+        
+        with np.errstate(invalid="ignore"):
+            if cond.operator == Operator.LESS_THAN:
+                return values < cond.threshold
+            elif cond.operator == Operator.LESS_EQUAL:
+                return values <= cond.threshold
+            elif cond.operator == Operator.GREATER_THAN:
+                return values > cond.threshold
+            elif cond.operator == Operator.GREATER_EQUAL:
+                return values >= cond.threshold
+            elif cond.operator == Operator.EQUAL:
+                return np.abs(values - cond.threshold) < 0.001
+            elif cond.operator == Operator.NOT_EQUAL:
+                return np.abs(values - cond.threshold) >= 0.001
+            elif cond.operator == Operator.IN_RANGE:
+                return (cond.threshold <= values) & (values <= high)
+            elif cond.operator == Operator.OUT_OF_RANGE:
+                return (values < cond.threshold) | (values > high)
+        
+        return np.zeros(n, dtype=bool)
+    
+    def rule_mask(self, conditions: List[Condition]) -> np.ndarray:
+        """Examples on which all conditions hold (AND logic)."""
+        fires = np.ones(len(self), dtype=bool)
+        for cond in conditions:
+            fires &= self.condition_mask(cond)
+        return fires
+    
+    def confusion(self, conditions: List[Condition], diagnosis: str) -> Tuple[int, int, int]:
+        """(true_positives, false_positives, false_negatives) of a rule."""
+        fires = self.rule_mask(conditions)
+        positives = self.positives(diagnosis)
+        total_fires = int(np.count_nonzero(fires))
+        tp = int(np.count_nonzero(fires & positives))
+        return tp, total_fires - tp, int(np.count_nonzero(positives)) - tp
+
+
 @dataclass
 class DiagnosticRule:
     """
@@ -152,9 +264,13 @@ class DiagnosticRule:
         # All conditions must be true (AND logic)
         return all(cond.evaluate(example) for cond in self.conditions)
     
+    def signature(self) -> Tuple:
+        """Hashable identity of what this rule tests (ignores id and metrics)."""
+        return (self.diagnosis, tuple(c.key() for c in self.conditions))
+    
     def compute_fitness(
         self,
-        examples: List[TrainingExample],
+        examples: Union[List[TrainingExample], CompiledExamples],
         precision_weight: float = 0.4,
         recall_weight: float = 0.3,
         simplicity_weight: float = 0.2,
@@ -168,43 +284,49 @@ class DiagnosticRule:
         - Recall: Does rule catch most cases of this diagnosis?
         - Simplicity: Fewer conditions = better (prevents overfitting)
         - Coverage: Rules that apply to more cases are preferred
+        
+        Pass CompiledExamples when scoring many rules on the same data;
+        a plain list is compiled on every call.
         """
-        # Count predictions
-        self.true_positives = 0
-        self.false_positives = 0
-        self.false_negatives = 0
-        total_positive = 0  # Examples with this diagnosis
-        total_fires = 0     # Times rule fires
+        if not isinstance(examples, CompiledExamples):
+            examples = CompiledExamples(examples)
         
-        for ex in examples:
-            is_positive = (ex.fault_label == self.diagnosis)
-            fires = self.evaluate(ex)
-            
-            if is_positive:
-                total_positive += 1
-                if fires:
-                    self.true_positives += 1
-                else:
-                    self.false_negatives += 1
-            else:
-                if fires:
-                    self.false_positives += 1
-            
-            if fires:
-                total_fires += 1
+        tp, fp, fn = examples.confusion(self.conditions, self.diagnosis)
+        return self.apply_confusion(
+            tp, fp, fn, len(examples),
+            precision_weight, recall_weight, simplicity_weight, coverage_weight,
+        )
+    
+    def apply_confusion(
+        self,
+        true_positives: int,
+        false_positives: int,
+        false_negatives: int,
+        n_examples: int,
+        precision_weight: float = 0.4,
+        recall_weight: float = 0.3,
+        simplicity_weight: float = 0.2,
+        coverage_weight: float = 0.1
+    ) -> float:
+        """Set metrics and fitness from confusion counts (see compute_fitness)."""
+        self.true_positives = true_positives
+        self.false_positives = false_positives
+        self.false_negatives = false_negatives
+        total_positive = true_positives + false_negatives  # Examples with this diagnosis
+        total_fires = true_positives + false_positives     # Times rule fires
         
         # Calculate metrics
-        if self.true_positives + self.false_positives > 0:
-            self.precision = self.true_positives / (self.true_positives + self.false_positives)
+        if total_fires > 0:
+            self.precision = true_positives / total_fires
         else:
             self.precision = 0.0
         
         if total_positive > 0:
-            self.recall = self.true_positives / total_positive
+            self.recall = true_positives / total_positive
         else:
             self.recall = 0.0
         
-        self.coverage = total_fires / len(examples) if examples else 0.0
+        self.coverage = total_fires / n_examples if n_examples else 0.0
         
         # Simplicity: Prefer fewer conditions (max 10 conditions)
         simplicity = 1.0 - (len(self.conditions) / 10.0)
@@ -219,7 +341,7 @@ class DiagnosticRule:
         )
         
         # Penalty for rules that never fire or fire on everything
-        if total_fires == 0 or total_fires == len(examples):
+        if total_fires == 0 or total_fires == n_examples:
             self.fitness *= 0.1
         
         return self.fitness
@@ -258,6 +380,22 @@ class DiagnosticRule:
         return rule
 
 
+# Per-process compiled examples for parallel fitness evaluation
+_worker_examples: Optional[CompiledExamples] = None
+
+
+def _init_fitness_worker(compiled: CompiledExamples) -> None:
+    """Pool initializer - receives the compiled examples once per process."""
+    global _worker_examples
+    _worker_examples = compiled
+
+
+def _rule_confusion(args: Tuple[List[Condition], str]) -> Tuple[int, int, int]:
+    """Worker function for multiprocessing - confusion counts of one rule."""
+    conditions, diagnosis = args
+    return _worker_examples.confusion(conditions, diagnosis)
+
+
 class GeneticRuleDiscovery:
     """
     Genetic Algorithm for discovering diagnostic rules.
@@ -278,6 +416,7 @@ class GeneticRuleDiscovery:
         min_precision: float = 0.6,    # Minimum precision to keep rule
         min_recall: float = 0.1,       # Minimum recall to keep rule
         max_conditions: int = 6,       # Maximum conditions per rule
+        workers: int = 1,              # Processes for fitness evaluation
     ):
         """
         Initialize the GA.
@@ -292,6 +431,9 @@ class GeneticRuleDiscovery:
             min_precision: Minimum precision threshold
             min_recall: Minimum recall threshold
             max_conditions: Maximum conditions per rule
+            workers: Worker processes for population scoring. Vectorized
+                scoring is fast, so this only pays off for large example
+                sets; 1 evaluates in-process.
         """
         self.population_size = population_size
         self.max_generations = max_generations
@@ -302,6 +444,7 @@ class GeneticRuleDiscovery:
         self.min_precision = min_precision
         self.min_recall = min_recall
         self.max_conditions = max_conditions
+        self.workers = workers
         
         self.population: List[DiagnosticRule] = []
         self.best_rules: Dict[str, DiagnosticRule] = {}  # diagnosis -> best rule
@@ -312,6 +455,11 @@ class GeneticRuleDiscovery:
         self.available_diagnoses: List[str] = []
         
         self._rule_counter = 0
+        
+        # Fitness evaluation state for the current evolve() run
+        self._compiled: Optional[CompiledExamples] = None
+        self._fitness_cache: Dict[Tuple, Tuple[int, int, int]] = {}
+        self._pool = None
     
     def _generate_rule_id(self) -> str:
         """Generate unique rule ID."""
@@ -474,9 +622,34 @@ class GeneticRuleDiscovery:
         return rule
     
     def _evaluate_population(self, examples: List[TrainingExample]) -> None:
-        """Evaluate fitness of all rules in population."""
+        """
+        Evaluate fitness of all rules in population.
+        
+        Confusion counts are memoized by rule signature, so elites and
+        unmutated copies are not re-scored. New rules are scored on the
+        compiled examples, in the worker pool if one is running.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledExamples(examples)
+        compiled = self._compiled
+        
+        pending: Dict[Tuple, DiagnosticRule] = {}
+        for rule in self.population:
+            signature = rule.signature()
+            if signature not in self._fitness_cache:
+                pending.setdefault(signature, rule)
+        
+        if pending:
+            work = [(rule.conditions, rule.diagnosis) for rule in pending.values()]
+            if self._pool is not None:
+                chunksize = max(1, len(work) // (self.workers * 4))
+                counts = self._pool.map(_rule_confusion, work, chunksize)
+            else:
+                counts = [compiled.confusion(conditions, diagnosis) for conditions, diagnosis in work]
+            self._fitness_cache.update(zip(pending, counts))
+        
         for rule in self.population:
-            rule.compute_fitness(examples)
+            rule.apply_confusion(*self._fitness_cache[rule.signature()], len(compiled))
     
     def _evolve_generation(self, examples: List[TrainingExample]) -> None:
         """Evolve one generation."""
@@ -536,8 +709,34 @@ class GeneticRuleDiscovery:
         self._initialize_population(examples)
         self.best_rules = {}
         self.generation_history = []
+        self._compiled = CompiledExamples(examples)
+        self._fitness_cache = {}
+        if self.workers > 1:
+            self._pool = mp.Pool(
+                processes=self.workers,
+                initializer=_init_fitness_worker,
+                initargs=(self._compiled,),
+            )
+        
+        try:
+            self._run_generations(examples, callback)
+        finally:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+            self._compiled = None
+            self._fitness_cache = {}
         
-        # Evolve
+        logger.info(f"Evolution complete. Found {len(self.best_rules)} good rules.")
+        return self.best_rules
+    
+    def _run_generations(
+        self,
+        examples: List[TrainingExample],
+        callback: Optional[Callable[[int, Dict], None]],
+    ) -> None:
+        """Generation loop of evolve()."""
         for gen in range(self.max_generations):
             self._evolve_generation(examples)
             
@@ -569,9 +768,6 @@ class GeneticRuleDiscovery:
                 if max(recent_best) - min(recent_best) < 0.001:
                     logger.info(f"Early stopping at generation {gen} (no improvement)")
                     break
-        
-        logger.info(f"Evolution complete. Found {len(self.best_rules)} good rules.")
-        return self.best_rules
     
     def predict(
         self,
@@ -19,7 +19,15 @@ Usage:
     # From feature dict
     results = engine.diagnose({"coolant_temp_final": 145, "stft_b1_mean": 15.2, ...})
     
-    # From raw PID stream
+    # Many vehicles at once (one model call per stage)
+    fleet_results = engine.diagnose_batch([features_car_1, features_car_2, ...])
+    
+    # Live, while readings arrive (ring-buffered, bounded memory)
+    extractor = StreamingFeatureExtractor()
+    await elm.monitor_pids(pids, duration=120, callback=extractor.add_readings)
+    results = engine.diagnose_from_stream(extractor)
+    
+    # From raw PID series
     results = engine.diagnose_from_pids({
         "coolant_temp": [(0, 70), (10, 120), (30, 145), ...],
         "stft_b1": [(0, 0.5), (10, 12.3), ...],
@@ -32,7 +40,8 @@ Usage:
 import os
 import pickle
 import logging
-from typing import Dict, List, Tuple, Optional, Any
+from collections import defaultdict
+from typing import Dict, List, Tuple, Optional, Any, Sequence
 from dataclasses import dataclass
 import numpy as np
 
@@ -43,6 +52,11 @@ try:
 except ImportError:
     TORCH_AVAILABLE = False
 
+try:
+    from .ranking import top_k_indices
+except ImportError:
+    from ranking import top_k_indices
+
 try:
     from .rf_trainer import RFTrainer, RFPredictor
 except ImportError:
@@ -51,9 +65,48 @@ except ImportError:
     except ImportError:
         RFPredictor = None
 
+try:
+    from .streaming_features import StreamingFeatureExtractor
+except ImportError:
+    from streaming_features import StreamingFeatureExtractor
+
 logger = logging.getLogger(__name__)
 
 
+# =============================================================================
+# BATCH HELPERS
+# =============================================================================
+
+def _feature_matrix(
+    feature_rows: Sequence[Dict[str, float]],
+    feature_names: Sequence[str],
+    zero_features: Sequence[str] = (),
+) -> np.ndarray:
+    """
+    Stack feature dicts into one contiguous float32 matrix.
+
+    Columns follow feature_names (the training order); missing or None
+    values become 0.0. Columns named in zero_features are forced to 0
+    (e.g. the categorical 'scenario' column the chrono models ignore).
+    """
+    X = np.array(
+        [[row.get(name) or 0.0 for name in feature_names] for row in feature_rows],
+        dtype=np.float32,
+    ).reshape(len(feature_rows), len(feature_names))
+    for name in zero_features:
+        if name in feature_names:
+            X[:, list(feature_names).index(name)] = 0.0
+    return X
+
+
+def _model_input(estimator: Any, X: np.ndarray, feature_names: Sequence[str]) -> Any:
+    """Wrap X in a DataFrame only if the estimator was fitted on one."""
+    if hasattr(estimator, "feature_names_in_"):
+        import pandas as pd
+        return pd.DataFrame(X, columns=list(feature_names), copy=False)
+    return X
+
+
 # =============================================================================
 # CHRONO RF PREDICTOR (for models trained by train_from_chrono.py)
 # =============================================================================
@@ -114,41 +167,35 @@ class ChronoRFPredictor:
         
         Returns list of (failure_mode, probability) tuples.
         """
-        import pandas as pd
-        
-        # Build feature vector - must match training feature order
-        feature_row = {}
-        for fname in self.feature_names:
-            if fname == 'scenario':
-                # Skip scenario - it's categorical and causes issues
-                feature_row[fname] = 0
-            else:
-                feature_row[fname] = features.get(fname, 0.0)
-        
-        X = pd.DataFrame([feature_row])
-        
-        # Ensure columns are in right order
-        X = X.reindex(columns=self.feature_names, fill_value=0.0)
-        
-        # Handle scenario column (it's categorical)
-        if 'scenario' in X.columns:
-            X['scenario'] = 0  # Drop it effectively
-        
-        # Get probabilities
+        return self.predict_batch([features], top_k)[0]
+
+    def predict_batch(
+        self,
+        feature_rows: Sequence[Dict[str, float]],
+        top_k: int = 3,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Predict failure modes for many feature dicts with one predict_proba call.
+
+        Returns one list of (failure_mode, probability) tuples per input row.
+        """
+        if not feature_rows:
+            return []
+
+        # Scenario is categorical and causes issues - zero it out
+        X = _feature_matrix(feature_rows, self.feature_names, zero_features=('scenario',))
+
         try:
-            probs = self.model.predict_proba(X)[0]
+            probs = self.model.predict_proba(_model_input(self.model, X, self.feature_names))
         except Exception as e:
             logger.warning(f"Prediction failed: {e}")
-            return [(self.class_names[0], 0.5)] if self.class_names else []
-        
-        # Sort by probability
-        sorted_indices = np.argsort(probs)[::-1]
-        
-        results = []
-        for idx in sorted_indices[:top_k]:
-            results.append((self.class_names[idx], float(probs[idx])))
-        
-        return results
+            fallback = [(self.class_names[0], 0.5)] if self.class_names else []
+            return [list(fallback) for _ in feature_rows]
+
+        return [
+            [(self.class_names[i], float(row_probs[i])) for i in row_top]
+            for row_probs, row_top in zip(probs, top_k_indices(probs, top_k))
+        ]
 
 
 # =============================================================================
@@ -188,21 +235,13 @@ class TwoStageXGBPredictor:
         logger.info(f"Loaded TwoStageXGB: {len(self.system_le.classes_)} systems, "
                    f"{self.metrics.get('pipeline_accuracy', 0):.1%} accuracy")
     
-    def _build_features(self, features: Dict[str, float]) -> "pd.DataFrame":
-        """Build feature DataFrame matching training format."""
-        import pandas as pd
-        
-        feature_row = {}
-        for fname in self.feature_names:
-            if fname == 'scenario':
-                feature_row[fname] = 0
-            else:
-                feature_row[fname] = features.get(fname, 0.0)
-        
-        X = pd.DataFrame([feature_row])
-        X = X.reindex(columns=self.feature_names, fill_value=0.0)
-        return X
-    
+    # Single-failure systems have no stage-2 model; the system implies the failure
+    SINGLE_FAILURE_MAP = {
+        'brakes': 'brakes.brake_fade',
+        'ev': 'tesla.hv_isolation_fault',
+        'starting': 'starter.motor_failing',
+    }
+
     def predict(
         self,
         features: Dict[str, float],
@@ -210,52 +249,78 @@ class TwoStageXGBPredictor:
     ) -> List[Tuple[str, float, str]]:
         """
         Predict failure modes using two-stage approach.
-        
+
         Returns list of (failure_mode, probability, system) tuples.
         """
-        X = self._build_features(features)
-        
+        return self.predict_batch([features], top_k)[0]
+
+    def predict_batch(
+        self,
+        feature_rows: Sequence[Dict[str, float]],
+        top_k: int = 4,
+    ) -> List[List[Tuple[str, float, str]]]:
+        """
+        Two-stage prediction for many feature dicts at once.
+
+        Stage 1 runs one predict_proba over the whole batch. Stage 2 runs one
+        predict_proba per system model, over only the rows that have that
+        system among their top 3 candidates.
+
+        Returns one list of (failure_mode, probability, system) tuples per row.
+        """
+        if not feature_rows:
+            return []
+
+        X = _feature_matrix(feature_rows, self.feature_names, zero_features=('scenario',))
+
         # Stage 1: Predict system with probabilities
-        X_scaled = self.system_scaler.transform(X)
-        system_probs = self.system_clf.predict_proba(X_scaled)[0]
-        
-        # Get top systems to consider
-        top_system_indices = np.argsort(system_probs)[::-1][:3]
-        
-        all_predictions = []
-        
-        for sys_idx in top_system_indices:
-            system = str(self.system_le.classes_[sys_idx])
-            sys_prob = system_probs[sys_idx]
-            
-            if sys_prob < 0.05:  # Skip very unlikely systems
+        system_probs = self.system_clf.predict_proba(
+            self.system_scaler.transform(_model_input(self.system_scaler, X, self.feature_names))
+        )
+        top_systems = top_k_indices(system_probs, 3)
+        system_names = [str(s) for s in self.system_le.classes_]
+
+        # Skip very unlikely systems
+        rows_by_system = defaultdict(list)
+        for row, sys_indices in enumerate(top_systems):
+            for sys_idx in sys_indices:
+                if system_probs[row, sys_idx] >= 0.05:
+                    rows_by_system[sys_idx].append(row)
+
+        # Stage 2: Predict failure mode within each candidate system
+        stage2 = {}
+        for sys_idx, rows in rows_by_system.items():
+            system = system_names[sys_idx]
+            if system not in self.failure_models:
                 continue
-            
-            if system in self.failure_models:
-                # Stage 2: Predict failure mode within this system
-                clf, le, scaler, _ = self.failure_models[system]
-                X_sys_scaled = scaler.transform(X)
-                fail_probs = clf.predict_proba(X_sys_scaled)[0]
-                
-                for i, fail_prob in enumerate(fail_probs):
-                    failure_mode = str(le.classes_[i])
+            clf, le, scaler, _ = self.failure_models[system]
+            fail_probs = clf.predict_proba(
+                scaler.transform(_model_input(scaler, X[rows], self.feature_names))
+            )
+            stage2[sys_idx] = ([str(c) for c in le.classes_], dict(zip(rows, fail_probs)))
+
+        results = []
+        for row, sys_indices in enumerate(top_systems):
+            all_predictions = []
+            for sys_idx in sys_indices:
+                sys_prob = system_probs[row, sys_idx]
+                if sys_prob < 0.05:
+                    continue
+                system = system_names[sys_idx]
+                if sys_idx in stage2:
                     # Combined probability = P(system) * P(failure|system)
-                    combined_prob = sys_prob * fail_prob
-                    all_predictions.append((failure_mode, combined_prob, system))
-            else:
-                # Single-failure system (brakes, ev, starting)
-                # Infer failure mode from system
-                single_failure_map = {
-                    'brakes': 'brakes.brake_fade',
-                    'ev': 'tesla.hv_isolation_fault',
-                    'starting': 'starter.motor_failing',
-                }
-                failure_mode = single_failure_map.get(system, f"{system}.unknown")
-                all_predictions.append((failure_mode, sys_prob, system))
-        
-        # Sort by combined probability
-        all_predictions.sort(key=lambda x: x[1], reverse=True)
-        return all_predictions[:top_k]
+                    labels, fail_probs = stage2[sys_idx]
+                    for failure_mode, fail_prob in zip(labels, fail_probs[row]):
+                        all_predictions.append((failure_mode, sys_prob * fail_prob, system))
+                else:
+                    failure_mode = self.SINGLE_FAILURE_MAP.get(system, f"{system}.unknown")
+                    all_predictions.append((failure_mode, sys_prob, system))
+
+            # Sort by combined probability
+            all_predictions.sort(key=lambda x: x[1], reverse=True)
+            results.append(all_predictions[:top_k])
+
+        return results
 
 
 # =============================================================================
@@ -446,65 +511,65 @@ class HierarchicalPredictor:
         
         logger.info(f"Loaded hierarchical models for systems: {list(self.models.keys())}")
     
-    def _extract_features(self, features: Dict[str, float], system: str) -> Optional[torch.Tensor]:
-        """Extract and order features for a specific system's model."""
-        if system not in self.metadata:
-            return None
-        
-        expected_features = self.metadata[system].get('features', [])
-        if not expected_features:
-            return None
-        
-        # Build feature vector
-        values = []
-        for feat_name in expected_features:
-            val = features.get(feat_name, 0.0)
-            if val is None:
-                val = 0.0
-            values.append(float(val))
-        
-        return torch.tensor([values], dtype=torch.float32)
-    
     def predict(self, features: Dict[str, float], top_k: int = 4) -> List[Tuple[str, float, str]]:
         """
         Predict failure modes from feature dictionary.
-        
+
         Returns list of (failure_mode, probability, system) tuples.
-        
+
         Note: Single-class systems are excluded since they always predict 100%.
         Multi-class systems provide meaningful probability distributions.
         """
-        all_predictions = []
-        
+        return self.predict_batch([features], top_k)[0]
+
+    def predict_batch(
+        self,
+        feature_rows: Sequence[Dict[str, float]],
+        top_k: int = 4,
+    ) -> List[List[Tuple[str, float, str]]]:
+        """
+        Predict failure modes for many feature dicts.
+
+        Each system network runs once over the whole batch; systems trained on
+        the same feature list share one input tensor. The per-system softmax
+        outputs are concatenated so top-k is a single row-wise selection.
+
+        Returns one list of (failure_mode, probability, system) tuples per row.
+        """
+        if not feature_rows:
+            return []
+
+        inputs = {}
+        blocks = []
+        columns = []
+
         for system in self.systems:
-            model = self.models[system]
-            meta = self.metadata[system]
-            labels = meta.get('labels', [])
-            
+            model = self.models.get(system)
+            labels = self.metadata[system].get('labels', [])
+            expected_features = self.metadata[system].get('features', [])
+
             # Skip single-class systems (always predict 100%)
-            if len(labels) <= 1:
+            if model is None or len(labels) <= 1 or not expected_features:
                 continue
-            
-            # Get feature tensor
-            x = self._extract_features(features, system)
-            if x is None:
-                continue
-            
-            # Run inference
+
+            key = tuple(expected_features)
+            if key not in inputs:
+                inputs[key] = torch.from_numpy(_feature_matrix(feature_rows, expected_features))
+
             with torch.no_grad():
-                logits = model(x)
-                probs = torch.softmax(logits, dim=1)[0]
-            
-            # Collect predictions
-            for i, label in enumerate(labels):
-                prob = probs[i].item()
-                # Convert numpy string to regular string
-                label_str = str(label)
-                all_predictions.append((label_str, prob, system))
-        
-        # Sort by probability and return top_k
-        all_predictions.sort(key=lambda x: x[1], reverse=True)
-        return all_predictions[:top_k]
+                probs = torch.softmax(model(inputs[key]), dim=1)
+
+            blocks.append(probs.numpy())
+            columns.extend((str(label), system) for label in labels)
+
+        if not blocks:
+            return [[] for _ in feature_rows]
+
+        probs = np.hstack(blocks)
+        return [
+            [(columns[i][0], float(row_probs[i]), columns[i][1]) for i in row_top]
+            for row_probs, row_top in zip(probs, top_k_indices(probs, top_k))
+        ]
 
 
 class InferenceEngine:
@@ -657,8 +722,28 @@ class InferenceEngine:
         Returns:
             List of DiagnosticResult objects
         """
-        predictions = self.predictor.predict(features, top_k)
-        
+        return self._to_results(self.predictor.predict(features, top_k))
+
+    def diagnose_batch(
+        self,
+        feature_rows: Sequence[Dict[str, float]],
+        top_k: int = 4,
+    ) -> List[List[DiagnosticResult]]:
+        """
+        Diagnose many vehicles at once (fleet scoring, lot dashboards).
+
+        Args:
+            feature_rows: One feature dict per vehicle
+            top_k: Return top K predictions per vehicle
+
+        Returns:
+            One list of DiagnosticResult objects per input row, in input order
+        """
+        predictions = self.predictor.predict_batch(list(feature_rows), top_k)
+        return [self._to_results(row) for row in predictions]
+
+    def _to_results(self, predictions: List[tuple]) -> List[DiagnosticResult]:
+        """Convert predictor tuples into DiagnosticResult objects."""
         results = []
         for pred in predictions:
             # Hierarchical returns (failure_mode, prob, system)
@@ -707,25 +792,33 @@ class InferenceEngine:
         Returns:
             List of DiagnosticResult objects
         """
-        predictions = self.predictor.predict_from_pids(pid_series, top_k)
-        
-        results = []
-        for failure_mode, probability in predictions:
-            failure_mode = str(failure_mode)
-            system = get_system_from_failure_mode(failure_mode)
-            result = DiagnosticResult(
-                failure_mode=failure_mode,
-                probability=probability,
-                system=system,
-                explanation=FAILURE_EXPLANATIONS.get(
-                    failure_mode,
-                    f"Detected {failure_mode.replace('.', ' ').replace('_', ' ')} in {system} system"
-                ),
-                confidence=self._confidence_level(probability),
-            )
-            results.append(result)
-        
-        return results
+        if hasattr(self.predictor, "predict_from_pids"):
+            return self._to_results(self.predictor.predict_from_pids(pid_series, top_k))
+
+        # Chrono-feature models: window covers the whole capture
+        window = max((len(series) for series in pid_series.values()), default=0)
+        extractor = StreamingFeatureExtractor.from_series(pid_series, window=max(window, 1))
+        return self.diagnose_from_stream(extractor, top_k)
+
+    def diagnose_from_stream(
+        self,
+        extractor: StreamingFeatureExtractor,
+        top_k: int = 4,
+    ) -> List[DiagnosticResult]:
+        """
+        Diagnose from a live StreamingFeatureExtractor.
+
+        Can be called at any moment of a capture, e.g. from the
+        ELM327Service.monitor_pids callback after extractor.add_readings().
+
+        Args:
+            extractor: Extractor fed with the PID readings seen so far
+            top_k: Return top K predictions
+
+        Returns:
+            List of DiagnosticResult objects
+        """
+        return self.diagnose(extractor.features(), top_k)
     
     def _confidence_level(self, probability: float) -> str:
         """Convert probability to confidence level."""
@@ -4,9 +4,15 @@ Failure mode registry and utility functions.
 This module provides:
 - FAILURE_REGISTRY: All failure modes organized by system and component
 - Utility functions for querying failures by component, system, DTC, or symptom
+
+Lookups go through an immutable index that is built on first use and
+dropped whenever FAILURE_REGISTRY (or one of its nested dicts/lists) is
+mutated, so it is rebuilt on the next lookup.
 """
 
-from typing import Dict, List, Optional
+import functools
+import re
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
 from .base import FailureMode
 
@@ -363,58 +369,217 @@ FAILURE_REGISTRY: Dict[str, Dict[str, List[FailureMode]]] = {
 }
 
 
+# ==============================================================================
+# REGISTRY INDEX
+# ==============================================================================
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Built lazily by _get_index(); reset to None by any registry mutation
+_index: Optional["_RegistryIndex"] = None
+
+
+def invalidate_registry_index() -> None:
+    """
+    Drop the lookup index so it is rebuilt on the next query.
+    
+    Called automatically on registry mutation; call it by hand after editing
+    a FailureMode in place (e.g. its expected_dtcs or symptoms).
+    """
+    global _index
+    _index = None
+
+
+def _invalidating(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        invalidate_registry_index()
+        return result
+    return wrapper
+
+
+def _track(value):
+    if isinstance(value, dict) and not isinstance(value, _TrackedDict):
+        return _TrackedDict(value)
+    if isinstance(value, list) and not isinstance(value, _TrackedList):
+        return _TrackedList(value)
+    return value
+
+
+class _TrackedList(list):
+    """List of failure modes that invalidates the index when mutated."""
+    
+    __setitem__ = _invalidating(list.__setitem__)
+    __delitem__ = _invalidating(list.__delitem__)
+    __iadd__ = _invalidating(list.__iadd__)
+    __imul__ = _invalidating(list.__imul__)
+    append = _invalidating(list.append)
+    extend = _invalidating(list.extend)
+    insert = _invalidating(list.insert)
+    pop = _invalidating(list.pop)
+    remove = _invalidating(list.remove)
+    clear = _invalidating(list.clear)
+    sort = _invalidating(list.sort)
+    reverse = _invalidating(list.reverse)
+
+
+class _TrackedDict(dict):
+    """Registry dict that invalidates the index when mutated.
+    
+    Nested dicts and lists are wrapped on insertion so that changes at any
+    depth (system -> component -> failure list) are seen.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        for key, value in dict(*args, **kwargs).items():
+            dict.__setitem__(self, key, _track(value))
+    
+    @_invalidating
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, _track(value))
+    
+    @_invalidating
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            dict.__setitem__(self, key, _track(value))
+    
+    @_invalidating
+    def setdefault(self, key, default=None):
+        return dict.setdefault(self, key, _track(default))
+    
+    def __ior__(self, other):
+        self.update(other)
+        return self
+    
+    __delitem__ = _invalidating(dict.__delitem__)
+    pop = _invalidating(dict.pop)
+    popitem = _invalidating(dict.popitem)
+    clear = _invalidating(dict.clear)
+
+
+class _RegistryIndex:
+    """
+    Immutable lookup tables over one snapshot of FAILURE_REGISTRY.
+    
+    Failures are referred to by their position in registry order, so every
+    lookup returns results in the same order (and with the same duplicates)
+    as a linear scan of get_all_failure_modes().
+    """
+    
+    _TOKEN_CACHE_SIZE = 4096
+    
+    def __init__(self, registry: Dict[str, Dict[str, List[FailureMode]]]):
+        all_failures: List[FailureMode] = []
+        by_system: Dict[str, Tuple[FailureMode, ...]] = {}
+        by_component: Dict[Tuple[str, str], Tuple[FailureMode, ...]] = {}
+        for system_id, components in registry.items():
+            system_failures: List[FailureMode] = []
+            for component_id, failures in components.items():
+                by_component[(system_id, component_id)] = tuple(failures)
+                system_failures.extend(failures)
+            by_system[system_id] = tuple(system_failures)
+            all_failures.extend(system_failures)
+        
+        self.all: Tuple[FailureMode, ...] = tuple(all_failures)
+        self.by_system = by_system
+        self.by_component = by_component
+        
+        by_id: Dict[str, FailureMode] = {}
+        by_dtc: Dict[str, List[int]] = {}
+        keywords: Dict[str, List[int]] = {}
+        descriptions: List[Tuple[str, ...]] = []
+        for pos, failure in enumerate(self.all):
+            by_id.setdefault(failure.id, failure)
+            for dtc in dict.fromkeys(failure.expected_dtcs):
+                by_dtc.setdefault(dtc, []).append(pos)
+            
+            lowered = tuple(symptom.description.lower() for symptom in failure.symptoms)
+            descriptions.append(lowered)
+            for token in {t for d in lowered for t in _TOKEN_RE.findall(d)}:
+                keywords.setdefault(token, []).append(pos)
+        
+        self.by_id = by_id
+        self.by_dtc = {dtc: tuple(positions) for dtc, positions in by_dtc.items()}
+        self.keywords = {token: frozenset(positions) for token, positions in keywords.items()}
+        self.descriptions = tuple(descriptions)
+        self._token_matches: Dict[str, FrozenSet[int]] = {}
+    
+    def _positions_for_token(self, token: str) -> FrozenSet[int]:
+        """Failures with a description word containing ``token``."""
+        positions = self._token_matches.get(token)
+        if positions is None:
+            positions = self.keywords.get(token, frozenset())
+            for word, postings in self.keywords.items():
+                if token in word and word != token:
+                    positions = positions | postings
+            if len(self._token_matches) >= self._TOKEN_CACHE_SIZE:
+                self._token_matches.clear()
+            self._token_matches[token] = positions
+        return positions
+    
+    def failures_for_symptom(self, keyword: str) -> List[FailureMode]:
+        keyword = keyword.lower()
+        
+        # Every alphanumeric run of the keyword sits inside one description
+        # word, so the inverted index gives a superset of the matches
+        candidates = None
+        for token in _TOKEN_RE.findall(keyword):
+            positions = self._positions_for_token(token)
+            candidates = positions if candidates is None else candidates & positions
+            if not candidates:
+                return []
+        order = range(len(self.all)) if candidates is None else sorted(candidates)
+        
+        return [
+            self.all[pos]
+            for pos in order
+            if any(keyword in description for description in self.descriptions[pos])
+        ]
+
+
+def _get_index() -> _RegistryIndex:
+    global _index
+    index = _index
+    if index is None:
+        index = _index = _RegistryIndex(FAILURE_REGISTRY)
+    return index
+
+
+FAILURE_REGISTRY = _TrackedDict(FAILURE_REGISTRY)
+
+
 # ==============================================================================
 # UTILITY FUNCTIONS
 # ==============================================================================
 
 def get_failure_modes_for_component(system_id: str, component_id: str) -> List[FailureMode]:
     """Get all failure modes for a specific component."""
-    system_failures = FAILURE_REGISTRY.get(system_id, {})
-    return system_failures.get(component_id, [])
+    return list(_get_index().by_component.get((system_id, component_id), ()))
 
 
 def get_failure_modes_for_system(system_id: str) -> List[FailureMode]:
     """Get all failure modes for a system."""
-    system_failures = FAILURE_REGISTRY.get(system_id, {})
-    all_failures = []
-    for component_failures in system_failures.values():
-        all_failures.extend(component_failures)
-    return all_failures
+    return list(_get_index().by_system.get(system_id, ()))
 
 
 def get_all_failure_modes() -> List[FailureMode]:
     """Get all registered failure modes."""
-    all_failures = []
-    for system_failures in FAILURE_REGISTRY.values():
-        for component_failures in system_failures.values():
-            all_failures.extend(component_failures)
-    return all_failures
+    return list(_get_index().all)
 
 
 def get_failure_by_id(failure_id: str) -> Optional[FailureMode]:
     """Get a failure mode by its ID."""
-    for failure in get_all_failure_modes():
-        if failure.id == failure_id:
-            return failure
-    return None
+    return _get_index().by_id.get(failure_id)
 
 
 def get_failures_for_dtc(dtc: str) -> List[FailureMode]:
     """Get all failure modes that can cause a specific DTC."""
-    matching = []
-    for failure in get_all_failure_modes():
-        if dtc in failure.expected_dtcs:
-            matching.append(failure)
-    return matching
+    index = _get_index()
+    return [index.all[pos] for pos in index.by_dtc.get(dtc, ())]
 
 
 def get_failures_for_symptom(symptom_keyword: str) -> List[FailureMode]:
     """Get failure modes matching a symptom keyword."""
-    keyword = symptom_keyword.lower()
-    matching = []
-    for failure in get_all_failure_modes():
-        for symptom in failure.symptoms:
-            if keyword in symptom.description.lower():
-                matching.append(failure)
-                break
-    return matching
+    return _get_index().failures_for_symptom(symptom_keyword)
@@ -21,6 +21,10 @@ Usage:
     sim = PhysicsSimulator()
     pid_series = sim.simulate_failure("thermostat_stuck_open", duration_sec=300)
     # Returns time series of PID values showing failure progression
+
+    # Many vehicles at once (NumPy state arrays, for training data)
+    batch = sim.simulate_batch(["normal", "vacuum_leak"], configs, seed=42)
+    features = sim.extract_features_batch(batch)
 """
 
 from dataclasses import dataclass, field
@@ -85,6 +89,108 @@ class EngineState:
     engine_running: bool = False
 
 
+@dataclass
+class BatchEngineState:
+    """
+    EngineState for N vehicles at once: every field is a length-N array.
+
+    Used by PhysicsSimulator.simulate_batch; the physics models' update_batch
+    methods mirror their scalar update() with boolean masks in place of
+    if/else branches.
+    """
+    time_sec: float
+    rpm: np.ndarray
+    coolant_temp_f: np.ndarray
+    intake_air_temp_f: np.ndarray
+    map_kpa: np.ndarray
+    maf_gs: np.ndarray
+    throttle_pct: np.ndarray
+    vehicle_speed_mph: np.ndarray
+    stft_b1: np.ndarray
+    ltft_b1: np.ndarray
+    o2_b1s1_v: np.ndarray
+    voltage: np.ndarray
+    fuel_pressure_kpa: np.ndarray
+    timing_advance_deg: np.ndarray
+    engine_load_pct: np.ndarray
+    thermostat_open_pct: np.ndarray
+    coolant_flow_rate: np.ndarray
+    fan_running: np.ndarray
+    engine_running: np.ndarray
+
+    @classmethod
+    def initial(cls, configs: List["SimulationConfig"]) -> "BatchEngineState":
+        """Same starting point as EngineState(...) in simulate_failure."""
+        n = len(configs)
+
+        def full(value):
+            return np.full(n, value, dtype=np.float64)
+
+        defaults = EngineState()
+        return cls(
+            time_sec=0.0,
+            rpm=full(defaults.rpm),
+            coolant_temp_f=np.array([c.initial_coolant_f for c in configs], dtype=np.float64),
+            intake_air_temp_f=np.array([c.ambient_temp_f for c in configs], dtype=np.float64),
+            map_kpa=full(defaults.map_kpa),
+            maf_gs=full(defaults.maf_gs),
+            throttle_pct=full(defaults.throttle_pct),
+            vehicle_speed_mph=full(defaults.vehicle_speed_mph),
+            stft_b1=full(defaults.stft_b1),
+            ltft_b1=full(defaults.ltft_b1),
+            o2_b1s1_v=full(defaults.o2_b1s1_v),
+            voltage=full(defaults.voltage),
+            fuel_pressure_kpa=full(defaults.fuel_pressure_kpa),
+            timing_advance_deg=full(defaults.timing_advance_deg),
+            engine_load_pct=full(defaults.engine_load_pct),
+            thermostat_open_pct=full(defaults.thermostat_open_pct),
+            coolant_flow_rate=full(defaults.coolant_flow_rate),
+            fan_running=np.zeros(n, dtype=bool),
+            engine_running=np.zeros(n, dtype=bool),
+        )
+
+
+class FailureMasks:
+    """Per-vehicle failure mode as cached boolean masks: masks["vacuum_leak"]."""
+
+    def __init__(self, failure_modes: List[str]):
+        self.modes = np.asarray(failure_modes, dtype=object)
+        self.n = len(failure_modes)
+        self._masks: Dict[str, np.ndarray] = {}
+
+    def __getitem__(self, failure_mode: str) -> np.ndarray:
+        mask = self._masks.get(failure_mode)
+        if mask is None:
+            mask = self._masks[failure_mode] = self.modes == failure_mode
+        return mask
+
+
+@dataclass
+class BatchSimulationResult:
+    """
+    Output of PhysicsSimulator.simulate_batch.
+
+    series[pid] is an (N, T) array on the common time grid `times`; vehicle i
+    has lengths[i] valid samples, the rest of its row is NaN.
+    """
+    failure_modes: List[str]
+    times: np.ndarray
+    lengths: np.ndarray
+    series: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.failure_modes)
+
+    def pid_series(self, i: int) -> Dict[str, List[Tuple[float, float]]]:
+        """Vehicle i in the simulate_failure format: pid -> [(time, value), ...]."""
+        n = self.lengths[i]
+        times = self.times[:n].tolist()
+        return {
+            pid: list(zip(times, values[i, :n].tolist()))
+            for pid, values in self.series.items()
+        }
+
+
 # =============================================================================
 # PHYSICS MODELS
 # =============================================================================
@@ -183,6 +289,59 @@ class ThermalModel:
         state.coolant_temp_f = min(state.coolant_temp_f, 280.0)  # Max realistic overheat
 
 
+    @classmethod
+    def update_batch(cls, state: BatchEngineState, dt: float, fm: FailureMasks):
+        """Vectorized update() over a batch of vehicles."""
+        running = state.engine_running
+        temp_above_ambient = state.coolant_temp_f - cls.AMBIENT_TEMP
+
+        # Engine off - cool toward ambient
+        off_temp = state.coolant_temp_f - cls.AMBIENT_COOLING_RATE * temp_above_ambient * dt
+
+        # Heat generation based on load
+        load_factor = state.engine_load_pct / 100.0
+        heat_rate = cls.ENGINE_HEAT_RATE_IDLE + (cls.ENGINE_HEAT_RATE_LOAD - cls.ENGINE_HEAT_RATE_IDLE) * load_factor
+
+        # Thermostat behavior
+        normal_open = np.clip(
+            (state.coolant_temp_f - cls.THERMOSTAT_OPEN_TEMP) / (cls.THERMOSTAT_FULL_OPEN - cls.THERMOSTAT_OPEN_TEMP),
+            0.0, 1.0,
+        )
+        thermostat = np.where(fm["thermostat_stuck_open"], 1.0,
+                              np.where(fm["thermostat_stuck_closed"], 0.0, normal_open))
+
+        # Water pump - determines coolant flow
+        flow = np.where(fm["water_pump_failure"], 0.1, 0.5 + 0.5 * (state.rpm / 3000))
+
+        # Fan control (only changes while the thermostat is open)
+        is_open = thermostat > 0
+        fan = state.fan_running.copy()
+        fan[is_open & (state.coolant_temp_f > cls.FAN_ON_TEMP)] = True
+        fan[is_open & (state.coolant_temp_f < cls.FAN_OFF_TEMP)] = False
+        fan[is_open & fm["cooling_fan_failure"]] = False
+
+        # Radiator cooling when open, block cooling when closed
+        base_cooling = cls.RADIATOR_COOLING_RATE * temp_above_ambient * thermostat * flow
+        base_cooling = np.where(fan, base_cooling * 2.0, base_cooling)
+        cooling_rate = np.where(
+            is_open,
+            base_cooling * (1.0 + state.vehicle_speed_mph / 30.0),
+            cls.AMBIENT_COOLING_RATE * temp_above_ambient * 0.3,
+        )
+
+        # Coolant leak - less coolant to radiate, less mass to heat
+        leak = fm["coolant_leak"]
+        cooling_rate = np.where(leak, cooling_rate * 0.6, cooling_rate)
+        heat_rate = np.where(leak, heat_rate * 1.3, heat_rate)
+
+        on_temp = np.clip(state.coolant_temp_f + (heat_rate - cooling_rate) * dt, cls.AMBIENT_TEMP, 280.0)
+
+        state.coolant_temp_f = np.where(running, on_temp, off_temp)
+        state.thermostat_open_pct = np.where(running, thermostat, 0.0)
+        state.coolant_flow_rate = np.where(running, flow, state.coolant_flow_rate)
+        state.fan_running = running & fan
+
+
 class FuelModel:
     """Models fuel system behavior."""
     
@@ -241,6 +400,39 @@ class FuelModel:
         state.ltft_b1 = max(-25, min(25, state.ltft_b1))
 
 
+    @classmethod
+    def update_batch(cls, state: BatchEngineState, dt: float, fm: FailureMasks):
+        """Vectorized update() over a batch of vehicles."""
+        running = state.engine_running
+
+        # Base fuel pressure
+        target_pressure = np.full(fm.n, cls.NORMAL_FUEL_PRESSURE_KPA)
+        target_pressure[fm["fuel_pump_weak"]] *= 0.75
+        target_pressure[fm["fuel_pressure_regulator_failure"]] *= 1.3
+        target_pressure[fm["clogged_fuel_filter"]] *= 0.85
+
+        pressure = state.fuel_pressure_kpa + (target_pressure - state.fuel_pressure_kpa) * 0.1
+
+        # Fuel trim response to pressure, air and injector issues
+        pressure_error = (pressure - cls.NORMAL_FUEL_PRESSURE_KPA) / cls.NORMAL_FUEL_PRESSURE_KPA
+        base_trim = (
+            -pressure_error * 30
+            + 15 * fm["vacuum_leak"]
+            + 12 * fm["injector_clogged"]
+            - 10 * fm["injector_leaking"]
+            + 8 * fm["maf_sensor_dirty"]
+        )
+
+        # STFT responds quickly, LTFT adapts slowly
+        stft = np.clip(state.stft_b1 + (base_trim - state.stft_b1) * 0.3 * dt, -25, 25)
+        ltft = np.where(np.abs(stft) > 5, state.ltft_b1 + stft * 0.01 * dt, state.ltft_b1)
+        ltft = np.clip(ltft, -25, 25)
+
+        state.fuel_pressure_kpa = np.where(running, pressure, 0.0)
+        state.stft_b1 = np.where(running, stft, 0.0)
+        state.ltft_b1 = np.where(running, ltft, state.ltft_b1)
+
+
 class O2SensorModel:
     """Models O2 sensor behavior."""
     
@@ -277,6 +469,27 @@ class O2SensorModel:
         state.o2_b1s1_v = max(0.0, min(1.0, state.o2_b1s1_v))
 
 
+    @classmethod
+    def update_batch(cls, state: BatchEngineState, dt: float, fm: FailureMasks, rng: np.random.Generator):
+        """Vectorized update() over a batch of vehicles."""
+        t = state.time_sec
+        total_trim = state.stft_b1 + state.ltft_b1
+
+        # Normal fast switching, biased by fuel trim
+        switch_val = math.sin(t * 2 * math.pi / cls.SWITCH_PERIOD_SEC)
+        value = cls.STOICH_VOLTAGE + switch_val * 0.35 - total_trim * 0.01
+
+        # Slow switching, dampened response
+        lazy_target = cls.STOICH_VOLTAGE + math.sin(t * 0.5) * 0.2
+        value = np.where(fm["o2_sensor_lazy"], state.o2_b1s1_v + (lazy_target - state.o2_b1s1_v) * 0.1 * dt, value)
+
+        jitter = rng.uniform(-0.02, 0.02, fm.n)
+        value = np.where(fm["o2_sensor_stuck_lean"], cls.LEAN_VOLTAGE + jitter, value)
+        value = np.where(fm["o2_sensor_stuck_rich"], cls.RICH_VOLTAGE + jitter, value)
+
+        state.o2_b1s1_v = np.where(state.engine_running, np.clip(value, 0.0, 1.0), 0.0)
+
+
 class ElectricalModel:
     """Models electrical system behavior."""
     
@@ -309,6 +522,27 @@ class ElectricalModel:
             state.voltage += random.uniform(-0.1, 0.1)
 
 
+    @classmethod
+    def update_batch(cls, state: BatchEngineState, dt: float, fm: FailureMasks, rng: np.random.Generator):
+        """Vectorized update() over a batch of vehicles."""
+        n = fm.n
+
+        # Battery only
+        off_voltage = np.where(
+            fm["battery_weak"],
+            11.8 + rng.uniform(-0.2, 0.2, n),
+            cls.BATTERY_VOLTAGE + rng.uniform(-0.1, 0.1, n),
+        )
+
+        # Engine running - alternator charging
+        target = (cls.CHARGING_VOLTAGE_MIN + cls.CHARGING_VOLTAGE_MAX) / 2
+        on_voltage = state.voltage + (target - state.voltage) * 0.5 * dt + rng.uniform(-0.1, 0.1, n)
+        on_voltage = np.where(fm["alternator_failure"], np.maximum(10.0, state.voltage - 0.01 * dt), on_voltage)
+        on_voltage = np.where(fm["voltage_regulator_failure"], 15.5 + rng.uniform(-1.0, 1.0, n), on_voltage)
+
+        state.voltage = np.where(state.engine_running, on_voltage, off_voltage)
+
+
 class IntakeModel:
     """Models intake/air system behavior."""
     
@@ -355,6 +589,36 @@ class IntakeModel:
             state.intake_air_temp_f = 70 + heat_soak + random.uniform(-2, 2)
 
 
+    @classmethod
+    def update_batch(cls, state: BatchEngineState, dt: float, fm: FailureMasks, rng: np.random.Generator):
+        """Vectorized update() over a batch of vehicles."""
+        n = fm.n
+        running = state.engine_running
+
+        # MAP based on throttle, plus unmetered air
+        base_map = (
+            cls.IDLE_MAP_KPA + (cls.ATMOSPHERIC_KPA - cls.IDLE_MAP_KPA) * (state.throttle_pct / 100)
+            + 15 * fm["vacuum_leak"]
+            + 8 * fm["pcv_valve_stuck_open"]
+        )
+        map_kpa = base_map + rng.uniform(-1, 1, n)
+
+        # MAF based on RPM and throttle
+        base_maf = 3.0 + (state.rpm / 1000) * 5.0 * (1 + state.throttle_pct / 100)
+        base_maf = np.where(fm["maf_sensor_dirty"], base_maf * 0.85, base_maf)
+        base_maf = np.where(fm["maf_sensor_failure"], 0.0, base_maf)
+        base_maf = np.where(fm["air_filter_clogged"], base_maf * 0.9, base_maf)
+        maf = base_maf + rng.uniform(-0.5, 0.5, n)
+
+        # Intake air temp rises slightly with engine heat
+        heat_soak = min(20, state.time_sec / 60 * 5)
+        iat = np.where(fm["iat_sensor_failure"], -40.0, 70 + heat_soak + rng.uniform(-2, 2, n))
+
+        state.map_kpa = np.where(running, map_kpa, cls.ATMOSPHERIC_KPA)
+        state.maf_gs = np.where(running, maf, 0.0)
+        state.intake_air_temp_f = np.where(running, iat, 70.0)
+
+
 class IgnitionModel:
     """Models ignition system behavior."""
     
@@ -383,6 +647,18 @@ class IgnitionModel:
         state.timing_advance_deg = target + random.uniform(-0.5, 0.5)
 
 
+    @classmethod
+    def update_batch(cls, state: BatchEngineState, dt: float, fm: FailureMasks, rng: np.random.Generator):
+        """Vectorized update() over a batch of vehicles."""
+        rpm_advance = (state.rpm - 800) / 1000 * 10
+        load_retard = state.engine_load_pct / 100 * 5
+        target = cls.BASE_TIMING + rpm_advance - load_retard + 5 * fm["knock_sensor_failure"]
+
+        state.timing_advance_deg = np.where(
+            state.engine_running, target + rng.uniform(-0.5, 0.5, fm.n), 0.0
+        )
+
+
 # =============================================================================
 # MAIN SIMULATOR
 # =============================================================================
@@ -435,6 +711,25 @@ class PhysicsSimulator:
         "normal": None,
     }
     
+    # Recorded PIDs for simulate_batch: (EngineState field, noise amplitude per
+    # unit noise_level), in simulate_failure's output order
+    BATCH_PIDS = {
+        "coolant_temp": ("coolant_temp_f", 10),
+        "rpm": ("rpm", 50),
+        "stft_b1": ("stft_b1", 2),
+        "ltft_b1": ("ltft_b1", 2),
+        "o2_b1s1": ("o2_b1s1_v", 0),
+        "voltage": ("voltage", 0),
+        "map": ("map_kpa", 5),
+        "maf": ("maf_gs", 1),
+        "throttle_position": ("throttle_pct", 0),
+        "vehicle_speed": ("vehicle_speed_mph", 0),
+        "intake_air_temp": ("intake_air_temp_f", 0),
+        "fuel_pressure": ("fuel_pressure_kpa", 0),
+        "timing_advance": ("timing_advance_deg", 0),
+        "engine_load": ("engine_load_pct", 0),
+    }
+
     def __init__(self, vehicle_specs: VehicleSpecs = None):
         """Initialize simulator with optional vehicle-specific specs."""
         self.vehicle_specs = vehicle_specs
@@ -556,9 +851,137 @@ class PhysicsSimulator:
             results["engine_load"].append((t, state.engine_load_pct))
         
         return results
+
+    def simulate_batch(
+        self,
+        failure_modes: List[str],
+        configs: List[SimulationConfig] = None,
+        driving_profiles: List[List[Tuple[float, float, float]]] = None,
+        seed: Optional[int] = None,
+    ) -> BatchSimulationResult:
+        """
+        Simulate N vehicles at once with NumPy state arrays.
+
+        Runs the same physics as simulate_failure, one vectorized update per
+        model and time step for the whole batch instead of one Python call
+        per vehicle. Vehicles may differ in failure mode, ambient/coolant
+        temperature, noise level, duration and driving profile; they must
+        share the sample rate.
+
+        The random streams differ from simulate_failure (which uses the
+        global `random` module), so individual runs are not bitwise equal,
+        but every random draw has the same distribution. Given `seed`, the
+        result is reproducible.
+
+        Args:
+            failure_modes: One SUPPORTED_FAILURES key per vehicle
+            configs: One SimulationConfig per vehicle (default: all default)
+            driving_profiles: Optional (time, rpm, throttle) list per vehicle
+            seed: Seed for profiles, sensor jitter and noise
+
+        Returns:
+            BatchSimulationResult with (N, T) arrays per PID
+        """
+        for failure_mode in failure_modes:
+            if failure_mode not in self.SUPPORTED_FAILURES:
+                raise ValueError(f"Unknown failure mode: {failure_mode}. "
+                               f"Supported: {list(self.SUPPORTED_FAILURES.keys())}")
+
+        n = len(failure_modes)
+        configs = configs or [SimulationConfig() for _ in range(n)]
+        if len(configs) != n:
+            raise ValueError("configs must have one entry per failure mode")
+        if len({c.sample_rate_hz for c in configs}) > 1:
+            raise ValueError("simulate_batch requires a common sample_rate_hz")
+
+        rng = np.random.default_rng(seed)
+        if driving_profiles is None:
+            driving_profiles = [self._generate_driving_profile(c, rng) for c in configs]
+
+        dt = 1.0 / configs[0].sample_rate_hz if configs else 1.0
+        lengths = np.array([len(np.arange(0, c.duration_sec, dt)) for c in configs], dtype=np.int64)
+        time_points = np.arange(0, max((c.duration_sec for c in configs), default=0), dt)
+
+        # Driving profiles padded to a rectangle; padding never becomes active
+        width = max((len(p) for p in driving_profiles), default=1)
+        prof_times = np.full((n, width), np.inf)
+        prof_rpm = np.zeros((n, width))
+        prof_throttle = np.zeros((n, width))
+        for i, profile in enumerate(driving_profiles):
+            points = np.asarray(profile, dtype=np.float64).reshape(-1, 3)
+            prof_times[i, :len(points)] = points[:, 0]
+            prof_rpm[i, :len(points)] = points[:, 1]
+            prof_throttle[i, :len(points)] = points[:, 2]
+        rows = np.arange(n)
+
+        fm = FailureMasks(failure_modes)
+        state = BatchEngineState.initial(configs)
+        noise = np.array([c.noise_level for c in configs])
+
+        series = {pid: np.empty((n, len(time_points))) for pid in self.BATCH_PIDS}
+
+        for step, t in enumerate(time_points):
+            state.time_sec = t
+
+            # Get driving inputs from profile
+            profile_idx = np.maximum((prof_times <= t).sum(axis=1) - 1, 0)
+            target_rpm = prof_rpm[rows, profile_idx]
+            target_throttle = prof_throttle[rows, profile_idx]
+
+            # Engine start at t=5
+            if t >= 5 and not state.engine_running.all():
+                state.rpm[~state.engine_running] = 1200  # Cranking
+                state.engine_running[:] = True
+
+            # Smooth RPM and throttle transitions
+            running = state.engine_running
+            state.rpm = np.where(running, state.rpm + (target_rpm - state.rpm) * 0.1, state.rpm)
+            state.throttle_pct = np.where(
+                running, state.throttle_pct + (target_throttle - state.throttle_pct) * 0.2, state.throttle_pct
+            )
+            state.engine_load_pct = np.where(
+                running, state.throttle_pct * 0.7 + (state.rpm / 6000) * 30, state.engine_load_pct
+            )
+            state.vehicle_speed_mph = np.where(
+                running, np.maximum(0, (state.rpm - 800) / 40), state.vehicle_speed_mph
+            )
+
+            # Update all physics models
+            ThermalModel.update_batch(state, dt, fm)
+            FuelModel.update_batch(state, dt, fm)
+            O2SensorModel.update_batch(state, dt, fm, rng)
+            ElectricalModel.update_batch(state, dt, fm, rng)
+            IntakeModel.update_batch(state, dt, fm, rng)
+            IgnitionModel.update_batch(state, dt, fm, rng)
+
+            # Record results with noise
+            for pid, (field_name, scale) in self.BATCH_PIDS.items():
+                values = getattr(state, field_name)
+                if scale:
+                    amplitude = noise * scale
+                    values = values + rng.uniform(-1.0, 1.0, n) * amplitude
+                series[pid][:, step] = values
+
+        # Samples past a vehicle's own duration are not part of its run
+        past_end = np.arange(len(time_points))[None, :] >= lengths[:, None]
+        for values in series.values():
+            values[past_end] = np.nan
+
+        return BatchSimulationResult(
+            failure_modes=list(failure_modes),
+            times=time_points,
+            lengths=lengths,
+            series=series,
+        )
     
-    def _generate_driving_profile(self, config: SimulationConfig) -> List[Tuple[float, float, float]]:
-        """Generate a realistic driving profile."""
+    def _generate_driving_profile(self, config: SimulationConfig, rng=None) -> List[Tuple[float, float, float]]:
+        """
+        Generate a realistic driving profile.
+
+        `rng` may be a numpy Generator (simulate_batch); defaults to the
+        global `random` module.
+        """
+        rng = random if rng is None else rng
         profile = []
         
         # First 5 seconds - engine off
@@ -581,17 +1004,17 @@ class PhysicsSimulator:
             t = 10
             while t < config.duration_sec:
                 # Random driving segments
-                segment_type = random.choice(["idle", "accelerate", "cruise", "decel"])
-                segment_duration = random.uniform(15, 45)
+                segment_type = rng.choice(["idle", "accelerate", "cruise", "decel"])
+                segment_duration = rng.uniform(15, 45)
                 
                 if segment_type == "idle":
                     profile.append((t, 800, 5))
                 elif segment_type == "accelerate":
-                    profile.append((t, random.uniform(2000, 4000), random.uniform(40, 80)))
+                    profile.append((t, rng.uniform(2000, 4000), rng.uniform(40, 80)))
                 elif segment_type == "cruise":
-                    profile.append((t, random.uniform(1500, 2500), random.uniform(20, 40)))
+                    profile.append((t, rng.uniform(1500, 2500), rng.uniform(20, 40)))
                 elif segment_type == "decel":
-                    profile.append((t, random.uniform(1000, 1500), random.uniform(0, 10)))
+                    profile.append((t, rng.uniform(1000, 1500), rng.uniform(0, 10)))
                 
                 t += segment_duration
         
@@ -642,6 +1065,59 @@ class PhysicsSimulator:
         
         return features
 
+    def extract_features_batch(self, result: BatchSimulationResult) -> List[Dict[str, float]]:
+        """
+        extract_features() for every vehicle of a simulate_batch result.
+
+        Statistics are computed over the whole (N, T) arrays at once, NaN
+        padding excluded. Returns one feature dict per vehicle, with the
+        same keys and values extract_features gives for pid_series(i).
+        """
+        n = len(result)
+        lengths = result.lengths
+        times = result.times
+        features: List[Dict[str, float]] = [{} for _ in range(n)]
+        valid = np.flatnonzero(lengths >= 2)
+        if len(valid) == 0 or len(times) < 2:
+            return features
+
+        lengths = lengths[valid]
+        step = max(times[1] - times[0], 0.001)
+
+        # Indices of each vehicle's last (up to) 10 samples
+        tail = lengths[:, None] - 10 + np.arange(10)[None, :]
+        tail_valid = tail >= 0
+        tail = np.maximum(tail, 0)
+
+        columns = {}
+        for pid_name, all_values in result.series.items():
+            values = all_values[valid]
+            lo = np.nanmin(values, axis=1)
+            hi = np.nanmax(values, axis=1)
+            rates = np.diff(values, axis=1) / step
+            last = np.take_along_axis(values, tail, axis=1)
+            columns[f"{pid_name}_mean"] = np.nanmean(values, axis=1)
+            columns[f"{pid_name}_std"] = np.nanstd(values, axis=1)
+            columns[f"{pid_name}_min"] = lo
+            columns[f"{pid_name}_max"] = hi
+            columns[f"{pid_name}_range"] = hi - lo
+            columns[f"{pid_name}_rate_mean"] = np.nanmean(rates, axis=1)
+            columns[f"{pid_name}_rate_max"] = np.nanmax(np.abs(rates), axis=1)
+            columns[f"{pid_name}_final"] = (last * tail_valid).sum(axis=1) / tail_valid.sum(axis=1)
+
+            # Time to reach 180°F (for warmup analysis)
+            if pid_name == "coolant_temp":
+                above_threshold = values >= 180
+                reached = above_threshold.any(axis=1)
+                first = np.argmax(above_threshold, axis=1)
+                columns["coolant_warmup_time"] = np.where(reached, times[first], times[lengths - 1])
+
+        names = list(columns)
+        matrix = np.column_stack([columns[name] for name in names]).tolist()
+        for i, row in zip(valid, matrix):
+            features[i] = dict(zip(names, row))
+        return features
+
 
 # =============================================================================
 # CLI FOR TESTING
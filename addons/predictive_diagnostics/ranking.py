@@ -0,0 +1,20 @@
+"""
+Ranking helpers shared by the RF predictors and the inference engine.
+
+Kept free of sklearn/torch imports so every model module can use them.
+"""
+
+import numpy as np
+
+
+def top_k_indices(probs: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k largest values in each row, highest first."""
+    k = min(k, probs.shape[1])
+    if k <= 0:
+        return np.empty((probs.shape[0], 0), dtype=np.intp)
+    if k < probs.shape[1]:
+        idx = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(probs.shape[1]), probs.shape)
+    order = np.argsort(-np.take_along_axis(probs, idx, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1)
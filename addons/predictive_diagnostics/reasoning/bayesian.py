@@ -12,46 +12,115 @@ This allows the system to:
 3. Recommend the most informative next test
 """
 
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple, Set
-import math
+from typing import Dict, Iterable, List, Optional, Tuple, Set
+
+import numpy as np
+
+
+# Evidence types that trigger the safety-critical HV-isolation override
+HV_ISOLATION_EVIDENCE = ("insulation_resistance_low", "dtc_insulation_resistance_low")
+HV_ISOLATION_FAILURES = ("hv_isolation_fault", "tesla_hv_isolation_fault")
+
+
+class FailureSpace:
+    """
+    Ordered set of failure IDs that belief vectors are indexed by.
+    
+    Shared by every state derived from the same initial state, so the
+    reasoner compiles its likelihood matrix once per space.
+    """
+    
+    def __init__(self, failure_ids: Iterable[str]):
+        self.ids: Tuple[str, ...] = tuple(failure_ids)
+        self.index: Dict[str, int] = {f: i for i, f in enumerate(self.ids)}
+        self._hash = hash(self.ids)
+        
+        # Masks used by the HV-isolation override
+        self.hv_index = self.index.get("hv_isolation_fault")
+        self.tesla_hv_index = self.index.get("tesla_hv_isolation_fault")
+        self.non_isolation_mask = np.array(
+            [f not in HV_ISOLATION_FAILURES and not f.startswith("normal") for f in self.ids],
+            dtype=bool,
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __hash__(self) -> int:
+        return self._hash
+    
+    def __eq__(self, other) -> bool:
+        return self is other or (isinstance(other, FailureSpace) and self.ids == other.ids)
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    """Scale to sum 1 (left unchanged when the total is 0)."""
+    total = vector.sum()
+    if total > 0:
+        return vector / total
+    return vector
+
+
+def _entropy(vector: np.ndarray) -> float:
+    nonzero = vector[vector > 0]
+    return float(-(nonzero * np.log2(nonzero)).sum())
 
 
-@dataclass
 class BeliefState:
     """
     Current belief distribution over failure hypotheses.
     
     Tracks probability of each failure mode and the evidence
-    that led to these beliefs.
+    that led to these beliefs. Probabilities are held as a vector over a
+    FailureSpace plus a ruled-out mask; ``probabilities`` and ``ruled_out``
+    are dict/set views of them.
     """
-    # Probability of each failure (sums to 1)
-    probabilities: Dict[str, float] = field(default_factory=dict)
     
-    # Evidence observed so far
-    evidence: List[Dict] = field(default_factory=list)
+    def __init__(self,
+                 probabilities: Optional[Dict[str, float]] = None,
+                 evidence: Optional[List[Dict]] = None,
+                 ruled_out: Optional[Set[str]] = None):
+        probabilities = dict(probabilities or {})
+        ruled_out = set(ruled_out or ())
+        for failure in ruled_out:
+            probabilities.setdefault(failure, 0.0)
+        
+        self.space = FailureSpace(probabilities)
+        # Probability of each failure (sums to 1)
+        self.vector = _normalize(np.fromiter(probabilities.values(), dtype=float, count=len(probabilities)))
+        # Failures ruled out (probability effectively 0)
+        self.ruled_out_mask = np.array([f in ruled_out for f in self.space.ids], dtype=bool)
+        # Evidence observed so far
+        self.evidence: List[Dict] = list(evidence or [])
+        self._probabilities: Optional[Dict[str, float]] = None
     
-    # Failures ruled out (probability effectively 0)
-    ruled_out: Set[str] = field(default_factory=set)
+    @classmethod
+    def from_vector(cls, space: FailureSpace, vector: np.ndarray,
+                    ruled_out_mask: np.ndarray, evidence: List[Dict]) -> 'BeliefState':
+        state = cls.__new__(cls)
+        state.space = space
+        state.vector = vector
+        state.ruled_out_mask = ruled_out_mask
+        state.evidence = evidence
+        state._probabilities = None
+        return state
     
-    def __post_init__(self):
-        self._normalize()
+    @property
+    def probabilities(self) -> Dict[str, float]:
+        """Probability of each failure as a dict (built on first access)."""
+        if self._probabilities is None:
+            self._probabilities = dict(zip(self.space.ids, self.vector.tolist()))
+        return self._probabilities
     
-    def _normalize(self):
-        """Ensure probabilities sum to 1."""
-        total = sum(self.probabilities.values())
-        if total > 0:
-            self.probabilities = {
-                k: v / total for k, v in self.probabilities.items()
-            }
+    @property
+    def ruled_out(self) -> Set[str]:
+        return {self.space.ids[i] for i in np.flatnonzero(self.ruled_out_mask)}
     
     def get_top_hypotheses(self, n: int = 5) -> List[Tuple[str, float]]:
         """Get top N hypotheses by probability."""
-        sorted_probs = sorted(
-            self.probabilities.items(),
-            key=lambda x: -x[1]
-        )
-        return sorted_probs[:n]
+        # Stable sort keeps insertion order among ties
+        order = np.argsort(-self.vector, kind="stable")[:n]
+        return [(self.space.ids[i], float(self.vector[i])) for i in order]
     
     def get_entropy(self) -> float:
         """
@@ -60,25 +129,21 @@ class BeliefState:
         Higher entropy = more uncertainty
         Lower entropy = more confident
         """
-        entropy = 0.0
-        for p in self.probabilities.values():
-            if p > 0:
-                entropy -= p * math.log2(p)
-        return entropy
+        return _entropy(self.vector)
     
     def is_confident(self, threshold: float = 0.7) -> bool:
         """Check if we're confident in a single diagnosis."""
-        if not self.probabilities:
+        if not len(self.vector):
             return False
-        top_prob = max(self.probabilities.values())
-        return top_prob >= threshold
+        return float(self.vector.max()) >= threshold
     
     def copy(self) -> 'BeliefState':
         """Create a copy of this belief state."""
-        return BeliefState(
-            probabilities=dict(self.probabilities),
-            evidence=list(self.evidence),
-            ruled_out=set(self.ruled_out),
+        return BeliefState.from_vector(
+            self.space,
+            self.vector.copy(),
+            self.ruled_out_mask.copy(),
+            list(self.evidence),
         )
 
 
@@ -102,6 +167,16 @@ class BayesianReasoner:
         # Likelihood tables: P(evidence|failure)
         # Format: evidence_type -> {failure_id -> probability}
         self._likelihoods = self._build_likelihood_tables()
+        
+        # Row order of the compiled (evidence x failure) matrices
+        self._evidence_types: List[str] = list(self._likelihoods)
+        self._evidence_index: Dict[str, int] = {
+            e: i for i, e in enumerate(self._evidence_types)
+        }
+        self._empty_evidence = np.array(
+            [not self._likelihoods[e] for e in self._evidence_types], dtype=bool
+        )
+        self._compiled: Dict[FailureSpace, np.ndarray] = {}
     
     def _build_likelihood_tables(self) -> Dict[str, Dict[str, float]]:
         """
@@ -978,6 +1053,24 @@ class BayesianReasoner:
         
         return BeliefState(probabilities=prior_probs)
     
+    def _likelihood_matrix(self, space: FailureSpace) -> np.ndarray:
+        """
+        Dense P(evidence|failure) matrix for ``space``, compiled once.
+        
+        Rows follow ``self._evidence_types``; failures missing from a table
+        get the default likelihood of 0.1.
+        """
+        matrix = self._compiled.get(space)
+        if matrix is None:
+            matrix = np.full((len(self._evidence_types), len(space)), 0.1)
+            for row, evidence_type in enumerate(self._evidence_types):
+                for failure, likelihood in self._likelihoods[evidence_type].items():
+                    col = space.index.get(failure)
+                    if col is not None:
+                        matrix[row, col] = likelihood
+            self._compiled[space] = matrix
+        return matrix
+    
     def update(self, state: BeliefState, 
                evidence_type: str, 
                observed: bool = True) -> BeliefState:
@@ -992,13 +1085,11 @@ class BayesianReasoner:
         Returns:
             New belief state after update
         """
-        new_state = state.copy()
-        
-        # Get likelihood table for this evidence
-        likelihoods = self._likelihoods.get(evidence_type, {})
+        row = self._evidence_index.get(evidence_type)
         
-        if not likelihoods:
+        if row is None or self._empty_evidence[row]:
             # Unknown evidence type - no update
+            new_state = state.copy()
             new_state.evidence.append({
                 "type": evidence_type,
                 "observed": observed,
@@ -1006,68 +1097,60 @@ class BayesianReasoner:
             })
             return new_state
         
-        # Apply Bayes' rule
-        new_probs = {}
-        for failure, prior in state.probabilities.items():
-            if failure in state.ruled_out:
-                new_probs[failure] = 0.0
-                continue
-            
-            # Get likelihood P(evidence|failure)
-            likelihood = likelihoods.get(failure, 0.1)  # Default low probability
-            
-            # If evidence is absent, use complement
-            if not observed:
-                likelihood = 1.0 - likelihood
-            
-            # Posterior ∝ likelihood * prior
-            new_probs[failure] = likelihood * prior
+        # Apply Bayes' rule: posterior ∝ P(evidence|failure) * prior
+        likelihood = self._likelihood_matrix(state.space)[row]
         
-        new_state.probabilities = new_probs
-        new_state._normalize()
+        # If evidence is absent, use complement
+        if not observed:
+            likelihood = 1.0 - likelihood
+        
+        vector = _normalize(np.where(state.ruled_out_mask, 0.0, likelihood * state.vector))
         
         # Safety-critical overrides: certain evidence should strongly bias results
-        # Strong safety-critical handling for isolation evidence
-        if observed and evidence_type in ("insulation_resistance_low", "dtc_insulation_resistance_low"):
-            # Check if the other complementary evidence has already been observed
-            has_other = any(
-                e["type"] in ("insulation_resistance_low", "dtc_insulation_resistance_low")
-                for e in state.evidence
-            )
-
-            if has_other:
-                # Both sensor and DTC evidence present — decisive override
-                if "hv_isolation_fault" in new_state.probabilities:
-                    new_state.probabilities["hv_isolation_fault"] = 0.995
-                if "tesla_hv_isolation_fault" in new_state.probabilities:
-                    new_state.probabilities["tesla_hv_isolation_fault"] = 0.99
-
-                # Zero out unrelated failures to avoid dilution
-                for f in list(new_state.probabilities.keys()):
-                    if f not in ("hv_isolation_fault", "tesla_hv_isolation_fault") and not f.startswith("normal"):
-                        new_state.probabilities[f] = 0.0
-            else:
-                # Single piece of evidence: strong bias but allow other possibilities
-                if "hv_isolation_fault" in new_state.probabilities:
-                    new_state.probabilities["hv_isolation_fault"] = max(new_state.probabilities.get("hv_isolation_fault", 0.0), 0.99)
-                if "tesla_hv_isolation_fault" in new_state.probabilities:
-                    new_state.probabilities["tesla_hv_isolation_fault"] = max(new_state.probabilities.get("tesla_hv_isolation_fault", 0.0), 0.95)
-
-                for f in list(new_state.probabilities.keys()):
-                    if f not in ("hv_isolation_fault", "tesla_hv_isolation_fault") and not f.startswith("normal"):
-                        new_state.probabilities[f] = min(new_state.probabilities.get(f, 0.0), 0.0001)
-
-            # Renormalize after forced adjustments
-            new_state._normalize()
-
+        if observed and evidence_type in HV_ISOLATION_EVIDENCE:
+            vector = self._apply_isolation_override(state, vector)
+        
         # Record evidence
-        new_state.evidence.append({
+        evidence = list(state.evidence)
+        evidence.append({
             "type": evidence_type,
             "observed": observed,
             "impact": "updated",
         })
         
-        return new_state
+        return BeliefState.from_vector(
+            state.space, vector, state.ruled_out_mask.copy(), evidence
+        )
+    
+    @staticmethod
+    def _apply_isolation_override(state: BeliefState, vector: np.ndarray) -> np.ndarray:
+        """Strong safety-critical handling for HV isolation evidence."""
+        space = state.space
+        vector = vector.copy()
+        
+        # Check if the other complementary evidence has already been observed
+        has_other = any(e["type"] in HV_ISOLATION_EVIDENCE for e in state.evidence)
+        
+        if has_other:
+            # Both sensor and DTC evidence present — decisive override
+            if space.hv_index is not None:
+                vector[space.hv_index] = 0.995
+            if space.tesla_hv_index is not None:
+                vector[space.tesla_hv_index] = 0.99
+            
+            # Zero out unrelated failures to avoid dilution
+            vector[space.non_isolation_mask] = 0.0
+        else:
+            # Single piece of evidence: strong bias but allow other possibilities
+            if space.hv_index is not None:
+                vector[space.hv_index] = max(vector[space.hv_index], 0.99)
+            if space.tesla_hv_index is not None:
+                vector[space.tesla_hv_index] = max(vector[space.tesla_hv_index], 0.95)
+            
+            np.minimum(vector, 0.0001, out=vector, where=space.non_isolation_mask)
+        
+        # Renormalize after forced adjustments
+        return _normalize(vector)
     
     def rule_out(self, state: BeliefState, failure_id: str) -> BeliefState:
         """
@@ -1075,10 +1158,20 @@ class BayesianReasoner:
         
         Use when a test conclusively eliminates a possibility.
         """
+        if failure_id not in state.space.index:
+            # Unknown failure: rebuild the space with it included at 0
+            ruled_out = state.ruled_out | {failure_id}
+            return BeliefState(
+                probabilities=state.probabilities,
+                evidence=list(state.evidence),
+                ruled_out=ruled_out,
+            )
+        
         new_state = state.copy()
-        new_state.ruled_out.add(failure_id)
-        new_state.probabilities[failure_id] = 0.0
-        new_state._normalize()
+        col = state.space.index[failure_id]
+        new_state.ruled_out_mask[col] = True
+        new_state.vector[col] = 0.0
+        new_state.vector = _normalize(new_state.vector)
         return new_state
     
     def get_best_test(self, state: BeliefState) -> Optional[Dict]:
@@ -1087,63 +1180,75 @@ class BayesianReasoner:
         
         Returns the test that would most reduce entropy (uncertainty).
         """
-        # Get top hypotheses to discriminate between
-        top_hyps = state.get_top_hypotheses(5)
-        if len(top_hyps) < 2:
+        # Need at least two hypotheses to discriminate between
+        if len(state.space) < 2:
             return None
         
-        top_failures = [h[0] for h in top_hyps if h[0] != "normal"]
+        gains = self._expected_info_gains(state)
         
-        # Find tests that discriminate between top failures
-        best_test = None
-        best_info_gain = 0.0
+        # Skip tests we've already observed
+        for e in state.evidence:
+            row = self._evidence_index.get(e["type"])
+            if row is not None:
+                gains[row] = 0.0
         
-        for evidence_type, likelihoods in self._likelihoods.items():
-            # Skip if we've already observed this
-            if any(e["type"] == evidence_type for e in state.evidence):
-                continue
-            
-            # Calculate expected information gain
-            info_gain = self._expected_info_gain(state, evidence_type)
-            
-            if info_gain > best_info_gain:
-                best_info_gain = info_gain
-                best_test = {
-                    "test": evidence_type,
-                    "expected_info_gain": info_gain,
-                    "description": self._get_test_description(evidence_type),
-                }
+        # First best in table order, as with a strict ">" scan
+        best = int(np.argmax(gains))
+        if gains[best] <= 0.0:
+            return None
         
-        return best_test
+        evidence_type = self._evidence_types[best]
+        return {
+            "test": evidence_type,
+            "expected_info_gain": float(gains[best]),
+            "description": self._get_test_description(evidence_type),
+        }
     
-    def _expected_info_gain(self, state: BeliefState, evidence_type: str) -> float:
-        """Calculate expected information gain from a test."""
-        current_entropy = state.get_entropy()
+    def _expected_info_gains(self, state: BeliefState) -> np.ndarray:
+        """
+        Expected information gain of every evidence type, in one batch.
         
-        likelihoods = self._likelihoods.get(evidence_type, {})
-        if not likelihoods:
-            return 0.0
+        Computes the posterior for both outcomes of all tests as two
+        (evidence x failure) matrices and takes row-wise entropies.
+        """
+        matrix = self._likelihood_matrix(state.space)
+        prior = np.where(state.ruled_out_mask, 0.0, state.vector)
+        current_entropy = state.get_entropy()
         
         # P(evidence) = sum over failures of P(evidence|failure) * P(failure)
-        p_evidence = sum(
-            likelihoods.get(f, 0.1) * p
-            for f, p in state.probabilities.items()
-        )
-        p_no_evidence = 1.0 - p_evidence
+        p_evidence = matrix @ state.vector
+        p_outcomes = (p_evidence, 1.0 - p_evidence)
         
-        # Expected entropy after observing test result
-        expected_entropy = 0.0
+        expected_entropy = np.zeros(len(self._evidence_types))
+        for likelihood, p_outcome in zip((matrix, 1.0 - matrix), p_outcomes):
+            joint = likelihood * prior
+            totals = joint.sum(axis=1, keepdims=True)
+            posterior = np.divide(joint, totals, out=joint, where=totals > 0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                terms = np.where(posterior > 0, posterior * np.log2(posterior), 0.0)
+            posterior_entropy = -terms.sum(axis=1)
+            expected_entropy += np.where(p_outcome > 0, p_outcome * posterior_entropy, 0.0)
         
-        for observed, p_outcome in [(True, p_evidence), (False, p_no_evidence)]:
-            if p_outcome <= 0:
+        # The isolation override changes the observed-outcome posterior;
+        # recompute those rows through update() so results match exactly
+        for evidence_type in HV_ISOLATION_EVIDENCE:
+            row = self._evidence_index.get(evidence_type)
+            if row is None or p_evidence[row] <= 0:
                 continue
-            
-            # Calculate posterior entropy
-            hypothetical_state = self.update(state, evidence_type, observed)
-            posterior_entropy = hypothetical_state.get_entropy()
-            expected_entropy += p_outcome * posterior_entropy
+            plain = _normalize(np.where(state.ruled_out_mask, 0.0, matrix[row] * state.vector))
+            overridden = self.update(state, evidence_type, observed=True).vector
+            expected_entropy[row] += p_evidence[row] * (_entropy(overridden) - _entropy(plain))
         
-        return current_entropy - expected_entropy
+        gains = current_entropy - expected_entropy
+        gains[self._empty_evidence] = 0.0
+        return gains
+    
+    def _expected_info_gain(self, state: BeliefState, evidence_type: str) -> float:
+        """Calculate expected information gain from a test."""
+        row = self._evidence_index.get(evidence_type)
+        if row is None:
+            return 0.0
+        return float(self._expected_info_gains(state)[row])
     
     def _get_test_description(self, evidence_type: str) -> str:
         """Get human-readable description of a test."""
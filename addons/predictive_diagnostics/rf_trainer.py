@@ -39,6 +39,11 @@ from sklearn.metrics import (
 )
 from sklearn.preprocessing import StandardScaler
 
+try:
+    from .ranking import top_k_indices
+except ImportError:
+    from ranking import top_k_indices
+
 try:
     from .synthetic_data import PhysicsBasedGenerator, PhysicsDataConfig, PHYSICS_FAILURE_MODES
 except ImportError:
@@ -347,25 +352,45 @@ class RFPredictor:
         Returns:
             List of (failure_mode, probability) tuples
         """
-        # Build feature vector
-        X = np.zeros((1, len(self.feature_names)))
-        for i, fname in enumerate(self.feature_names):
-            X[0, i] = features.get(fname, 0.0)
-        
+        return self.predict_batch([features], top_k)[0]
+
+    def predict_batch(
+        self,
+        feature_rows: List[Dict[str, float]],
+        top_k: int = 3,
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Predict failure modes for many feature dicts with one predict_proba call.
+
+        Args:
+            feature_rows: One dict of feature_name -> value per sample
+            top_k: Return top K predictions per sample
+
+        Returns:
+            One list of (failure_mode, probability) tuples per sample
+        """
+        if not feature_rows:
+            return []
+
+        # Build one float32 matrix in training feature order
+        X = np.array(
+            [[row.get(fname) or 0.0 for fname in self.feature_names] for row in feature_rows],
+            dtype=np.float32,
+        )
+
         # Scale
         X_scaled = self.scaler.transform(X)
-        
+
         # Get probabilities
-        probs = self.model.predict_proba(X_scaled)[0]
-        
-        # Sort by probability
-        sorted_indices = np.argsort(probs)[::-1]
-        
-        results = []
-        for idx in sorted_indices[:top_k]:
-            results.append((self.class_names[idx], float(probs[idx])))
-        
-        return results
+        probs = self.model.predict_proba(X_scaled)
+
+        # Top K per row
+        top = top_k_indices(probs, top_k)
+
+        return [
+            [(self.class_names[idx], float(row_probs[idx])) for idx in row_top]
+            for row_probs, row_top in zip(probs, top)
+        ]
     
     def predict_from_pids(
         self,
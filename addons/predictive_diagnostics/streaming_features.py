@@ -0,0 +1,182 @@
+"""
+Streaming Feature Extraction
+
+Builds the Chrono-model feature set (mean, std, min, max, range, final,
+delta, rate_max per sensor) incrementally while PID readings arrive, so a
+diagnosis can be produced at any moment of a live capture instead of after
+the whole series has been collected.
+
+Each PID keeps a fixed-size NumPy ring buffer of its most recent readings.
+Appending is O(1) and memory is bounded by the window size regardless of how
+long the session runs. Features are computed over the buffered window with
+the same definitions as chrono_simulator/train_from_chrono.py (sample std,
+delta = last - first, rate_max = largest absolute step between consecutive
+readings), so for a capture shorter than the window they equal the batch
+extraction over the full series.
+
+Usage:
+    extractor = StreamingFeatureExtractor(window=600)
+
+    # Live: feed each monitor_pids sample as it arrives
+    await elm.monitor_pids(pids, duration=120, callback=extractor.add_readings)
+
+    # At any point during or after the capture
+    results = engine.diagnose_from_stream(extractor)
+"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# ELM327 / scan_tool PID names -> sensor names used by the Chrono training data.
+# Names not listed here are lowercased (e.g. "STFT_B1" -> "stft_b1").
+PID_SENSOR_NAMES = {
+    "LOAD": "engine_load",
+    "SPEED": "speed_kmh",
+    "THROTTLE_POS": "throttle_pct",
+}
+
+DEFAULT_WINDOW = 600  # 5 minutes at monitor_pids' default 0.5s interval
+
+
+def sensor_name(pid_name: str) -> str:
+    """Map a scan_tool PID name to the Chrono sensor name."""
+    return PID_SENSOR_NAMES.get(pid_name, pid_name.lower())
+
+
+class PIDRingBuffer:
+    """Fixed-capacity ring buffer of float readings for one PID."""
+
+    __slots__ = ("capacity", "_values", "_head", "_count")
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self._values = np.empty(capacity, dtype=np.float64)
+        self._head = 0  # next write position
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: float) -> None:
+        self._values[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def values(self) -> np.ndarray:
+        """Buffered readings, oldest first."""
+        if self._count < self.capacity:
+            return self._values[:self._count]
+        return np.concatenate((self._values[self._head:], self._values[:self._head]))
+
+    def features(self, prefix: str) -> Dict[str, float]:
+        """Chrono window features for the buffered readings."""
+        values = self.values()
+        n = len(values)
+        if n == 0:
+            return {}
+
+        lo, hi = float(values.min()), float(values.max())
+        features = {
+            f"{prefix}_mean": float(values.mean()),
+            f"{prefix}_std": float(values.std(ddof=1)) if n > 1 else 0.0,
+            f"{prefix}_min": lo,
+            f"{prefix}_max": hi,
+            f"{prefix}_range": hi - lo,
+            f"{prefix}_final": float(values[-1]),
+        }
+        if n > 1:
+            features[f"{prefix}_delta"] = float(values[-1] - values[0])
+            features[f"{prefix}_rate_max"] = float(np.abs(np.diff(values)).max())
+        return features
+
+
+class StreamingFeatureExtractor:
+    """
+    Incremental per-PID feature extractor backed by ring buffers.
+
+    Readings can be added one at a time (add), as a monitor_pids sample
+    (add_readings), or as a full pid_series dict (from_series).
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        """
+        Args:
+            window: Readings kept per PID; features cover this many most
+                recent readings.
+        """
+        self.window = window
+        self._buffers: Dict[str, PIDRingBuffer] = {}
+        self.samples = 0
+        self.last_timestamp: Optional[Any] = None
+
+    @classmethod
+    def from_series(
+        cls,
+        pid_series: Dict[str, List[Tuple[float, float]]],
+        window: int = DEFAULT_WINDOW,
+    ) -> "StreamingFeatureExtractor":
+        """Build an extractor from a pid_name -> [(time, value), ...] dict."""
+        extractor = cls(window)
+        for pid_name, series in pid_series.items():
+            extractor.extend(pid_name, (value for _, value in series))
+        return extractor
+
+    @property
+    def sensors(self) -> List[str]:
+        return list(self._buffers)
+
+    def _buffer(self, pid_name: str) -> PIDRingBuffer:
+        name = sensor_name(pid_name)
+        buffer = self._buffers.get(name)
+        if buffer is None:
+            buffer = self._buffers[name] = PIDRingBuffer(self.window)
+        return buffer
+
+    def add(self, pid_name: str, value: Optional[float]) -> None:
+        """Add one reading. None/NaN readings are skipped, like dropna() in training."""
+        if value is None:
+            return
+        value = float(value)
+        if math.isnan(value):
+            return
+        self._buffer(pid_name).append(value)
+
+    def extend(self, pid_name: str, values: Iterable[Optional[float]]) -> None:
+        """Add many readings for one PID, oldest first."""
+        for value in values:
+            self.add(pid_name, value)
+
+    def add_readings(self, readings: Dict[str, Any]) -> None:
+        """
+        Add one sample of readings.
+
+        Accepts the Dict[str, PIDReading] that ELM327Service.read_pids /
+        monitor_pids produce, or a plain name -> value dict, so it can be
+        passed directly as the monitor_pids callback.
+        """
+        for pid_name, reading in readings.items():
+            value = getattr(reading, "value", reading)
+            self.add(pid_name, value)
+            timestamp = getattr(reading, "timestamp", None)
+            if timestamp is not None:
+                self.last_timestamp = timestamp
+        self.samples += 1
+
+    def features(self) -> Dict[str, float]:
+        """Current feature dict, ready for InferenceEngine.diagnose()."""
+        features = {}
+        for name, buffer in self._buffers.items():
+            features.update(buffer.features(name))
+        return features
+
+    def reset(self) -> None:
+        """Drop all buffered readings."""
+        self._buffers.clear()
+        self.samples = 0
+        self.last_timestamp = None
@@ -136,6 +136,7 @@ class PhysicsDataConfig:
     highway_probability: float = 0.3
     output_dir: str = "training_data"
     random_seed: Optional[int] = 42
+    batch_size: int = 256  # Vehicles per PhysicsSimulator.simulate_batch call (1 = scalar path)
 
 
 class PhysicsBasedGenerator:
@@ -154,6 +155,7 @@ class PhysicsBasedGenerator:
         if self.config.random_seed:
             random.seed(self.config.random_seed)
             np.random.seed(self.config.random_seed)
+        self._rng = np.random.default_rng(self.config.random_seed)
         
         self.simulator = PhysicsSimulator()
         self._feature_names: List[str] = None
@@ -187,6 +189,43 @@ class PhysicsBasedGenerator:
         features["sim_highway"] = float(sim_config.highway_cruise)
         
         return features
+
+    def _random_sim_config(self, rng) -> SimulationConfig:
+        """Draw a SimulationConfig with the same distributions as generate_sample."""
+        sim_config = SimulationConfig(
+            duration_sec=rng.uniform(*self.config.duration_range),
+            ambient_temp_f=rng.uniform(*self.config.ambient_temp_range),
+            initial_coolant_f=rng.uniform(*self.config.ambient_temp_range),
+            noise_level=rng.uniform(*self.config.noise_range),
+        )
+        roll = rng.random()
+        if roll < self.config.idle_probability:
+            sim_config.idle_only = True
+        elif roll < self.config.idle_probability + self.config.highway_probability:
+            sim_config.highway_cruise = True
+        return sim_config
+
+    def generate_samples(self, failure_modes: List[str]) -> List[Dict[str, float]]:
+        """
+        Generate one training sample per entry of failure_modes in a single
+        batched simulation (PhysicsSimulator.simulate_batch).
+
+        Samples follow the same distributions as generate_sample and are
+        reproducible from config.random_seed.
+        """
+        configs = [self._random_sim_config(self._rng) for _ in failure_modes]
+        result = self.simulator.simulate_batch(
+            failure_modes, configs, seed=int(self._rng.integers(2**32))
+        )
+        samples = self.simulator.extract_features_batch(result)
+
+        for features, sim_config in zip(samples, configs):
+            features["sim_duration"] = sim_config.duration_sec
+            features["sim_ambient_temp"] = sim_config.ambient_temp_f
+            features["sim_idle_only"] = float(sim_config.idle_only)
+            features["sim_highway"] = float(sim_config.highway_cruise)
+
+        return samples
     
     def get_all_failure_modes(self) -> List[str]:
         """Get list of all failure modes supported by physics simulator."""
@@ -218,20 +257,38 @@ class PhysicsBasedGenerator:
         all_samples = []
         all_labels = []
         
-        for mode_idx, mode in enumerate(failure_modes):
+        if self.config.batch_size > 1:
+            # Batched simulation: vehicles of all classes advance together
+            labels = [mode_idx for mode_idx in range(len(failure_modes)) for _ in range(samples_per_class)]
+            batch_size = self.config.batch_size
             if verbose:
-                print(f"Generating {samples_per_class} samples for: {mode}")
+                print(f"Generating {len(labels)} samples in batches of {batch_size}")
             
-            for i in range(samples_per_class):
+            for start in range(0, len(labels), batch_size):
+                batch_labels = labels[start:start + batch_size]
                 try:
-                    features = self.generate_sample(mode)
-                    all_samples.append(features)
-                    all_labels.append(mode_idx)
+                    all_samples.extend(self.generate_samples([failure_modes[i] for i in batch_labels]))
+                    all_labels.extend(batch_labels)
                     
-                    if verbose and (i + 1) % 25 == 0:
-                        print(f"  ... {i + 1}/{samples_per_class}")
+                    if verbose:
+                        print(f"  ... {start + len(batch_labels)}/{len(labels)}")
                 except Exception as e:
-                    logger.error(f"Error generating sample {i} for {mode}: {e}")
+                    logger.error(f"Error generating batch at sample {start}: {e}")
+        else:
+            for mode_idx, mode in enumerate(failure_modes):
+                if verbose:
+                    print(f"Generating {samples_per_class} samples for: {mode}")
+                
+                for i in range(samples_per_class):
+                    try:
+                        features = self.generate_sample(mode)
+                        all_samples.append(features)
+                        all_labels.append(mode_idx)
+                        
+                        if verbose and (i + 1) % 25 == 0:
+                            print(f"  ... {i + 1}/{samples_per_class}")
+                    except Exception as e:
+                        logger.error(f"Error generating sample {i} for {mode}: {e}")
         
         if not all_samples:
             raise ValueError("No samples generated!")
@@ -812,11 +869,14 @@ if __name__ == "__main__":
     parser.add_argument("--output", type=str, default="training_data", help="Output directory")
     parser.add_argument("--analyze", action="store_true", help="Analyze generated data")
     parser.add_argument("--modes", type=str, nargs="*", help="Specific failure modes to include")
+    parser.add_argument("--batch-size", type=int, default=256,
+                        help="Vehicles simulated together (1 = one simulation per sample)")
     args = parser.parse_args()
     
     config = PhysicsDataConfig(
         samples_per_class=args.samples,
         output_dir=args.output,
+        batch_size=args.batch_size,
     )
     
     gen = PhysicsBasedGenerator(config)
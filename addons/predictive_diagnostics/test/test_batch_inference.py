@@ -0,0 +1,120 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from addons.predictive_diagnostics.inference_engine import (
+    ChronoRFPredictor,
+    InferenceEngine,
+    TwoStageXGBPredictor,
+    get_system_from_failure_mode,
+)
+from addons.predictive_diagnostics.ranking import top_k_indices
+
+
+FEATURES = ["coolant_temp_mean", "coolant_temp_final", "stft_b1_mean", "brake_temp_max", "scenario"]
+
+
+def _fleet(n, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i, values in enumerate(rng.normal(0.0, 1.0, size=(n, len(FEATURES)))):
+        row = {name: float(v) for name, v in zip(FEATURES, values)}
+        del row[FEATURES[i % 3]]  # sparse input, missing features default to 0
+        rows.append(row)
+    return rows
+
+
+def _fit(X, y):
+    le = LabelEncoder().fit(y)
+    scaler = StandardScaler().fit(X)
+    clf = LogisticRegression(max_iter=500).fit(scaler.transform(X), le.transform(y))
+    return clf, le, scaler
+
+
+@pytest.fixture
+def twostage_path(tmp_path):
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame(rng.normal(size=(300, len(FEATURES))), columns=FEATURES)
+    systems = np.array(["cooling", "fuel", "brakes"])[rng.integers(0, 3, 300)]
+    failures = {
+        "cooling": np.array(["cooling.thermostat_stuck_closed", "cooling.water_pump_failure"]),
+        "fuel": np.array(["fuel.vacuum_leak", "fuel.weak_fuel_pump", "fuel.injector_clogged"]),
+    }
+    system_clf, system_le, system_scaler = _fit(X, systems)
+    failure_models = {}
+    for system, labels in failures.items():
+        mask = systems == system
+        y = labels[rng.integers(0, len(labels), mask.sum())]
+        failure_models[system] = (*_fit(X[mask], y), None)
+
+    path = tmp_path / "twostage_xgb.pkl"
+    with open(path, "wb") as f:
+        pickle.dump(
+            {
+                "system_clf": system_clf,
+                "system_le": system_le,
+                "system_scaler": system_scaler,
+                "failure_models": failure_models,
+                "feature_names": FEATURES,
+            },
+            f,
+        )
+    return str(path)
+
+
+def test_top_k_matches_full_sort():
+    probs = np.random.default_rng(2).random((50, 9))
+    for k in (1, 3, 9, 12):
+        expected = np.argsort(-probs, axis=1, kind="stable")[:, :k]
+        assert np.array_equal(top_k_indices(probs, k), expected)
+
+
+def test_twostage_batch_matches_single_row(twostage_path):
+    predictor = TwoStageXGBPredictor(twostage_path)
+    fleet = _fleet(40)
+
+    batched = predictor.predict_batch(fleet, top_k=4)
+    assert len(batched) == len(fleet)
+    for row, preds in zip(fleet, batched):
+        single = predictor.predict(row, top_k=4)
+        assert [p[0] for p in preds] == [p[0] for p in single]
+        assert [p[1] for p in preds] == pytest.approx([p[1] for p in single], abs=1e-6)
+        # brakes has no stage-2 model, so the system maps straight to its failure
+        assert all(p[0] == "brakes.brake_fade" for p in preds if p[2] == "brakes")
+
+    # The categorical scenario column is ignored
+    moved = [dict(row, scenario=1e6) for row in fleet]
+    assert predictor.predict_batch(moved, top_k=4) == batched
+
+
+def test_chrono_rf_batch_and_engine():
+    rng = np.random.default_rng(3)
+    predictor = ChronoRFPredictor.__new__(ChronoRFPredictor)
+    predictor.feature_names = FEATURES
+    predictor.class_names = ["thermostat_stuck_closed", "vacuum_leak", "normal", "alternator_failure"]
+    X = pd.DataFrame(rng.normal(size=(200, len(FEATURES))), columns=FEATURES)
+    predictor.model = LogisticRegression(max_iter=500).fit(X, rng.integers(0, 4, 200))
+
+    fleet = _fleet(25)
+    batched = predictor.predict_batch(fleet, top_k=3)
+    for row, preds in zip(fleet, batched):
+        single = predictor.predict(row, top_k=3)
+        assert [m for m, _ in preds] == [m for m, _ in single]
+        assert [p for _, p in preds] == pytest.approx([p for _, p in single], abs=1e-9)
+        assert [p for _, p in preds] == sorted((p for _, p in preds), reverse=True)
+
+    engine = InferenceEngine.__new__(InferenceEngine)
+    engine.predictor, engine.model_type = predictor, "rf"
+    results = engine.diagnose_batch(fleet, top_k=2)
+    assert [[r.failure_mode for r in rows] for rows in results] == [
+        [mode for mode, _ in preds[:2]] for preds in batched
+    ]
+    assert all(r.system == get_system_from_failure_mode(r.failure_mode) for rows in results for r in rows)
+    assert engine.diagnose_batch([]) == []
@@ -0,0 +1,82 @@
+import math
+
+import pytest
+
+from addons.predictive_diagnostics.reasoning.bayesian import BayesianReasoner
+
+
+def _brute_force_gain(reasoner, state, evidence_type):
+    """Expected information gain computed the unbatched way, via update()."""
+    likelihoods = reasoner._likelihoods[evidence_type]
+    p_evidence = sum(likelihoods.get(f, 0.1) * p for f, p in state.probabilities.items())
+    expected = 0.0
+    for observed, p_outcome in ((True, p_evidence), (False, 1.0 - p_evidence)):
+        if p_outcome > 0:
+            expected += p_outcome * reasoner.update(state, evidence_type, observed).get_entropy()
+    return state.get_entropy() - expected
+
+
+def _brute_force_best(reasoner, state):
+    seen = {e["type"] for e in state.evidence}
+    best, best_gain = None, 0.0
+    for evidence_type in reasoner._likelihoods:
+        if evidence_type in seen:
+            continue
+        gain = _brute_force_gain(reasoner, state, evidence_type)
+        if gain > best_gain:
+            best, best_gain = evidence_type, gain
+    return best, best_gain
+
+
+@pytest.fixture
+def reasoner():
+    return BayesianReasoner()
+
+
+def test_batched_info_gain_matches_per_test_updates(reasoner):
+    state = reasoner.create_initial_state()
+    state = reasoner.rule_out(state, "vacuum_leak")
+
+    for evidence in ("coolant_temp_high", "insulation_resistance_low"):
+        for evidence_type in reasoner._likelihoods:
+            assert reasoner._expected_info_gain(state, evidence_type) == pytest.approx(
+                _brute_force_gain(reasoner, state, evidence_type), abs=1e-9
+            )
+
+        best, gain = _brute_force_best(reasoner, state)
+        recommended = reasoner.get_best_test(state)
+        assert recommended["test"] == best
+        assert recommended["expected_info_gain"] == pytest.approx(gain, abs=1e-9)
+
+        state = reasoner.update(state, evidence, observed=True)
+
+
+def test_hv_isolation_override_single_and_combined(reasoner):
+    state = reasoner.create_initial_state()
+
+    single = reasoner.update(state, "insulation_resistance_low", observed=True)
+    top = dict(single.get_top_hypotheses(2))
+    assert set(top) == {"hv_isolation_fault", "tesla_hv_isolation_fault"}
+    assert all(
+        p <= 0.0001 / 0.5
+        for f, p in single.probabilities.items()
+        if f not in top and not f.startswith("normal")
+    )
+
+    both = reasoner.update(single, "dtc_insulation_resistance_low", observed=True)
+    probs = both.probabilities
+    assert probs["hv_isolation_fault"] / probs["tesla_hv_isolation_fault"] == pytest.approx(0.995 / 0.99)
+    assert probs["hv_isolation_fault"] + probs["tesla_hv_isolation_fault"] + probs["normal"] == pytest.approx(1.0)
+    assert probs["thermostat_stuck_closed"] == 0.0
+
+
+def test_ruled_out_failures_stay_at_zero(reasoner):
+    state = reasoner.create_initial_state({"a": 0.5, "b": 0.3, "normal": 0.2})
+    state = reasoner.rule_out(state, "a")
+    state = reasoner.rule_out(state, "not_in_prior")
+    state = reasoner.update(state, "coolant_temp_high", observed=True)
+
+    assert state.ruled_out == {"a", "not_in_prior"}
+    assert state.probabilities["a"] == 0.0
+    assert state.probabilities["not_in_prior"] == 0.0
+    assert math.isclose(sum(state.probabilities.values()), 1.0)
@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from addons.predictive_diagnostics.classifier import TrainingExample
+from addons.predictive_diagnostics.genetic import (
+    CompiledExamples,
+    Condition,
+    DiagnosticRule,
+    GeneticRuleDiscovery,
+    Operator,
+)
+
+
+def _examples(n, seed=0):
+    rnd = random.Random(seed)
+    labels = ["normal", "thermostat_stuck", "vacuum_leak"]
+    examples = []
+    for i in range(n):
+        label = labels[i % 3]
+        pids = {
+            "coolant_temp": rnd.gauss(115 if label == "thermostat_stuck" else 90, 8),
+            "stft_b1": rnd.gauss(12 if label == "vacuum_leak" else 0, 4),
+            "engine_rpm": float(rnd.choice([0, 750, 800, 2500])),
+        }
+        if rnd.random() < 0.2:
+            del pids[rnd.choice(list(pids))]  # missing reading
+        dtcs = ["P0171"] if label == "vacuum_leak" and rnd.random() < 0.7 else []
+        if label == "thermostat_stuck" and rnd.random() < 0.5:
+            dtcs.append("P0217")
+        examples.append(TrainingExample(
+            example_id=str(i), vehicle_year=2020, vehicle_make="Chevrolet",
+            vehicle_model="Bolt", pid_values=pids, dtc_codes=dtcs, fault_label=label,
+        ))
+    return examples
+
+
+def _legacy_fitness(rule, examples):
+    """Per-example loop of the original compute_fitness."""
+    fires = [rule.evaluate(ex) for ex in examples]
+    tp = sum(f and ex.fault_label == rule.diagnosis for f, ex in zip(fires, examples))
+    fp = sum(fires) - tp
+    fn = sum(ex.fault_label == rule.diagnosis for ex in examples) - tp
+    return tp, fp, fn
+
+
+def test_condition_masks_match_evaluate():
+    examples = _examples(300)
+    compiled = CompiledExamples(examples)
+    conditions = [
+        Condition("DTC_P0171", Operator.EQUAL, 1.0),
+        Condition("DTC_P0171", Operator.NOT_EQUAL, 1.0),
+        Condition("DTC_P0300", Operator.NOT_EQUAL, 1.0),  # never seen
+        Condition("DTC_P0217", Operator.GREATER_THAN, 1.0),
+        Condition("engine_rpm", Operator.EQUAL, 800.0),
+        Condition("engine_rpm", Operator.NOT_EQUAL, 0.0),
+        Condition("coolant_temp", Operator.IN_RANGE, 85.0, 95.0),
+        Condition("coolant_temp", Operator.OUT_OF_RANGE, 85.0, 95.0),
+        Condition("stft_b1", Operator.IN_RANGE, -1.0, 0.0),  # 0.0 high falls back to threshold
+        Condition("oil_temp", Operator.LESS_THAN, 1e9),  # missing everywhere
+    ] + [Condition("stft_b1", op, 3.0) for op in Operator.ALL]
+
+    for cond in conditions:
+        mask = compiled.condition_mask(cond)
+        assert mask.tolist() == [cond.evaluate(ex) for ex in examples], cond.to_string()
+
+
+def test_compute_fitness_matches_per_example_loop():
+    examples = _examples(240)
+    compiled = CompiledExamples(examples)
+    ga = GeneticRuleDiscovery(max_conditions=4)
+    ga._analyze_data(examples)
+    random.seed(1)
+
+    for _ in range(200):
+        rule = ga._random_rule()
+        fitness = rule.compute_fitness(compiled)
+        assert (rule.true_positives, rule.false_positives, rule.false_negatives) == _legacy_fitness(rule, examples)
+        assert rule.compute_fitness(examples) == fitness  # plain list is compiled on the fly
+
+    empty = DiagnosticRule("r", [], "normal")
+    assert empty.compute_fitness(compiled) == pytest.approx(0.1 * (0.4 / 3 + 0.3 + 0.2 + 0.1))
+
+
+def test_evolve_memoizes_and_parallel_matches_serial(monkeypatch):
+    examples = _examples(150)
+
+    def run(workers):
+        random.seed(7)
+        ga = GeneticRuleDiscovery(population_size=30, max_generations=6, workers=workers)
+        rules = ga.evolve(examples)
+        return {d: (r.to_string(), r.fitness) for d, r in rules.items()}, ga.generation_history
+
+    scored = []
+    original = CompiledExamples.confusion
+
+    def counting(self, conditions, diagnosis):
+        scored.append(diagnosis)
+        return original(self, conditions, diagnosis)
+
+    monkeypatch.setattr(CompiledExamples, "confusion", counting)
+    serial = run(workers=1)
+    assert 0 < len(scored) < 30 * 6  # elites and unchanged copies come from the cache
+    monkeypatch.undo()
+
+    assert run(workers=2) == serial
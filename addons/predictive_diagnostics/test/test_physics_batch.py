@@ -0,0 +1,97 @@
+import random
+
+import numpy as np
+import pytest
+
+from addons.predictive_diagnostics.physics_simulator import PhysicsSimulator, SimulationConfig
+from addons.predictive_diagnostics.synthetic_data import PhysicsBasedGenerator, PhysicsDataConfig
+
+# Channels that only depend on the driving profile and noise_level; the
+# others carry sensor jitter from each path's own random stream
+DETERMINISTIC_PIDS = [
+    "coolant_temp", "rpm", "stft_b1", "ltft_b1", "fuel_pressure",
+    "throttle_position", "engine_load", "vehicle_speed",
+]
+
+
+@pytest.fixture
+def sim():
+    return PhysicsSimulator()
+
+
+def _configs(n, seed=0, **overrides):
+    rnd = random.Random(seed)
+    return [
+        SimulationConfig(
+            duration_sec=overrides.get("duration_sec", rnd.uniform(60, 240)),
+            initial_coolant_f=rnd.uniform(40, 95),
+            noise_level=overrides.get("noise_level", 0.02),
+            idle_only=i % 3 == 0,
+            highway_cruise=i % 3 == 1,
+        )
+        for i in range(n)
+    ]
+
+
+def test_batch_matches_scalar_simulation(sim):
+    modes = list(sim.SUPPORTED_FAILURES)
+    configs = _configs(len(modes), noise_level=0.0)
+    random.seed(1)
+    profiles = [sim._generate_driving_profile(c) for c in configs]
+
+    result = sim.simulate_batch(modes, configs, profiles, seed=2)
+
+    for i, mode in enumerate(modes):
+        scalar = sim.simulate_failure(mode, configs[i], profiles[i])
+        batched = result.pid_series(i)
+        assert batched.keys() == scalar.keys()
+        for pid in DETERMINISTIC_PIDS:
+            assert batched[pid] == pytest.approx(scalar[pid], abs=1e-9), (mode, pid)
+
+
+def test_batch_features_match_extract_features(sim):
+    modes = ["normal", "thermostat_stuck_closed", "vacuum_leak", "alternator_failure"]
+    configs = _configs(len(modes))
+    configs[2].duration_sec = 1.0  # one sample, too short for features, like extract_features
+
+    result = sim.simulate_batch(modes, configs, seed=3)
+    batched = sim.extract_features_batch(result)
+
+    assert batched[2] == {}
+    for i, features in enumerate(batched):
+        expected = sim.extract_features(result.pid_series(i))
+        assert list(features) == list(expected)
+        for name, value in expected.items():
+            assert features[name] == pytest.approx(value, rel=1e-9, abs=1e-9), name
+
+
+def test_batch_is_seeded_and_statistically_equivalent(sim):
+    modes = ["normal", "thermostat_stuck_open", "o2_sensor_stuck_lean", "voltage_regulator_failure"] * 30
+    configs = _configs(len(modes), duration_sec=120)
+
+    first = sim.extract_features_batch(sim.simulate_batch(modes, configs, seed=4))
+    assert first == sim.extract_features_batch(sim.simulate_batch(modes, configs, seed=4))
+    assert first != sim.extract_features_batch(sim.simulate_batch(modes, configs, seed=5))
+
+    random.seed(6)
+    scalar = [sim.extract_features(sim.simulate_failure(m, c)) for m, c in zip(modes, configs)]
+    for key in ["coolant_temp_final", "o2_b1s1_mean", "voltage_mean", "rpm_mean"]:
+        for mode in set(modes):
+            a = [f[key] for f, m in zip(first, modes) if m == mode]
+            b = [f[key] for f, m in zip(scalar, modes) if m == mode]
+            spread = max(np.std(a), np.std(b), 1e-3)
+            assert abs(np.mean(a) - np.mean(b)) < 1.5 * spread, (mode, key)
+
+
+def test_generator_batched_dataset_is_reproducible():
+    def build():
+        config = PhysicsDataConfig(samples_per_class=5, duration_range=(30, 60), batch_size=8, random_seed=7)
+        return PhysicsBasedGenerator(config).generate_dataset(
+            failure_modes=["normal", "coolant_leak", "fuel_pump_weak"], verbose=False
+        )
+
+    X, y, feature_names, class_names = build()
+    assert X.shape == (15, len(feature_names))
+    assert np.bincount(y).tolist() == [5, 5, 5]
+    assert {"coolant_temp_final", "sim_duration", "sim_highway"} <= set(feature_names)
+    assert np.array_equal(X, build()[0])
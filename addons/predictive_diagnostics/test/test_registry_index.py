@@ -0,0 +1,58 @@
+import dataclasses
+
+from addons.predictive_diagnostics.knowledge import registry
+from addons.predictive_diagnostics.knowledge.registry import (
+    FAILURE_REGISTRY,
+    get_all_failure_modes,
+    get_failure_by_id,
+    get_failure_modes_for_component,
+    get_failure_modes_for_system,
+    get_failures_for_dtc,
+    get_failures_for_symptom,
+)
+
+
+def _scan_symptom(keyword):
+    keyword = keyword.lower()
+    return [
+        f for f in get_all_failure_modes()
+        if any(keyword in s.description.lower() for s in f.symptoms)
+    ]
+
+
+def test_symptom_lookup_matches_substring_scan():
+    for keyword in ("overheat", "NO START", "idle", "eat", "won't", "light on", "", "xyzzy"):
+        assert get_failures_for_symptom(keyword) == _scan_symptom(keyword), keyword
+
+
+def test_dtc_and_id_lookups_match_scan():
+    failures = get_all_failure_modes()
+    for dtc in {d for f in failures for d in f.expected_dtcs}:
+        assert get_failures_for_dtc(dtc) == [f for f in failures if dtc in f.expected_dtcs]
+    for failure in failures:
+        assert get_failure_by_id(failure.id) is next(f for f in failures if f.id == failure.id)
+    assert get_failure_by_id("no_such_failure") is None
+
+
+def test_index_rebuilds_after_registry_mutation():
+    base = get_failure_by_id("thermostat_stuck_closed")
+    extra = dataclasses.replace(base, id="test_only_failure", expected_dtcs=["P9990"])
+
+    FAILURE_REGISTRY["cooling"]["thermostat"].append(extra)
+    try:
+        assert get_failure_by_id("test_only_failure") is extra
+        assert get_failures_for_dtc("P9990") == [extra]
+        assert extra in get_failure_modes_for_system("cooling")
+    finally:
+        FAILURE_REGISTRY["cooling"]["thermostat"].remove(extra)
+    assert get_failure_by_id("test_only_failure") is None
+
+    FAILURE_REGISTRY["test_system"] = {"test_component": [extra]}
+    try:
+        assert get_failure_modes_for_component("test_system", "test_component") == [extra]
+        FAILURE_REGISTRY["test_system"]["test_component"].clear()
+        assert get_failure_modes_for_component("test_system", "test_component") == []
+    finally:
+        del FAILURE_REGISTRY["test_system"]
+    assert get_failure_modes_for_system("test_system") == []
+    assert registry._index is None or "test_system" not in registry._index.by_system
@@ -0,0 +1,99 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from addons.predictive_diagnostics.inference_engine import InferenceEngine
+from addons.predictive_diagnostics.streaming_features import (
+    PIDRingBuffer,
+    StreamingFeatureExtractor,
+)
+
+
+def _chrono_features(col, values):
+    """Batch extraction as in chrono_simulator/train_from_chrono.py."""
+    values = pd.Series(values, dtype=float).dropna()
+    features = {
+        f"{col}_mean": values.mean(),
+        f"{col}_std": values.std() if len(values) > 1 else 0.0,
+        f"{col}_min": values.min(),
+        f"{col}_max": values.max(),
+        f"{col}_range": values.max() - values.min(),
+        f"{col}_final": values.iloc[-1],
+    }
+    if len(values) > 1:
+        features[f"{col}_delta"] = values.iloc[-1] - values.iloc[0]
+        features[f"{col}_rate_max"] = values.diff().abs().max()
+    return features
+
+
+def test_features_match_batch_extraction_and_window():
+    rng = np.random.default_rng(0)
+    coolant = list(np.cumsum(rng.normal(0.5, 2.0, 250)) + 70)
+    coolant[17] = float("nan")
+    rpm = [750.0]
+
+    extractor = StreamingFeatureExtractor.from_series(
+        {"coolant_temp": list(enumerate(coolant)), "rpm": [(0, rpm[0])]}, window=1000
+    )
+    features = extractor.features()
+    expected = {**_chrono_features("coolant_temp", coolant), **_chrono_features("rpm", rpm)}
+    assert features.keys() == expected.keys()
+    for name, value in expected.items():
+        assert features[name] == pytest.approx(value, rel=1e-12), name
+
+    # A full ring holds only the most recent `window` readings
+    windowed = StreamingFeatureExtractor(window=64)
+    windowed.extend("COOLANT_TEMP", coolant)
+    recent = [v for v in coolant if not np.isnan(v)][-64:]
+    for name, value in _chrono_features("coolant_temp", recent).items():
+        assert windowed.features()[name] == pytest.approx(value, rel=1e-12), name
+
+
+def test_ring_buffer_wraps_in_order():
+    buffer = PIDRingBuffer(4)
+    for value in range(10):
+        buffer.append(value)
+        assert list(buffer.values()) == list(range(max(0, value - 3), value + 1))
+    assert len(buffer) == 4
+
+
+def test_live_monitor_session_can_diagnose_mid_capture():
+    from addons.scan_tool.protocol import OBDProtocol
+    from addons.scan_tool.service import ELM327Service
+    from addons.scan_tool.simulator import SimulatedConnection
+
+    service = ELM327Service()
+    service._connection = SimulatedConnection(vehicle_state="overheating")
+    service._protocol = OBDProtocol(service._connection)
+    service._connected = True
+
+    class RecordingPredictor:
+        def __init__(self):
+            self.calls = []
+
+        def predict(self, features, top_k):
+            self.calls.append(features)
+            return [("cooling.thermostat_stuck_closed", 0.9)]
+
+    engine = InferenceEngine.__new__(InferenceEngine)
+    engine.predictor = RecordingPredictor()
+    extractor = StreamingFeatureExtractor(window=8)
+    diagnoses = []
+
+    def on_sample(readings):
+        extractor.add_readings(readings)
+        diagnoses.append(engine.diagnose_from_stream(extractor))
+
+    samples = asyncio.run(
+        service.monitor_pids(["COOLANT_TEMP", "RPM", "SPEED"], duration=0.05, interval=0, callback=on_sample)
+    )
+
+    assert len(diagnoses) == len(samples) == extractor.samples > 0
+    assert diagnoses[-1][0].failure_mode == "cooling.thermostat_stuck_closed"
+    last = engine.predictor.calls[-1]
+    assert {"coolant_temp_mean", "rpm_final", "speed_kmh_max"} <= last.keys()
+    coolant = [s["COOLANT_TEMP"].value for s in samples][-8:]
+    assert last["coolant_temp_mean"] == pytest.approx(np.mean(coolant))
+    assert extractor.last_timestamp == samples[-1]["SPEED"].timestamp
@@ -49,6 +49,7 @@ class TrainingConfig:
     ga_max_generations: int = 50
     ga_min_precision: float = 0.6
     ga_min_recall: float = 0.1
+    ga_workers: int = 1
     
     # Output paths
     model_output_dir: str = "/tmp/predictive_diagnostics/models"
@@ -67,6 +68,7 @@ class TrainingConfig:
             "ga_max_generations": self.ga_max_generations,
             "ga_min_precision": self.ga_min_precision,
             "ga_min_recall": self.ga_min_recall,
+            "ga_workers": self.ga_workers,
             "model_output_dir": self.model_output_dir,
             "fault_tree_cache_dir": self.fault_tree_cache_dir,
         }
@@ -170,6 +172,7 @@ class TrainingPipeline:
             max_generations=self.config.ga_max_generations,
             min_precision=self.config.ga_min_precision,
             min_recall=self.config.ga_min_recall,
+            workers=self.config.ga_workers,
         )
     
     def _get_output_prefix(self, year: int, make: str, model: str, system: str) -> str:
@@ -21,15 +21,24 @@ Usage:
 """
 
 from .service import ELM327Service
+from .sampler import PIDSampler
+from .capture import CaptureReader, CaptureWriter, ReplayConnection
 from .connection import ELM327Connection, ConnectionType
+from .profiler import AdapterProfile, AdapterProfiler
 from .protocol import OBDProtocol
 from .pids import PIDRegistry, decode_pid
 from .bidirectional import ActuatorControl
 
 __all__ = [
     'ELM327Service',
+    'PIDSampler',
+    'CaptureReader',
+    'CaptureWriter',
+    'ReplayConnection',
     'ELM327Connection', 
     'ConnectionType',
+    'AdapterProfile',
+    'AdapterProfiler',
     'OBDProtocol',
     'PIDRegistry',
     'decode_pid',
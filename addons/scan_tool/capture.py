@@ -0,0 +1,627 @@
+"""
+PID Capture Files - compact recordings of live data, and their replay
+
+Monitor results used to be lists of dicts with ISO timestamp strings that
+were thrown away after the response. A capture file keeps the whole
+recording at ~8 bytes per reading instead:
+
+    - columnar: per chunk, one series per PID of float32 values
+    - timestamps delta-encoded as uint32 microseconds
+    - append-only chunks, each checksummed, so a capture can be read
+      (tail -f style) while it is still being written, and a crash only
+      loses the chunk being written
+    - readers memory-map the file and only touch the columns they need
+
+ReplayConnection feeds a capture back through the ELM327Connection
+interface, at recorded or accelerated speed, so diagnostics can be re-run
+offline against a real drive cycle.
+
+File layout (little-endian):
+
+    header      6s magic b"OBDCAP", u16 version, u32 metadata length,
+                JSON metadata (vin, started, ...), zero padded to 8 bytes
+    chunk ...   4s b"CHNK", u32 body length, u32 series count,
+                u32 CRC-32 of body, i64 base time (ns since epoch)
+      body      per series: u16 PID, u16 reserved, u32 count,
+                u32[count] time deltas (us; the first from the base time,
+                the rest from the previous reading), f32[count] values
+
+Usage:
+    with CaptureWriter('drive.obdcap', metadata={'vin': elm.vin}) as capture:
+        await elm.monitor_pids(['RPM', 'MAP'], duration=600, callback=capture.add_readings)
+
+    with CaptureReader('drive.obdcap') as capture:
+        times, values = capture.series('RPM')
+
+    await elm.connect('replay', 'drive.obdcap', speed=4.0)
+
+    python -m addons.scan_tool.capture drive.obdcap   # summary
+"""
+
+import asyncio
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .connection import ConnectionConfig, ConnectionType, ELM327Connection
+from .pids import PID_DEFINITIONS, PIDDefinition, PIDRegistry, get_pid_by_name
+from .service import PIDReading
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OBDCAP"
+VERSION = 1
+CHUNK_MAGIC = b"CHNK"
+
+FILE_HEADER = struct.Struct("<6sHI")
+CHUNK_HEADER = struct.Struct("<4sIIIq")
+SERIES_HEADER = struct.Struct("<HHI")
+
+CAPTURE_SUFFIX = ".obdcap"
+
+# Readings buffered before a chunk is written
+DEFAULT_CHUNK_READINGS = 1024
+
+# Longest time span of one chunk; bounds how far readers lag the writer
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+_MAX_DELTA_US = 0xFFFFFFFF
+_SWAP = sys.byteorder != "little"  # columns are stored little-endian
+
+
+class CaptureError(Exception):
+    """Raised for files that are not (compatible) capture files."""
+
+
+def new_capture_path(directory: Union[str, Path], vin: Optional[str] = None) -> Path:
+    """Timestamped capture file name in ``directory`` (created if missing)."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")[:-3]
+    return directory / f"{stamp}-{vin or 'novin'}{CAPTURE_SUFFIX}"
+
+
+def _read_header(data) -> Tuple[Dict[str, Any], int]:
+    """Parse the file header; returns (metadata, offset of the first chunk)."""
+    if len(data) < FILE_HEADER.size:
+        raise CaptureError("File too short for a capture header")
+    magic, version, meta_len = FILE_HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise CaptureError("Not a PID capture file")
+    if version != VERSION:
+        raise CaptureError(f"Unsupported capture version {version}")
+    end = FILE_HEADER.size + meta_len
+    if len(data) < end:
+        raise CaptureError("Truncated capture header")
+    metadata = json.loads(bytes(data[FILE_HEADER.size:end]).decode("utf-8"))
+    return metadata, end + (-end % 8)
+
+
+# =============================================================================
+# Writing
+# =============================================================================
+
+class CaptureWriter:
+    """
+    Append-only capture writer.
+
+    Readings are buffered per PID and written as one chunk every
+    ``chunk_readings`` readings or ``flush_interval`` seconds of data,
+    whichever comes first. Opening an existing capture appends to it
+    (after dropping a torn chunk left by a crash).
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        metadata: Optional[Dict[str, Any]] = None,
+        chunk_readings: int = DEFAULT_CHUNK_READINGS,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        """
+        Open a capture for writing.
+
+        Args:
+            path: Capture file (created if missing, appended to otherwise)
+            metadata: JSON-serializable info stored in a new file's header
+                (vin, vehicle, notes, ...)
+            chunk_readings: Readings buffered before a chunk is written
+            flush_interval: Longest time span (seconds) of one chunk
+        """
+        self.path = Path(path)
+        self.chunk_readings = chunk_readings
+        self._flush_span_ns = int(flush_interval * 1e9)
+        self._columns: Dict[int, List[Tuple[int, float]]] = {}
+        self._pending = 0
+        self._chunk_start: Optional[int] = None
+        self.readings = 0
+
+        if self.path.exists() and self.path.stat().st_size:
+            with CaptureReader(self.path) as existing:
+                self.metadata = existing.metadata
+                valid = existing.valid_bytes
+            self._file = open(self.path, "r+b")
+            self._file.truncate(valid)
+            self._file.seek(valid)
+        else:
+            self.metadata = {"started": datetime.now().isoformat(), **(metadata or {})}
+            self._file = open(self.path, "wb")
+            meta = json.dumps(self.metadata).encode("utf-8")
+            header = FILE_HEADER.pack(MAGIC, VERSION, len(meta)) + meta
+            self._file.write(header + bytes(-len(header) % 8))
+            self._file.flush()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def add(self, reading: PIDReading) -> None:
+        """Buffer one reading."""
+        ts = int(reading.timestamp.timestamp() * 1e9)
+        if self._chunk_start is not None and (
+            self._pending >= self.chunk_readings
+            or abs(ts - self._chunk_start) >= self._flush_span_ns
+        ):
+            self.flush()
+        if self._chunk_start is None:
+            self._chunk_start = ts
+        self._columns.setdefault(reading.pid, []).append((ts, reading.value))
+        self._pending += 1
+        self.readings += 1
+
+    def add_readings(self, readings: Dict[str, PIDReading]) -> None:
+        """
+        Buffer a sample as returned by read_pids()/monitor_pids().
+
+        Usable directly as a monitor_pids callback. A reading listed under
+        several names is stored once.
+        """
+        seen = set()
+        for reading in readings.values():
+            key = (reading.pid, reading.timestamp)
+            if key not in seen:
+                seen.add(key)
+                self.add(reading)
+
+    def flush(self) -> None:
+        """Write buffered readings as one chunk."""
+        if not self._pending:
+            return
+        for column in self._columns.values():
+            column.sort(key=lambda item: item[0])
+        base = min(column[0][0] for column in self._columns.values())
+        body = bytearray()
+        for pid, column in self._columns.items():
+            deltas = array("I")
+            values = array("f")
+            previous = base
+            for ts, value in column:
+                deltas.append(min(max(ts - previous, 0) // 1000, _MAX_DELTA_US))
+                values.append(value)
+                previous = ts
+            if _SWAP:
+                deltas.byteswap()
+                values.byteswap()
+            body += SERIES_HEADER.pack(pid, 0, len(column))
+            body += deltas.tobytes()
+            body += values.tobytes()
+
+        header = CHUNK_HEADER.pack(CHUNK_MAGIC, len(body), len(self._columns), zlib.crc32(body), base)
+        # One write per chunk, so readers see whole chunks or a torn tail
+        self._file.write(header + body)
+        self._file.flush()
+        self._columns = {}
+        self._pending = 0
+        self._chunk_start = None
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> "CaptureWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+# =============================================================================
+# Reading
+# =============================================================================
+
+class CaptureReader:
+    """
+    Memory-mapped capture reader.
+
+    Only the chunk and series headers are parsed up front; columns are
+    decoded on demand. Call refresh() to pick up chunks appended since
+    the file was opened.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open a capture for reading.
+
+        Raises:
+            CaptureError: If the file is not a capture file
+        """
+        self.path = Path(path)
+        self._fd = os.open(self.path, os.O_RDONLY)
+        self._mm: Optional[mmap.mmap] = None
+        # (base time ns, {pid: (count, offset of the deltas)}) per chunk
+        self._chunks: List[Tuple[int, Dict[int, Tuple[int, int]]]] = []
+        self._counts: Dict[int, int] = {}
+        try:
+            self._map()
+            self.metadata, self._end = _read_header(self._mm)
+            self.refresh()
+        except Exception:
+            self.close()
+            raise
+
+    def _map(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._mm = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+
+    def refresh(self) -> int:
+        """
+        Index chunks appended since the last call.
+
+        Returns:
+            Number of new complete chunks
+        """
+        if os.fstat(self._fd).st_size != len(self._mm):
+            self._map()
+        mm = self._mm
+        found = 0
+        while self._end + CHUNK_HEADER.size <= len(mm):
+            magic, length, n_series, crc, base = CHUNK_HEADER.unpack_from(mm, self._end)
+            start = self._end + CHUNK_HEADER.size
+            if magic != CHUNK_MAGIC or start + length > len(mm):
+                break  # Still being written (or torn by a crash)
+            if zlib.crc32(mm[start:start + length]) != crc:
+                break
+
+            columns = {}
+            offset = start
+            for _ in range(n_series):
+                pid, _, count = SERIES_HEADER.unpack_from(mm, offset)
+                offset += SERIES_HEADER.size
+                columns[pid] = (count, offset)
+                self._counts[pid] = self._counts.get(pid, 0) + count
+                offset += 8 * count
+            self._chunks.append((base, columns))
+            self._end = start + length
+            found += 1
+        return found
+
+    @property
+    def valid_bytes(self) -> int:
+        """Size of the file up to the end of the last complete chunk."""
+        return self._end
+
+    @property
+    def pids(self) -> List[int]:
+        """PIDs with at least one reading."""
+        return sorted(self._counts)
+
+    def count(self, pid: Union[int, str]) -> int:
+        """Number of readings of a PID."""
+        return self._counts.get(self._resolve(pid), 0)
+
+    @property
+    def readings(self) -> int:
+        return sum(self._counts.values())
+
+    def series(self, pid: Union[int, str]) -> Tuple[array, array]:
+        """
+        All readings of one PID.
+
+        Returns:
+            (times, values): array('d') of epoch seconds, array('f')
+        """
+        pid = self._resolve(pid)
+        times = array("d")
+        values = array("f")
+        for base, columns in self._chunks:
+            if pid not in columns:
+                continue
+            count, offset = columns[pid]
+            deltas = array("I", self._mm[offset:offset + 4 * count])
+            column = array("f", self._mm[offset + 4 * count:offset + 8 * count])
+            if _SWAP:
+                deltas.byteswap()
+                column.byteswap()
+            times.extend((base + us * 1000) / 1e9 for us in accumulate(deltas))
+            values.extend(column)
+        return times, values
+
+    def span(self) -> Tuple[Optional[float], Optional[float]]:
+        """(first, last) reading time in epoch seconds; (None, None) if empty."""
+        first = last = None
+        for pid in self._counts:
+            times, _ = self.series(pid)
+            if times:
+                first = times[0] if first is None else min(first, times[0])
+                last = times[-1] if last is None else max(last, times[-1])
+        return first, last
+
+    @staticmethod
+    def _resolve(pid: Union[int, str]) -> Optional[int]:
+        return get_pid_by_name(pid) if isinstance(pid, str) else pid
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "CaptureReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+# =============================================================================
+# Replay
+# =============================================================================
+
+@lru_cache(maxsize=None)
+def _encoding(pid: int) -> Tuple[int, float, float]:
+    """
+    Inverse of a PID formula: (leading bytes, scale, offset).
+
+    Every Mode 01 formula is linear in the big-endian value of its leading
+    bytes (all of them for most PIDs; only A for O2 voltages and fuel
+    status, A-B for wide-band ratios), so value = raw * scale + offset.
+    """
+    defn = PID_DEFINITIONS[pid]
+    for width in range(defn.bytes, 0, -1):
+        top = 256 ** width - 1
+
+        def decode(raw: int) -> float:
+            return defn.formula(raw.to_bytes(width, "big") + bytes(defn.bytes - width))
+
+        offset = decode(0)
+        scale = (decode(top) - offset) / top
+        if scale and all(
+            abs(decode(raw) - (raw * scale + offset)) <= 1e-6 * max(1.0, abs(scale * top))
+            for raw in (1, top // 7, top // 3, top // 2)
+        ):
+            return width, scale, offset
+    return defn.bytes, 1.0, 0.0
+
+
+def encode_pid(defn: PIDDefinition, value: float) -> bytes:
+    """Data bytes an ECU would send for ``value`` (nearest representable)."""
+    width, scale, offset = _encoding(defn.pid)
+    raw = min(max(round((value - offset) / scale), 0), 256 ** width - 1)
+    return raw.to_bytes(width, "big") + bytes(defn.bytes - width)
+
+
+class ReplayConnection(ELM327Connection):
+    """
+    ELM327Connection that answers from a capture file.
+
+    Mode 01 requests (single or multi-PID) return the last recorded value
+    of each PID at the replay position, which advances with the clock at
+    ``speed`` times real time from connect(). Mode 09 VIN comes from the
+    capture metadata; other modes reply NO DATA. Past the end, the last
+    values are held (or the replay restarts with ``loop``).
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        speed: float = 1.0,
+        loop: bool = False,
+        config: Optional[ConnectionConfig] = None,
+    ):
+        """
+        Initialize replay.
+
+        Args:
+            path: Capture file
+            speed: Replay speed (1.0 = as recorded, 4.0 = four times faster)
+            loop: Restart from the beginning after the last reading
+            config: Connection config (defaults to a replay config for ``path``)
+        """
+        if speed <= 0:
+            raise ValueError("Replay speed must be positive")
+        super().__init__(config or ConnectionConfig(ConnectionType.REPLAY, str(path)))
+        self.path = Path(path)
+        self.speed = speed
+        self.loop = loop
+        self.metadata: Dict[str, Any] = {}
+        self._series: Dict[int, Tuple[array, array]] = {}
+        self._start = 0.0
+        self._duration = 0.0
+        self._started_at = 0.0
+        self._spaces = True
+
+    async def connect(self) -> bool:
+        """Load the capture and start the replay clock."""
+        try:
+            with CaptureReader(self.path) as capture:
+                self.metadata = capture.metadata
+                self._series = {
+                    pid: capture.series(pid) for pid in capture.pids if pid in PID_DEFINITIONS
+                }
+        except (OSError, CaptureError) as e:
+            logger.error(f"Cannot replay {self.path}: {e}")
+            return False
+
+        firsts = [times[0] for times, _ in self._series.values()]
+        lasts = [times[-1] for times, _ in self._series.values()]
+        self._start = min(firsts, default=0.0)
+        self._duration = max(lasts, default=0.0) - self._start
+        self._started_at = asyncio.get_event_loop().time()
+        self._connected = True
+        logger.info(
+            f"Replaying {self.path.name}: {len(self._series)} PIDs, "
+            f"{self._duration:.1f}s at {self.speed:g}x"
+        )
+        return True
+
+    async def disconnect(self) -> None:
+        self._connected = False
+
+    @property
+    def position(self) -> float:
+        """Seconds into the capture."""
+        elapsed = (asyncio.get_event_loop().time() - self._started_at) * self.speed
+        if self.loop and self._duration > 0:
+            return elapsed % self._duration
+        return min(elapsed, self._duration)
+
+    @property
+    def finished(self) -> bool:
+        """True once a non-looping replay has passed its last reading."""
+        if self.loop:
+            return False
+        return (asyncio.get_event_loop().time() - self._started_at) * self.speed >= self._duration
+
+    def seek(self, seconds: float) -> None:
+        """Jump to ``seconds`` into the capture."""
+        self._started_at = asyncio.get_event_loop().time() - seconds / self.speed
+
+    async def send_command(self, command: str, timeout: Optional[float] = None) -> str:
+        if not self._connected:
+            raise ConnectionError("Not connected to ELM327")
+        command = command.strip().upper().replace(" ", "")
+        if command.startswith("AT"):
+            return self._handle_at(command[2:])
+        if len(command) < 4 or any(c not in "0123456789ABCDEF" for c in command):
+            return "?"
+
+        mode = command[:2]
+        if mode == "01":
+            return self._handle_mode_01(command[2:])
+        if mode == "09" and command[2:4] == "02":
+            return self._vin_reply()
+        return "NO DATA"
+
+    # -------------------------------------------------------------------------
+    # Replies
+    # -------------------------------------------------------------------------
+
+    def _fmt(self, data: List[int]) -> str:
+        return (" " if self._spaces else "").join(f"{b:02X}" for b in data)
+
+    def _handle_at(self, cmd: str) -> str:
+        if cmd in ("Z", "I"):
+            return "ELM327 v1.5 (Replay)"
+        if cmd in ("S0", "S1"):
+            self._spaces = cmd == "S1"
+        elif cmd == "RV":
+            voltage = self._value(get_pid_by_name("VOLTAGE"))
+            return f"{voltage if voltage is not None else 12.6:.1f}V"
+        elif cmd == "DP":
+            return self.metadata.get("protocol", "ISO 15765-4 (CAN 11/500)")
+        return "OK"
+
+    def _handle_mode_01(self, pid_hex: str) -> str:
+        if len(pid_hex) % 2 or len(pid_hex) > 12:
+            return "NO DATA"
+        payload = [0x41]
+        for i in range(0, len(pid_hex), 2):
+            pid = int(pid_hex[i:i + 2], 16)
+            if pid % 0x20 == 0:
+                data = self._supported_bitmap(pid)
+            else:
+                value = self._value(pid)
+                data = encode_pid(PID_DEFINITIONS[pid], value) if value is not None else None
+            if data is not None:
+                payload += [pid, *data]
+        if len(payload) == 1:
+            return "NO DATA"
+        if len(payload) <= 7:
+            return self._fmt(payload)
+
+        # ISO-TP multi-frame reply, as an ELM327 prints it with headers off
+        sep = " " if self._spaces else ""
+        lines = [f"{len(payload):03X}", f"0:{sep}{self._fmt(payload[:6])}"]
+        rest = payload[6:]
+        for index, start in enumerate(range(0, len(rest), 7), 1):
+            frame = rest[start:start + 7]
+            lines.append(f"{index % 16:X}:{sep}{self._fmt(frame + [0] * (7 - len(frame)))}")
+        return "\n".join(lines)
+
+    def _supported_bitmap(self, base: int) -> Optional[bytes]:
+        """PIDs base+1..base+0x20 supported (recorded), bit 0 = more follow."""
+        if base and not any(pid > base for pid in self._series):
+            return None
+        bitmap = 0
+        for pid in self._series:
+            if base < pid <= base + 0x20:
+                bitmap |= 1 << (base + 0x20 - pid)
+        if any(pid > base + 0x20 for pid in self._series):
+            bitmap |= 1
+        return struct.pack(">I", bitmap)
+
+    def _value(self, pid: int) -> Optional[float]:
+        """Last recorded value of ``pid`` at the replay position."""
+        if pid not in self._series:
+            return None
+        times, values = self._series[pid]
+        index = bisect_right(times, self._start + self.position) - 1
+        return values[max(index, 0)]
+
+    def _vin_reply(self) -> str:
+        vin = self.metadata.get("vin")
+        if not vin:
+            return "NO DATA"
+        data = vin.encode("ascii")
+        return "\n".join(
+            self._fmt([0x49, 0x02, i // 4 + 1, *data[i:i + 4]]) for i in range(0, len(data), 4)
+        )
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    """Print a summary of capture files."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize PID capture files")
+    parser.add_argument("paths", nargs="+", help="Capture files")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        with CaptureReader(path) as capture:
+            first, last = capture.span()
+            duration = (last - first) if first is not None else 0.0
+            print(f"{path}: {capture.readings} readings, {duration:.1f}s, "
+                  f"{capture.valid_bytes / max(capture.readings, 1):.1f} bytes/reading")
+            for key, value in capture.metadata.items():
+                print(f"  {key}: {value}")
+            for pid in capture.pids:
+                defn = PIDRegistry.get(pid)
+                times, values = capture.series(pid)
+                name = defn.name if defn else f"PID {pid:02X}"
+                unit = defn.unit if defn else ""
+                print(f"  {name:<16} {len(values):>7} readings  "
+                      f"min {min(values):.2f}  max {max(values):.2f} {unit}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ Connection Types:
     - Bluetooth: /dev/rfcomm0 (Linux) or COM port (Windows)
     - WiFi: TCP to 192.168.0.10:35000 (typical ELM327 WiFi)
     - USB: /dev/ttyUSB0 (Linux) or COM port (Windows)
+    - Replay: path to a capture file (see capture.ReplayConnection)
 """
 
 import asyncio
@@ -25,6 +26,7 @@ class ConnectionType(Enum):
     WIFI = "wifi"
     USB = "usb"
     SERIAL = "serial"  # Generic serial (could be BT or USB)
+    REPLAY = "replay"  # Capture file played back (see capture.py)
 
 
 @dataclass
@@ -50,6 +52,9 @@ class ELM327Connection(ABC):
         self._connected = False
         self._reader: Optional[asyncio.StreamReader] = None
         self._writer: Optional[asyncio.StreamWriter] = None
+        self.profile = None  # profiler.AdapterProfile once initialized
+        self.read_deadline: Optional[float] = None  # per Mode 01 PID, from the profile
+        self._late_reply = False  # a read timed out; its reply may still arrive
     
     @property
     def connected(self) -> bool:
@@ -71,7 +76,7 @@ class ELM327Connection(ABC):
         
         Args:
             command: Command string (e.g., "ATZ", "0100")
-            timeout: Response timeout in seconds
+            timeout: Response timeout in seconds (default: see _default_timeout)
             
         Returns:
             Response string with prompt removed
@@ -79,7 +84,11 @@ class ELM327Connection(ABC):
         if not self._connected or not self._writer:
             raise ConnectionError("Not connected to ELM327")
         
-        timeout = timeout or self.config.timeout
+        if not timeout:
+            timeout = self._default_timeout(command)
+        
+        if self._late_reply:
+            await self._discard_until_prompt()
         
         # Send command with carriage return
         cmd_bytes = f"{command}\r".encode('ascii')
@@ -89,30 +98,76 @@ class ELM327Connection(ABC):
         logger.debug(f"Sent: {command}")
         
         # Read response until prompt (>)
-        response = await self._read_until_prompt(timeout)
+        response = await self._read_until_prompt(timeout, command)
         logger.debug(f"Received: {response}")
         
         return response
     
-    async def _read_until_prompt(self, timeout: float) -> str:
-        """Read response until ELM327 prompt (>)."""
+    def _default_timeout(self, command: str) -> float:
+        """
+        Read deadline for a command.
+        
+        The profiled deadline was measured on single-PID Mode 01 round
+        trips, so it only applies to Mode 01 PID reads, once per PID in the
+        request. Everything else (AT commands, Mode 03/09 multi-frame
+        replies, 04) gets config.timeout.
+        """
+        cmd = command.replace(' ', '').upper()
+        if self.read_deadline and cmd.startswith("01") and len(cmd) >= 4:
+            pids = (len(cmd) - 2) // 2
+            return min(self.read_deadline * pids, self.config.timeout)
+        return self.config.timeout
+    
+    async def _discard_until_prompt(self) -> None:
+        """Drop a timed-out command's late reply so it is not read as the next one's."""
+        self._late_reply = False
+        if not self._reader:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.timeout
+        discarded = bytearray()
+        try:
+            while True:
+                chunk = await asyncio.wait_for(
+                    self._reader.read(1024),
+                    timeout=max(deadline - loop.time(), 0)
+                )
+                discarded += chunk
+                if not chunk or b">" in chunk:
+                    break
+        except asyncio.TimeoutError:
+            logger.warning("No prompt after a timed-out command; adapter may be out of sync")
+        if discarded:
+            logger.debug(f"Discarded late reply: {bytes(discarded)}")
+    
+    async def _read_until_prompt(self, timeout: float, command: Optional[str] = None) -> str:
+        """
+        Read response until ELM327 prompt (>).
+        
+        Args:
+            timeout: Deadline for the whole response, in seconds
+            command: Command just sent (its echo is removed if present)
+        """
         if not self._reader:
             raise ConnectionError("Reader not initialized")
         
-        buffer = b""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        buffer = bytearray()
         try:
             while True:
                 chunk = await asyncio.wait_for(
                     self._reader.read(1024),
-                    timeout=timeout
+                    timeout=max(deadline - loop.time(), 0)
                 )
                 if not chunk:
                     break
                 buffer += chunk
-                if b">" in buffer:
+                if b">" in chunk:
                     break
         except asyncio.TimeoutError:
-            logger.warning(f"Timeout reading response, got: {buffer}")
+            logger.warning(f"Timeout reading response, got: {bytes(buffer)}")
+            self._late_reply = True
         
         # Decode and clean response
         response = buffer.decode('ascii', errors='ignore')
@@ -121,10 +176,27 @@ class ELM327Connection(ABC):
         
         # Remove echo if present (command echoed back)
         lines = [l.strip() for l in response.split('\n') if l.strip()]
-        if lines and not lines[0].startswith('4'):  # OBD responses start with 4x
-            lines = lines[1:]  # Remove echo
+        if lines and command and lines[0].replace(' ', '').upper() == command.replace(' ', '').upper():
+            lines = lines[1:]
         
         return '\n'.join(lines)
+    
+    async def _initialize(self) -> None:
+        """Initialize ELM327 adapter (profiled once per adapter and vehicle)."""
+        from .profiler import AdapterProfiler
+        
+        try:
+            self.profile = await AdapterProfiler(self).initialize(self.config.address)
+            self.read_deadline = self.profile.read_deadline
+        except Exception as e:
+            # Unusual adapter: fall back to the basic init sequence
+            logger.warning(f"Adapter profiling failed ({e}); using default timing")
+            self.profile = None
+            self.read_deadline = None
+            for command in ("ATE0", "ATL0", "ATS0", "ATSP0"):
+                await self.send_command(command)
+        
+        logger.debug("ELM327 initialized")
 
 
 class SerialConnection(ELM327Connection):
@@ -165,26 +237,6 @@ class SerialConnection(ELM327Connection):
             await self._writer.wait_closed()
         self._connected = False
         logger.info("Serial connection closed")
-    
-    async def _initialize(self) -> None:
-        """Initialize ELM327 adapter."""
-        # Reset
-        await self.send_command("ATZ", timeout=3.0)
-        await asyncio.sleep(1.0)  # Give it time to reset
-        
-        # Disable echo
-        await self.send_command("ATE0")
-        
-        # Disable linefeeds
-        await self.send_command("ATL0")
-        
-        # Disable spaces in responses
-        await self.send_command("ATS0")
-        
-        # Auto-detect protocol
-        await self.send_command("ATSP0")
-        
-        logger.debug("ELM327 initialized")
 
 
 class WiFiConnection(ELM327Connection):
@@ -224,26 +276,6 @@ class WiFiConnection(ELM327Connection):
             await self._writer.wait_closed()
         self._connected = False
         logger.info("WiFi connection closed")
-    
-    async def _initialize(self) -> None:
-        """Initialize ELM327 adapter."""
-        # Reset
-        await self.send_command("ATZ", timeout=3.0)
-        await asyncio.sleep(1.0)
-        
-        # Disable echo
-        await self.send_command("ATE0")
-        
-        # Disable linefeeds  
-        await self.send_command("ATL0")
-        
-        # Disable spaces
-        await self.send_command("ATS0")
-        
-        # Auto-detect protocol
-        await self.send_command("ATSP0")
-        
-        logger.debug("ELM327 initialized")
 
 
 def create_connection(
@@ -257,11 +289,15 @@ def create_connection(
     Args:
         connection_type: Type of connection (bluetooth, wifi, usb, serial)
         address: Device path or IP address
-        **kwargs: Additional connection config
+        **kwargs: Additional connection config (for replay: speed, loop)
         
     Returns:
         Configured ELM327Connection instance
     """
+    if connection_type == ConnectionType.REPLAY:
+        from .capture import ReplayConnection
+        return ReplayConnection(address, **kwargs)
+    
     config = ConnectionConfig(
         connection_type=connection_type,
         address=address,
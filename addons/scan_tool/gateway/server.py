@@ -10,6 +10,7 @@ Features:
 - Device detection (shows appropriate UI for iPhone/Android/Desktop)
 - QR code for easy phone connection
 - REST API + WebSocket for real-time data
+- One PID sampler per adapter: every client shares a single polling schedule
 
 Usage:
     python -m addons.scan_tool.gateway.server --port 8327
@@ -23,7 +24,7 @@ import platform
 import socket
 from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -36,6 +37,9 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from addons.scan_tool.service import ELM327Service
+from addons.scan_tool.capture import CaptureWriter, new_capture_path
+from addons.scan_tool.pids import PIDRegistry
+from addons.scan_tool.sampler import PIDSampler
 from addons.scan_tool.session import get_session, reset_session, DiagnosticSession
 
 logging.basicConfig(level=logging.INFO)
@@ -43,7 +47,11 @@ logger = logging.getLogger(__name__)
 
 # Global ELM327 service instance
 _elm: Optional[ELM327Service] = None
+# Sole poller of _elm; endpoints subscribe to it instead of calling read_pid
+_sampler: Optional[PIDSampler] = None
 _connected_at: Optional[datetime] = None
+# Where /monitor records captures (--capture-dir); None = recording disabled
+_capture_dir: Optional[Path] = None
 
 # mDNS/Bonjour service for auto-discovery
 _mdns_service = None
@@ -115,8 +123,9 @@ def stop_mdns_service():
 # =============================================================================
 
 class ConnectRequest(BaseModel):
-    connection_type: str = "bluetooth"  # bluetooth, wifi, usb
-    address: str  # /dev/rfcomm0, 192.168.0.10:35000, etc.
+    connection_type: str = "bluetooth"  # bluetooth, wifi, usb, replay
+    address: str  # /dev/rfcomm0, 192.168.0.10:35000, capture file, etc.
+    speed: float = 1.0  # replay only: 1.0 = as recorded
 
 class PIDRequest(BaseModel):
     pids: str  # Comma-separated: "RPM, COOLANT_TEMP, LOAD"
@@ -124,7 +133,9 @@ class PIDRequest(BaseModel):
 class MonitorRequest(BaseModel):
     pids: str
     duration: float = 10.0
-    interval: float = 1.0
+    interval: Optional[float] = None  # None = per-PID tier rates
+    rates: Optional[Dict[str, float]] = None  # e.g. {"RPM": 10, "COOLANT_TEMP": 0.5}
+    capture: bool = False  # record to a capture file in --capture-dir
 
 class WaitConditionRequest(BaseModel):
     pid: str
@@ -161,6 +172,8 @@ async def lifespan(app: FastAPI):
     # Cleanup on shutdown
     global _elm
     stop_mdns_service()
+    if _sampler:
+        await _sampler.stop()
     if _elm and _elm.connected:
         await _elm.disconnect()
         logger.info("Disconnected ELM327 on shutdown")
@@ -376,18 +389,23 @@ async def root():
 @app.post("/connect")
 async def connect(req: ConnectRequest):
     """Connect to ELM327 adapter."""
-    global _elm, _connected_at
+    global _elm, _sampler, _connected_at
     
     try:
         # Disconnect existing
+        if _sampler:
+            await _sampler.stop()
+            _sampler = None
         if _elm and _elm.connected:
             await _elm.disconnect()
         
         _elm = ELM327Service()
-        success = await _elm.connect(req.connection_type, req.address)
+        kwargs = {"speed": req.speed} if req.connection_type.lower() == "replay" else {}
+        success = await _elm.connect(req.connection_type, req.address, **kwargs)
         
         if success:
             _connected_at = datetime.now()
+            _sampler = PIDSampler(_elm)
             supported = await _elm.get_supported_pids()
             return {
                 "status": "connected",
@@ -406,8 +424,11 @@ async def connect(req: ConnectRequest):
 @app.post("/disconnect")
 async def disconnect():
     """Disconnect from ELM327."""
-    global _elm, _connected_at
+    global _elm, _sampler, _connected_at
     
+    if _sampler:
+        await _sampler.stop()
+        _sampler = None
     if _elm:
         await _elm.disconnect()
         _elm = None
@@ -419,7 +440,7 @@ async def disconnect():
 
 def _require_connection():
     """Check ELM327 is connected."""
-    if not _elm or not _elm.connected:
+    if not _elm or not _elm.connected or not _sampler:
         raise HTTPException(status_code=400, detail="Not connected. POST /connect first.")
 
 
@@ -433,7 +454,8 @@ async def read_vin():
     _require_connection()
     
     try:
-        vin = await _elm.read_vin()
+        async with _sampler.exclusive():
+            vin = await _elm.read_vin()
         return {"vin": vin}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -445,7 +467,8 @@ async def read_dtcs(user_id: str = "default"):
     _require_connection()
     
     try:
-        all_dtcs = await _elm.read_all_dtcs()
+        async with _sampler.exclusive():
+            all_dtcs = await _elm.read_all_dtcs()
         session = get_session(user_id)
         
         result = {
@@ -489,14 +512,11 @@ async def read_pids(req: PIDRequest, user_id: str = "default"):
         pid_names = [p.strip() for p in req.pids.split(',')]
         session = get_session(user_id)
         
-        results = {}
-        for pid_name in pid_names:
-            reading = await _elm.read_pid(pid_name)
-            if reading:
-                results[pid_name] = {
-                    "value": reading.value,
-                    "unit": reading.unit
-                }
+        readings = await _sampler.read(pid_names)
+        results = {
+            pid_name: {"value": reading.value, "unit": reading.unit}
+            for pid_name, reading in readings.items()
+        }
         
         return {"pids": results, "timestamp": datetime.now().isoformat()}
         
@@ -512,15 +532,11 @@ async def read_fuel_trims(user_id: str = "default"):
     try:
         # Read all fuel trim PIDs
         trim_pids = ['STFT1', 'LTFT1', 'STFT2', 'LTFT2']
-        results = {}
-        
-        for pid_name in trim_pids:
-            reading = await _elm.read_pid(pid_name)
-            if reading:
-                results[pid_name] = {
-                    "value": reading.value,
-                    "unit": reading.unit
-                }
+        readings = await _sampler.read(trim_pids)
+        results = {
+            pid_name: {"value": reading.value, "unit": reading.unit}
+            for pid_name, reading in readings.items()
+        }
         
         return {"fuel_trims": results, "timestamp": datetime.now().isoformat()}
         
@@ -532,22 +548,34 @@ async def read_fuel_trims(user_id: str = "default"):
 async def monitor_pids(req: MonitorRequest, user_id: str = "default"):
     """Monitor PIDs over time."""
     _require_connection()
+    if req.capture and not _capture_dir:
+        raise HTTPException(status_code=400, detail="Capture disabled. Start the gateway with --capture-dir.")
     
+    capture = None
     try:
         pid_names = [p.strip() for p in req.pids.split(',')]
+        if req.capture:
+            capture = CaptureWriter(
+                new_capture_path(_capture_dir, _elm.vin),
+                metadata={"vin": _elm.vin, "pids": pid_names},
+            )
         
-        # Collect samples
+        # Collect samples from the shared schedule
         samples = []
-        start = datetime.now()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + req.duration
         
-        while (datetime.now() - start).total_seconds() < req.duration:
-            sample = {"timestamp": datetime.now().isoformat()}
-            for pid_name in pid_names:
-                reading = await _elm.read_pid(pid_name)
-                if reading:
+        async with _sampler.subscribe(pid_names, interval=req.interval, rates=req.rates) as sub:
+            while (remaining := deadline - loop.time()) > 0:
+                frame = await sub.get(timeout=remaining)
+                if frame is None:
+                    break
+                sample = {"timestamp": frame.timestamp.isoformat()}
+                for pid_name, reading in frame.readings.items():
                     sample[pid_name] = reading.value
-            samples.append(sample)
-            await asyncio.sleep(req.interval)
+                samples.append(sample)
+                if capture:
+                    capture.add_readings(frame.readings)
         
         # Calculate stats
         stats = {}
@@ -561,14 +589,23 @@ async def monitor_pids(req: MonitorRequest, user_id: str = "default"):
                     "samples": len(values)
                 }
         
+        report = _sampler.report()
         return {
             "samples": samples,
             "stats": stats,
-            "duration": req.duration
+            "rates": {
+                name: report[PIDRegistry.get(name).name]
+                for name in stats if PIDRegistry.get(name) and PIDRegistry.get(name).name in report
+            },
+            "duration": req.duration,
+            "capture": capture.path.name if capture else None
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if capture:
+            capture.close()
 
 
 @app.post("/wait-condition")
@@ -595,11 +632,19 @@ async def wait_for_condition(req: WaitConditionRequest):
         raise HTTPException(status_code=400, detail=f"Unknown operator: {req.operator}")
     
     try:
-        result = await _elm.wait_for_condition(
-            req.pid,
-            condition,
-            timeout=req.timeout
-        )
+        # Watch the shared stream rather than polling the adapter directly
+        result = None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + req.timeout
+        
+        async with _sampler.subscribe([req.pid], interval=0.2) as sub:
+            while result is None and (remaining := deadline - loop.time()) > 0:
+                frame = await sub.get(timeout=remaining)
+                if frame is None:
+                    break
+                reading = frame.readings.get(req.pid)
+                if reading and condition(reading.value):
+                    result = reading
         
         if result:
             return {
@@ -625,7 +670,8 @@ async def clear_dtcs(user_id: str = "default"):
     _require_connection()
     
     try:
-        success = await _elm.clear_dtcs()
+        async with _sampler.exclusive():
+            success = await _elm.clear_dtcs()
         if success:
             session = get_session(user_id)
             session.log_action("Cleared DTCs via gateway")
@@ -642,7 +688,8 @@ async def diagnostic_snapshot():
     _require_connection()
     
     try:
-        snapshot = await _elm.capture_diagnostic_snapshot()
+        async with _sampler.exclusive():
+            snapshot = await _elm.capture_diagnostic_snapshot()
         
         return {
             "timestamp": snapshot.timestamp.isoformat(),
@@ -728,68 +775,80 @@ async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket for real-time PID streaming.
     
-    Send: {"action": "subscribe", "pids": ["RPM", "COOLANT_TEMP"]}
-    Receive: {"RPM": 850, "COOLANT_TEMP": 195, "timestamp": "..."}
+    Send: {"action": "subscribe", "pids": ["RPM", "COOLANT_TEMP"], "rates": {"RPM": 10}}
+    Receive: {"RPM": 850, "timestamp": "..."} (only the PIDs polled in that slot)
+    Send: {"action": "rates"} for target/achieved Hz per PID
+    
+    Each PID streams at its own rate ("rates" overrides the tier default).
+    
+    Frames come from the shared PID sampler; a client that reads too
+    slowly skips frames instead of holding up the other clients.
     """
     await websocket.accept()
     logger.info("WebSocket client connected")
     
-    subscribed_pids = []
-    streaming = False
+    subscription = None
+    forwarder: Optional[asyncio.Task] = None
+    
+    async def forward(sub):
+        async for frame in sub:
+            result = {"timestamp": frame.timestamp.isoformat()}
+            for pid, reading in frame.readings.items():
+                result[pid] = reading.value
+            await websocket.send_json(result)
+    
+    async def stop_streaming():
+        nonlocal subscription, forwarder
+        if subscription:
+            subscription.close()
+            subscription = None
+        if forwarder:
+            forwarder.cancel()
+            try:
+                await forwarder
+            except (asyncio.CancelledError, Exception):
+                pass
+            forwarder = None
     
     try:
         while True:
-            # Check for incoming messages (non-blocking)
-            try:
-                data = await asyncio.wait_for(websocket.receive_json(), timeout=0.1)
+            data = await websocket.receive_json()
+            action = data.get("action")
+            
+            if action == "subscribe":
+                await stop_streaming()
+                subscribed_pids = data.get("pids", [])
+                await websocket.send_json({
+                    "status": "subscribed",
+                    "pids": subscribed_pids
+                })
+                if subscribed_pids and _sampler and _elm.connected:
+                    subscription = _sampler.subscribe(subscribed_pids, rates=data.get("rates"))
+                    forwarder = asyncio.create_task(forward(subscription))
                 
-                action = data.get("action")
+            elif action == "unsubscribe":
+                await stop_streaming()
+                await websocket.send_json({"status": "unsubscribed"})
                 
-                if action == "subscribe":
-                    subscribed_pids = data.get("pids", [])
-                    streaming = True
-                    await websocket.send_json({
-                        "status": "subscribed",
-                        "pids": subscribed_pids
-                    })
-                    
-                elif action == "unsubscribe":
-                    streaming = False
-                    await websocket.send_json({"status": "unsubscribed"})
-                    
-                elif action == "read":
-                    # One-shot read
-                    pids = data.get("pids", [])
-                    if _elm and _elm.connected:
-                        result = {"timestamp": datetime.now().isoformat()}
-                        for pid in pids:
-                            reading = await _elm.read_pid(pid)
-                            if reading:
-                                result[pid] = reading.value
-                        await websocket.send_json(result)
-                    else:
-                        await websocket.send_json({"error": "Not connected"})
-                        
-            except asyncio.TimeoutError:
-                pass  # No message, continue streaming
-            
-            # Stream subscribed PIDs
-            if streaming and subscribed_pids and _elm and _elm.connected:
-                result = {"timestamp": datetime.now().isoformat()}
-                for pid in subscribed_pids:
-                    try:
-                        reading = await _elm.read_pid(pid)
-                        if reading:
-                            result[pid] = reading.value
-                    except:
-                        pass
-                await websocket.send_json(result)
-                await asyncio.sleep(0.5)  # 2 Hz update rate
-            else:
-                await asyncio.sleep(0.1)
+            elif action == "rates":
+                await websocket.send_json({"rates": _sampler.report() if _sampler else {}})
+                
+            elif action == "read":
+                # One-shot read
+                pids = data.get("pids", [])
+                if _sampler and _elm.connected:
+                    readings = await _sampler.read(pids)
+                    result = {"timestamp": datetime.now().isoformat()}
+                    for pid, reading in readings.items():
+                        result[pid] = reading.value
+                    await websocket.send_json(result)
+                else:
+                    await websocket.send_json({"error": "Not connected"})
                 
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
+    finally:
+        await stop_streaming()
 
 
 # =============================================================================
@@ -1177,10 +1236,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="ELM327 Bluetooth Gateway")
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
     parser.add_argument("--port", type=int, default=8327, help="Port to listen on")
+    parser.add_argument("--capture-dir", help="Directory for /monitor capture files (enables capture)")
     args = parser.parse_args()
     
     # Set global port for mDNS
     _server_port = args.port
+    if args.capture_dir:
+        _capture_dir = Path(args.capture_dir)
     
     local_ip = get_local_ip()
     hostname = socket.gethostname()
@@ -60,6 +60,7 @@ except ImportError:
         return None
 
 from .service import ELM327Service, DiagnosticSnapshot
+from .capture import CaptureWriter, new_capture_path
 from .protocol import DTC, get_dtc_description
 from .pids import PIDRegistry
 from .bidirectional import ActuatorType, ActuatorState
@@ -103,6 +104,10 @@ class Tools:
             default=False,
             description="Enable DTC clearing (use with caution)"
         )
+        capture_dir: str = Field(
+            default="",
+            description="Directory to record monitor/plot captures to (empty = don't record); replay with connection type 'replay'"
+        )
     
     def __init__(self):
         """Initialize the tool."""
@@ -115,6 +120,20 @@ class Tools:
             return __user__.get("id") or __user__.get("email") or "default"
         return "default"
     
+    def _open_capture(self, pids: List[str], context: str = "") -> Optional[CaptureWriter]:
+        """Start a capture file if capture_dir is configured."""
+        if not self.valves.capture_dir:
+            return None
+        vin = _elm_service.vin if _elm_service else None
+        try:
+            return CaptureWriter(
+                new_capture_path(self.valves.capture_dir, vin),
+                metadata={'vin': vin, 'pids': pids, 'context': context},
+            )
+        except OSError as e:
+            logger.warning(f"Could not start capture: {e}")
+            return None
+    
     # =========================================================================
     # SESSION MANAGEMENT - CRITICAL FOR LLM CONTEXT
     # =========================================================================
@@ -353,9 +372,11 @@ class Tools:
         Connect to an ELM327 OBD-II adapter.
         
         Args:
-            connection_type: Connection type - 'wifi', 'bluetooth', or 'usb'
+            connection_type: Connection type - 'wifi', 'bluetooth', 'usb', or
+                    'replay' (play back a recorded capture file)
             address: Device address. For WiFi: IP:port (e.g., '192.168.0.10:35000').
-                    For Bluetooth/USB: device path (e.g., '/dev/rfcomm0')
+                    For Bluetooth/USB: device path (e.g., '/dev/rfcomm0').
+                    For replay: capture file path
         
         Returns:
             Connection status message with VIN if available
@@ -587,8 +608,8 @@ class Tools:
             
             for name, reading in readings.items():
                 result.append(f"  • {name}: {reading.value:.2f} {reading.unit}")
-                # Save to session
-                session.add_pid(name, reading.value, reading.unit, context)
+            # Save to session
+            session.add_pids((name, r.value, r.unit, context) for name, r in readings.items())
             
             session.phase = DiagnosticPhase.GATHERING_DATA
             session.log_action(f"Read {len(readings)} PIDs" + (f" ({context})" if context else ""))
@@ -631,8 +652,8 @@ class Tools:
                 status = "✅" if -10 <= val <= 10 else "⚠️"
                 direction = "adding fuel (lean)" if val > 0 else "removing fuel (rich)" if val < 0 else "neutral"
                 result.append(f"  {status} {name}: {val:+.1f}% ({direction})")
-                # Save to session
-                session.add_pid(name, val, "%", "fuel trim reading")
+            # Save to session
+            session.add_pids((name, r.value, "%", "fuel trim reading") for name, r in trims.items())
             
             session.log_action("Read fuel trims")
             
@@ -657,7 +678,7 @@ class Tools:
         self,
         pids: str,
         duration: float = 10.0,
-        interval: float = 1.0,
+        interval: Optional[float] = None,
         context: str = "",
         __user__: dict = None
     ) -> str:
@@ -670,7 +691,8 @@ class Tools:
         Args:
             pids: Comma-separated list of PID names
             duration: Monitoring duration in seconds (default: 10)
-            interval: Sample interval in seconds (default: 1)
+            interval: Sample interval in seconds (default: each PID at its
+                own rate - fast for RPM/MAP/O2, slow for temperatures)
             context: What's happening during monitoring (e.g., "during warmup", "at 2500 RPM")
         
         Returns:
@@ -684,13 +706,19 @@ class Tools:
         
         try:
             pid_list = [p.strip() for p in pids.split(',')]
+            capture = self._open_capture(pid_list, context)
             
             # Collect samples
-            samples = await _elm_service.monitor_pids(
-                pid_list,
-                duration=duration,
-                interval=interval
-            )
+            try:
+                samples = await _elm_service.monitor_pids(
+                    pid_list,
+                    duration=duration,
+                    interval=interval,
+                    callback=capture.add_readings if capture else None
+                )
+            finally:
+                if capture:
+                    capture.close()
             
             if not samples:
                 return "⚠️ No data collected"
@@ -707,6 +735,8 @@ class Tools:
             if context:
                 result.append(f"   _(Context: {context})_")
             
+            rates = {} if interval is not None else _elm_service.poll_report
+            final = []
             for name, data in stats.items():
                 values = data['values']
                 unit = data['unit']
@@ -714,16 +744,20 @@ class Tools:
                 max_val = max(values)
                 avg_val = sum(values)/len(values)
                 
-                result.append(f"\n  **{name}** ({unit}):")
+                rate = f", {rates[name]['achieved_hz']:.1f} Hz" if name in rates else ""
+                result.append(f"\n  **{name}** ({unit}{rate}):")
                 result.append(f"    Min: {min_val:.2f}")
                 result.append(f"    Max: {max_val:.2f}")
                 result.append(f"    Avg: {avg_val:.2f}")
                 
                 # Save final reading to session
-                session.add_pid(name, values[-1], unit, f"monitored {duration}s: min={min_val:.1f}, max={max_val:.1f}" + (f" ({context})" if context else ""))
+                final.append((name, values[-1], unit, f"monitored {duration}s: min={min_val:.1f}, max={max_val:.1f}" + (f" ({context})" if context else "")))
+            session.add_pids(final)
             
+            if capture:
+                result.append(f"\n💾 Recorded to {capture.path}")
             session.phase = DiagnosticPhase.TESTING
-            session.log_action(f"Monitored {', '.join(pid_list)} for {duration}s" + (f" ({context})" if context else ""))
+            session.log_action(f"Monitored {', '.join(pid_list)} for {duration}s" + (f" ({context})" if context else "") + (f", recorded to {capture.path}" if capture else ""))
             
             return '\n'.join(result)
             
@@ -770,26 +804,28 @@ class Tools:
             pid_list = [p.strip().upper() for p in pids.split(',')]
             duration = min(duration, 120.0)  # Cap at 2 minutes
             
-            # Collect data
+            # Collect data, each PID at its own rate
             data = {pid: {'times': [], 'values': [], 'unit': ''} for pid in pid_list}
             start_time = datetime.now()
             
-            sample_interval = 0.2  # 5Hz sampling
-            samples_collected = 0
+            capture = self._open_capture(pid_list, title)
+            try:
+                samples = await _elm_service.monitor_pids(
+                    pid_list,
+                    duration=duration,
+                    callback=capture.add_readings if capture else None
+                )
+            finally:
+                if capture:
+                    capture.close()
+            samples_collected = len(samples)
             
-            while (datetime.now() - start_time).total_seconds() < duration:
-                timestamp = (datetime.now() - start_time).total_seconds()
-                
-                readings = await _elm_service.read_pids(pid_list)
-                if readings:
-                    for name, reading in readings.items():
-                        if name in data:
-                            data[name]['times'].append(timestamp)
-                            data[name]['values'].append(reading.value)
-                            data[name]['unit'] = reading.unit
-                    samples_collected += 1
-                
-                await asyncio.sleep(sample_interval)
+            for readings in samples:
+                for name, reading in readings.items():
+                    if name in data:
+                        data[name]['times'].append((reading.timestamp - start_time).total_seconds())
+                        data[name]['values'].append(reading.value)
+                        data[name]['unit'] = reading.unit
             
             if samples_collected < 2:
                 return "⚠️ Insufficient data collected. Check connection."
@@ -833,10 +869,11 @@ class Tools:
             plt.close(fig)
             
             # Log to session
-            session.log_action(f"Captured plot of {', '.join(pid_list)} for {duration}s ({samples_collected} samples)")
+            recorded = f", recorded to {capture.path}" if capture else ""
+            session.log_action(f"Captured plot of {', '.join(pid_list)} for {duration}s ({samples_collected} samples{recorded})")
             
             # Return markdown image
-            return f"📊 **PID Data Capture** ({samples_collected} samples over {duration:.0f}s)\n\n![{plot_title}](data:image/png;base64,{img_base64})"
+            return f"📊 **PID Data Capture** ({samples_collected} samples over {duration:.0f}s{recorded})\n\n![{plot_title}](data:image/png;base64,{img_base64})"
             
         except Exception as e:
             logger.exception("Error in elm327_capture_plot")
@@ -741,6 +741,67 @@ class PIDRegistry:
         return [d.name for d in PID_DEFINITIONS.values()]
 
 
+# -----------------------------------------------------------------------------
+# Polling Rates
+# -----------------------------------------------------------------------------
+
+class PollTier(Enum):
+    """
+    Live-data polling tiers: target rate (Hz) and priority (0 = highest).
+    
+    When the adapter link cannot carry every requested rate, lower
+    priority tiers are slowed down first (see scheduler.PollScheduler).
+    """
+    FAST = (10.0, 0)     # RPM, MAP, O2 switching
+    MEDIUM = (2.0, 1)    # Fuel trims, voltage
+    SLOW = (0.5, 2)      # Temperatures, catalyst, EVAP
+    STATIC = (0.1, 3)    # Counters and values that barely change
+    
+    @property
+    def hz(self) -> float:
+        return self.value[0]
+    
+    @property
+    def priority(self) -> int:
+        return self.value[1]
+
+
+# Default tier per category
+CATEGORY_POLL_TIERS: Dict[PIDCategory, PollTier] = {
+    PIDCategory.ENGINE: PollTier.FAST,
+    PIDCategory.AIR: PollTier.FAST,
+    PIDCategory.SPEED: PollTier.FAST,
+    PIDCategory.OXYGEN: PollTier.FAST,
+    PIDCategory.FUEL: PollTier.MEDIUM,
+    PIDCategory.TEMPERATURE: PollTier.SLOW,
+    PIDCategory.EMISSIONS: PollTier.SLOW,
+    PIDCategory.CATALYST: PollTier.SLOW,
+    PIDCategory.EVAP: PollTier.SLOW,
+    PIDCategory.FREEZE_FRAME: PollTier.STATIC,
+    PIDCategory.VEHICLE_INFO: PollTier.STATIC,
+}
+
+# PIDs that poll at a different rate than the rest of their category
+PID_POLL_TIER_OVERRIDES: Dict[str, PollTier] = {
+    "RUN_TIME": PollTier.STATIC,
+    "DIST_MIL_ON": PollTier.STATIC,
+    "DIST_CLR": PollTier.STATIC,
+    "VOLTAGE": PollTier.MEDIUM,
+    "FUEL_STATUS": PollTier.SLOW,
+    "FUEL_LEVEL": PollTier.STATIC,
+    "BARO": PollTier.STATIC,
+    "AMBIENT_TEMP": PollTier.STATIC,
+}
+
+
+def get_poll_tier(pid: Union[int, str]) -> PollTier:
+    """Get the default polling tier of a PID (MEDIUM if unknown)."""
+    defn = PIDRegistry.get(pid)
+    if not defn:
+        return PollTier.MEDIUM
+    return PID_POLL_TIER_OVERRIDES.get(defn.name) or CATEGORY_POLL_TIERS.get(defn.category, PollTier.MEDIUM)
+
+
 # Common PID groups for diagnostic scenarios
 FUEL_TRIM_PIDS = [0x06, 0x07, 0x08, 0x09]  # STFT/LTFT Bank 1 & 2
 OXYGEN_PIDS = [0x14, 0x15, 0x18, 0x19, 0x24, 0x25]  # O2 sensors
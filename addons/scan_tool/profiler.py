@@ -0,0 +1,323 @@
+"""
+Adapter Profiler - per-adapter, per-vehicle link tuning
+
+ELM327 clones differ in which AT commands they accept, whether they
+answer multi-PID requests and how long the ECU behind them takes to
+reply. A fixed init sequence and a fixed 5 s read timeout leave most of
+the link's speed unused: the adapter waits its default 200 ms (ATST 32)
+for further ECU replies after every request, and a lost reply stalls the
+poll loop for the full timeout.
+
+AdapterProfiler runs once per adapter and vehicle:
+    - resets the adapter and turns off echo, linefeeds, spaces and headers,
+      recording which of those it accepts
+    - lets it search for the protocol, then reads the protocol number, the
+      VIN and the supported PIDs
+    - probes multi-PID support and samples the ECU round-trip time
+    - derives the adapter timeout (ATST), the adaptive timing mode (ATAT)
+      and the per-PID read deadline from the latency distribution
+
+The result is cached (JSON file, keyed by adapter ID and VIN). On
+reconnect the adapter is switched straight to the cached protocol and
+only the VIN is read to pick the profile: no protocol search, no probing.
+ELM327Service seeds the poll scheduler with the profile's multi-PID
+support and request time, so polling starts at the link's real capacity.
+
+Usage:
+    profile = await AdapterProfiler(connection).initialize('/dev/rfcomm0')
+    connection.read_deadline = profile.read_deadline
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import statistics
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .pids import PID_DEFINITIONS
+from .protocol import MAX_PIDS_PER_REQUEST, OBDProtocol
+
+logger = logging.getLogger(__name__)
+
+# Profiles of every adapter/vehicle pair seen on this host
+PROFILE_CACHE_PATH = os.environ.get("SCAN_TOOL_ADAPTER_PROFILES", "/tmp/scan_tool_adapter_profiles.json")
+
+# Seconds to wait after ATZ before the adapter takes commands
+RESET_DELAY = 1.0
+
+# Timeout for the first OBD request after a protocol change (search / bus init)
+SEARCH_TIMEOUT = 15.0
+
+# Round trips sampled for the latency distribution
+LATENCY_SAMPLES = 8
+
+# ATST unit (seconds) and bounds: ~49 ms up to the 1 s the adapter allows
+ATST_UNIT = 0.004096
+ATST_MIN = 0x0C
+ATST_MAX = 0xFF
+
+# ATST covers this multiple of the slowest sampled round trip
+ATST_MARGIN = 2.0
+
+# Read deadline: ATST plus this many slowest round trips, at least MIN_READ_DEADLINE
+DEADLINE_ROUND_TRIPS = 4
+MIN_READ_DEADLINE = 0.5
+
+# Preferred PIDs for latency sampling and the multi-PID probe
+_PROBE_PIDS = [0x0C, 0x0D, 0x05, 0x04, 0x11, 0x0B]
+
+
+@dataclass
+class AdapterProfile:
+    """What an adapter/vehicle pair supports and how fast it answers."""
+    adapter_id: str  # ATI version @ address
+    vin: Optional[str]
+    elm_version: str
+    protocol: str  # ATSP/ATDPN protocol number, e.g. "6"
+    protocol_name: str
+    echo_off: bool  # accepted ATE0
+    spaces_off: bool  # accepted ATS0
+    headers_off: bool  # accepted ATH0
+    adaptive_timing: int  # ATAT mode to use (0 = not supported)
+    multi_pid: Optional[bool]  # None = could not be probed
+    supported_pids: List[int] = field(default_factory=list)
+    latency_ms: Dict[str, float] = field(default_factory=dict)  # p50, p95, max
+    atst: int = 0x32
+    read_deadline: float = 5.0  # seconds per PID in a Mode 01 request
+    request_time: Optional[float] = None  # median seconds per Mode 01 request
+    profiled_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    @property
+    def key(self) -> str:
+        return f"{self.adapter_id}|{self.vin or ''}"
+
+
+class ProfileCache:
+    """Adapter profiles in a JSON file, keyed by adapter ID and VIN."""
+
+    def __init__(self, path: str = PROFILE_CACHE_PATH):
+        self.path = Path(path)
+        self._profiles: Optional[Dict[str, AdapterProfile]] = None
+
+    def _load(self) -> Dict[str, AdapterProfile]:
+        if self._profiles is None:
+            self._profiles = {}
+            try:
+                for key, data in json.loads(self.path.read_text()).items():
+                    self._profiles[key] = AdapterProfile(**data)
+            except FileNotFoundError:
+                pass
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable adapter profile cache {self.path}: {e}")
+        return self._profiles
+
+    def get(self, adapter_id: str, vin: Optional[str]) -> Optional[AdapterProfile]:
+        return self._load().get(f"{adapter_id}|{vin or ''}")
+
+    def latest(self, adapter_id: str) -> Optional[AdapterProfile]:
+        """Most recent profile of an adapter (the vehicle it was last used on)."""
+        profiles = [p for p in self._load().values() if p.adapter_id == adapter_id]
+        return max(profiles, key=lambda p: p.profiled_at, default=None)
+
+    def put(self, profile: AdapterProfile) -> None:
+        profiles = self._load()
+        profiles[profile.key] = profile
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({k: asdict(p) for k, p in profiles.items()}, indent=1))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save adapter profile: {e}")
+
+
+_default_cache: Optional[ProfileCache] = None
+
+
+def get_profile_cache() -> ProfileCache:
+    """The host-wide profile cache (PROFILE_CACHE_PATH)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ProfileCache()
+    return _default_cache
+
+
+class AdapterProfiler:
+    """Brings an adapter up using its cached profile, profiling it first if needed."""
+
+    def __init__(
+        self,
+        connection,
+        cache: Optional[ProfileCache] = None,
+        reset_delay: float = RESET_DELAY,
+    ):
+        """
+        Initialize profiler.
+
+        Args:
+            connection: Connected ELM327Connection (anything with send_command)
+            cache: Profile cache (default: the host-wide cache)
+            reset_delay: Seconds to wait after ATZ
+        """
+        self.connection = connection
+        self.cache = cache or get_profile_cache()
+        self.reset_delay = reset_delay
+        config = getattr(connection, 'config', None)
+        self.max_timeout = config.timeout if config else 5.0
+        self._protocol = OBDProtocol(connection)
+
+    async def initialize(self, address: str) -> AdapterProfile:
+        """
+        Reset and configure the adapter.
+
+        Args:
+            address: Adapter address (part of the adapter ID)
+
+        Returns:
+            The profile now applied to the adapter
+        """
+        version = await self._reset()
+        adapter_id = f"{version}@{address}"
+        settings = {
+            'echo_off': await self._ok("ATE0"),
+            'linefeeds_off': await self._ok("ATL0"),
+            'spaces_off': await self._ok("ATS0"),
+            'headers_off': await self._ok("ATH0"),
+        }
+
+        previous = self.cache.latest(adapter_id)
+        if previous:
+            # Most likely the same vehicle: skip the protocol search
+            await self._ok(f"ATSP{previous.protocol}")
+            if await self._first_request() is not None:
+                vin = await self._read_vin()
+                profile = self.cache.get(adapter_id, vin)
+                if profile:
+                    logger.info(f"Using cached profile for {adapter_id} ({vin or 'no VIN'})")
+                    await self._apply(profile)
+                    return profile
+
+        profile = await self._probe(adapter_id, version, settings)
+        self.cache.put(profile)
+        await self._apply(profile)
+        return profile
+
+    # -------------------------------------------------------------------------
+    # Steps
+    # -------------------------------------------------------------------------
+
+    async def _send(self, command: str, timeout: Optional[float] = None) -> str:
+        return await self.connection.send_command(command, timeout=timeout)
+
+    async def _ok(self, command: str) -> bool:
+        """Send an AT command; True if the adapter accepted it."""
+        try:
+            return "OK" in (await self._send(command)).upper()
+        except asyncio.TimeoutError:
+            return False
+
+    async def _reset(self) -> str:
+        """ATZ, then the adapter's version string (ATI)."""
+        await self._send("ATZ", timeout=3.0)
+        if self.reset_delay:
+            await asyncio.sleep(self.reset_delay)
+        lines = [l.strip() for l in (await self._send("ATI")).split('\n') if l.strip()]
+        return lines[-1] if lines else "ELM327"
+
+    async def _first_request(self) -> Optional[List[int]]:
+        """0100 with a long timeout (protocol search/bus init); supported PIDs 01-20 or None."""
+        response = await self._send("0100", timeout=SEARCH_TIMEOUT)
+        data = self._protocol._parse_response(response)
+        if not data or len(data) < 4:
+            return None
+        bitmap = int.from_bytes(bytes(data[:4]), 'big')
+        return [i + 1 for i in range(32) if bitmap & (1 << (31 - i))]
+
+    async def _read_vin(self) -> Optional[str]:
+        try:
+            return await self._protocol.read_vin()
+        except Exception as e:
+            logger.debug(f"VIN read failed during profiling: {e}")
+            return None
+
+    async def _probe(self, adapter_id: str, version: str, settings: Dict[str, bool]) -> AdapterProfile:
+        """Full profile: protocol search, VIN, multi-PID and latency."""
+        logger.info(f"Profiling adapter {adapter_id}")
+        await self._ok("ATSP0")
+        supported = await self._first_request()
+        if supported is None:
+            # Nothing to measure; don't cache a profile built from no answers
+            raise ConnectionError("No response to 0100 after protocol search")
+        protocol = (await self._send("ATDPN")).strip().upper().lstrip('A') or "0"
+        protocol_name = (await self._send("ATDP")).strip()
+        vin = await self._read_vin()
+
+        probe = [p for p in _PROBE_PIDS if p in supported]
+        probe += [p for p in supported if p in PID_DEFINITIONS and p not in probe]
+        multi_pid = None
+        if len(probe) >= 2:
+            await self._protocol.read_pids(probe[:min(3, MAX_PIDS_PER_REQUEST)])
+            multi_pid = self._protocol.multi_pid
+
+        # ECU round trips (single-PID requests, as the adapter sees them)
+        command = f"01{probe[0]:02X}" if probe else "0100"
+        loop = asyncio.get_running_loop()
+        samples = []
+        for _ in range(LATENCY_SAMPLES):
+            started = loop.time()
+            await self._send(command)
+            samples.append(loop.time() - started)
+        samples.sort()
+        p50 = statistics.median(samples)
+        p95 = samples[min(len(samples) - 1, math.ceil(0.95 * len(samples)) - 1)]
+        slowest = samples[-1]
+
+        # Adaptive timing: aggressive (2) only when replies are consistent
+        adaptive = 0
+        if await self._ok("ATAT1"):
+            adaptive = 1
+            if slowest <= 2 * p50 and await self._ok("ATAT2"):
+                adaptive = 2
+
+        atst = min(max(math.ceil(slowest * ATST_MARGIN / ATST_UNIT), ATST_MIN), ATST_MAX)
+        deadline = max(MIN_READ_DEADLINE, atst * ATST_UNIT + DEADLINE_ROUND_TRIPS * slowest)
+
+        profile = AdapterProfile(
+            adapter_id=adapter_id,
+            vin=vin,
+            elm_version=version,
+            protocol=protocol if protocol.isalnum() and len(protocol) == 1 else "0",
+            protocol_name=protocol_name,
+            echo_off=settings['echo_off'],
+            spaces_off=settings['spaces_off'],
+            headers_off=settings['headers_off'],
+            adaptive_timing=adaptive,
+            multi_pid=multi_pid,
+            supported_pids=supported,
+            latency_ms={
+                'p50': round(p50 * 1000, 1),
+                'p95': round(p95 * 1000, 1),
+                'max': round(slowest * 1000, 1),
+            },
+            atst=atst,
+            read_deadline=round(min(deadline, self.max_timeout), 3),
+            request_time=p50,
+        )
+        logger.info(
+            f"Adapter profile: protocol {profile.protocol} ({protocol_name}), "
+            f"multi-PID {multi_pid}, latency p50 {profile.latency_ms['p50']} ms / "
+            f"max {profile.latency_ms['max']} ms, ATST {atst:02X}, ATAT{adaptive}, "
+            f"read deadline {profile.read_deadline}s"
+        )
+        return profile
+
+    async def _apply(self, profile: AdapterProfile) -> None:
+        """Set the profile's timing on the adapter."""
+        if profile.adaptive_timing:
+            await self._ok(f"ATAT{profile.adaptive_timing}")
+        await self._ok(f"ATST{profile.atst:02X}")
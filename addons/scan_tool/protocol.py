@@ -22,8 +22,13 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Dict, List, Optional, Tuple
 
+from .pids import PID_DEFINITIONS
+
 logger = logging.getLogger(__name__)
 
+# SAE J1979 allows up to 6 PIDs in one Mode 01 request on CAN
+MAX_PIDS_PER_REQUEST = 6
+
 
 class OBDMode(Enum):
     """OBD-II service modes."""
@@ -87,6 +92,9 @@ class OBDProtocol:
         """
         self.connection = connection
         self._supported_pids: Dict[int, List[int]] = {}  # mode -> list of PIDs
+        
+        # Multi-PID Mode 01 requests: None = not probed yet, then True/False
+        self.multi_pid: Optional[bool] = None
     
     # -------------------------------------------------------------------------
     # Mode 01: Current Data (Live PIDs)
@@ -152,12 +160,54 @@ class OBDProtocol:
         """
         Read multiple PIDs.
         
+        PIDs with a known data length are requested up to
+        MAX_PIDS_PER_REQUEST per command (e.g. "010C0D05"), which costs one
+        adapter round-trip instead of one per PID. The first multi-PID
+        request probes support: if the adapter/protocol rejects it or only
+        answers part of it, the protocol falls back to single-PID requests
+        for the rest of the session.
+        
         Args:
             pids: List of PID numbers
             
         Returns:
             Dict mapping PID to raw response bytes
         """
+        pids = list(dict.fromkeys(pids))
+        results = {}
+        single = pids
+        
+        if self.multi_pid is not False and len(pids) > 1:
+            single = [p for p in pids if p not in PID_DEFINITIONS]
+            grouped = [p for p in pids if p in PID_DEFINITIONS]
+            
+            for start in range(0, len(grouped), MAX_PIDS_PER_REQUEST):
+                group = grouped[start:start + MAX_PIDS_PER_REQUEST]
+                if len(group) == 1 or self.multi_pid is False:
+                    single.extend(group)
+                    continue
+                
+                probing = self.multi_pid is None
+                data = await self._read_pid_group(group)
+                if data is None:
+                    single.extend(group)
+                    continue
+                results.update(data)
+                
+                if probing:
+                    # Some adapters answer only the first PID of a group
+                    missing = [p for p in group if p not in data]
+                    recovered = await self._read_single_pids(missing)
+                    if recovered:
+                        logger.info("Multi-PID responses are incomplete; using single-PID requests")
+                        self.multi_pid = False
+                    results.update(recovered)
+        
+        results.update(await self._read_single_pids(single))
+        return {pid: results[pid] for pid in pids if pid in results}
+    
+    async def _read_single_pids(self, pids: List[int]) -> Dict[int, bytes]:
+        """Read PIDs one request at a time."""
         results = {}
         for pid in pids:
             data = await self.read_pid(pid)
@@ -165,6 +215,30 @@ class OBDProtocol:
                 results[pid] = data
         return results
     
+    async def _read_pid_group(self, pids: List[int]) -> Optional[Dict[int, bytes]]:
+        """
+        Read up to MAX_PIDS_PER_REQUEST PIDs with one Mode 01 request.
+        
+        Returns:
+            Dict of PID -> bytes, or None if the request was rejected
+        """
+        command = "01" + "".join(f"{pid:02X}" for pid in pids)
+        try:
+            response = await self.connection.send_command(command)
+        except Exception as e:
+            logger.warning(f"Multi-PID request {command} failed: {e}")
+            response = ""
+        
+        data = self._parse_multi_pid_response(response, pids)
+        if data:
+            self.multi_pid = True
+            return data
+        
+        if self.multi_pid is None:
+            logger.info(f"Multi-PID request rejected ({response.strip()!r}); using single-PID requests")
+            self.multi_pid = False
+        return None
+    
     # -------------------------------------------------------------------------
     # Mode 02: Freeze Frame Data
     # -------------------------------------------------------------------------
@@ -352,6 +426,75 @@ class OBDProtocol:
         
         return bytes_list
     
+    def _parse_multi_pid_response(self, response: str, pids: List[int]) -> Dict[int, bytes]:
+        """
+        Parse a multi-PID Mode 01 response into per-PID data bytes.
+        
+        Handles single-frame replies ("41 0C 1A F8 0D 32"), ISO-TP
+        multi-frame replies with headers off (optional byte-count line,
+        then "0:", "1:", ... frames, last one zero padded) and one
+        message per responding ECU. When several ECUs report the same PID,
+        the first one wins, as with single-PID reads.
+        
+        Args:
+            response: Raw response string
+            pids: PIDs that were requested
+            
+        Returns:
+            Dict mapping PID to raw data bytes
+        """
+        messages: List[Tuple[List[int], Optional[int]]] = []
+        current: Optional[List[int]] = None
+        length: Optional[int] = None
+        
+        for line in response.upper().split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            
+            frame = re.match(r'^([0-9A-F]):\s*((?:[0-9A-F]{2}\s*)*)$', line)
+            if frame:
+                if frame.group(1) == '0' or current is None:
+                    current = []
+                    messages.append((current, length))
+                    length = None
+                current.extend(self._hex_to_bytes(frame.group(2)))
+                continue
+            
+            hex_str = ''.join(line.split())
+            current = None
+            if re.fullmatch(r'[0-9A-F]{3}', hex_str):
+                length = int(hex_str, 16)  # ISO-TP byte count line
+            elif re.fullmatch(r'(?:[0-9A-F]{2})+', hex_str):
+                messages.append((self._hex_to_bytes(hex_str), None))
+            # Anything else: SEARCHING..., NO DATA, ?, BUS INIT, ...
+        
+        wanted = set(pids)
+        results: Dict[int, bytes] = {}
+        for data, size in messages:
+            if size is not None:
+                data = data[:size]
+            if not data or data[0] != 0x41:
+                continue
+            
+            # 41 PID DATA.. PID DATA.. (PID order is the ECU's, not ours)
+            i = 1
+            while i < len(data):
+                pid = data[i]
+                defn = PID_DEFINITIONS.get(pid)
+                if pid not in wanted or defn is None or i + 1 + defn.bytes > len(data):
+                    break
+                results.setdefault(pid, bytes(data[i + 1:i + 1 + defn.bytes]))
+                i += 1 + defn.bytes
+        
+        return results
+    
+    @staticmethod
+    def _hex_to_bytes(hex_str: str) -> List[int]:
+        """Convert a hex string (spaces allowed) to byte values."""
+        cleaned = ''.join(hex_str.split())
+        return [int(cleaned[i:i + 2], 16) for i in range(0, len(cleaned) - 1, 2)]
+    
     def _parse_multiframe_response(self, response: str) -> List[int]:
         """
         Parse multi-frame OBD response (like VIN).
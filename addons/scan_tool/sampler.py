@@ -0,0 +1,335 @@
+"""
+PID Sampler - one polling task per adapter
+
+An ELM327 adapter answers one command at a time. When several consumers
+(WebSocket streams, /monitor calls, tool captures) each run their own
+read_pid loop, their commands interleave on the same link, throughput
+drops and replies can get mixed up.
+
+PIDSampler owns the link instead:
+    - every subscriber registers the PIDs it wants and, optionally, their
+      rates (default: the PID's PollTier)
+    - one task merges every subscriber's targets into a single rate-tiered
+      poll plan (scheduler.PollScheduler); each slot of the plan is one
+      read_pids call (batched into multi-PID requests)
+    - each sample is pushed to a bounded queue per subscriber; a slow
+      subscriber loses its oldest frames instead of stalling the others
+    - other commands (DTCs, VIN, ...) run between polls via exclusive()
+
+Usage:
+    sampler = PIDSampler(elm)
+
+    async with sampler.subscribe(['RPM', 'COOLANT_TEMP'], rates={'RPM': 5}) as sub:
+        async for sample in sub:
+            print(sample.readings)  # the subscriber's PIDs polled in this slot
+
+    readings = await sampler.read(['STFT_B1', 'LTFT_B1'])
+
+    async with sampler.exclusive():
+        dtcs = await elm.read_dtcs()
+
+    await sampler.stop()
+"""
+
+import asyncio
+import logging
+import math
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+from .pids import PIDRegistry, get_pid_by_name
+from .scheduler import PollScheduler, merge_targets, resolve_targets
+from .service import ELM327Service, PIDReading
+
+logger = logging.getLogger(__name__)
+
+# Frames buffered per subscriber before the oldest are dropped
+DEFAULT_QUEUE_SIZE = 8
+
+
+@dataclass
+class Sample:
+    """One poll as seen by a subscriber."""
+    seq: int
+    timestamp: datetime
+    readings: Dict[str, PIDReading]  # keyed by the name the subscriber asked for
+
+
+class Subscription:
+    """
+    A consumer's view of the sampler.
+
+    Holds the subscriber's PIDs and target rates and a bounded queue of
+    samples. Use as an async context manager (closes on exit) and/or an
+    async iterator (ends when closed).
+    """
+
+    def __init__(
+        self,
+        sampler: 'PIDSampler',
+        pids: Dict[int, List[str]],
+        targets: Dict[int, tuple],
+        queue_size: int,
+    ):
+        self._sampler = sampler
+        self.pids = pids  # PID number -> names the subscriber used for it
+        self.targets = targets  # PID number -> (hz, priority)
+        self.dropped = 0
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self._last: Dict[int, float] = {}  # loop time each PID was last delivered
+
+    def _wants(self, pid: int, now: float) -> bool:
+        """Whether a fresh reading of ``pid`` is due for this subscriber."""
+        last = self._last.get(pid)
+        # Other subscribers may poll the PID faster than this one asked for
+        if last is not None and now - last < 0.75 / self.targets[pid][0]:
+            return False
+        self._last[pid] = now
+        return True
+
+    def _offer(self, item: Optional[Sample]) -> None:
+        """Queue a sample (None = closed), dropping the oldest if full."""
+        if self._queue.full():
+            self._queue.get_nowait()
+            if item is not None:
+                self.dropped += 1
+        self._queue.put_nowait(item)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Sample]:
+        """
+        Wait for the next sample.
+
+        Returns:
+            The sample, or None once closed or after ``timeout`` seconds
+        """
+        if self.closed and self._queue.empty():
+            return None
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        """Stop receiving samples; a pending get() returns None."""
+        if self.closed:
+            return
+        self.closed = True
+        self._sampler._remove(self)
+        self._offer(None)
+
+    async def __aenter__(self) -> 'Subscription':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def __aiter__(self) -> 'Subscription':
+        return self
+
+    async def __anext__(self) -> Sample:
+        sample = await self.get()
+        if sample is None:
+            raise StopAsyncIteration
+        return sample
+
+
+class PIDSampler:
+    """
+    Single producer of PID samples for one connected adapter.
+
+    The PIDs of all subscribers share one poll plan at the fastest rate any
+    subscriber asked for; each subscriber only receives readings at its own
+    rate.
+    """
+
+    def __init__(self, elm: ELM327Service, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Initialize sampler.
+
+        Args:
+            elm: Connected ELM327Service (the sampler becomes its only poller)
+            queue_size: Default frames buffered per subscriber
+        """
+        self._elm = elm
+        self._queue_size = queue_size
+        self._subscribers: List[Subscription] = []
+        self._link = asyncio.Lock()
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._scheduler = PollScheduler(batch_size=elm.pids_per_request, request_time=elm.request_time)
+        self.cycles = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    # -------------------------------------------------------------------------
+    # Consumers
+    # -------------------------------------------------------------------------
+
+    def subscribe(
+        self,
+        pids: List[Union[int, str]],
+        interval: Optional[float] = None,
+        rates: Optional[Dict[str, float]] = None,
+        queue_size: Optional[int] = None,
+    ) -> Subscription:
+        """
+        Start receiving samples of ``pids``.
+
+        Args:
+            pids: PID numbers or names (unknown names are skipped)
+            interval: Poll every PID once per interval seconds (0 = as fast
+                as possible) instead of its tier rate
+            rates: Per-PID target Hz overrides
+            queue_size: Frames buffered before the oldest are dropped
+
+        Returns:
+            Subscription; close it (or leave its ``async with``) when done
+        """
+        targets = resolve_targets(pids, rates, interval)
+        resolved: Dict[int, List[str]] = {}
+        for pid in pids:
+            pid_num = get_pid_by_name(pid) if isinstance(pid, str) else pid
+            if pid_num in targets:
+                name = pid if isinstance(pid, str) else PIDRegistry.get(pid_num).name
+                resolved.setdefault(pid_num, []).append(name)
+
+        sub = Subscription(
+            self,
+            resolved,
+            targets,
+            queue_size if queue_size is not None else self._queue_size,
+        )
+        if not self._elm.connected:
+            sub.close()
+            return sub
+
+        self._subscribers.append(sub)
+        self._retarget()
+        self.start()
+        return sub
+
+    async def read(self, pids: List[Union[int, str]]) -> Dict[str, PIDReading]:
+        """
+        One-shot read between polls.
+
+        Returns:
+            Dict mapping each requested name to its PIDReading (PIDs that
+            did not answer are missing)
+        """
+        async with self._link:
+            readings = await self._elm.read_pids(pids)
+        by_pid = {reading.pid: reading for reading in readings.values()}
+        results = {}
+        for pid in pids:
+            pid_num = get_pid_by_name(pid) if isinstance(pid, str) else pid
+            if pid_num in by_pid:
+                results[pid if isinstance(pid, str) else by_pid[pid_num].name] = by_pid[pid_num]
+        return results
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Target, allocated and achieved Hz per polled PID."""
+        return self._scheduler.report()
+
+    def exclusive(self) -> asyncio.Lock:
+        """
+        Lock for running other adapter commands between polling cycles.
+
+        Usage: ``async with sampler.exclusive(): await elm.read_dtcs()``
+        """
+        return self._link
+
+    def _remove(self, sub: Subscription) -> None:
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+            self._retarget()
+
+    def _retarget(self) -> None:
+        """Re-plan polling for the current subscribers."""
+        self._scheduler.set_targets(merge_targets(*(sub.targets for sub in self._subscribers)))
+        self._changed.set()
+
+    # -------------------------------------------------------------------------
+    # Polling Task
+    # -------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the polling task (idempotent)."""
+        if not self.running:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop polling and close every subscription."""
+        if self._task:
+            # wait_for() (< 3.12) can swallow a cancel that races the event
+            self._stopping = True
+            self._changed.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for sub in list(self._subscribers):
+            sub.close()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            self._changed.clear()
+            now = loop.time()
+            pids, wait = self._scheduler.next_batch(now)
+            if wait:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), None if wait == math.inf else wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                async with self._link:
+                    if not self._elm.connected:
+                        break
+                    started = loop.time()
+                    readings = await self._elm.read_pids(pids)
+                    finished = loop.time()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"PID sampling failed: {e}")
+                if not self._elm.connected:
+                    break
+                continue
+
+            self.cycles += 1
+            by_pid = {reading.pid: reading for reading in readings.values()}
+            self._scheduler.batch_size = self._elm.pids_per_request
+            self._scheduler.record(pids, list(by_pid), finished - started, finished)
+
+            timestamp = datetime.now()
+            for sub in list(self._subscribers):
+                chosen = {
+                    name: by_pid[pid_num]
+                    for pid_num, names in sub.pids.items()
+                    if pid_num in by_pid and sub._wants(pid_num, finished)
+                    for name in names
+                }
+                if chosen:
+                    sub._offer(Sample(seq=self.cycles, timestamp=timestamp, readings=chosen))
+            # Let consumers and exclusive() callers in between polls
+            await asyncio.sleep(0)
+
+        if self._stopping:
+            return
+        logger.info("Adapter disconnected; PID sampler stopped")
+        for sub in list(self._subscribers):
+            sub.close()
@@ -0,0 +1,356 @@
+"""
+PID Poll Scheduler - rate-tiered live data polling
+
+Polling every PID at one fixed interval wastes adapter round-trips on slow
+signals (coolant temp, fuel level) and starves fast ones (RPM, MAP, O2
+switching). PollScheduler gives each PID its own target rate instead:
+
+    - defaults come from the PID's PollTier (pids.get_poll_tier), and can
+      be overridden per request
+    - the targets are laid out as a weighted round-robin plan: a frame of
+      equally spaced slots in which each PID appears rate x frame times,
+      phased so PIDs share slots (one multi-PID request) where possible
+    - each poll records the adapter round-trip time; when the link cannot
+      carry the plan's requests, lower-priority tiers are slowed down first
+    - achieved Hz per PID is measured and reported
+
+The scheduler does no I/O. A polling loop asks it what to read next:
+
+    scheduler = PollScheduler(resolve_targets(['RPM', 'COOLANT_TEMP']))
+    while polling:
+        pids, wait = scheduler.next_batch(loop.time())
+        if wait:
+            await asyncio.sleep(wait)
+            continue
+        started = loop.time()
+        readings = await elm.read_pids(pids)
+        scheduler.record(pids, [r.pid for r in readings.values()], loop.time() - started, loop.time())
+"""
+
+import logging
+import math
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple, Union
+
+from .pids import PIDRegistry, get_pid_by_name, get_poll_tier
+from .protocol import MAX_PIDS_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
+# Fastest rate a PID can ask for (interval=0 means "as fast as possible")
+MAX_POLL_HZ = 20.0
+
+# Longest plan frame; PIDs slower than 1/MAX_FRAME still poll once a frame
+MAX_FRAME = 10.0
+
+# Share of the measured link capacity the plan may use
+LINK_HEADROOM = 0.9
+
+# How often the allocation is checked against the measured capacity
+REPLAN_EVERY = 2.0
+
+
+def resolve_targets(
+    pids: List[Union[int, str]],
+    rates: Optional[Dict[Union[int, str], float]] = None,
+    interval: Optional[float] = None,
+) -> Dict[int, Tuple[float, int]]:
+    """
+    Resolve PIDs to (target Hz, priority).
+
+    Args:
+        pids: PID numbers or names (unknown names are skipped)
+        rates: Per-PID Hz overrides, keyed by name or number
+        interval: If given, poll every PID once per ``interval`` seconds
+            (0 = as fast as possible) instead of its tier rate
+
+    Returns:
+        Dict mapping PID number to (hz, priority)
+    """
+    overrides = {}
+    for key, hz in (rates or {}).items():
+        pid_num = get_pid_by_name(key) if isinstance(key, str) else key
+        if pid_num is not None:
+            overrides[pid_num] = hz
+
+    targets = {}
+    for pid in pids:
+        pid_num = get_pid_by_name(pid) if isinstance(pid, str) else pid
+        if pid_num is None or not PIDRegistry.get(pid_num):
+            logger.warning(f"Unknown PID: {pid}")
+            continue
+        tier = get_poll_tier(pid_num)
+        if pid_num in overrides:
+            hz = overrides[pid_num]
+        elif interval is not None:
+            hz = 1 / interval if interval > 0 else MAX_POLL_HZ
+        else:
+            hz = tier.hz
+        targets[pid_num] = (min(max(hz, 1 / MAX_FRAME), MAX_POLL_HZ), tier.priority)
+    return targets
+
+
+def merge_targets(*target_sets: Dict[int, Tuple[float, int]]) -> Dict[int, Tuple[float, int]]:
+    """Combine several consumers' targets: fastest rate, highest priority."""
+    merged: Dict[int, Tuple[float, int]] = {}
+    for targets in target_sets:
+        for pid, (hz, priority) in targets.items():
+            if pid in merged:
+                old_hz, old_priority = merged[pid]
+                hz, priority = max(hz, old_hz), min(priority, old_priority)
+            merged[pid] = (hz, priority)
+    return merged
+
+
+class PollScheduler:
+    """
+    Weighted round-robin poll plan with priority-based degradation.
+
+    Times are in seconds on any monotonic clock (e.g. loop.time()); the
+    caller passes ``now`` in.
+    """
+
+    def __init__(
+        self,
+        targets: Optional[Dict[int, Tuple[float, int]]] = None,
+        batch_size: int = MAX_PIDS_PER_REQUEST,
+        request_time: Optional[float] = None,
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            targets: PID number -> (target Hz, priority), see resolve_targets
+            batch_size: PIDs per adapter request (1 if multi-PID is unsupported)
+            request_time: Known seconds per adapter request (e.g. from the
+                adapter profile), so the first plan already fits the link
+        """
+        self.batch_size = batch_size
+        self.request_time: Optional[float] = request_time  # EWMA seconds per adapter request
+        self._targets: Dict[int, Tuple[float, int]] = {}
+        self._allocated: Dict[int, float] = {}
+        self._answered: Dict[int, Deque[float]] = {}
+        self._plan: List[List[int]] = []
+        self._slot_period = 0.0
+        self._slot = 0
+        self._next_at: Optional[float] = None
+        self._replanned_at: Optional[float] = None
+        self.set_targets(targets or {})
+
+    # -------------------------------------------------------------------------
+    # Targets and Plan
+    # -------------------------------------------------------------------------
+
+    def set_targets(self, targets: Dict[int, Tuple[float, int]]) -> None:
+        """Replace the polled PIDs and their rates (keeps link statistics)."""
+        self._targets = dict(targets)
+        for pid in list(self._answered):
+            if pid not in self._targets:
+                del self._answered[pid]
+        for pid in self._targets:
+            self._answered.setdefault(pid, deque(maxlen=32))
+        self._fit()
+
+    @property
+    def capacity(self) -> Optional[float]:
+        """Measured adapter requests per second (None until measured)."""
+        if not self.request_time:
+            return None
+        return 1 / self.request_time
+
+    def _layout(self, allocated: Dict[int, float]) -> Tuple[List[List[int]], float]:
+        """Lay rates out over a frame of equally spaced slots; returns (slots, slot period)."""
+        if not allocated:
+            return [], 0.0
+        fastest = max(allocated.values())
+        slowest = min(allocated.values())
+        frame = min(1 / slowest, MAX_FRAME)
+        n = max(1, round(fastest * frame))
+        plan: List[List[int]] = [[] for _ in range(n)]
+
+        def cost(slot: List[int]) -> int:
+            return math.ceil(len(slot) / self.batch_size)
+
+        # Highest priority and fastest first, so they get the cleanest phases
+        order = sorted(allocated, key=lambda p: (self._targets[p][1], -allocated[p]))
+        for pid in order:
+            k = max(1, min(n, round(allocated[pid] * frame)))
+            step = n / k
+            best = None
+            for offset in range(max(1, int(step))):
+                positions = [int(offset + j * step) % n for j in range(k)]
+                # Extra requests this phase adds, then how full the slots get
+                score = (
+                    sum(cost(plan[i] + [pid]) - cost(plan[i]) for i in positions),
+                    max(len(plan[i]) for i in positions),
+                )
+                if best is None or score < best[0]:
+                    best = (score, positions)
+            for i in best[1]:
+                plan[i].append(pid)
+        return plan, frame / n
+
+    def _requests_per_second(self, plan: List[List[int]], slot_period: float) -> float:
+        if not plan:
+            return 0.0
+        requests = sum(math.ceil(len(slot) / self.batch_size) for slot in plan)
+        return requests / (slot_period * len(plan))
+
+    def _degrade(self, limit: float) -> Tuple[Dict[int, float], List[List[int]], float]:
+        """
+        Highest-rate allocation whose plan fits ``limit`` requests/s.
+
+        Every PID starts at the floor rate; tiers then get their targets in
+        priority order, each scaled down (binary search) only as far as
+        needed. Lower tiers are still tried at full rate afterwards, since
+        they may ride along in requests the higher tiers already make.
+        """
+        floor = 1 / MAX_FRAME
+        allocated = {pid: floor for pid in self._targets}
+
+        def fits(trial: Dict[int, float]) -> Tuple[bool, List[List[int]], float]:
+            plan, slot_period = self._layout(trial)
+            return self._requests_per_second(plan, slot_period) <= limit, plan, slot_period
+
+        for priority in sorted({p for _, p in self._targets.values()}):
+            tier = [pid for pid, (_, p) in self._targets.items() if p == priority]
+
+            def scaled(scale: float) -> Dict[int, float]:
+                trial = dict(allocated)
+                for pid in tier:
+                    trial[pid] = max(self._targets[pid][0] * scale, floor)
+                return trial
+
+            if fits(scaled(1.0))[0]:
+                allocated = scaled(1.0)
+                continue
+            lo, hi = 0.0, 1.0
+            for _ in range(10):
+                mid = (lo + hi) / 2
+                if fits(scaled(mid))[0]:
+                    lo = mid
+                else:
+                    hi = mid
+            allocated = scaled(lo)
+
+        _, plan, slot_period = fits(allocated)
+        return allocated, plan, slot_period
+
+    def _fit(self) -> bool:
+        """
+        Allocate rates and build the plan so it fits the measured link.
+
+        Returns:
+            True if the allocation changed noticeably
+        """
+        allocated = {pid: hz for pid, (hz, _) in self._targets.items()}
+        plan, slot_period = self._layout(allocated)
+        limit = self.capacity * LINK_HEADROOM if self.capacity is not None else math.inf
+        if self._requests_per_second(plan, slot_period) > limit:
+            allocated, plan, slot_period = self._degrade(limit)
+
+        changed = set(allocated) != set(self._allocated) or any(
+            abs(hz - self._allocated[pid]) > 0.1 * hz for pid, hz in allocated.items()
+        )
+        if changed or not self._plan:
+            self._allocated = allocated
+            self._plan = plan
+            self._slot_period = slot_period
+            self._slot = 0
+        return changed
+
+    # -------------------------------------------------------------------------
+    # Polling
+    # -------------------------------------------------------------------------
+
+    def next_batch(self, now: float) -> Tuple[List[int], float]:
+        """
+        What to poll at ``now``.
+
+        Returns:
+            (PIDs to read now, 0) or ([], seconds until the next slot)
+        """
+        if not self._plan:
+            return [], math.inf
+        if self._next_at is None:
+            self._next_at = now
+        if self._replanned_at is None:
+            self._replanned_at = now
+        elif self.capacity is not None and now - self._replanned_at >= REPLAN_EVERY:
+            self._replanned_at = now
+            self._maybe_replan()
+
+        while True:
+            if now < self._next_at:
+                return [], self._next_at - now
+            batch = self._plan[self._slot]
+            self._slot = (self._slot + 1) % len(self._plan)
+            self._next_at += self._slot_period
+            if self._next_at < now - self._slot_period:
+                # Running behind: slow the plan down instead of bursting
+                self._next_at = now
+            if batch:
+                return list(batch), 0.0
+
+    def record(self, pids: List[int], answered: List[int], elapsed: float, now: float) -> None:
+        """
+        Record one poll.
+
+        Args:
+            pids: PIDs that were requested
+            answered: PIDs that returned data
+            elapsed: Seconds the read took
+            now: Time the read finished
+        """
+        requests = math.ceil(len(pids) / self.batch_size)
+        if requests and elapsed > 0:
+            per_request = elapsed / requests
+            if self.request_time is None:
+                self.request_time = per_request
+            else:
+                self.request_time += 0.2 * (per_request - self.request_time)
+        for pid in answered:
+            if pid in self._answered:
+                self._answered[pid].append(now)
+
+    def _maybe_replan(self) -> None:
+        """Rebuild the plan if the measured capacity changes the allocation."""
+        if not self._fit():
+            return
+        degraded = [
+            PIDRegistry.get(pid).name for pid, hz in self._allocated.items()
+            if hz < self._targets[pid][0] * 0.99
+        ]
+        logger.info(
+            f"Link carries ~{self.capacity:.1f} requests/s; "
+            + (f"slowing {', '.join(degraded)}" if degraded else "all target rates fit")
+        )
+
+    # -------------------------------------------------------------------------
+    # Reporting
+    # -------------------------------------------------------------------------
+
+    def achieved_hz(self, pid: int) -> float:
+        """Measured rate of answered polls for a PID over its recent polls."""
+        times = self._answered.get(pid)
+        if not times or len(times) < 2 or times[-1] <= times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-PID rates.
+
+        Returns:
+            Dict mapping PID name to target_hz, allocated_hz, achieved_hz
+            and priority
+        """
+        return {
+            PIDRegistry.get(pid).name: {
+                'target_hz': round(hz, 2),
+                'allocated_hz': round(self._allocated.get(pid, 0.0), 2),
+                'achieved_hz': round(self.achieved_hz(pid), 2),
+                'priority': priority,
+            }
+            for pid, (hz, priority) in self._targets.items()
+        }
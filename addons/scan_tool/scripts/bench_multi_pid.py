@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-PID vs. multi-PID Mode 01 snapshots against the simulator.
+
+Reads a 12-PID snapshot through ELM327Service.read_pids with a simulated
+adapter round-trip latency (Bluetooth/WiFi dongles are typically 50-100 ms
+per command). "single" forces one 01xx request per PID (the previous
+behaviour), "multi" lets OBDProtocol group up to 6 PIDs per request.
+Both modes must return a decoded reading for every PID (values differ run
+to run because the simulated engine varies).
+
+Usage: python addons/scan_tool/scripts/bench_multi_pid.py [--latency 0.05] [--snapshots 5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+
+from addons.scan_tool.protocol import OBDProtocol
+from addons.scan_tool.service import ELM327Service
+from addons.scan_tool.simulator import SimulatedConnection
+
+SNAPSHOT = [
+    "RPM", "SPEED", "COOLANT_TEMP", "LOAD", "THROTTLE_POS", "MAF",
+    "STFT_B1", "LTFT_B1", "STFT_B2", "LTFT_B2", "IAT", "VOLTAGE",
+]
+
+
+class CountingConnection(SimulatedConnection):
+    """SimulatedConnection that counts adapter round-trips."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = 0
+
+    async def send_command(self, command, timeout=None):
+        self.commands += 1
+        return await super().send_command(command, timeout)
+
+
+async def run(mode, latency, snapshots):
+    conn = CountingConnection("normal", latency=latency)
+    service = ELM327Service()
+    service._connection = conn
+    service._protocol = OBDProtocol(conn)
+    service._connected = True
+    if mode == "single":
+        service._protocol.multi_pid = False
+
+    await service.read_pids(SNAPSHOT)  # warm-up / multi-PID probe
+    conn.commands = 0
+
+    start = time.perf_counter()
+    for _ in range(snapshots):
+        readings = await service.read_pids(SNAPSHOT)
+    elapsed = (time.perf_counter() - start) / snapshots
+    return elapsed, conn.commands / snapshots, {k: r.value for k, r in readings.items()}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per adapter round-trip")
+    parser.add_argument("--snapshots", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("single", "multi"):
+        results[mode] = await run(mode, args.latency, args.snapshots)
+
+    assert results["single"][2].keys() == results["multi"][2].keys() == set(SNAPSHOT), "PID sets differ"
+
+    print(f"{len(SNAPSHOT)}-PID snapshot, {args.latency * 1000:.0f} ms/round-trip")
+    print(f"{'mode':8}{'round-trips':>13}{'ms/snapshot':>13}{'snapshots/s':>13}")
+    for mode, (elapsed, commands, _) in results.items():
+        print(f"{mode:8}{commands:>13.0f}{elapsed * 1000:>13.0f}{1 / elapsed:>13.2f}")
+    print(f"speedup  {results['single'][0] / results['multi'][0]:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
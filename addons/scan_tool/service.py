@@ -30,7 +30,7 @@ from .connection import (
     create_connection,
     DEFAULT_ADDRESSES,
 )
-from .protocol import OBDProtocol, DTC, get_dtc_description
+from .protocol import OBDProtocol, DTC, get_dtc_description, MAX_PIDS_PER_REQUEST
 from .pids import (
     PIDRegistry,
     PIDDefinition,
@@ -41,6 +41,7 @@ from .pids import (
     TEMPERATURE_PIDS,
 )
 from .bidirectional import ActuatorControl, ActuatorType, ActuatorState
+from .scheduler import PollScheduler, resolve_targets
 
 logger = logging.getLogger(__name__)
 
@@ -102,6 +103,9 @@ class ELM327Service:
         self._actuator_control: Optional[ActuatorControl] = None
         self._supported_pids: List[int] = []
         self._vin: Optional[str] = None
+        
+        # Per-PID target/achieved rates of the last tiered monitor_pids run
+        self.poll_report: Dict[str, Dict[str, float]] = {}
     
     @property
     def connected(self) -> bool:
@@ -113,6 +117,19 @@ class ELM327Service:
         """Get cached VIN."""
         return self._vin
     
+    @property
+    def pids_per_request(self) -> int:
+        """PIDs one Mode 01 request can carry on this link."""
+        if self._protocol and self._protocol.multi_pid is False:
+            return 1
+        return MAX_PIDS_PER_REQUEST
+    
+    @property
+    def request_time(self) -> Optional[float]:
+        """Profiled seconds per Mode 01 request (None if the adapter was not profiled)."""
+        profile = getattr(self._connection, 'profile', None)
+        return profile.request_time if profile else None
+    
     # -------------------------------------------------------------------------
     # Context Manager Support
     # -------------------------------------------------------------------------
@@ -169,6 +186,12 @@ class ELM327Service:
         self._protocol = OBDProtocol(self._connection)
         self._actuator_control = ActuatorControl(self._protocol)
         
+        # The adapter profile already knows multi-PID support and the VIN
+        profile = getattr(self._connection, 'profile', None)
+        self._vin = profile.vin if profile else None
+        if profile:
+            self._protocol.multi_pid = profile.multi_pid
+        
         # Get supported PIDs
         try:
             self._supported_pids = await self._protocol.get_supported_pids()
@@ -178,7 +201,8 @@ class ELM327Service:
         
         # Try to read VIN
         try:
-            self._vin = await self._protocol.read_vin()
+            if not self._vin:
+                self._vin = await self._protocol.read_vin()
             if self._vin:
                 logger.info(f"Vehicle VIN: {self._vin}")
         except Exception as e:
@@ -370,12 +394,33 @@ class ELM327Service:
             Dict mapping PID name to PIDReading
         """
         self._ensure_connected()
-        results = {}
         
+        definitions = {}
         for pid in pids:
-            reading = await self.read_pid(pid)
-            if reading:
-                results[reading.name] = reading
+            pid_num = get_pid_by_name(pid) if isinstance(pid, str) else pid
+            if pid_num is None:
+                logger.warning(f"Unknown PID name: {pid}")
+                continue
+            defn = PIDRegistry.get(pid_num)
+            if not defn:
+                logger.warning(f"No definition for PID 0x{pid_num:02X}")
+                continue
+            definitions[pid_num] = defn
+        
+        # One protocol call: PIDs are batched into multi-PID requests where supported
+        raw = await self._protocol.read_pids(list(definitions))
+        
+        results = {}
+        timestamp = datetime.now()
+        for pid_num, data in raw.items():
+            defn = definitions[pid_num]
+            results[defn.name] = PIDReading(
+                pid=pid_num,
+                name=defn.name,
+                value=defn.decode(data),
+                unit=defn.unit,
+                timestamp=timestamp,
+            )
         
         return results
     
@@ -405,23 +450,75 @@ class ELM327Service:
         self,
         pids: List[Union[int, str]],
         duration: float,
-        interval: float = 0.5,
-        callback: Optional[callable] = None
+        interval: Optional[float] = None,
+        callback: Optional[callable] = None,
+        rates: Optional[Dict[str, float]] = None
     ) -> List[Dict[str, PIDReading]]:
         """
         Monitor PIDs over time.
         
+        By default each PID is polled at its own rate (see pids.PollTier):
+        RPM, MAP and O2 sensors fast, temperatures and fuel level slowly.
+        Each sample then holds only the PIDs polled together; the achieved
+        rates are left in ``self.poll_report``.
+        
         Args:
             pids: PIDs to monitor
             duration: Total monitoring time in seconds
-            interval: Sample interval in seconds
+            interval: Sample every PID together once per interval seconds
+                instead of per-PID rates
             callback: Optional callback(readings) for each sample
+            rates: Per-PID target Hz overrides, e.g. {'COOLANT_TEMP': 1.0}
             
         Returns:
             List of reading dictionaries over time
         """
         self._ensure_connected()
         
+        if interval is not None and not rates:
+            return await self._monitor_fixed_interval(pids, duration, interval, callback)
+        
+        loop = asyncio.get_event_loop()
+        scheduler = PollScheduler(
+            resolve_targets(pids, rates, interval),
+            batch_size=self.pids_per_request,
+            request_time=self.request_time,
+        )
+        samples = []
+        start_time = loop.time()
+        end_time = start_time + duration
+        
+        while (now := loop.time()) < end_time:
+            batch, wait = scheduler.next_batch(now)
+            if wait:
+                await asyncio.sleep(min(wait, end_time - now))
+                continue
+            
+            readings = await self.read_pids(batch)
+            finished = loop.time()
+            scheduler.batch_size = self.pids_per_request
+            scheduler.record(batch, [r.pid for r in readings.values()], finished - now, finished)
+            
+            if readings:
+                samples.append(readings)
+                if callback:
+                    callback(readings)
+        
+        self.poll_report = scheduler.report()
+        logger.info(
+            f"Collected {len(samples)} samples over {duration}s: "
+            + ", ".join(f"{name} {r['achieved_hz']:.1f}/{r['target_hz']:.1f} Hz" for name, r in self.poll_report.items())
+        )
+        return samples
+    
+    async def _monitor_fixed_interval(
+        self,
+        pids: List[Union[int, str]],
+        duration: float,
+        interval: float,
+        callback: Optional[callable]
+    ) -> List[Dict[str, PIDReading]]:
+        """Sample every PID together, once per interval."""
         samples = []
         start_time = asyncio.get_event_loop().time()
         
@@ -502,12 +599,9 @@ class ELM327Service:
         pending = await self.read_pending_dtcs()
         
         # Read standard diagnostic PIDs
-        pids = {}
-        for pid_num in DIAGNOSTIC_SNAPSHOT_PIDS:
-            if pid_num in self._supported_pids:
-                reading = await self.read_pid(pid_num)
-                if reading:
-                    pids[reading.name] = reading
+        pids = await self.read_pids(
+            [pid_num for pid_num in DIAGNOSTIC_SNAPSHOT_PIDS if pid_num in self._supported_pids]
+        )
         
         snapshot = DiagnosticSnapshot(
             timestamp=datetime.now(),
@@ -12,12 +12,24 @@ The session tracks:
 
 Each tool call can query and update this state, allowing the LLM to
 build context over multiple tool calls.
+
+Sessions live in a SQLite file (SCAN_TOOL_SESSION_DB) so every uvicorn
+worker on the host sees the same session. PID readings are kept in a
+fixed-size ring buffer per PID, so long monitoring runs don't grow the
+session without bound.
 """
 
+import heapq
 import logging
-from dataclasses import dataclass, field
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 from enum import Enum
 import json
 
@@ -88,6 +100,7 @@ class DiagnosticSession:
     """
     # Session metadata
     session_id: str = ""
+    user_id: str = ""
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
     phase: DiagnosticPhase = DiagnosticPhase.NOT_STARTED
@@ -103,9 +116,8 @@ class DiagnosticSession:
     symptoms: List[str] = field(default_factory=list)
     tech_observations: List[str] = field(default_factory=list)
     
-    # Data collected
+    # Data collected (PID readings: see pid_history)
     dtcs: List[DTCReading] = field(default_factory=list)
-    pids: List[PIDReading] = field(default_factory=list)
     tests: List[TestResult] = field(default_factory=list)
     
     # Analysis
@@ -118,10 +130,29 @@ class DiagnosticSession:
     # Next steps (what needs to be done)
     next_steps: List[str] = field(default_factory=list)
     
+    # Store the session was loaded from, and its PID ring buffers (loaded lazily)
+    _store: Optional['SessionStore'] = field(default=None, repr=False, compare=False)
+    _pid_history: Optional[Dict[str, Deque[PIDReading]]] = field(default=None, repr=False, compare=False)
+    
+    def save(self):
+        """
+        Persist the session.
+        
+        Mutating methods save on their own; call this after assigning
+        fields directly.
+        """
+        if self._store is not None:
+            self._store.save(self)
+    
+    def _touch(self):
+        self.updated_at = datetime.now()
+        self.save()
+    
     def log_action(self, action: str):
         """Log an action that was performed."""
         self.action_log.append((datetime.now(), action))
-        self.updated_at = datetime.now()
+        del self.action_log[:-ACTION_LOG_SIZE]
+        self._touch()
     
     def add_dtc(self, code: str, description: str, category: str = "stored"):
         """Add a DTC to the session."""
@@ -136,29 +167,55 @@ class DiagnosticSession:
             category=category,
             timestamp=datetime.now()
         ))
-        self.updated_at = datetime.now()
+        self._touch()
+    
+    @property
+    def history_size(self) -> int:
+        """Readings kept per PID."""
+        return self._store.history_size if self._store is not None else PID_HISTORY_SIZE
+    
+    @property
+    def pid_history(self) -> Dict[str, Deque[PIDReading]]:
+        """Recent readings per PID (keyed by upper-cased name), oldest first."""
+        if self._pid_history is None:
+            self._pid_history = self._store.load_pids(self.user_id) if self._store is not None else {}
+        return self._pid_history
+    
+    @property
+    def pids(self) -> List[PIDReading]:
+        """All buffered PID readings, oldest first."""
+        readings = [r for history in self.pid_history.values() for r in history]
+        return sorted(readings, key=lambda r: r.timestamp)
     
     def add_pid(self, name: str, value: float, unit: str, context: str = ""):
-        """Add a PID reading to the session."""
-        self.pids.append(PIDReading(
-            name=name,
-            value=value,
-            unit=unit,
-            timestamp=datetime.now(),
-            context=context
-        ))
-        self.updated_at = datetime.now()
+        """Add a PID reading to the session (the PID's oldest reading drops out when full)."""
+        self.add_pids([(name, value, unit, context)])
+    
+    def add_pids(self, readings: Iterable[Tuple[str, float, str, str]]):
+        """Add one poll cycle's readings, as (name, value, unit, context), in a single write."""
+        now = datetime.now()
+        batch = [
+            PIDReading(name=name, value=value, unit=unit, timestamp=now, context=context)
+            for name, value, unit, context in readings
+        ]
+        if not batch:
+            return
+        if self._pid_history is not None or self._store is None:
+            for reading in batch:
+                history = self.pid_history.setdefault(reading.name.upper(), deque(maxlen=self.history_size))
+                history.append(reading)
+        self.updated_at = now
+        if self._store is not None:
+            self._store.append_pids(self.user_id, batch)
     
     def get_latest_pid(self, name: str) -> Optional[PIDReading]:
         """Get the most recent reading for a specific PID."""
-        for pid in reversed(self.pids):
-            if pid.name.upper() == name.upper():
-                return pid
-        return None
+        history = self.pid_history.get(name.upper())
+        return history[-1] if history else None
     
     def get_pid_history(self, name: str) -> List[PIDReading]:
-        """Get all readings for a specific PID."""
-        return [p for p in self.pids if p.name.upper() == name.upper()]
+        """Get the buffered readings for a specific PID."""
+        return list(self.pid_history.get(name.upper(), ()))
     
     def add_hypothesis(self, diagnosis: str, system: str, confidence: float, 
                       evidence: List[str], tests_to_confirm: List[str] = None):
@@ -171,7 +228,7 @@ class DiagnosticSession:
                 h.supporting_evidence = evidence
                 h.tests_to_confirm = tests_to_confirm or []
                 h.updated_at = datetime.now()
-                self.updated_at = datetime.now()
+                self._touch()
                 return
         
         # Add new
@@ -184,7 +241,7 @@ class DiagnosticSession:
             tests_to_confirm=tests_to_confirm or [],
             updated_at=datetime.now()
         ))
-        self.updated_at = datetime.now()
+        self._touch()
     
     def rule_out(self, diagnosis: str, reason: str):
         """Rule out a diagnosis."""
@@ -192,7 +249,7 @@ class DiagnosticSession:
         
         # Remove from hypotheses if present
         self.hypotheses = [h for h in self.hypotheses if h.diagnosis != diagnosis]
-        self.updated_at = datetime.now()
+        self._touch()
     
     def set_vehicle(self, year: str = None, make: str = None, model: str = None, 
                    engine: str = None, vin: str = None):
@@ -207,7 +264,7 @@ class DiagnosticSession:
             self.vehicle_engine = engine
         if vin:
             self.vehicle_vin = vin
-        self.updated_at = datetime.now()
+        self._touch()
     
     def get_vehicle_description(self) -> str:
         """Get formatted vehicle description."""
@@ -223,13 +280,13 @@ class DiagnosticSession:
         symptom = symptom.lower().strip()
         if symptom not in self.symptoms:
             self.symptoms.append(symptom)
-            self.updated_at = datetime.now()
+            self._touch()
     
     def add_observation(self, observation: str):
         """Add a technician observation."""
         if observation not in self.tech_observations:
             self.tech_observations.append(observation)
-            self.updated_at = datetime.now()
+            self._touch()
     
     def get_summary(self) -> str:
         """
@@ -375,36 +432,335 @@ class DiagnosticSession:
             'tests_performed': len(self.tests),
             'next_steps': self.next_steps,
         }
+    
+    def _state(self) -> Dict[str, Any]:
+        """Everything but the PID readings, as JSON-ready values."""
+        state = {}
+        for f in fields(self):
+            if f.name.startswith('_'):
+                continue
+            value = getattr(self, f.name)
+            if f.name in ('dtcs', 'tests', 'hypotheses'):
+                value = [asdict(item) for item in value]
+            state[f.name] = value
+        return state
+    
+    @classmethod
+    def _from_state(cls, state: Dict[str, Any]) -> 'DiagnosticSession':
+        """Rebuild a session saved by _state()."""
+        def when(value: str) -> datetime:
+            return datetime.fromisoformat(value)
+        
+        state = dict(state)
+        state['created_at'] = when(state['created_at'])
+        state['updated_at'] = when(state['updated_at'])
+        state['phase'] = DiagnosticPhase(state['phase'])
+        state['dtcs'] = [DTCReading(**{**d, 'timestamp': when(d['timestamp'])}) for d in state['dtcs']]
+        state['tests'] = [TestResult(**{**t, 'timestamp': when(t['timestamp'])}) for t in state['tests']]
+        state['hypotheses'] = [Hypothesis(**{**h, 'updated_at': when(h['updated_at'])}) for h in state['hypotheses']]
+        state['action_log'] = [(when(ts), action) for ts, action in state['action_log']]
+        return cls(**state)
 
 
-# =============================================================================
-# SESSION STORAGE - User-scoped with auto-expiration
-# =============================================================================
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
 
-import threading
 
-# Thread lock for session access (web servers handle concurrent requests)
-_session_lock = threading.Lock()
+# =============================================================================
+# SESSION STORAGE - SQLite, shared across worker processes, auto-expiring
+# =============================================================================
 
-# Sessions keyed by user_id - each tech gets their own session
-_sessions: Dict[str, DiagnosticSession] = {}
-_session_timestamps: Dict[str, datetime] = {}
+# Shared by every process that uses the same file (one per host)
+SESSION_DB_PATH = os.environ.get("SCAN_TOOL_SESSION_DB", "/tmp/scan_tool_sessions.db")
 
 # Sessions expire after 2 hours of inactivity
 SESSION_TIMEOUT_HOURS = 2
 
+# Readings kept per PID; older ones are overwritten
+PID_HISTORY_SIZE = 120
+
+# Actions kept in the action log
+ACTION_LOG_SIZE = 200
+
+# Sessions other processes last touched are swept at most this often (seconds)
+EXPIRY_SWEEP_INTERVAL = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at);
+CREATE TABLE IF NOT EXISTS pid_readings (
+    user_id TEXT NOT NULL,
+    pid TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    unit TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    context TEXT NOT NULL,
+    PRIMARY KEY (user_id, pid, slot)
+);
+"""
+
+
+class SessionStore:
+    """
+    Diagnostic sessions in a SQLite file.
+    
+    Every process that opens the same file shares the sessions, so a
+    technician gets the same session whichever uvicorn worker serves the
+    request. Mutations are written through: the session state (everything
+    but PID readings) is saved as one JSON row, and each PID reading goes
+    to slot ``seq % history_size`` of that PID's ring buffer. A poll
+    cycle's readings are written in one transaction, which reads each
+    PID's next seq once under the write lock.
+    
+    Expiry is lazy. Each access pushes the session's deadline on an
+    in-process heap; accesses pop only the deadlines that have passed and
+    delete those sessions unless another process refreshed them. Sessions
+    this process never touched are removed by an indexed sweep every
+    EXPIRY_SWEEP_INTERVAL seconds. Expired sessions are never returned,
+    swept or not.
+    """
+    
+    def __init__(
+        self,
+        path: str = SESSION_DB_PATH,
+        ttl: float = SESSION_TIMEOUT_HOURS * 3600,
+        history_size: int = PID_HISTORY_SIZE,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize store.
+        
+        Args:
+            path: SQLite file (created if missing)
+            ttl: Seconds of inactivity before a session expires
+            history_size: Readings kept per PID
+            clock: Time source in epoch seconds (for tests)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.history_size = history_size
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}  # latest known deadline per queued user
+        self._next_sweep = 0.0
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Locked connection inside a write transaction."""
+        with self._lock:
+            # A forked worker must not reuse its parent's connection
+            if self._conn is None or self._conn_pid != os.getpid():
+                self._conn = sqlite3.connect(
+                    self.path, timeout=10, isolation_level=None, check_same_thread=False
+                )
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.executescript(_SCHEMA)
+                self._conn_pid = os.getpid()
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+    
+    def _schedule(self, user_id: str, expires_at: float) -> None:
+        if user_id not in self._deadlines:
+            heapq.heappush(self._heap, (expires_at, user_id))
+        self._deadlines[user_id] = expires_at
+    
+    # -------------------------------------------------------------------------
+    # Sessions
+    # -------------------------------------------------------------------------
+    
+    def load(self, user_id: str) -> Optional[DiagnosticSession]:
+        """Load a live session and extend its deadline; None if missing or expired."""
+        now = self._clock()
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE sessions SET expires_at = ? WHERE user_id = ? AND expires_at > ?",
+                (now + self.ttl, user_id, now),
+            ).rowcount
+            row = conn.execute("SELECT state FROM sessions WHERE user_id = ?", (user_id,)).fetchone()
+            if not updated or row is None:
+                return None
+            self._schedule(user_id, now + self.ttl)
+        
+        session = DiagnosticSession._from_state(json.loads(row[0]))
+        session._store = self
+        return session
+    
+    def create(self, user_id: str) -> DiagnosticSession:
+        """Start a fresh session for a user, replacing any existing one."""
+        session = DiagnosticSession(
+            session_id=f"{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            user_id=user_id,
+        )
+        session._store = self
+        session._pid_history = {}
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM pid_readings WHERE user_id = ?", (user_id,))
+        self.save(session)
+        return session
+    
+    def save(self, session: DiagnosticSession) -> None:
+        """Write a session's state (not its PID readings) and extend its deadline."""
+        state = json.dumps(session._state(), default=_json_default)
+        expires_at = self._clock() + self.ttl
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (user_id, state, expires_at) VALUES (?, ?, ?)",
+                (session.user_id, state, expires_at),
+            )
+            self._schedule(session.user_id, expires_at)
+    
+    def count(self) -> int:
+        """Number of live sessions."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (self._clock(),)).fetchone()
+        return row[0]
+    
+    # -------------------------------------------------------------------------
+    # PID Ring Buffers
+    # -------------------------------------------------------------------------
+    
+    def append_pid(self, user_id: str, reading: PIDReading) -> None:
+        """Store a reading in its PID's ring buffer, overwriting the oldest when full."""
+        self.append_pids(user_id, [reading])
+    
+    def append_pids(self, user_id: str, readings: List[PIDReading]) -> None:
+        """Store several readings (one poll cycle) in one transaction."""
+        next_seq: Dict[str, int] = {}
+        rows = []
+        with self._transaction() as conn:
+            for reading in readings:
+                key = reading.name.upper()
+                if key not in next_seq:
+                    # Read under the write lock, so other processes' appends count
+                    next_seq[key] = conn.execute(
+                        "SELECT COALESCE(MAX(seq) + 1, 0) FROM pid_readings WHERE user_id = ? AND pid = ?",
+                        (user_id, key),
+                    ).fetchone()[0]
+                seq = next_seq[key]
+                next_seq[key] = seq + 1
+                rows.append((user_id, key, seq % self.history_size, seq, reading.name, reading.value,
+                             reading.unit, reading.timestamp.isoformat(), reading.context))
+            conn.executemany(
+                "INSERT OR REPLACE INTO pid_readings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+    
+    def load_pids(self, user_id: str) -> Dict[str, Deque[PIDReading]]:
+        """A user's PID ring buffers, oldest reading first."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT pid, name, value, unit, timestamp, context FROM pid_readings "
+                "WHERE user_id = ? ORDER BY pid, seq",
+                (user_id,),
+            ).fetchall()
+        history: Dict[str, Deque[PIDReading]] = {}
+        for key, name, value, unit, timestamp, context in rows:
+            history.setdefault(key, deque(maxlen=self.history_size)).append(
+                PIDReading(name, value, unit, datetime.fromisoformat(timestamp), context)
+            )
+        return history
+    
+    # -------------------------------------------------------------------------
+    # Expiry
+    # -------------------------------------------------------------------------
+    
+    def expire(self) -> int:
+        """
+        Delete sessions whose deadline has passed.
+        
+        Returns:
+            Number of sessions deleted
+        """
+        now = self._clock()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, user_id = heapq.heappop(self._heap)
+                deadline = self._deadlines.pop(user_id)
+                if deadline > now:
+                    self._schedule(user_id, deadline)  # accessed again since it was queued
+                else:
+                    due.append(user_id)
+            sweep = now >= self._next_sweep
+            if sweep:
+                self._next_sweep = now + EXPIRY_SWEEP_INTERVAL
+        if not due and not sweep:
+            return 0
+        
+        with self._transaction() as conn:
+            if sweep:
+                expired = [row[0] for row in conn.execute(
+                    "SELECT user_id FROM sessions WHERE expires_at <= ?", (now,)
+                )]
+            else:
+                # Another process may have refreshed them since
+                expired = [
+                    user_id for user_id in due
+                    if conn.execute(
+                        "SELECT 1 FROM sessions WHERE user_id = ? AND expires_at <= ?", (user_id, now)
+                    ).fetchone()
+                ]
+            for user_id in expired:
+                conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+                conn.execute("DELETE FROM pid_readings WHERE user_id = ?", (user_id,))
+        if expired:
+            logger.debug(f"Expired {len(expired)} diagnostic sessions")
+        return len(expired)
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
 
-def _cleanup_expired_sessions():
-    """Remove sessions that haven't been accessed in SESSION_TIMEOUT_HOURS."""
-    # Note: Caller should hold _session_lock
-    now = datetime.now()
-    expired = [
-        user_id for user_id, ts in _session_timestamps.items()
-        if (now - ts).total_seconds() > SESSION_TIMEOUT_HOURS * 3600
-    ]
-    for user_id in expired:
-        del _sessions[user_id]
-        del _session_timestamps[user_id]
+def get_session_store() -> SessionStore:
+    """The process-wide session store (opens SESSION_DB_PATH on first use)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(SESSION_DB_PATH)
+        return _store
+
+
+def configure_session_store(path: str = SESSION_DB_PATH, **kwargs) -> SessionStore:
+    """
+    Use a different session database (e.g. per deployment, or in tests).
+    
+    Args:
+        path: SQLite file
+        **kwargs: SessionStore options (ttl, history_size, clock)
+    """
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = SessionStore(path, **kwargs)
+        return _store
 
 
 def get_session(user_id: str = "default") -> DiagnosticSession:
@@ -417,19 +773,9 @@ def get_session(user_id: str = "default") -> DiagnosticSession:
     Returns:
         The user's DiagnosticSession (creates one if doesn't exist)
     """
-    with _session_lock:
-        # Cleanup old sessions periodically
-        _cleanup_expired_sessions()
-        
-        if user_id not in _sessions:
-            _sessions[user_id] = DiagnosticSession(
-                session_id=f"{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            )
-        
-        # Update access timestamp
-        _session_timestamps[user_id] = datetime.now()
-        
-        return _sessions[user_id]
+    store = get_session_store()
+    store.expire()
+    return store.load(user_id) or store.create(user_id)
 
 
 def reset_session(user_id: str = "default") -> DiagnosticSession:
@@ -442,12 +788,7 @@ def reset_session(user_id: str = "default") -> DiagnosticSession:
     Returns:
         Fresh DiagnosticSession
     """
-    with _session_lock:
-        _sessions[user_id] = DiagnosticSession(
-            session_id=f"{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        )
-        _session_timestamps[user_id] = datetime.now()
-        return _sessions[user_id]
+    return get_session_store().create(user_id)
 
 
 def get_session_summary(user_id: str = "default") -> str:
@@ -457,5 +798,6 @@ def get_session_summary(user_id: str = "default") -> str:
 
 def get_active_session_count() -> int:
     """Get the number of active diagnostic sessions (for monitoring)."""
-    _cleanup_expired_sessions()
-    return len(_sessions)
+    store = get_session_store()
+    store.expire()
+    return store.count()
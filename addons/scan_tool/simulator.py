@@ -17,8 +17,14 @@ Usage:
     sim = SimulatedELM327(vehicle_state='overheating')
     response = await sim.send_command('0105')  # Coolant temp
     
+    # Multi-PID request (up to 6 PIDs, ISO-TP multi-frame reply)
+    response = await sim.send_command('010C0D05')
+    
     # As a TCP server (for testing real connection code)
     python -m addons.scan_tool.simulator --port 35000 --state overheating
+    
+    # Emulate a slow dongle that rejects multi-PID requests
+    python -m addons.scan_tool.simulator --latency 0.08 --no-multi-pid
 """
 
 import asyncio
@@ -125,6 +131,8 @@ class SimulatedELM327:
         vehicle_state: str = "normal",
         profile: VehicleProfile = None,
         noise_level: float = 0.05,  # 5% random variation
+        multi_pid: bool = True,
+        latency: float = 0.0,
     ):
         """
         Initialize simulator.
@@ -133,9 +141,15 @@ class SimulatedELM327:
             vehicle_state: One of VehicleState values or 'normal'
             profile: Vehicle characteristics
             noise_level: Random variation (0-1)
+            multi_pid: Answer multi-PID Mode 01 requests (False emulates
+                adapters/protocols that reply NO DATA to them)
+            latency: Simulated adapter round-trip time per command in seconds
+                (Bluetooth/WiFi dongles are typically 0.05-0.1s)
         """
         self.profile = profile or VehicleProfile()
         self.noise_level = noise_level
+        self.multi_pid = multi_pid
+        self.latency = latency
         self.state = SimulatedState()
         self._echo_enabled = True
         self._spaces_enabled = True
@@ -269,6 +283,9 @@ class SimulatedELM327:
         Returns:
             Response string
         """
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
         command = command.strip().upper()
         
         # AT commands
@@ -355,8 +372,10 @@ class SimulatedELM327:
         mode = int(command[0:2], 16)
         pid = int(command[2:4], 16) if len(command) >= 4 else 0
         
-        # Mode 01: Current data
+        # Mode 01: Current data (one PID, or up to 6 in one request)
         if mode == 0x01:
+            if len(command) > 4:
+                return self._handle_mode_01_multi(command[2:])
             return self._handle_mode_01(pid)
         
         # Mode 03: Stored DTCs
@@ -398,6 +417,46 @@ class SimulatedELM327:
         
         return "NO DATA"
     
+    def _handle_mode_01_multi(self, pid_hex: str) -> str:
+        """Handle a multi-PID Mode 01 request like 010C0D05."""
+        if not self.multi_pid or len(pid_hex) % 2 or len(pid_hex) > 12:
+            return "NO DATA"
+        
+        response_bytes = [0x41]
+        for i in range(0, len(pid_hex), 2):
+            pid = int(pid_hex[i:i+2], 16)
+            handler = self._pid_handlers.get(pid)
+            if handler:  # Unsupported PIDs are left out of the reply
+                response_bytes += [pid] + list(handler())
+        
+        if len(response_bytes) == 1:
+            return "NO DATA"
+        return self._format_can_message(response_bytes)
+    
+    def _format_can_message(self, payload: List[int]) -> str:
+        """
+        Format a response the way an ELM327 prints CAN replies (headers off).
+        
+        Up to 7 bytes fit a single frame. Longer replies use ISO-TP framing:
+        a byte-count line, then "0:" with 6 bytes and "1:", "2:", ... with 7
+        bytes each, the last frame zero padded.
+        """
+        sep = ' ' if self._spaces_enabled else ''
+        
+        def fmt(data):
+            return sep.join(f'{b:02X}' for b in data)
+        
+        if len(payload) <= 7:
+            return fmt(payload)
+        
+        lines = [f'{len(payload):03X}', f'0:{sep}{fmt(payload[:6])}']
+        rest = payload[6:]
+        for index, start in enumerate(range(0, len(rest), 7), 1):
+            chunk = rest[start:start + 7]
+            chunk += [0x00] * (7 - len(chunk))
+            lines.append(f'{index % 16:X}:{sep}{fmt(chunk)}')
+        return '\n'.join(lines)
+    
     def _handle_mode_09(self, pid: int) -> str:
         """Handle Mode 09 (vehicle info) requests."""
         if pid == 0x02:
@@ -693,11 +752,13 @@ class SimulatorServer:
         self, 
         host: str = "0.0.0.0",
         port: int = 35000,
-        vehicle_state: str = "normal"
+        vehicle_state: str = "normal",
+        multi_pid: bool = True,
+        latency: float = 0.0,
     ):
         self.host = host
         self.port = port
-        self.elm = SimulatedELM327(vehicle_state=vehicle_state)
+        self.elm = SimulatedELM327(vehicle_state=vehicle_state, multi_pid=multi_pid, latency=latency)
         self._server = None
     
     async def start(self) -> None:
@@ -826,6 +887,17 @@ async def main():
         choices=[s.value for s in VehicleState],
         help="Vehicle state to simulate"
     )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Simulated round-trip time per command in seconds (default: 0)"
+    )
+    parser.add_argument(
+        "--no-multi-pid",
+        action="store_true",
+        help="Reject multi-PID Mode 01 requests like older adapters"
+    )
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
@@ -848,7 +920,9 @@ async def main():
     server = SimulatorServer(
         host=args.host,
         port=args.port,
-        vehicle_state=args.state
+        vehicle_state=args.state,
+        multi_pid=not args.no_multi_pid,
+        latency=args.latency,
     )
     
     try:
@@ -882,9 +956,9 @@ class SimulatedConnection:
         dtcs = await service.read_dtcs()
     """
     
-    def __init__(self, vehicle_state: str = "normal"):
-        """Initialize with a vehicle state."""
-        self.elm = SimulatedELM327(vehicle_state=vehicle_state)
+    def __init__(self, vehicle_state: str = "normal", **elm_kwargs):
+        """Initialize with a vehicle state (extra kwargs go to SimulatedELM327)."""
+        self.elm = SimulatedELM327(vehicle_state=vehicle_state, **elm_kwargs)
         self._connected = True
     
     @property
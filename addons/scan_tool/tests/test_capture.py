@@ -0,0 +1,128 @@
+"""
+Tests for PID capture files and capture replay.
+
+Uses temporary files and the replay connection; no hardware.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from addons.scan_tool.capture import (
+    CHUNK_HEADER, CaptureError, CaptureReader, CaptureWriter, ReplayConnection, encode_pid,
+)
+from addons.scan_tool.pids import PID_DEFINITIONS
+from addons.scan_tool.service import ELM327Service, PIDReading
+
+VIN = "1HGCM82633A004352"
+T0 = datetime(2026, 1, 30, 17, 45)
+
+
+def _record(path, seconds=20, **writer_kwargs):
+    """RPM ramps 800 -> 2800 at 10 Hz, coolant warms 60 -> 80 at 1 Hz."""
+    with CaptureWriter(path, metadata={'vin': VIN}, **writer_kwargs) as capture:
+        for i in range(seconds * 10):
+            ts = T0 + timedelta(milliseconds=100 * i)
+            capture.add(PIDReading(0x0C, 'RPM', 800 + i * 2000 / (seconds * 10), 'rpm', ts))
+            if i % 10 == 0:
+                capture.add(PIDReading(0x05, 'COOLANT_TEMP', 60 + i / 10, '°C', ts))
+    return path
+
+
+class TestCaptureFile:
+
+    def test_round_trip_is_compact(self, tmp_path):
+        path = _record(tmp_path / 'drive.obdcap', flush_interval=5.0)
+        with CaptureReader(path) as capture:
+            assert capture.metadata['vin'] == VIN
+            assert capture.pids == [0x05, 0x0C]
+            assert capture.count('RPM') == 200 and capture.count('ECT') == 20
+
+            times, values = capture.series('RPM')
+            assert times[0] == pytest.approx(T0.timestamp())
+            assert times[-1] - times[0] == pytest.approx(19.9, abs=1e-4)
+            assert values[-1] == pytest.approx(2790)
+            assert capture.span() == (pytest.approx(times[0]), pytest.approx(times[-1]))
+            # float32 + 4-byte delta per reading, plus chunk/series headers
+            assert path.stat().st_size / capture.readings < 10
+
+    def test_readable_while_being_written(self, tmp_path):
+        path = tmp_path / 'live.obdcap'
+        writer = CaptureWriter(path, flush_interval=1.0)
+        with CaptureReader(path) as reader:
+            for i in range(25):
+                writer.add(PIDReading(0x0D, 'SPEED', i, 'km/h', T0 + timedelta(milliseconds=100 * i)))
+            # Complete 1-second chunks are visible; the rest is still buffered
+            assert reader.refresh() == 2
+            assert reader.count('SPEED') == 20
+
+            writer.close()
+            assert reader.refresh() == 1
+            assert list(reader.series('SPEED')[1]) == list(range(25))
+
+    def test_torn_chunk_is_ignored_and_dropped_on_append(self, tmp_path):
+        path = _record(tmp_path / 'crash.obdcap', seconds=3)
+        intact = path.stat().st_size
+        with open(path, 'ab') as f:
+            f.write(CHUNK_HEADER.pack(b'CHNK', 400, 1, 0, 0) + b'\0' * 40)  # crash mid-write
+
+        with CaptureReader(path) as capture:
+            assert capture.valid_bytes == intact
+            assert capture.count('RPM') == 30
+
+        with CaptureWriter(path) as capture:
+            capture.add(PIDReading(0x0C, 'RPM', 900, 'rpm', T0 + timedelta(seconds=5)))
+        with CaptureReader(path) as capture:
+            assert capture.metadata['vin'] == VIN
+            assert capture.count('RPM') == 31
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / 'notes.txt'
+        path.write_text('not a capture file')
+        with pytest.raises(CaptureError):
+            CaptureReader(path)
+
+    def test_values_re_encode_to_data_bytes(self):
+        for defn in PID_DEFINITIONS.values():
+            for raw in (bytes(defn.bytes), bytes([0x7F] * defn.bytes), bytes([0xC8] + [0] * (defn.bytes - 1))):
+                value = defn.formula(raw)
+                assert defn.formula(encode_pid(defn, value)) == pytest.approx(value), defn.name
+
+
+class TestReplay:
+
+    @pytest.mark.asyncio
+    async def test_service_reads_a_replay_like_an_adapter(self, tmp_path):
+        path = _record(tmp_path / 'drive.obdcap')
+        elm = ELM327Service()
+        assert await elm.connect('replay', str(path))
+        try:
+            assert elm.vin == VIN
+            assert set(await elm.get_supported_pids()) == {0x05, 0x0C}
+
+            elm._connection.seek(10.0)
+            readings = await elm.read_pids(['RPM', 'COOLANT_TEMP', 'SPEED'])
+            assert set(readings) == {'RPM', 'COOLANT_TEMP'}
+            assert readings['RPM'].value == pytest.approx(1800, abs=15)
+            assert readings['COOLANT_TEMP'].value == 70
+        finally:
+            await elm.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_accelerated_replay_and_end_of_capture(self, tmp_path):
+        path = _record(tmp_path / 'drive.obdcap')
+        conn = ReplayConnection(path, speed=100.0)
+        assert await conn.connect()
+        assert not conn.finished
+        await asyncio.sleep(0.1)  # 10s of recording
+        assert 8.0 < conn.position < 19.9
+
+        await asyncio.sleep(0.15)
+        assert conn.finished
+        assert await conn.send_command('010C') == '41 0C 2B 98'  # last value held: 2790 rpm
+        assert await conn.send_command('0103') == 'NO DATA'
+
+    @pytest.mark.asyncio
+    async def test_missing_capture_fails_to_connect(self, tmp_path):
+        assert not await ReplayConnection(tmp_path / 'missing.obdcap').connect()
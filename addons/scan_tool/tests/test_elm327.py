@@ -286,5 +286,81 @@ class TestIntegration:
         assert data['dtcs'][0]['code'] == 'P0171'
 
 
+class TestMultiPID:
+    """Test multi-PID Mode 01 requests and fallback."""
+    
+    def test_parse_multiframe_multi_ecu_response(self):
+        """ISO-TP frames, padding and a second ECU are split per PID."""
+        protocol = OBDProtocol(MagicMock())
+        response = (
+            "SEARCHING...\n"
+            "00E\n"
+            "0: 41 0C 1A F8 0D 32\n"
+            "1: 05 7B 04 80 06 82 07\n"
+            "2: 7F 00 00 00 00 00 00\n"
+            "410580"
+        )
+        data = protocol._parse_multi_pid_response(response, [0x0C, 0x0D, 0x05, 0x04, 0x06, 0x07])
+        
+        assert data == {
+            0x0C: bytes([0x1A, 0xF8]),
+            0x0D: bytes([0x32]),
+            0x05: bytes([0x7B]),  # first ECU wins
+            0x04: bytes([0x80]),
+            0x06: bytes([0x82]),
+            0x07: bytes([0x7F]),
+        }
+        assert protocol._parse_multi_pid_response("NO DATA", [0x0C, 0x0D]) == {}
+    
+    @pytest.mark.asyncio
+    async def test_read_pids_batches_requests(self):
+        """Twelve PIDs take two requests against the simulator."""
+        from addons.scan_tool.simulator import SimulatedConnection
+        
+        conn = SimulatedConnection("normal")
+        conn.send_command = AsyncMock(side_effect=conn.send_command)
+        protocol = OBDProtocol(conn)
+        pids = [0x0C, 0x0D, 0x05, 0x04, 0x11, 0x10, 0x06, 0x07, 0x08, 0x09, 0x0F, 0x42]
+        
+        data = await protocol.read_pids(pids)
+        
+        assert list(data) == pids
+        assert protocol.multi_pid is True
+        assert conn.send_command.await_count == 2
+        for pid, raw in data.items():
+            assert len(raw) == PID_DEFINITIONS[pid].bytes
+    
+    @pytest.mark.asyncio
+    async def test_read_pids_falls_back_when_rejected(self):
+        """Adapters that reject multi-PID requests get single requests."""
+        from addons.scan_tool.simulator import SimulatedConnection
+        
+        conn = SimulatedConnection("normal", multi_pid=False)
+        conn.send_command = AsyncMock(side_effect=conn.send_command)
+        protocol = OBDProtocol(conn)
+        pids = [0x0C, 0x0D, 0x05]
+        
+        assert list(await protocol.read_pids(pids)) == pids
+        assert protocol.multi_pid is False
+        assert conn.send_command.await_count == 1 + len(pids)
+        
+        conn.send_command.reset_mock()
+        assert list(await protocol.read_pids(pids)) == pids
+        assert conn.send_command.await_count == len(pids)
+    
+    @pytest.mark.asyncio
+    async def test_read_pids_falls_back_on_truncated_reply(self):
+        """Adapters that answer only the first PID of a group are detected."""
+        conn = MagicMock()
+        replies = {"010C0D": "41 0C 1A F8", "010C": "41 0C 1A F8", "010D": "41 0D 32"}
+        conn.send_command = AsyncMock(side_effect=lambda cmd, timeout=None: replies[cmd])
+        protocol = OBDProtocol(conn)
+        
+        data = await protocol.read_pids([0x0C, 0x0D])
+        
+        assert data == {0x0C: bytes([0x1A, 0xF8]), 0x0D: bytes([0x32])}
+        assert protocol.multi_pid is False
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
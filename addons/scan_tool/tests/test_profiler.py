@@ -0,0 +1,198 @@
+"""
+Tests for adapter profiling and the profiled read path.
+
+Profiles the simulated adapter into a temporary cache; no hardware.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from addons.scan_tool.connection import ConnectionConfig, ConnectionType, WiFiConnection
+from addons.scan_tool.profiler import ATST_MIN, AdapterProfiler, ProfileCache
+from addons.scan_tool import service as service_module
+from addons.scan_tool.service import ELM327Service
+from addons.scan_tool.simulator import SimulatedConnection
+
+
+class RecordingConnection(SimulatedConnection):
+    """SimulatedConnection that records the commands it was sent."""
+
+    def __init__(self, *args, vin=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = []
+        self.vin = vin
+
+    async def send_command(self, command, timeout=None):
+        self.commands.append(command)
+        if command == "0902" and self.vin:
+            data = (b"\x01" + self.vin.encode()).hex().upper()
+            return f"49 02 {' '.join(data[i:i + 2] for i in range(0, len(data), 2))}"
+        return await super().send_command(command, timeout)
+
+
+async def _profile(cache, **kwargs):
+    conn = RecordingConnection("normal", **kwargs)
+    await conn.connect()
+    profile = await AdapterProfiler(conn, cache, reset_delay=0).initialize("sim")
+    return profile, conn
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ProfileCache(str(tmp_path / "profiles.json"))
+
+
+class TestAdapterProfiler:
+
+    @pytest.mark.asyncio
+    async def test_profile_measures_and_tunes_the_link(self, cache):
+        profile, conn = await _profile(cache, latency=0.01)
+
+        assert profile.protocol == "6"
+        assert profile.vin == "1HGCM82633A004352"
+        assert profile.multi_pid is True
+        assert profile.echo_off and profile.spaces_off
+        assert 5 <= profile.latency_ms['p50'] <= profile.latency_ms['max'] < 100
+        assert profile.atst >= ATST_MIN
+        assert profile.read_deadline < 5.0  # tighter than the fixed default
+        assert f"ATST{profile.atst:02X}" in conn.commands
+        assert f"ATAT{profile.adaptive_timing}" in conn.commands
+        assert "ATSP0" in conn.commands  # protocol search on first contact
+
+    @pytest.mark.asyncio
+    async def test_reconnect_uses_cached_profile_without_probing(self, cache, tmp_path):
+        first, _ = await _profile(cache, latency=0.01)
+
+        # New process: the profile comes from the file
+        reloaded = ProfileCache(str(tmp_path / "profiles.json"))
+        profile, conn = await _profile(reloaded, latency=0.01)
+
+        assert profile == first
+        assert "ATSP0" not in conn.commands
+        assert "ATSP6" in conn.commands
+        assert "010C" not in conn.commands  # no latency sampling
+        assert "ATDPN" not in conn.commands
+        assert f"ATST{first.atst:02X}" in conn.commands
+
+    @pytest.mark.asyncio
+    async def test_other_vehicle_is_profiled_again(self, cache):
+        first, _ = await _profile(cache)
+        profile, conn = await _profile(cache, vin="2T1BURHE0JC000001", multi_pid=False)
+
+        assert profile.vin == "2T1BURHE0JC000001"
+        assert profile.multi_pid is False
+        assert "010C" in conn.commands
+        assert cache.get(first.adapter_id, first.vin) == first
+        assert cache.latest(first.adapter_id) == profile
+
+    @pytest.mark.asyncio
+    async def test_silent_vehicle_is_not_cached(self, cache):
+        class Silent(RecordingConnection):
+            async def send_command(self, command, timeout=None):
+                if command.startswith("01"):
+                    self.commands.append(command)
+                    return "UNABLE TO CONNECT"
+                return await super().send_command(command, timeout)
+
+        conn = Silent("normal")
+        await conn.connect()
+        with pytest.raises(ConnectionError):
+            await AdapterProfiler(conn, cache, reset_delay=0).initialize("sim")
+        assert not cache.path.exists()
+
+    @pytest.mark.asyncio
+    async def test_service_starts_from_the_profile(self, cache, monkeypatch):
+        await _profile(cache, multi_pid=False)
+        conn = RecordingConnection("normal", multi_pid=False)
+
+        async def connect():
+            await SimulatedConnection.connect(conn)
+            conn.profile = await AdapterProfiler(conn, cache, reset_delay=0).initialize("sim")
+            return True
+
+        conn.connect = connect
+        monkeypatch.setattr(service_module, "create_connection", lambda *args, **kwargs: conn)
+        service = ELM327Service()
+        assert await service.connect("wifi", "sim")
+
+        # Multi-PID support and VIN come from the cached profile, not new probes
+        assert service.pids_per_request == 1
+        assert service.request_time == conn.profile.request_time
+        assert service.vin == conn.profile.vin
+        assert "0902" in conn.commands and conn.commands.count("0902") == 1
+
+
+class _ReaderConnection(WiFiConnection):
+    """WiFiConnection reading from an in-memory stream."""
+
+    def __init__(self):
+        super().__init__(ConnectionConfig(ConnectionType.WIFI, "127.0.0.1"))
+        self._reader = asyncio.StreamReader()
+
+
+class TestReadUntilPrompt:
+
+    @pytest.mark.asyncio
+    async def test_echo_is_stripped_but_status_lines_kept(self):
+        conn = _ReaderConnection()
+        conn._reader.feed_data(b"010C\r41 0C 1A F8\r\r>")
+        assert await conn._read_until_prompt(1.0, "010C") == "41 0C 1A F8"
+
+        conn._reader.feed_data(b"NO DATA\r\r>")
+        assert await conn._read_until_prompt(1.0, "0142") == "NO DATA"
+
+        conn._reader.feed_data(b"014\r0: 49 02 01 31 48 47\r>")
+        response = await conn._read_until_prompt(1.0, "0902")
+        assert response.split("\n")[0] == "014"  # ISO-TP byte count, not echo
+
+    @pytest.mark.asyncio
+    async def test_deadline_covers_the_whole_response(self):
+        conn = _ReaderConnection()
+
+        async def trickle():
+            for _ in range(10):
+                conn._reader.feed_data(b"41 ")
+                await asyncio.sleep(0.05)
+
+        task = asyncio.create_task(trickle())
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        response = await conn._read_until_prompt(0.2, "010C")
+        assert loop.time() - started < 0.4
+        assert response.startswith("41")
+        await task
+
+    @pytest.mark.asyncio
+    async def test_profiled_deadline_only_covers_mode_01_pid_reads(self):
+        conn = _ReaderConnection()
+        conn.read_deadline = 0.2
+
+        assert conn._default_timeout("010C") == 0.2
+        assert conn._default_timeout("010C0D05") == pytest.approx(0.6)
+        conn.read_deadline = 2.0
+        assert conn._default_timeout("010C0D05") == conn.config.timeout  # capped
+        for command in ("03", "0902", "04", "ATZ"):
+            assert conn._default_timeout(command) == conn.config.timeout
+
+    @pytest.mark.asyncio
+    async def test_late_reply_is_discarded_before_the_next_command(self):
+        conn = _ReaderConnection()
+        conn._connected = True
+        conn._writer = SimpleNamespace(write=lambda data: None, drain=_done)
+
+        assert await conn.send_command("010C", timeout=0.05) == ""
+        conn._reader.feed_data(b"41 0C 1A F8\r\r>")  # the timed-out reply arrives late
+
+        async def reply():
+            await asyncio.sleep(0.01)
+            conn._reader.feed_data(b"41 0D 32\r\r>")
+
+        task = asyncio.create_task(reply())
+        assert await conn.send_command("010D", timeout=1.0) == "41 0D 32"
+        await task
+
+
+async def _done():
+    pass
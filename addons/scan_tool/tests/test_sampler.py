@@ -0,0 +1,138 @@
+"""
+Tests for the shared PID sampler.
+
+Runs against the simulated adapter; no hardware.
+"""
+
+import asyncio
+
+import pytest
+
+from addons.scan_tool.protocol import OBDProtocol
+from addons.scan_tool.sampler import PIDSampler
+from addons.scan_tool.service import ELM327Service
+from addons.scan_tool.simulator import SimulatedConnection
+
+
+class TrackingConnection(SimulatedConnection):
+    """SimulatedConnection that records commands and flags overlapping ones."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = []
+        self.in_flight = 0
+        self.overlapped = False
+
+    async def send_command(self, command, timeout=None):
+        self.in_flight += 1
+        self.overlapped |= self.in_flight > 1
+        try:
+            self.commands.append(command)
+            await asyncio.sleep(0.002)
+            return await super().send_command(command, timeout)
+        finally:
+            self.in_flight -= 1
+
+
+def _service():
+    conn = TrackingConnection("normal")
+    service = ELM327Service()
+    service._connection = conn
+    service._protocol = OBDProtocol(conn)
+    return service, conn
+
+
+class TestPIDSampler:
+
+    @pytest.mark.asyncio
+    async def test_subscribers_share_one_poll_plan(self):
+        service, conn = _service()
+        sampler = PIDSampler(service)
+        try:
+            fast = sampler.subscribe(['RPM', 'SPEED'], interval=0.02)
+            other = sampler.subscribe(['COOLANT_TEMP', 'rpm'], interval=0.02)
+            for _ in range(3):
+                a = await fast.get(timeout=1)
+                b = await other.get(timeout=1)
+                # Same poll, one adapter request for the union of PIDs
+                assert a.seq == b.seq
+            assert set(a.readings) == {'RPM', 'SPEED'}
+            assert set(b.readings) == {'COOLANT_TEMP', 'rpm'}
+            mode01 = [c for c in conn.commands if c.startswith('01') and c != '0100']
+            assert len(mode01) <= sampler.cycles + 1  # + multi-PID probe
+            assert not conn.overlapped
+        finally:
+            await sampler.stop()
+        assert fast.closed and other.closed
+        assert await fast.get() is None
+
+    @pytest.mark.asyncio
+    async def test_pids_stream_at_their_own_rates(self):
+        service, _ = _service()
+        sampler = PIDSampler(service)
+        try:
+            sub = sampler.subscribe(['RPM', 'COOLANT_TEMP'], rates={'RPM': 20, 'COOLANT_TEMP': 2})
+            counts = {'RPM': 0, 'COOLANT_TEMP': 0}
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + 1.0
+            while (remaining := deadline - loop.time()) > 0:
+                sample = await sub.get(timeout=remaining)
+                if sample is None:
+                    break
+                for name in sample.readings:
+                    counts[name] += 1
+            assert counts['RPM'] >= 4 * counts['COOLANT_TEMP'] > 0
+            report = sampler.report()
+            assert report['RPM']['target_hz'] == 20
+            assert report['COOLANT_TEMP']['target_hz'] == 2
+            assert report['RPM']['achieved_hz'] > report['COOLANT_TEMP']['achieved_hz']
+        finally:
+            await sampler.stop()
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_drops_oldest_frames(self):
+        service, _ = _service()
+        sampler = PIDSampler(service)
+        try:
+            slow = sampler.subscribe(['RPM'], interval=0, queue_size=2)
+            fast = sampler.subscribe(['RPM'], interval=0)
+            seen = [(await fast.get(timeout=1)).seq for _ in range(10)]
+            assert seen == sorted(seen) and len(set(seen)) == 10
+            assert slow.dropped > 0
+            frames = [await slow.get(timeout=1), await slow.get(timeout=1)]
+            assert frames[0].seq < frames[1].seq
+            assert frames[1].seq >= seen[-1]
+        finally:
+            await sampler.stop()
+
+    @pytest.mark.asyncio
+    async def test_read_and_exclusive_do_not_interleave_with_stream(self):
+        service, conn = _service()
+        sampler = PIDSampler(service)
+        try:
+            async with sampler.subscribe(['RPM', 'LOAD']) as stream:
+                await stream.get(timeout=1)
+                readings = await sampler.read(['STFT_B1', 'LTFT_B1', 'NOT_A_PID'])
+                async with sampler.exclusive():
+                    vin = await service.read_vin()
+                    dtcs = await service.read_dtcs()
+                await stream.get(timeout=1)
+            assert set(readings) == {'STFT_B1', 'LTFT_B1'}
+            assert vin and isinstance(dtcs, list)
+            assert not conn.overlapped
+            assert sampler.subscribers == 0
+        finally:
+            await sampler.stop()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_closes_subscriptions(self):
+        service, conn = _service()
+        sampler = PIDSampler(service)
+        sub = sampler.subscribe(['RPM'], interval=0)
+        await sub.get(timeout=1)
+        await conn.disconnect()
+        while await sub.get(timeout=1) is not None:
+            pass
+        assert sub.closed
+        assert sampler.subscribe(['RPM']).closed
+        await sampler.stop()
@@ -0,0 +1,100 @@
+"""
+Tests for the rate-tiered PID poll scheduler.
+
+Drives the scheduler with a fake clock and a fixed adapter round-trip time.
+"""
+
+import pytest
+
+from addons.scan_tool.pids import PollTier, get_pid_by_name, get_poll_tier
+from addons.scan_tool.scheduler import PollScheduler, merge_targets, resolve_targets
+
+LIVE_DATA = ['RPM', 'MAP', 'O2_B1S1', 'SPEED', 'STFT_B1', 'LTFT_B1', 'COOLANT_TEMP', 'FUEL_LEVEL']
+
+
+def _run(scheduler, seconds, request_time):
+    """Poll for ``seconds`` of fake time; every request takes ``request_time``."""
+    now = 0.0
+    polls = {}
+    while now < seconds:
+        pids, wait = scheduler.next_batch(now)
+        if wait:
+            now += wait
+            continue
+        elapsed = request_time * -(-len(pids) // scheduler.batch_size)
+        now += elapsed
+        scheduler.record(pids, pids, elapsed, now)
+        for pid in pids:
+            polls[pid] = polls.get(pid, 0) + 1
+    return {pid: count / seconds for pid, count in polls.items()}
+
+
+class TestPollTiers:
+
+    def test_defaults_come_from_category_with_overrides(self):
+        assert get_poll_tier('RPM') is PollTier.FAST
+        assert get_poll_tier('O2_B1S1') is PollTier.FAST
+        assert get_poll_tier('STFT_B1') is PollTier.MEDIUM
+        assert get_poll_tier('COOLANT_TEMP') is PollTier.SLOW
+        assert get_poll_tier('FUEL_LEVEL') is PollTier.STATIC  # FUEL category
+        assert get_poll_tier('RUN_TIME') is PollTier.STATIC  # ENGINE category
+
+    def test_resolve_and_merge_targets(self):
+        rpm, coolant = get_pid_by_name('RPM'), get_pid_by_name('COOLANT_TEMP')
+        targets = resolve_targets(['RPM', 'coolant', 'BOGUS'], rates={'ECT': 1.0})
+        assert targets == {rpm: (10.0, 0), coolant: (1.0, 2)}
+        assert resolve_targets(['RPM'], interval=2.0) == {rpm: (0.5, 0)}
+
+        merged = merge_targets(targets, {coolant: (4.0, 3)})
+        assert merged[coolant] == (4.0, 2)
+
+
+class TestPollScheduler:
+
+    def test_plan_meets_tier_rates_on_a_fast_link(self):
+        scheduler = PollScheduler(resolve_targets(LIVE_DATA))
+        rates = _run(scheduler, 20.0, request_time=0.02)
+
+        for name in LIVE_DATA:
+            pid = get_pid_by_name(name)
+            assert rates[pid] == pytest.approx(get_poll_tier(name).hz, rel=0.15)
+        # Slow PIDs ride along in the fast PIDs' multi-PID requests
+        assert max(len(slot) for slot in scheduler._plan) <= scheduler.batch_size
+        assert len(scheduler._plan) == 100
+
+    def test_saturated_link_degrades_low_priority_first(self):
+        # Single-PID adapter at 80 ms per request: ~12 PIDs/s for 41 PIDs/s of targets
+        scheduler = PollScheduler(resolve_targets(LIVE_DATA), batch_size=1)
+        _run(scheduler, 30.0, request_time=0.08)
+        report = scheduler.report()
+
+        fast = report['RPM']
+        assert fast['allocated_hz'] < fast['target_hz']
+        assert fast['achieved_hz'] == pytest.approx(fast['allocated_hz'], rel=0.2)
+        for name in ('STFT_B1', 'COOLANT_TEMP'):
+            # Lower tiers give up their rate before the fast tier does
+            assert report[name]['allocated_hz'] <= 0.2
+        assert report['FUEL_LEVEL']['allocated_hz'] == pytest.approx(0.1)  # already at the floor
+        total = sum(r['achieved_hz'] for r in report.values())
+        assert total <= 1 / 0.08
+
+    def test_multi_pid_link_keeps_lower_tiers_that_fit(self):
+        # Requests are the bottleneck; six PIDs per request leave room for the slow tiers
+        scheduler = PollScheduler(resolve_targets(LIVE_DATA))
+        _run(scheduler, 30.0, request_time=0.15)
+        report = scheduler.report()
+
+        assert report['RPM']['allocated_hz'] < 10
+        assert report['STFT_B1']['allocated_hz'] == pytest.approx(2.0)
+        assert report['COOLANT_TEMP']['allocated_hz'] == pytest.approx(0.5)
+
+    def test_set_targets_keeps_statistics(self):
+        rpm = get_pid_by_name('RPM')
+        scheduler = PollScheduler(resolve_targets(['RPM']))
+        _run(scheduler, 2.0, request_time=0.01)
+        assert scheduler.achieved_hz(rpm) > 0
+
+        scheduler.set_targets(resolve_targets(['RPM', 'SPEED']))
+        assert scheduler.achieved_hz(rpm) > 0
+        scheduler.set_targets({})
+        assert scheduler.next_batch(100.0) == ([], float('inf'))
@@ -0,0 +1,141 @@
+"""
+Tests for the persistent diagnostic session store.
+
+Each test uses its own SQLite file.
+"""
+
+import multiprocessing
+import sqlite3
+
+import pytest
+
+from addons.scan_tool import session as session_module
+from addons.scan_tool.session import (
+    DiagnosticPhase, SessionStore, configure_session_store, get_active_session_count,
+    get_session, reset_session,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_module, '_store', None)
+    path = str(tmp_path / 'sessions.db')
+    yield path
+    session_module.get_session_store().close()
+
+
+def _worker(path):
+    """Runs in another process: the other uvicorn worker."""
+    configure_session_store(path)
+    session = get_session('tech1')
+    session.add_symptom('Rough idle')
+    session.add_pid('STFT_B1', 12.5, '%', 'at idle')
+
+
+class TestSessionStore:
+
+    def test_session_is_shared_across_processes(self, db):
+        configure_session_store(db)
+        session = get_session('tech1')
+        session.set_vehicle(year='2015', make='Honda', vin='1HGCM82633A004352')
+        session.phase = DiagnosticPhase.TESTING
+        session.save()
+
+        worker = multiprocessing.get_context('fork').Process(target=_worker, args=(db,))
+        worker.start()
+        worker.join(10)
+        assert worker.exitcode == 0
+
+        session = get_session('tech1')
+        assert session.vehicle_make == 'Honda'
+        assert session.phase is DiagnosticPhase.TESTING
+        assert session.symptoms == ['rough idle']
+        assert session.get_latest_pid('stft_b1').context == 'at idle'
+        assert get_session('tech2').symptoms == []
+
+    def test_pid_history_is_a_ring_buffer(self, db):
+        configure_session_store(db, history_size=5)
+        session = get_session('tech1')
+        for i in range(12):
+            session.add_pid('RPM', 700 + i, 'rpm')
+            session.add_pid('COOLANT_TEMP', 80 + i, '°C')
+
+        assert [r.value for r in session.get_pid_history('RPM')] == [707, 708, 709, 710, 711]
+        reloaded = get_session('tech1')
+        assert [r.value for r in reloaded.get_pid_history('rpm')] == [707, 708, 709, 710, 711]
+        assert len(reloaded.pids) == 10
+        with sqlite3.connect(db) as conn:
+            assert conn.execute('SELECT COUNT(*) FROM pid_readings').fetchone()[0] == 10
+
+        reset_session('tech1')
+        assert get_session('tech1').pids == []
+
+    def test_poll_cycle_is_one_transaction(self, db):
+        store = configure_session_store(db, history_size=3)
+        session = get_session('tech1')
+
+        statements = []
+        store._conn.set_trace_callback(statements.append)
+        for i in range(4):
+            session.add_pids([('RPM', 700 + i, 'rpm', ''), ('MAP', 30 + i, 'kPa', '')])
+        store._conn.set_trace_callback(None)
+
+        assert sum(s.startswith('BEGIN') for s in statements) == 4
+        reloaded = get_session('tech1')
+        assert [r.value for r in reloaded.get_pid_history('RPM')] == [701, 702, 703]
+        assert [r.value for r in reloaded.get_pid_history('MAP')] == [31, 32, 33]
+
+    def test_workers_appending_to_one_session_keep_every_reading(self, db):
+        a = SessionStore(db, history_size=10)
+        b = SessionStore(db, history_size=10)
+        session_a = a.create('tech1')
+        session_b = b.load('tech1')
+        session_a.add_pid('RPM', 1, 'rpm')
+        session_a.add_pid('RPM', 2, 'rpm')
+        session_b.add_pids([('RPM', 3, 'rpm', ''), ('RPM', 4, 'rpm', '')])
+        session_a.add_pid('RPM', 5, 'rpm')
+
+        assert [r.value for r in a.load_pids('tech1')['RPM']] == [1, 2, 3, 4, 5]
+        a.close()
+        b.close()
+
+    def test_idle_sessions_expire_lazily(self, db):
+        clock = FakeClock()
+        configure_session_store(db, ttl=60, clock=clock)
+        get_session('tech1').add_symptom('no start')
+        get_session('tech2').add_symptom('stalls')
+
+        clock.now += 30
+        get_session('tech1')  # keeps tech1 alive
+        clock.now += 40
+        assert get_active_session_count() == 1
+        assert get_session('tech1').symptoms == ['no start']
+        assert get_session('tech2').symptoms == []  # expired, replaced by a new session
+
+    def test_expiry_respects_other_processes_refresh(self, db):
+        clock = FakeClock()
+        mine = SessionStore(db, ttl=60, clock=clock)
+        other = SessionStore(db, ttl=60, clock=clock)
+        mine.create('tech1').add_pid('RPM', 750, 'rpm')
+        mine.expire()  # initial sweep
+
+        clock.now += 50
+        assert other.load('tech1') is not None  # refreshed elsewhere
+        clock.now += 20
+        assert mine.expire() == 0
+        session = mine.load('tech1')
+        assert session.get_latest_pid('RPM').value == 750
+
+        clock.now += 61
+        assert mine.expire() == 1
+        assert other.load('tech1') is None
+        mine.close()
+        other.close()
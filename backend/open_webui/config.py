@@ -2722,6 +2722,28 @@ ENABLE_RAG_HYBRID_SEARCH_ENRICHED_TEXTS = PersistentConfig(
     == "true",
 )
 
+# Per-collection BM25 indexes for hybrid search (retrieval/bm25.py):
+# how many stay in memory, an optional directory to persist them in (also
+# shared between workers to detect changes), and how many seconds an
+# in-memory index is trusted before it is rebuilt (0 = until changed).
+# With several workers, changes are announced through REDIS_URL or the
+# directory; with neither, the cache is disabled.
+RAG_BM25_INDEX_CACHE_SIZE = int(os.environ.get("RAG_BM25_INDEX_CACHE_SIZE", "32"))
+RAG_BM25_INDEX_DIR = os.environ.get("RAG_BM25_INDEX_DIR", "")
+RAG_BM25_INDEX_TTL = int(os.environ.get("RAG_BM25_INDEX_TTL", "600"))
+
+# Content-addressed embedding cache (retrieval/embedding_cache.py) in front
+# of every embedding engine; size limit is in megabytes
+ENABLE_RAG_EMBEDDING_CACHE = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_CACHE", "True").lower() == "true"
+)
+RAG_EMBEDDING_CACHE_PATH = os.environ.get(
+    "RAG_EMBEDDING_CACHE_PATH", str(CACHE_DIR / "embeddings" / "embeddings.sqlite3")
+)
+RAG_EMBEDDING_CACHE_MAX_SIZE_MB = int(
+    os.environ.get("RAG_EMBEDDING_CACHE_MAX_SIZE_MB", "512")
+)
+
 RAG_FULL_CONTEXT = PersistentConfig(
     "RAG_FULL_CONTEXT",
     "rag.full_context",
@@ -2822,6 +2844,15 @@ ENABLE_ASYNC_EMBEDDING = PersistentConfig(
     os.environ.get("ENABLE_ASYNC_EMBEDDING", "True").lower() == "true",
 )
 
+# Embedding batch scheduler (retrieval/embedding_scheduler.py): concurrent
+# requests when ENABLE_ASYNC_EMBEDDING is on, the per-batch latency the
+# adaptive batch size aims under (seconds), and attempts per failed batch
+RAG_EMBEDDING_MAX_IN_FLIGHT = int(os.environ.get("RAG_EMBEDDING_MAX_IN_FLIGHT", "4"))
+RAG_EMBEDDING_TARGET_LATENCY = float(
+    os.environ.get("RAG_EMBEDDING_TARGET_LATENCY", "10")
+)
+RAG_EMBEDDING_MAX_RETRIES = int(os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "3"))
+
 RAG_EMBEDDING_QUERY_PREFIX = os.environ.get("RAG_EMBEDDING_QUERY_PREFIX", None)
 
 RAG_EMBEDDING_CONTENT_PREFIX = os.environ.get("RAG_EMBEDDING_CONTENT_PREFIX", None)
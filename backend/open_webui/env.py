@@ -635,6 +635,25 @@ else:
         CHAT_STREAM_RESPONSE_CHUNK_MAX_BUFFER_SIZE = None
 
 
+# Streamed "message" deltas are buffered in memory and written back to the chat
+# row at most once per interval (seconds) or every N buffered characters.
+CHAT_STREAM_DB_FLUSH_INTERVAL = os.environ.get("CHAT_STREAM_DB_FLUSH_INTERVAL", "1")
+
+try:
+    CHAT_STREAM_DB_FLUSH_INTERVAL = float(CHAT_STREAM_DB_FLUSH_INTERVAL)
+except Exception:
+    CHAT_STREAM_DB_FLUSH_INTERVAL = 1.0
+
+CHAT_STREAM_DB_FLUSH_MAX_CHARS = os.environ.get(
+    "CHAT_STREAM_DB_FLUSH_MAX_CHARS", "4096"
+)
+
+try:
+    CHAT_STREAM_DB_FLUSH_MAX_CHARS = int(CHAT_STREAM_DB_FLUSH_MAX_CHARS)
+except Exception:
+    CHAT_STREAM_DB_FLUSH_MAX_CHARS = 4096
+
+
 ####################################
 # WEBSOCKET SUPPORT
 ####################################
@@ -810,6 +829,104 @@ for tier_id, default_value in _DEFAULT_TIERS.items():
 # Default tier for new users (set to None for pay-per-token model)
 BILLING_DEFAULT_TIER = os.environ.get("BILLING_DEFAULT_TIER", None)
 
+# Billing: usage events are queued in-process and written in batches.
+# Set BILLING_USAGE_FLUSH_INTERVAL=0 to write every event straight through.
+BILLING_USAGE_FLUSH_INTERVAL = os.environ.get("BILLING_USAGE_FLUSH_INTERVAL", "1")
+
+try:
+    BILLING_USAGE_FLUSH_INTERVAL = float(BILLING_USAGE_FLUSH_INTERVAL)
+except Exception:
+    BILLING_USAGE_FLUSH_INTERVAL = 1.0
+
+BILLING_USAGE_FLUSH_MAX_EVENTS = os.environ.get("BILLING_USAGE_FLUSH_MAX_EVENTS", "256")
+
+try:
+    BILLING_USAGE_FLUSH_MAX_EVENTS = int(BILLING_USAGE_FLUSH_MAX_EVENTS)
+except Exception:
+    BILLING_USAGE_FLUSH_MAX_EVENTS = 256
+
+# Billing: TTL (seconds) of the balance/subscription cache used by the chat
+# completion gate. Shared across workers through Redis when REDIS_URL is set.
+BILLING_CACHE_TTL = os.environ.get("BILLING_CACHE_TTL", "5")
+
+try:
+    BILLING_CACHE_TTL = float(BILLING_CACHE_TTL)
+except Exception:
+    BILLING_CACHE_TTL = 5.0
+
+# Billing: month-end runs invoice and charge users in batches of
+# BILLING_RUN_BATCH_SIZE with up to BILLING_RUN_CONCURRENCY in flight.
+BILLING_RUN_CONCURRENCY = os.environ.get("BILLING_RUN_CONCURRENCY", "8")
+
+try:
+    BILLING_RUN_CONCURRENCY = max(1, int(BILLING_RUN_CONCURRENCY))
+except Exception:
+    BILLING_RUN_CONCURRENCY = 8
+
+BILLING_RUN_BATCH_SIZE = os.environ.get("BILLING_RUN_BATCH_SIZE", "200")
+
+try:
+    BILLING_RUN_BATCH_SIZE = max(1, int(BILLING_RUN_BATCH_SIZE))
+except Exception:
+    BILLING_RUN_BATCH_SIZE = 200
+
+# Mitchell agents: seconds without a heartbeat before an agent counts as
+# offline and its assigned query goes back on the queue, and the longest an
+# agent's long-poll for work may block.
+MITCHELL_AGENT_TIMEOUT = os.environ.get("MITCHELL_AGENT_TIMEOUT", "60")
+
+try:
+    MITCHELL_AGENT_TIMEOUT = max(1.0, float(MITCHELL_AGENT_TIMEOUT))
+except Exception:
+    MITCHELL_AGENT_TIMEOUT = 60.0
+
+MITCHELL_LONG_POLL_MAX = os.environ.get("MITCHELL_LONG_POLL_MAX", "30")
+
+try:
+    MITCHELL_LONG_POLL_MAX = max(0.0, float(MITCHELL_LONG_POLL_MAX))
+except Exception:
+    MITCHELL_LONG_POLL_MAX = 30.0
+
+# Days completed and failed Mitchell queries are kept before they are deleted
+# (0 keeps them)
+MITCHELL_QUERY_RETENTION_DAYS = os.environ.get("MITCHELL_QUERY_RETENTION_DAYS", "30")
+
+try:
+    MITCHELL_QUERY_RETENTION_DAYS = max(0.0, float(MITCHELL_QUERY_RETENTION_DAYS))
+except Exception:
+    MITCHELL_QUERY_RETENTION_DAYS = 30.0
+
+# Mitchell result cache: identical lookups (same vehicle, tool, params and
+# question) are answered from earlier results for MITCHELL_RESULT_CACHE_TTL
+# seconds, or per tool from MITCHELL_RESULT_CACHE_TTLS, a JSON object such
+# as {"get_tsb_list": 86400}. A TTL of 0 disables caching, built-in per-tool
+# TTLs included; only tools listed in MITCHELL_RESULT_CACHE_TTLS are then
+# still cached. MITCHELL_RESULT_CACHE_SIZE bounds
+# the in-process tier in front of the database.
+MITCHELL_RESULT_CACHE_TTL = os.environ.get("MITCHELL_RESULT_CACHE_TTL", "604800")
+
+try:
+    MITCHELL_RESULT_CACHE_TTL = max(0.0, float(MITCHELL_RESULT_CACHE_TTL))
+except Exception:
+    MITCHELL_RESULT_CACHE_TTL = 604800.0
+
+MITCHELL_RESULT_CACHE_TTLS = os.environ.get("MITCHELL_RESULT_CACHE_TTLS", "")
+
+try:
+    MITCHELL_RESULT_CACHE_TTLS = {
+        tool: float(ttl)
+        for tool, ttl in json.loads(MITCHELL_RESULT_CACHE_TTLS or "{}").items()
+    }
+except Exception:
+    MITCHELL_RESULT_CACHE_TTLS = {}
+
+MITCHELL_RESULT_CACHE_SIZE = os.environ.get("MITCHELL_RESULT_CACHE_SIZE", "1024")
+
+try:
+    MITCHELL_RESULT_CACHE_SIZE = max(0, int(MITCHELL_RESULT_CACHE_SIZE))
+except Exception:
+    MITCHELL_RESULT_CACHE_SIZE = 1024
+
 
 ####################################
 # SENTENCE TRANSFORMERS
@@ -5,27 +5,32 @@ back to a simple BPE-like heuristic using the Python standard library when not.
 
 Functions:
 - count_tokens_for_model(text, model_name): returns estimated token count (int)
+- StreamingTokenCounter: same count, maintained incrementally as deltas arrive
 
 The implementation here is intentionally small and easy to review; for better
 accuracy we can add a light-weight dependency like 'tiktoken' or 'huggingface/transformers'.
 """
 
+import re
+from bisect import bisect_left
+from functools import lru_cache
 from typing import Optional
 
+_SIMPLE_TOKEN_RE = re.compile(r"\w+|[^\w\s]", flags=re.UNICODE)
+
 
 def _simple_tokenizer(text: str) -> int:
     # Very small heuristic: split on whitespace and punctuation
-    import re
-
-    tokens = re.findall(r"\w+|[^\w\s]", text, flags=re.UNICODE)
+    tokens = _SIMPLE_TOKEN_RE.findall(text)
     return len(tokens)
 
 
-def count_tokens_for_model(text: str, model_name: Optional[str] = None) -> int:
-    """Return estimated token count for `text` targeting `model_name`.
+@lru_cache(maxsize=8)
+def _get_encoding(model_name: Optional[str] = None):
+    """Return the tiktoken encoding for `model_name`, or None if unavailable.
 
-    Attempts to use tiktoken if present for better accuracy; otherwise uses a
-    simple heuristic that counts words and punctuation as tokens.
+    Cached so a missing tiktoken (or an encoding file that cannot be fetched)
+    is only paid for once per process instead of on every call.
     """
     try:
         import tiktoken  # type: ignore
@@ -41,7 +46,98 @@ def count_tokens_for_model(text: str, model_name: Optional[str] = None) -> int:
         if not enc_name:
             enc_name = "cl100k_base"
 
-        enc = tiktoken.get_encoding(enc_name)
-        return len(enc.encode(text))
+        return tiktoken.get_encoding(enc_name)
     except Exception:
-        return _simple_tokenizer(text)
+        return None
+
+
+def count_tokens_for_model(text: str, model_name: Optional[str] = None) -> int:
+    """Return estimated token count for `text` targeting `model_name`.
+
+    Attempts to use tiktoken if present for better accuracy; otherwise uses a
+    simple heuristic that counts words and punctuation as tokens.
+    """
+    enc = _get_encoding(model_name)
+    if enc is not None:
+        try:
+            return len(enc.encode(text))
+        except Exception:
+            pass
+    return _simple_tokenizer(text)
+
+
+class StreamingTokenCounter:
+    """Incremental token count for text that arrives as deltas.
+
+    Only the new suffix is tokenized: once enough text is pending, every token
+    except the last `carry_tokens` is committed to the running count and the
+    tail is kept as a carry-over window, so a BPE merge (or word) that spans two
+    deltas is still tokenized together. `total` matches count_tokens_for_model
+    on the full text for ordinary prose.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        carry_tokens: int = 8,
+        min_chunk_chars: int = 512,
+    ):
+        self.model_name = model_name
+        self.carry_tokens = carry_tokens
+        self.min_chunk_chars = min_chunk_chars
+        self.length = 0  # characters consumed so far
+        self._committed = 0
+        self._pending = ""
+
+    @property
+    def total(self) -> int:
+        if not self._pending:
+            return self._committed
+        return self._committed + count_tokens_for_model(
+            self._pending, self.model_name
+        )
+
+    def feed(self, delta: str):
+        if not delta:
+            return
+        self._pending += delta
+        self.length += len(delta)
+        if len(self._pending) >= self.min_chunk_chars:
+            self._commit()
+
+    def update(self, text: str):
+        """Advance to the full text `text`, feeding only what is new.
+
+        Falls back to a recount when `text` does not extend what was seen.
+        """
+        text = text or ""
+        tail_start = self.length - len(self._pending)
+        if len(text) >= self.length and text[tail_start : self.length] == self._pending:
+            self.feed(text[self.length :])
+        else:
+            self.reset(text)
+
+    def reset(self, text: str = ""):
+        self.length = 0
+        self._committed = 0
+        self._pending = ""
+        self.feed(text)
+
+    def _token_starts(self, text: str) -> list[int]:
+        enc = _get_encoding(self.model_name)
+        if enc is not None:
+            try:
+                return enc.decode_with_offsets(enc.encode(text))[1]
+            except Exception:
+                pass
+        return [m.start() for m in _SIMPLE_TOKEN_RE.finditer(text)]
+
+    def _commit(self):
+        starts = self._token_starts(self._pending)
+        if len(starts) <= self.carry_tokens:
+            return
+
+        cut = starts[-self.carry_tokens]
+        # Tokens that begin inside the same character as `cut` stay pending
+        self._committed += bisect_left(starts, cut)
+        self._pending = self._pending[cut:]
@@ -66,6 +66,7 @@ from open_webui.socket.main import (
     periodic_usage_pool_cleanup,
     get_event_emitter,
     get_models_in_use,
+    flush_all_message_buffers,
 )
 from open_webui.routers import (
     audio,
@@ -129,6 +130,7 @@ from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 from open_webui.models.users import UserModel, Users
 from open_webui.models.chats import Chats
+from open_webui.models.billing import flush_usage_ledger
 
 from open_webui.config import (
     # Ollama
@@ -669,6 +671,15 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    # Persist any streamed message content still held in the write-behind buffer
+    flush_all_message_buffers()
+
+    # Write usage events still queued in the billing ledger
+    try:
+        flush_usage_ledger()
+    except Exception:
+        log.exception("Failed to flush usage ledger during shutdown")
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -1721,10 +1732,10 @@ async def chat_completion(
         if user and getattr(user, "role", None) != "admin":
             from open_webui.models import billing as _billing
 
-            bal = int(_billing.get_user_balance(user.id) or 0)
+            bal = int(_billing.get_cached_user_balance(user.id) or 0)
             if bal <= 0:
                 # Check if user has an active paid subscription (overage allowed)
-                sub = _billing.get_user_subscription(user.id)
+                sub = _billing.get_cached_user_subscription(user.id)
                 has_paid_tier = (
                     sub 
                     and getattr(sub, "status", None) == "active" 
@@ -0,0 +1,70 @@
+"""add_mitchell_queue_tables
+
+Revision ID: add_mitchell_queue_tables
+Revises: add_pending_tier_id
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_mitchell_queue_tables"
+down_revision: Union[str, None] = "add_pending_tier_id"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "mitchell_agent",
+        sa.Column("id", sa.Text(), primary_key=True, unique=True),
+        sa.Column("name", sa.Text(), nullable=True),
+        sa.Column("version", sa.Text(), nullable=True),
+        sa.Column("capabilities", sa.JSON(), nullable=True),
+        sa.Column("hostname", sa.Text(), nullable=True),
+        sa.Column("status", sa.Text(), nullable=True),
+        sa.Column("current_job_id", sa.Text(), nullable=True),
+        sa.Column("registered_at", sa.BigInteger(), nullable=True),
+        sa.Column("last_heartbeat", sa.BigInteger(), nullable=True),
+    )
+
+    op.create_table(
+        "mitchell_query",
+        sa.Column("id", sa.Text(), primary_key=True, unique=True),
+        sa.Column("vehicle", sa.JSON(), nullable=True),
+        sa.Column("question", sa.Text(), nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=True),
+        sa.Column("meta", sa.JSON(), nullable=True),
+        sa.Column("status", sa.Text(), nullable=False),
+        sa.Column("created_by", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=False),
+        sa.Column("assigned_agent_id", sa.Text(), nullable=True),
+        sa.Column("assigned_at", sa.BigInteger(), nullable=True),
+        sa.Column("answer", sa.Text(), nullable=True),
+        sa.Column("source_url", sa.Text(), nullable=True),
+        sa.Column("page_title", sa.Text(), nullable=True),
+        sa.Column("breadcrumb", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("processing_time_ms", sa.BigInteger(), nullable=True),
+        sa.Column("processed_at", sa.BigInteger(), nullable=True),
+        sa.Column("ingested_to_rag", sa.Boolean(), nullable=True),
+    )
+
+    op.create_index(
+        "ix_mitchell_query_dispatch",
+        "mitchell_query",
+        ["status", sa.text("priority DESC"), "created_at"],
+    )
+    op.create_index(
+        "ix_mitchell_query_agent", "mitchell_query", ["assigned_agent_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_mitchell_query_agent", table_name="mitchell_query")
+    op.drop_index("ix_mitchell_query_dispatch", table_name="mitchell_query")
+    op.drop_table("mitchell_query")
+    op.drop_table("mitchell_agent")
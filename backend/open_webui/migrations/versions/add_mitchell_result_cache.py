@@ -0,0 +1,46 @@
+"""add_mitchell_result_cache
+
+Revision ID: add_mitchell_result_cache
+Revises: add_mitchell_queue_tables
+Create Date: 2026-10-16 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_mitchell_result_cache"
+down_revision: Union[str, None] = "add_mitchell_queue_tables"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "mitchell_result_cache",
+        sa.Column("key", sa.Text(), primary_key=True, unique=True),
+        sa.Column("tool", sa.Text(), nullable=True),
+        sa.Column("query_id", sa.Text(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=False),
+        sa.Column("expires_at", sa.BigInteger(), nullable=False),
+    )
+    op.create_index(
+        "ix_mitchell_result_cache_expires_at", "mitchell_result_cache", ["expires_at"]
+    )
+
+    op.add_column("mitchell_query", sa.Column("cache_key", sa.Text(), nullable=True))
+    op.create_index(
+        "ix_mitchell_query_cache_key", "mitchell_query", ["cache_key", "status"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_mitchell_query_cache_key", table_name="mitchell_query")
+    op.drop_column("mitchell_query", "cache_key")
+    op.drop_index(
+        "ix_mitchell_result_cache_expires_at", table_name="mitchell_result_cache"
+    )
+    op.drop_table("mitchell_result_cache")
@@ -1,8 +1,22 @@
+import atexit
+import datetime
+import json
+import logging
+import threading
 import time
 import uuid
 import os
 from pydantic import BaseModel, ConfigDict
 
+from open_webui.env import (
+    BILLING_CACHE_TTL,
+    BILLING_RUN_BATCH_SIZE,
+    BILLING_RUN_CONCURRENCY,
+    BILLING_USAGE_FLUSH_INTERVAL,
+    BILLING_USAGE_FLUSH_MAX_EVENTS,
+    REDIS_KEY_PREFIX,
+    REDIS_URL,
+)
 from open_webui.internal.db import Base, get_db
 from sqlalchemy import (
     BigInteger,
@@ -11,7 +25,14 @@ from sqlalchemy import (
     String,
     Text,
     Index,
+    and_,
+    func,
+    insert,
+    update,
 )
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+log = logging.getLogger(__name__)
 
 
 class UsageEvent(Base):
@@ -284,107 +305,462 @@ class BillingInvoiceModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-class Billing:
-    @staticmethod
-    def record_usage_event(user_id: str, chat_id: str | None, message_id: str | None, tokens_prompt: int, tokens_completion: int, tokens_total: int, token_source: str | None = None, ts: int | None = None):
-        ts = ts or int(time.time())
-        with get_db() as db:
-            # insert usage_event
-            ue = UsageEvent(
-                **{
-                    "id": str(uuid.uuid4()),
-                    "user_id": user_id,
-                    "chat_id": chat_id,
-                    "message_id": message_id,
-                    "tokens_prompt": int(tokens_prompt or 0),
-                    "tokens_completion": int(tokens_completion or 0),
-                    "tokens_total": int(tokens_total or 0),
-                    "token_source": token_source,
-                    "created_at": ts,
-                }
-            )
-            db.add(ue)
+class UsageLedger:
+    """In-process write-behind queue for usage events.
 
-            # upsert user_token_usage for the billing period (month-level)
-            period_start, period_end = _billing_period_for_timestamp(ts)
+    ``record`` only appends to memory; ``flush`` writes everything queued so
+    far in a single transaction: one bulk insert into ``usage_event`` plus one
+    ``UPDATE ... SET x = x + :delta`` per (user, period) in ``user_token_usage``,
+    per user in ``user_token_balance`` and per (user, date, model) in
+    ``daily_usage``. A flush runs once ``flush_max_events`` are queued or
+    ``flush_interval`` seconds after the first queued event; an interval of 0
+    writes every event straight through.
 
-            utu = (
-                db.query(UserTokenUsage)
-                .filter_by(user_id=user_id, period_start=period_start, period_end=period_end)
-                .first()
+    Balance deductions that are queued but not yet committed are exposed via
+    ``pending_balance_delta`` so balance checks stay exact.
+
+    A batch that fails ``max_flush_retries`` flushes in a row is written in
+    halves down to single events, so one bad event cannot hold up the rest;
+    an event that still fails on its own is logged in full and dropped.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 1.0,
+        flush_max_events: int = 256,
+        max_flush_retries: int = 3,
+    ):
+        self.flush_interval = flush_interval
+        self.flush_max_events = max(1, flush_max_events)
+        self.max_flush_retries = max(1, max_flush_retries)
+
+        self._lock = threading.Lock()
+        # Serializes flushes so batches commit in the order they were queued
+        self._flush_lock = threading.Lock()
+        self._events: list[dict] = []
+        self._pending_balance: dict[str, int] = {}
+        self._timer: threading.Timer | None = None
+        self._failed_flushes = 0
+
+    def __len__(self):
+        return len(self._events)
+
+    def record(self, event: dict):
+        tokens_total = event["tokens_total"]
+        with self._lock:
+            self._events.append(event)
+            if tokens_total > 0:
+                user_id = event["user_id"]
+                self._pending_balance[user_id] = (
+                    self._pending_balance.get(user_id, 0) + tokens_total
+                )
+            flush_now = (
+                self.flush_interval <= 0
+                or len(self._events) >= self.flush_max_events
             )
+            if not flush_now:
+                self._schedule()
 
-            if not utu:
-                now = int(time.time())
-                utu = UserTokenUsage(
-                    id=str(uuid.uuid4()),
-                    user_id=user_id,
-                    period_start=period_start,
-                    period_end=period_end,
-                    tokens_prompt=int(tokens_prompt or 0),
-                    tokens_completion=int(tokens_completion or 0),
-                    tokens_total=int(tokens_total or 0),
-                    cost_total=None,
-                    currency="USD",
-                    billed=False,
-                    created_at=now,
-                    updated_at=now,
+        if flush_now:
+            self.flush()
+
+    def pending_balance_delta(self, user_id: str) -> int:
+        """Tokens recorded for ``user_id`` that are not yet deducted in the DB."""
+        with self._lock:
+            return self._pending_balance.get(user_id, 0)
+
+    def flush(self) -> int:
+        """Write all queued events. Returns the number of events written.
+
+        On failure the batch is put back at the head of the queue and retried
+        on the next flush; after ``max_flush_retries`` failures it is split
+        up to find the events that cannot be written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._cancel_timer()
+                batch, self._events = self._events, []
+            if not batch:
+                return 0
+
+            try:
+                balance_deltas = self._write_batch(batch)
+            except Exception as e:
+                self._failed_flushes += 1
+                if self._failed_flushes < self.max_flush_retries:
+                    log.exception(f"Failed to flush {len(batch)} usage events")
+                    self._requeue(batch)
+                    raise
+                log.warning(
+                    f"Failed to flush {len(batch)} usage events {self._failed_flushes} times "
+                    f"({e}); writing them in smaller batches"
                 )
-                db.add(utu)
-            else:
-                utu.tokens_prompt = (utu.tokens_prompt or 0) + int(tokens_prompt or 0)
-                utu.tokens_completion = (utu.tokens_completion or 0) + int(tokens_completion or 0)
-                utu.tokens_total = (utu.tokens_total or 0) + int(tokens_total or 0)
-                utu.updated_at = int(time.time())
-
-            # decrement user token balance if present (prepaid token model)
-            if tokens_total and int(tokens_total) > 0:
-                balance = db.query(UserTokenBalance).filter_by(user_id=user_id).first()
-                if balance:
-                    # allow negative balances (we record usage even if user exhausted prepaid tokens)
-                    balance.tokens_balance = (balance.tokens_balance or 0) - int(tokens_total)
-                    balance.updated_at = int(time.time())
-
-            # upsert daily_usage for analytics breakdown
-            import datetime
+                self._failed_flushes = 0
+                balance_deltas, dropped, rest = self._write_split(batch)
+                self._settle(balance_deltas, dropped)
+                if rest:
+                    self._requeue(rest)
+                    raise
+                return len(batch) - len(dropped)
+
+            self._failed_flushes = 0
+            self._settle(balance_deltas)
+            return len(batch)
+
+    def _requeue(self, batch: list[dict]):
+        with self._lock:
+            self._events = batch + self._events
+            self._schedule()
+
+    def _settle(self, balance_deltas: dict[str, int], dropped: list[dict] = ()):
+        """Release the pending balance of written (or dropped) events."""
+        balance_deltas = dict(balance_deltas)
+        for event in dropped:
+            if event["tokens_total"] > 0:
+                user_id = event["user_id"]
+                balance_deltas[user_id] = balance_deltas.get(user_id, 0) + event["tokens_total"]
+
+        for user_id in balance_deltas:
+            BILLING_CACHE.invalidate(user_id, "balance")
+
+        with self._lock:
+            for user_id, tokens in balance_deltas.items():
+                remaining = self._pending_balance.get(user_id, 0) - tokens
+                if remaining > 0:
+                    self._pending_balance[user_id] = remaining
+                else:
+                    self._pending_balance.pop(user_id, None)
+
+    def _write_split(self, batch: list[dict]) -> tuple[dict[str, int], list[dict], list[dict]]:
+        """Write ``batch`` in halves, down to single events, keeping order.
+
+        Returns (balance deltas written, events dropped, events left to
+        retry). A connection-level error stops the split and leaves the rest
+        for the next flush, so an outage drops nothing.
+        """
+        written: dict[str, int] = {}
+        dropped: list[dict] = []
+        parts = [batch]
+        while parts:
+            part = parts.pop(0)
+            try:
+                deltas = self._write_batch(part)
+            except (OperationalError, InterfaceError):
+                log.exception("Usage events could not be written; retrying later")
+                return written, dropped, [event for p in [part, *parts] for event in p]
+            except Exception as e:
+                if len(part) > 1:
+                    middle = len(part) // 2
+                    parts[:0] = [part[:middle], part[middle:]]
+                    continue
+                log.error(
+                    f"Dropping usage event that cannot be written ({e}): "
+                    f"{json.dumps(part[0], default=str)}"
+                )
+                dropped.append(part[0])
+                continue
+            for user_id, tokens in deltas.items():
+                written[user_id] = written.get(user_id, 0) + tokens
+        return written, dropped, []
+
+    def _schedule(self):
+        if self._timer is not None or self.flush_interval <= 0:
+            return
+        self._timer = threading.Timer(self.flush_interval, self._flush_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _flush_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            # Already logged and re-queued by flush
+            pass
+
+    @staticmethod
+    def _write_batch(batch: list[dict]) -> dict[str, int]:
+        usage: dict[tuple[str, int, int], list[int]] = {}
+        daily: dict[tuple[str, str, str | None], list[int]] = {}
+        balance: dict[str, int] = {}
+
+        for event in batch:
+            user_id = event["user_id"]
+            ts = event["created_at"]
+            tokens = (
+                event["tokens_prompt"],
+                event["tokens_completion"],
+                event["tokens_total"],
+            )
+
+            period_start, period_end = _billing_period_for_timestamp(ts)
+            totals = usage.setdefault((user_id, period_start, period_end), [0, 0, 0])
+            for i, value in enumerate(tokens):
+                totals[i] += value
+
+            token_source = event["token_source"]
             date_str = datetime.datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d")
             # Extract model from token_source if available
             model_id = token_source.split(":")[0] if token_source and ":" in token_source else token_source
-            
-            daily = (
-                db.query(DailyUsage)
-                .filter_by(user_id=user_id, date=date_str, model_id=model_id)
-                .first()
-            )
-            now = int(time.time())
-            if not daily:
-                daily = DailyUsage(
-                    id=str(uuid.uuid4()),
-                    user_id=user_id,
-                    date=date_str,
-                    model_id=model_id,
-                    tokens_prompt=int(tokens_prompt or 0),
-                    tokens_completion=int(tokens_completion or 0),
-                    tokens_total=int(tokens_total or 0),
-                    request_count=1,
-                    created_at=now,
-                    updated_at=now,
+            totals = daily.setdefault((user_id, date_str, model_id), [0, 0, 0, 0])
+            for i, value in enumerate(tokens):
+                totals[i] += value
+            totals[3] += 1
+
+            if event["tokens_total"] > 0:
+                balance[user_id] = balance.get(user_id, 0) + event["tokens_total"]
+
+        now = int(time.time())
+        with get_db() as db:
+            db.execute(insert(UsageEvent), batch)
+
+            for (user_id, period_start, period_end), (prompt, completion, total) in usage.items():
+                result = db.execute(
+                    update(UserTokenUsage)
+                    .where(
+                        UserTokenUsage.user_id == user_id,
+                        UserTokenUsage.period_start == period_start,
+                        UserTokenUsage.period_end == period_end,
+                    )
+                    .values(
+                        tokens_prompt=func.coalesce(UserTokenUsage.tokens_prompt, 0) + prompt,
+                        tokens_completion=func.coalesce(UserTokenUsage.tokens_completion, 0) + completion,
+                        tokens_total=func.coalesce(UserTokenUsage.tokens_total, 0) + total,
+                        updated_at=now,
+                    )
+                )
+                if result.rowcount == 0:
+                    db.add(
+                        UserTokenUsage(
+                            id=str(uuid.uuid4()),
+                            user_id=user_id,
+                            period_start=period_start,
+                            period_end=period_end,
+                            tokens_prompt=prompt,
+                            tokens_completion=completion,
+                            tokens_total=total,
+                            cost_total=None,
+                            currency="USD",
+                            billed=False,
+                            created_at=now,
+                            updated_at=now,
+                        )
+                    )
+
+            # decrement user token balance if present (prepaid token model);
+            # negative balances are allowed, usage is recorded even when exhausted
+            for user_id, total in balance.items():
+                db.execute(
+                    update(UserTokenBalance)
+                    .where(UserTokenBalance.user_id == user_id)
+                    .values(
+                        tokens_balance=func.coalesce(UserTokenBalance.tokens_balance, 0) - total,
+                        updated_at=now,
+                    )
                 )
-                db.add(daily)
-            else:
-                daily.tokens_prompt = (daily.tokens_prompt or 0) + int(tokens_prompt or 0)
-                daily.tokens_completion = (daily.tokens_completion or 0) + int(tokens_completion or 0)
-                daily.tokens_total = (daily.tokens_total or 0) + int(tokens_total or 0)
-                daily.request_count = (daily.request_count or 0) + 1
-                daily.updated_at = now
+
+            for (user_id, date_str, model_id), (prompt, completion, total, count) in daily.items():
+                result = db.execute(
+                    update(DailyUsage)
+                    .where(
+                        DailyUsage.user_id == user_id,
+                        DailyUsage.date == date_str,
+                        DailyUsage.model_id.is_(None) if model_id is None else DailyUsage.model_id == model_id,
+                    )
+                    .values(
+                        tokens_prompt=func.coalesce(DailyUsage.tokens_prompt, 0) + prompt,
+                        tokens_completion=func.coalesce(DailyUsage.tokens_completion, 0) + completion,
+                        tokens_total=func.coalesce(DailyUsage.tokens_total, 0) + total,
+                        request_count=func.coalesce(DailyUsage.request_count, 0) + count,
+                        updated_at=now,
+                    )
+                )
+                if result.rowcount == 0:
+                    db.add(
+                        DailyUsage(
+                            id=str(uuid.uuid4()),
+                            user_id=user_id,
+                            date=date_str,
+                            model_id=model_id,
+                            tokens_prompt=prompt,
+                            tokens_completion=completion,
+                            tokens_total=total,
+                            request_count=count,
+                            created_at=now,
+                            updated_at=now,
+                        )
+                    )
 
             db.commit()
 
+        return balance
+
+
+USAGE_LEDGER = UsageLedger(
+    flush_interval=BILLING_USAGE_FLUSH_INTERVAL,
+    flush_max_events=BILLING_USAGE_FLUSH_MAX_EVENTS,
+)
+
+
+def flush_usage_ledger() -> int:
+    """Write any queued usage events; called on shutdown and before billing runs."""
+    return USAGE_LEDGER.flush()
+
+
+atexit.register(flush_usage_ledger)
+
+
+class BillingCache:
+    """Short-TTL cache for per-user balance and subscription lookups.
+
+    Values are stored JSON-encoded, in Redis when ``REDIS_URL`` is configured
+    (so all workers share entries and invalidations) and in process memory
+    otherwise. Writers call ``invalidate`` after committing; the TTL bounds
+    staleness for anything that bypasses them. A TTL of 0 disables caching.
+    """
+
+    KINDS = ("balance", "subscription")
+
+    def __init__(self, ttl: float = 5.0, redis=None, key_prefix: str = REDIS_KEY_PREFIX):
+        self.ttl = ttl
+        self.redis = redis
+        self.key_prefix = key_prefix
+
+        self._lock = threading.Lock()
+        self._local: dict[tuple[str, str], tuple[float, object]] = {}
+
+    def _key(self, kind: str, user_id: str) -> str:
+        return f"{self.key_prefix}:billing:{kind}:{user_id}"
+
+    def get(self, kind: str, user_id: str, loader):
+        """Return the cached value for (kind, user_id), calling ``loader`` on a miss."""
+        if self.ttl <= 0:
+            return loader()
+
+        found, value = self._lookup(kind, user_id)
+        try:
+            from open_webui.utils.telemetry.metrics import inc_billing_cache
+
+            inc_billing_cache(kind, "hit" if found else "miss")
+        except Exception:
+            pass
+        if found:
+            return value
+
+        value = loader()
+        self._store(kind, user_id, value)
+        return value
+
+    def invalidate(self, user_id: str, *kinds: str):
+        kinds = kinds or self.KINDS
+        if self.redis is not None:
+            try:
+                self.redis.delete(*[self._key(kind, user_id) for kind in kinds])
+            except Exception as e:
+                log.warning(f"Failed to invalidate billing cache for {user_id}: {e}")
+            return
+        with self._lock:
+            for kind in kinds:
+                self._local.pop((kind, user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+    def _lookup(self, kind: str, user_id: str) -> tuple[bool, object]:
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self._key(kind, user_id))
+            except Exception as e:
+                log.debug(f"Billing cache read failed: {e}")
+                return False, None
+            if raw is None:
+                return False, None
+            return True, json.loads(raw)["v"]
+
+        with self._lock:
+            entry = self._local.get((kind, user_id))
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._local[(kind, user_id)]
+                return False, None
+            return True, value
+
+    def _store(self, kind: str, user_id: str, value):
+        if self.redis is not None:
+            try:
+                self.redis.set(
+                    self._key(kind, user_id),
+                    json.dumps({"v": value}),
+                    px=max(1, int(self.ttl * 1000)),
+                )
+            except Exception as e:
+                log.debug(f"Billing cache write failed: {e}")
+            return
+        with self._lock:
+            self._local[(kind, user_id)] = (time.monotonic() + self.ttl, value)
+
+
+def _get_billing_cache_redis():
+    if not REDIS_URL:
+        return None
+    from open_webui.utils.redis import get_redis_client
+
+    return get_redis_client()
+
+
+BILLING_CACHE = BillingCache(ttl=BILLING_CACHE_TTL, redis=_get_billing_cache_redis())
+
+
+class Billing:
+    @staticmethod
+    def record_usage_event(user_id: str, chat_id: str | None, message_id: str | None, tokens_prompt: int, tokens_completion: int, tokens_total: int, token_source: str | None = None, ts: int | None = None):
+        """Queue a usage event; aggregates and the balance are updated on the next ledger flush."""
+        USAGE_LEDGER.record(
+            {
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "chat_id": chat_id,
+                "message_id": message_id,
+                "tokens_prompt": int(tokens_prompt or 0),
+                "tokens_completion": int(tokens_completion or 0),
+                "tokens_total": int(tokens_total or 0),
+                "token_source": token_source,
+                "created_at": ts or int(time.time()),
+            }
+        )
+
     @staticmethod
     def get_user_balance(user_id: str) -> int:
         with get_db() as db:
             bal = db.query(UserTokenBalance).filter_by(user_id=user_id).first()
-            return int(bal.tokens_balance if bal else 0)
+            if not bal:
+                return 0
+            return int(bal.tokens_balance or 0) - USAGE_LEDGER.pending_balance_delta(user_id)
+
+    @staticmethod
+    def get_cached_user_balance(user_id: str) -> int:
+        """``get_user_balance`` backed by ``BILLING_CACHE``; used on the chat completion path."""
+
+        def load() -> int:
+            with get_db() as db:
+                bal = (
+                    db.query(UserTokenBalance.tokens_balance)
+                    .filter_by(user_id=user_id)
+                    .first()
+                )
+                return None if bal is None else int(bal.tokens_balance or 0)
+
+        stored = BILLING_CACHE.get("balance", user_id, load)
+        if stored is None:
+            return 0
+        return stored - USAGE_LEDGER.pending_balance_delta(user_id)
 
     @staticmethod
     def check_overage_status(user_id: str) -> dict | None:
@@ -414,7 +790,11 @@ class Billing:
             
             # Get current balance
             bal = db.query(UserTokenBalance).filter_by(user_id=user_id).first()
-            current_balance = int(bal.tokens_balance if bal else 0)
+            current_balance = (
+                int(bal.tokens_balance or 0) - USAGE_LEDGER.pending_balance_delta(user_id)
+                if bal
+                else 0
+            )
             
             # Not in overage if balance is positive
             if current_balance >= 0:
@@ -517,6 +897,7 @@ class Billing:
                 bal.auto_renew_tokens = int(tokens) if enabled else 0
                 bal.updated_at = now
             db.commit()
+            BILLING_CACHE.invalidate(user_id, "balance")
             return {
                 "auto_renew_enabled": bool(bal.auto_renew_enabled),
                 "auto_renew_tokens": int(bal.auto_renew_tokens or 0),
@@ -550,6 +931,7 @@ class Billing:
                     bal.updated_at = ts
 
             db.commit()
+            BILLING_CACHE.invalidate(user_id, "balance")
 
             return TokenPurchaseModel.model_validate(tp)
 
@@ -579,6 +961,7 @@ class Billing:
                 bal.updated_at = now
 
             db.commit()
+            BILLING_CACHE.invalidate(tp.user_id, "balance")
             return TokenPurchaseModel.model_validate(tp)
 
     @staticmethod
@@ -681,6 +1064,17 @@ class Billing:
                 return UserSubscriptionModel.model_validate(sub)
             return None
 
+    @staticmethod
+    def get_cached_user_subscription(user_id: str) -> UserSubscriptionModel | None:
+        """``get_user_subscription`` backed by ``BILLING_CACHE``; used on the chat completion path."""
+
+        def load() -> dict | None:
+            sub = Billing.get_user_subscription(user_id)
+            return sub.model_dump() if sub else None
+
+        data = BILLING_CACHE.get("subscription", user_id, load)
+        return UserSubscriptionModel.model_validate(data) if data else None
+
     @staticmethod
     def set_user_subscription(
         user_id: str,
@@ -745,6 +1139,7 @@ class Billing:
                 sub.status = status
                 sub.updated_at = now
             db.commit()
+            BILLING_CACHE.invalidate(user_id, "subscription")
             db.refresh(sub)
             return UserSubscriptionModel.model_validate(sub)
 
@@ -795,6 +1190,12 @@ class Billing:
         sub = Billing.get_user_subscription(user_id)
         # Use 'none' for users without a subscription, not 'starter'
         tier_id = sub.tier_id if sub and sub.tier_id and sub.tier_id != "none" else "none"
+        tokens_used = Billing.get_monthly_usage(user_id, period_start, period_end)
+        return Billing._compute_bill(tier_id, tokens_used)
+
+    @staticmethod
+    def _compute_bill(tier_id: str, tokens_used: int) -> dict:
+        """Price ``tokens_used`` against ``tier_id``; see ``calculate_monthly_bill``."""
         tier = Billing.get_tier_info(tier_id)
         
         # If no tier (new user), return minimal info
@@ -804,7 +1205,7 @@ class Billing:
                 "tier_name": "No Plan",
                 "base_price_cents": 0,
                 "tokens_included": 0,
-                "tokens_used": Billing.get_monthly_usage(user_id, period_start, period_end),
+                "tokens_used": tokens_used,
                 "tokens_overage": 0,
                 "overage_rate_per_1k_cents": 0,
                 "overage_cost_cents": 0,
@@ -812,7 +1213,6 @@ class Billing:
                 "usage_percent": 0,
             }
         
-        tokens_used = Billing.get_monthly_usage(user_id, period_start, period_end)
         tokens_included = tier["tokens_included"]
         tokens_overage = max(0, tokens_used - tokens_included)
         
@@ -946,40 +1346,84 @@ class Billing:
         - Have a billing period that ended before `as_of`
         - Have not already been invoiced for that period
         """
-        import datetime
         as_of = as_of or int(time.time())
         
         with get_db() as db:
-            # Get all active subscriptions
-            subs = db.query(UserSubscription).filter(
-                UserSubscription.status == "active",
-                UserSubscription.tier_id != "none",
-            ).all()
-            
-            to_bill = []
-            for sub in subs:
-                # Check if billing period has ended
-                if sub.current_period_end and sub.current_period_end <= as_of:
-                    # Check if already invoiced for this period
-                    existing = db.query(BillingInvoice).filter_by(
-                        user_id=sub.user_id,
-                        period_start=sub.current_period_start,
-                    ).first()
-                    
-                    if not existing:
-                        to_bill.append({
-                            "user_id": sub.user_id,
-                            "period_start": sub.current_period_start,
-                            "period_end": sub.current_period_end,
-                            "tier_id": sub.tier_id,
-                        })
+            # Anti-join: ended periods of active subscriptions with no invoice yet
+            rows = (
+                db.query(
+                    UserSubscription.user_id,
+                    UserSubscription.current_period_start,
+                    UserSubscription.current_period_end,
+                    UserSubscription.tier_id,
+                )
+                .outerjoin(
+                    BillingInvoice,
+                    and_(
+                        BillingInvoice.user_id == UserSubscription.user_id,
+                        BillingInvoice.period_start == UserSubscription.current_period_start,
+                    ),
+                )
+                .filter(
+                    UserSubscription.status == "active",
+                    UserSubscription.tier_id != "none",
+                    UserSubscription.current_period_end.isnot(None),
+                    UserSubscription.current_period_end <= as_of,
+                    BillingInvoice.id.is_(None),
+                )
+                .all()
+            )
             
-            return to_bill
+            return [
+                {
+                    "user_id": row.user_id,
+                    "period_start": row.current_period_start,
+                    "period_end": row.current_period_end,
+                    "tier_id": row.tier_id,
+                }
+                for row in rows
+            ]
+
+    @staticmethod
+    def get_usage_for_periods(periods: list[dict]) -> dict[tuple[str, int, int], int]:
+        """Total tokens for many (user_id, period_start, period_end) periods in one query.
+
+        Same lookup as ``get_monthly_usage``; periods without usage map to 0.
+        """
+        wanted = {(p["user_id"], p["period_start"], p["period_end"]) for p in periods}
+        usage = dict.fromkeys(wanted, 0)
+        if not wanted:
+            return usage
+        
+        with get_db() as db:
+            rows = (
+                db.query(
+                    UserTokenUsage.user_id,
+                    UserTokenUsage.period_start,
+                    UserTokenUsage.period_end,
+                    func.sum(UserTokenUsage.tokens_total).label("tokens_total"),
+                )
+                .filter(UserTokenUsage.user_id.in_({user_id for user_id, _, _ in wanted}))
+                .group_by(
+                    UserTokenUsage.user_id,
+                    UserTokenUsage.period_start,
+                    UserTokenUsage.period_end,
+                )
+                .all()
+            )
+        for row in rows:
+            key = (row.user_id, row.period_start, row.period_end)
+            if key in usage:
+                usage[key] = int(row.tokens_total or 0)
+        return usage
 
     @staticmethod
-    def create_invoice(user_id: str, period_start: int, period_end: int) -> BillingInvoiceModel | None:
+    def create_invoice(user_id: str, period_start: int, period_end: int, bill: dict | None = None) -> BillingInvoiceModel | None:
         """Create an invoice for a user's billing period.
         
+        ``bill`` may be passed when it was already computed (see ``run_billing``),
+        otherwise it is calculated here.
+        
         Returns existing invoice if one already exists for this period (idempotent).
         Returns None if invoice creation fails due to race condition.
         """
@@ -997,7 +1441,8 @@ class Billing:
                 return BillingInvoiceModel.model_validate(existing)
             
             # Calculate the bill
-            bill = Billing.calculate_monthly_bill(user_id, period_start, period_end)
+            if bill is None:
+                bill = Billing.calculate_monthly_bill(user_id, period_start, period_end)
             
             try:
                 invoice = BillingInvoice(
@@ -1189,6 +1634,7 @@ class Billing:
             sub.current_period_end = new_end
             sub.updated_at = now
             db.commit()
+            BILLING_CACHE.invalidate(user_id, "subscription")
             db.refresh(sub)
             return UserSubscriptionModel.model_validate(sub)
 
@@ -1219,6 +1665,7 @@ class Billing:
                 )
                 db.add(bal)
             db.commit()
+        BILLING_CACHE.invalidate(user_id, "balance")
         
         return tokens_to_grant
 
@@ -1263,8 +1710,12 @@ class Billing:
             }
         
         try:
+            # Invoices must include usage still queued in the ledger
+            flush_usage_ledger()
+
             as_of = as_of or int(time.time())
             users_to_bill = Billing.get_users_to_bill(as_of)
+            usage = Billing.get_usage_for_periods(users_to_bill)
             
             results = {
                 "checked": len(users_to_bill),
@@ -1275,7 +1726,7 @@ class Billing:
                 "details": [],
             }
             
-            for user_info in users_to_bill:
+            def bill_user(user_info: dict) -> dict:
                 user_id = user_info["user_id"]
                 period_start = user_info["period_start"]
                 period_end = user_info["period_end"]
@@ -1283,17 +1734,20 @@ class Billing:
                 detail = {"user_id": user_id, "period_start": period_start, "period_end": period_end}
                 
                 try:
-                    # Create invoice
-                    invoice = Billing.create_invoice(user_id, period_start, period_end)
-                    results["invoiced"] += 1
+                    # Create invoice (idempotent per user/period)
+                    bill = Billing._compute_bill(
+                        user_info["tier_id"],
+                        usage.get((user_id, period_start, period_end), 0),
+                    )
+                    invoice = Billing.create_invoice(user_id, period_start, period_end, bill=bill)
+                    detail["invoiced"] = True
                     detail["invoice_id"] = invoice.id
                     detail["amount_cents"] = invoice.total_amount_cents
                     
-                    # Charge invoice
+                    # Charge invoice (Stripe idempotency key is derived from the invoice id)
                     charge_result = Billing.charge_invoice(invoice.id, stripe_api_key)
                     
                     if charge_result["success"]:
-                        results["charged"] += 1
                         detail["status"] = "paid"
                         detail["payment_intent_id"] = charge_result.get("payment_intent_id")
                         
@@ -1305,17 +1759,29 @@ class Billing:
                             tokens_to_grant = Billing.grant_monthly_tokens(user_id, new_sub.tier_id)
                             detail["tokens_granted"] = tokens_to_grant
                     else:
-                        results["failed"] += 1
                         detail["status"] = "failed"
                         detail["error"] = charge_result.get("error")
                         
                 except Exception as e:
                     log.exception(f"Error billing user {user_id}")
-                    results["failed"] += 1
                     detail["status"] = "error"
                     detail["error"] = str(e)
                 
-                results["details"].append(detail)
+                return detail
+            
+            from concurrent.futures import ThreadPoolExecutor
+            
+            with ThreadPoolExecutor(max_workers=BILLING_RUN_CONCURRENCY) as executor:
+                for i in range(0, len(users_to_bill), BILLING_RUN_BATCH_SIZE):
+                    batch = users_to_bill[i : i + BILLING_RUN_BATCH_SIZE]
+                    for detail in executor.map(bill_user, batch):
+                        if detail.pop("invoiced", False):
+                            results["invoiced"] += 1
+                        if detail["status"] == "paid":
+                            results["charged"] += 1
+                        else:
+                            results["failed"] += 1
+                        results["details"].append(detail)
             
             return results
         finally:
@@ -1353,6 +1819,7 @@ class Billing:
 # Expose simple API for other modules
 record_usage_event = Billing.record_usage_event
 get_user_balance = Billing.get_user_balance
+get_cached_user_balance = Billing.get_cached_user_balance
 has_user_balance_record = Billing.has_user_balance_record
 get_auto_renew_settings = Billing.get_auto_renew_settings
 set_auto_renew_settings = Billing.set_auto_renew_settings
@@ -1363,6 +1830,7 @@ reconcile_pending_purchases = Billing.reconcile_pending_purchases
 
 # Subscription management
 get_user_subscription = Billing.get_user_subscription
+get_cached_user_subscription = Billing.get_cached_user_subscription
 set_user_subscription = Billing.set_user_subscription
 get_tier_info = Billing.get_tier_info
 get_all_tiers = Billing.get_all_tiers
@@ -1429,7 +1897,7 @@ def check_and_trigger_auto_renew(user_id: str) -> dict | None:
         if not bal.auto_renew_enabled or bal.auto_renew_tokens <= 0:
             return None
         
-        if bal.tokens_balance > 0:
+        if (bal.tokens_balance or 0) - USAGE_LEDGER.pending_balance_delta(user_id) > 0:
             return None  # Still have tokens, no need to renew
         
         # Check if there's already a pending auto-renew purchase in the last 5 minutes
@@ -406,13 +406,13 @@ class ChatTable:
 
         updated = self.update_chat_by_id(id, chat)
 
-        # If content was persisted and no token fields were provided, try to compute tokens (non-blocking)
+        # If content was persisted and no token fields were provided, advance the
+        # message's streaming token counter; usage is recorded once on finalize.
         try:
             if isinstance(message.get("content"), str) and not message.get("tokens_total"):
-                # Defer to the compute helper which will upsert token fields and record usage
                 try:
-                    from open_webui.socket.main import compute_tokens_and_record_message
-                    compute_tokens_and_record_message(owner_id, id, message_id, message.get("content"), message.get("model") or None)
+                    from open_webui.socket.main import track_message_tokens
+                    track_message_tokens(owner_id, id, message_id, message.get("content"), message.get("model") or None)
                 except Exception:
                     pass
         except Exception:
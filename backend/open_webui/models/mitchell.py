@@ -0,0 +1,557 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from open_webui.env import (
+    MITCHELL_RESULT_CACHE_SIZE,
+    MITCHELL_RESULT_CACHE_TTL,
+    MITCHELL_RESULT_CACHE_TTLS,
+)
+from open_webui.internal.db import Base, get_db
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Boolean, Column, Index, Integer, JSON, Text, select
+
+log = logging.getLogger(__name__)
+
+####################
+# Mitchell Agent / Query DB Schema
+####################
+
+# Query lifecycle: pending -> assigned -> ok | error. An assignment whose
+# agent stops sending heartbeats goes back to pending.
+PENDING = "pending"
+ASSIGNED = "assigned"
+DONE_STATUSES = ("ok", "error")
+
+
+class MitchellAgent(Base):
+    __tablename__ = "mitchell_agent"
+
+    id = Column(Text, primary_key=True, unique=True)
+    name = Column(Text)
+    version = Column(Text)
+    capabilities = Column(JSON, nullable=True)
+    hostname = Column(Text, nullable=True)
+
+    status = Column(Text)  # ready, busy
+    current_job_id = Column(Text, nullable=True)
+
+    registered_at = Column(BigInteger)
+    last_heartbeat = Column(BigInteger)
+
+
+class MitchellQuery(Base):
+    __tablename__ = "mitchell_query"
+
+    id = Column(Text, primary_key=True, unique=True)
+    vehicle = Column(JSON)
+    question = Column(Text)
+    priority = Column(Integer, default=0)
+    meta = Column(JSON, nullable=True)
+    cache_key = Column(Text, nullable=True)
+
+    status = Column(Text, nullable=False, default=PENDING)
+    created_by = Column(Text, nullable=True)
+    created_at = Column(BigInteger, nullable=False)
+
+    assigned_agent_id = Column(Text, nullable=True)
+    assigned_at = Column(BigInteger, nullable=True)
+
+    answer = Column(Text, nullable=True)
+    source_url = Column(Text, nullable=True)
+    page_title = Column(Text, nullable=True)
+    breadcrumb = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    processing_time_ms = Column(BigInteger, default=0)
+    processed_at = Column(BigInteger, nullable=True)
+    ingested_to_rag = Column(Boolean, default=False)
+
+
+# The dispatch index is the queue: (status, priority DESC, created_at) lets
+# the next query be found with one O(log n) index seek instead of a sort
+Index(
+    "ix_mitchell_query_dispatch",
+    MitchellQuery.status,
+    MitchellQuery.priority.desc(),
+    MitchellQuery.created_at,
+)
+Index("ix_mitchell_query_agent", MitchellQuery.assigned_agent_id)
+Index("ix_mitchell_query_cache_key", MitchellQuery.cache_key, MitchellQuery.status)
+
+
+class MitchellResult(Base):
+    """Persistent tier of the result cache (see MitchellResultCache)."""
+
+    __tablename__ = "mitchell_result_cache"
+
+    key = Column(Text, primary_key=True, unique=True)
+    tool = Column(Text, nullable=True)
+    query_id = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+
+    created_at = Column(BigInteger, nullable=False)
+    expires_at = Column(BigInteger, nullable=False)
+
+
+Index("ix_mitchell_result_cache_expires_at", MitchellResult.expires_at)
+
+
+class MitchellAgentModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    name: str
+    version: str = "1.0.0"
+    capabilities: list[str] = []
+    hostname: Optional[str] = ""
+
+    status: str = "ready"
+    current_job_id: Optional[str] = None
+
+    registered_at: int  # timestamp in epoch (ns)
+    last_heartbeat: int  # timestamp in epoch (ns)
+
+
+class MitchellQueryModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    vehicle: dict
+    question: str
+    priority: int = 0
+    meta: Optional[dict] = None
+    cache_key: Optional[str] = None
+
+    status: str
+    created_by: Optional[str] = None
+    created_at: int  # timestamp in epoch (ns)
+
+    assigned_agent_id: Optional[str] = None
+    assigned_at: Optional[int] = None
+
+    answer: Optional[str] = None
+    source_url: Optional[str] = None
+    page_title: Optional[str] = None
+    breadcrumb: Optional[str] = None
+    error: Optional[str] = None
+    processing_time_ms: Optional[int] = 0
+    processed_at: Optional[int] = None
+    ingested_to_rag: Optional[bool] = False
+
+
+class MitchellTable:
+    ####################
+    # Agents
+    ####################
+
+    def upsert_agent(
+        self,
+        agent_id: str,
+        name: Optional[str] = None,
+        version: Optional[str] = None,
+        capabilities: Optional[list[str]] = None,
+        hostname: Optional[str] = None,
+        status: str = "ready",
+        current_job_id: Optional[str] = None,
+    ) -> MitchellAgentModel:
+        """Register an agent or record a heartbeat from it. Unknown agents are
+        registered on their first heartbeat."""
+        now = time.time_ns()
+        with get_db() as db:
+            agent = db.get(MitchellAgent, agent_id)
+            if agent is None:
+                agent = MitchellAgent(
+                    id=agent_id,
+                    name=name or f"Agent-{agent_id[:8]}",
+                    version=version or "1.0.0",
+                    capabilities=capabilities or [],
+                    hostname=hostname or "",
+                    registered_at=now,
+                )
+                db.add(agent)
+            else:
+                if name is not None:
+                    agent.name = name
+                if version is not None:
+                    agent.version = version
+                if capabilities is not None:
+                    agent.capabilities = capabilities
+                if hostname is not None:
+                    agent.hostname = hostname
+            agent.status = status
+            agent.current_job_id = current_job_id
+            agent.last_heartbeat = now
+            db.commit()
+            db.refresh(agent)
+            return MitchellAgentModel.model_validate(agent)
+
+    def touch_agent(self, agent_id: str) -> bool:
+        """Refresh an agent's heartbeat; False if the agent is not registered."""
+        with get_db() as db:
+            updated = (
+                db.query(MitchellAgent)
+                .filter_by(id=agent_id)
+                .update({"last_heartbeat": time.time_ns()})
+            )
+            db.commit()
+            return updated > 0
+
+    def get_agents(self) -> list[MitchellAgentModel]:
+        with get_db() as db:
+            return [
+                MitchellAgentModel.model_validate(agent)
+                for agent in db.query(MitchellAgent).order_by(MitchellAgent.registered_at)
+            ]
+
+    ####################
+    # Queue
+    ####################
+
+    def enqueue(
+        self,
+        vehicle: dict,
+        question: str,
+        priority: int = 0,
+        meta: Optional[dict] = None,
+        created_by: Optional[str] = None,
+        cache_key: Optional[str] = None,
+    ) -> MitchellQueryModel:
+        with get_db() as db:
+            query = MitchellQuery(
+                id=str(uuid.uuid4()),
+                vehicle=vehicle,
+                question=question,
+                priority=priority,
+                meta=meta or {},
+                cache_key=cache_key,
+                status=PENDING,
+                created_by=created_by,
+                created_at=time.time_ns(),
+                processing_time_ms=0,
+                ingested_to_rag=False,
+            )
+            db.add(query)
+            db.commit()
+            db.refresh(query)
+            return MitchellQueryModel.model_validate(query)
+
+    def get_in_flight(self, cache_key: str) -> Optional[MitchellQueryModel]:
+        """The oldest pending or assigned query with this cache key, if any."""
+        with get_db() as db:
+            query = (
+                db.query(MitchellQuery)
+                .filter(
+                    MitchellQuery.cache_key == cache_key,
+                    MitchellQuery.status.in_((PENDING, ASSIGNED)),
+                )
+                .order_by(MitchellQuery.created_at)
+                .first()
+            )
+            return MitchellQueryModel.model_validate(query) if query else None
+
+    def claim(self, agent_id: str) -> Optional[MitchellQueryModel]:
+        """Assign the highest-priority, oldest pending query to ``agent_id``.
+
+        An agent that already holds an assignment gets it back. Claims are a
+        conditional UPDATE, so two workers racing for the same row cannot
+        both win; the loser moves on to the next row.
+        """
+        with get_db() as db:
+            held = (
+                db.query(MitchellQuery)
+                .filter_by(status=ASSIGNED, assigned_agent_id=agent_id)
+                .order_by(MitchellQuery.assigned_at)
+                .first()
+            )
+            if held is not None:
+                return MitchellQueryModel.model_validate(held)
+
+            while True:
+                candidate = (
+                    db.query(MitchellQuery.id)
+                    .filter(MitchellQuery.status == PENDING)
+                    .order_by(MitchellQuery.priority.desc(), MitchellQuery.created_at)
+                    .first()
+                )
+                if candidate is None:
+                    return None
+
+                won = (
+                    db.query(MitchellQuery)
+                    .filter(MitchellQuery.id == candidate.id, MitchellQuery.status == PENDING)
+                    .update(
+                        {
+                            "status": ASSIGNED,
+                            "assigned_agent_id": agent_id,
+                            "assigned_at": time.time_ns(),
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+                if won:
+                    query = db.get(MitchellQuery, candidate.id)
+                    db.refresh(query)
+                    return MitchellQueryModel.model_validate(query)
+
+    def reclaim_stale(self, timeout: float) -> int:
+        """Put assignments back on the queue when their agent has not sent a
+        heartbeat for ``timeout`` seconds (or is no longer registered)."""
+        cutoff = time.time_ns() - int(timeout * 1e9)
+        live_agents = select(MitchellAgent.id).where(MitchellAgent.last_heartbeat >= cutoff)
+        with get_db() as db:
+            reclaimed = (
+                db.query(MitchellQuery)
+                .filter(
+                    MitchellQuery.status == ASSIGNED,
+                    ~MitchellQuery.assigned_agent_id.in_(live_agents),
+                )
+                .update(
+                    {"status": PENDING, "assigned_agent_id": None, "assigned_at": None},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+        if reclaimed:
+            log.info(f"Reclaimed {reclaimed} Mitchell queries from unresponsive agents")
+        return reclaimed
+
+    def prune_finished(self, max_age: float) -> int:
+        """Delete completed and failed queries processed more than
+        ``max_age`` seconds ago."""
+        cutoff = time.time_ns() - int(max_age * 1e9)
+        with get_db() as db:
+            deleted = (
+                db.query(MitchellQuery)
+                .filter(
+                    MitchellQuery.status.in_(DONE_STATUSES),
+                    MitchellQuery.processed_at < cutoff,
+                )
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+        if deleted:
+            log.info(f"Pruned {deleted} finished Mitchell queries")
+        return deleted
+
+    def complete(
+        self, query_id: str, agent_id: str, status: str, **fields
+    ) -> tuple[Optional[MitchellQueryModel], bool]:
+        """Record an agent's result. Returns ``(query, already_completed)``;
+        the query is None if it does not exist."""
+        with get_db() as db:
+            query = db.get(MitchellQuery, query_id)
+            if query is None:
+                return None, False
+            if query.status in DONE_STATUSES:
+                return MitchellQueryModel.model_validate(query), True
+
+            query.status = status
+            query.assigned_agent_id = agent_id or query.assigned_agent_id
+            query.processed_at = time.time_ns()
+            for key, value in fields.items():
+                setattr(query, key, value)
+            db.commit()
+            db.refresh(query)
+            return MitchellQueryModel.model_validate(query), False
+
+    def set_ingested(self, query_id: str, ingested: bool) -> None:
+        with get_db() as db:
+            db.query(MitchellQuery).filter_by(id=query_id).update(
+                {"ingested_to_rag": ingested}
+            )
+            db.commit()
+
+    def get_query(self, query_id: str) -> Optional[MitchellQueryModel]:
+        with get_db() as db:
+            query = db.get(MitchellQuery, query_id)
+            return MitchellQueryModel.model_validate(query) if query else None
+
+    def get_queries(
+        self, statuses: Optional[list[str]] = None, limit: int = 50
+    ) -> list[MitchellQueryModel]:
+        """The ``limit`` most recently created queries, newest first."""
+        with get_db() as db:
+            q = db.query(MitchellQuery)
+            if statuses:
+                q = q.filter(MitchellQuery.status.in_(statuses))
+            return [
+                MitchellQueryModel.model_validate(query)
+                for query in q.order_by(MitchellQuery.created_at.desc()).limit(limit)
+            ]
+
+
+Mitchell = MitchellTable()
+
+
+####################
+# Result Cache
+####################
+
+DEFAULT_TOOL = "query_autonomous"
+
+# Service data for a given vehicle does not change between model years, so
+# spec lookups keep for a month; bulletin lists gain entries over time.
+RESULT_CACHE_TOOL_TTLS = {
+    "get_fluid_capacities": 30 * 86400,
+    "get_torque_specs": 30 * 86400,
+    "get_tire_specs": 30 * 86400,
+    "get_reset_procedure": 30 * 86400,
+    "get_adas_calibration": 30 * 86400,
+    "get_wiring_diagram": 30 * 86400,
+    "get_dtc_info": 30 * 86400,
+    "get_tsb_list": 86400,
+}
+
+
+def _normalize(value) -> str:
+    return re.sub(r"\s+", " ", str(value)).strip().lower()
+
+
+class MitchellResultCache:
+    """Two-tier cache of completed Mitchell lookups.
+
+    Entries are keyed by the normalized (vehicle, tool, params, question) and
+    hold the result as returned by ``GET /queries/{id}``. The first tier is
+    an in-process LRU of ``max_entries``; the second is the
+    ``mitchell_result_cache`` table, which every worker shares and which
+    survives restarts. Each tool has its own TTL (``ttl`` for tools without
+    one); a TTL of 0 disables caching for that tool. A ``ttl`` of 0 turns
+    the built-in per-tool TTLs off too, leaving only explicit ``tool_ttls``.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 604800.0,
+        tool_ttls: Optional[dict] = None,
+        max_entries: int = 1024,
+    ):
+        self.ttl = ttl
+        defaults = RESULT_CACHE_TOOL_TTLS if ttl > 0 else {}
+        self.tool_ttls = {**defaults, **(tool_ttls or {})}
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._lru: OrderedDict[str, tuple[int, dict]] = OrderedDict()
+
+    @staticmethod
+    def key(
+        vehicle: dict,
+        question: str,
+        tool: Optional[str] = None,
+        params: Optional[dict] = None,
+    ) -> str:
+        normalized = {
+            "vehicle": {
+                _normalize(k): _normalize(v)
+                for k, v in (vehicle or {}).items()
+                if v not in (None, "")
+            },
+            "tool": tool or DEFAULT_TOOL,
+            "params": params or {},
+            # Trailing punctuation and spacing do not change the answer
+            "question": _normalize(question or "").rstrip("?.! "),
+        }
+        encoded = json.dumps(normalized, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, tool: Optional[str]) -> float:
+        return self.tool_ttls.get(tool or DEFAULT_TOOL, self.ttl)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached result for ``key``, checking memory then the DB."""
+        now = time.time_ns()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._lru.move_to_end(key)
+                    self.record_lookup("memory")
+                    return entry[1]
+                del self._lru[key]
+
+        try:
+            with get_db() as db:
+                row = db.get(MitchellResult, key)
+                if row is None or row.expires_at <= now:
+                    self.record_lookup("miss")
+                    return None
+                expires_at, result = row.expires_at, row.result
+        except Exception as e:
+            log.warning(f"Mitchell result cache read failed: {e}")
+            return None
+
+        self._remember(key, expires_at, result)
+        self.record_lookup("db")
+        return result
+
+    def put(self, key: str, tool: Optional[str], query_id: str, result: dict) -> bool:
+        ttl = self.ttl_for(tool)
+        if ttl <= 0:
+            return False
+        now = time.time_ns()
+        expires_at = now + int(ttl * 1e9)
+        try:
+            with get_db() as db:
+                row = db.get(MitchellResult, key)
+                if row is None:
+                    row = MitchellResult(key=key)
+                    db.add(row)
+                row.tool = tool or DEFAULT_TOOL
+                row.query_id = query_id
+                row.result = result
+                row.created_at = now
+                row.expires_at = expires_at
+                db.commit()
+        except Exception as e:
+            log.warning(f"Mitchell result cache write failed: {e}")
+            return False
+        self._remember(key, expires_at, result)
+        return True
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the persistent tier (run by the queue maintenance loop)."""
+        with get_db() as db:
+            deleted = (
+                db.query(MitchellResult)
+                .filter(MitchellResult.expires_at <= time.time_ns())
+                .delete(synchronize_session=False)
+            )
+            db.commit()
+        return deleted
+
+    def clear_memory(self) -> None:
+        with self._lock:
+            self._lru.clear()
+
+    def _remember(self, key: str, expires_at: int, result: dict) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._lru[key] = (expires_at, result)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    @staticmethod
+    def record_lookup(outcome: str) -> None:
+        try:
+            from open_webui.utils.telemetry.metrics import inc_mitchell_cache
+
+            inc_mitchell_cache(outcome)
+        except Exception:
+            pass
+
+
+MITCHELL_RESULT_CACHE = MitchellResultCache(
+    ttl=MITCHELL_RESULT_CACHE_TTL,
+    tool_ttls=MITCHELL_RESULT_CACHE_TTLS,
+    max_entries=MITCHELL_RESULT_CACHE_SIZE,
+)
@@ -0,0 +1,542 @@
+"""
+Per-collection BM25 indexes for hybrid search.
+
+BM25Retriever.from_texts re-tokenizes and re-counts a whole collection on
+every query. BM25Index keeps the counts instead: the vocabulary plus
+compact postings arrays (CSR layout: per-term offsets into document-id and
+term-frequency arrays). Documents can be added and removed without a
+rebuild, and an index can be saved to / loaded from a single .npz file.
+
+Scoring is BM25Okapi exactly as rank_bm25 (which BM25Retriever uses) does
+it: k1=1.5, b=0.75, negative IDFs floored at epsilon * average IDF, and
+whitespace tokenization. Rankings therefore match BM25Retriever.
+
+BM25IndexCache holds the indexes in memory with an LRU bound and
+optionally persists them to disk. It is kept current by
+open_webui.retrieval.utils.update_bm25_index / invalidate_bm25_index,
+which the vector DB write paths call. Every change also bumps a
+per-collection version, in Redis when one is given or else in a version
+file in the persist directory, so other worker processes notice on their
+next read and rebuild. Without either, invalidation only reaches this
+process (utils.py then disables the cache when several workers run).
+Writes made directly against the vector DB are covered by `ttl`.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from open_webui.retrieval.vector.main import GetResult
+
+log = logging.getLogger(__name__)
+
+
+def default_tokenizer(text: str) -> list[str]:
+    """Same preprocessing as langchain's BM25Retriever default."""
+    return text.split()
+
+
+class BM25Index:
+    """
+    Incremental BM25Okapi index over one collection.
+
+    `texts` are what BM25 scores (and the returned page_content, as with
+    BM25Retriever.from_texts); `documents` are the raw collection texts
+    when they differ (enriched texts), so the index can also stand in for
+    VECTOR_DB_CLIENT.get().
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, epsilon: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        self.ids: list[str] = []
+        self.texts: list[str] = []
+        self.documents: list[str] = []
+        self.metadatas: list[Any] = []
+
+        self.vocab: dict[str, int] = {}
+        self.doc_lens = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+
+        # Postings in CSR layout: term t occupies
+        # postings_docs/postings_tf[term_offsets[t]:term_offsets[t + 1]]
+        self.term_offsets = np.zeros(1, dtype=np.int64)
+        self.postings_docs = np.zeros(0, dtype=np.int32)
+        self.postings_tf = np.zeros(0, dtype=np.int32)
+
+        # Documents added since the last merge into the CSR arrays
+        self._pending: list[tuple[int, int, int]] = []  # (term, doc, tf)
+        self._stats: Optional[tuple] = None
+        self._lock = threading.RLock()
+
+        # Collection version this index reflects (see BM25IndexCache)
+        self.version: Optional[str] = None
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.alive))
+
+    @classmethod
+    def from_get_result(
+        cls,
+        result: GetResult,
+        texts: Optional[list[str]] = None,
+    ) -> "BM25Index":
+        """Build from a VECTOR_DB_CLIENT.get() result, scoring `texts` if given."""
+        index = cls()
+        documents = result.documents[0]
+        index.add(
+            ids=result.ids[0] if result.ids else [str(i) for i in range(len(documents))],
+            texts=texts if texts is not None else documents,
+            metadatas=result.metadatas[0],
+            documents=documents if texts is not None else None,
+        )
+        return index
+
+    def add(
+        self,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[Any],
+        documents: Optional[list[str]] = None,
+    ) -> None:
+        """Add documents. `documents` defaults to `texts`."""
+        with self._lock:
+            start = len(self.texts)
+            lens = []
+            for offset, text in enumerate(texts):
+                counts = Counter(default_tokenizer(text))
+                lens.append(sum(counts.values()))
+                for term, tf in counts.items():
+                    term_id = self.vocab.setdefault(term, len(self.vocab))
+                    self._pending.append((term_id, start + offset, tf))
+
+            self.ids.extend(ids)
+            self.texts.extend(texts)
+            self.documents.extend(documents if documents is not None else texts)
+            self.metadatas.extend(metadatas)
+            self.doc_lens = np.concatenate((self.doc_lens, np.asarray(lens, dtype=np.int32)))
+            self.alive = np.concatenate((self.alive, np.ones(len(texts), dtype=bool)))
+            self._stats = None
+
+    def remove(self, ids: list[str]) -> int:
+        """Drop documents by id; returns how many were removed."""
+        with self._lock:
+            targets = set(ids)
+            removed = 0
+            for i, doc_id in enumerate(self.ids):
+                if doc_id in targets and self.alive[i]:
+                    self.alive[i] = False
+                    removed += 1
+            if removed:
+                self._stats = None
+            return removed
+
+    def _merge_pending(self) -> None:
+        """Fold pending postings into the CSR arrays (stable: doc order kept)."""
+        if not self._pending:
+            return
+        new = np.asarray(self._pending, dtype=np.int64).reshape(-1, 3)
+        old_terms = np.repeat(
+            np.arange(len(self.term_offsets) - 1, dtype=np.int64),
+            np.diff(self.term_offsets),
+        )
+        terms = np.concatenate((old_terms, new[:, 0]))
+        order = np.argsort(terms, kind="stable")
+        self.postings_docs = np.concatenate((self.postings_docs, new[:, 1].astype(np.int32)))[order]
+        self.postings_tf = np.concatenate((self.postings_tf, new[:, 2].astype(np.int32)))[order]
+        self.term_offsets = np.concatenate(
+            ([0], np.cumsum(np.bincount(terms, minlength=len(self.vocab))))
+        ).astype(np.int64)
+        self._pending = []
+
+    def _corpus_stats(self) -> tuple:
+        """(idf per term, avgdl) over live documents, cached until the next change."""
+        if self._stats is None:
+            self._merge_pending()
+            n_docs = len(self)
+            live_postings = self.alive[self.postings_docs]
+            term_ids = np.repeat(
+                np.arange(len(self.vocab), dtype=np.int64), np.diff(self.term_offsets)
+            )
+            df = np.bincount(term_ids[live_postings], minlength=len(self.vocab))
+
+            # rank_bm25 only knows terms that occur in the corpus
+            present = df > 0
+            idf = np.log(n_docs - df + 0.5) - np.log(df + 0.5)
+            if present.any():
+                average_idf = idf[present].mean()
+                idf = np.where(idf < 0, self.epsilon * average_idf, idf)
+            idf[~present] = 0.0
+
+            total = int(self.doc_lens[self.alive].sum())
+            avgdl = total / n_docs if n_docs else 0.0
+            self._stats = (idf, avgdl)
+        return self._stats
+
+    def get_scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document (dead documents score -inf)."""
+        with self._lock:
+            idf, avgdl = self._corpus_stats()
+            scores = np.zeros(len(self.texts))
+            if avgdl > 0:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lens / avgdl)
+                for term in default_tokenizer(query):
+                    term_id = self.vocab.get(term)
+                    if term_id is None or idf[term_id] == 0:
+                        continue
+                    lo, hi = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+                    docs = self.postings_docs[lo:hi]
+                    tf = self.postings_tf[lo:hi]
+                    scores[docs] += idf[term_id] * (tf * (self.k1 + 1) / (tf + norm[docs]))
+            scores[~self.alive] = -np.inf
+            return scores
+
+    def search(self, query: str, k: int) -> list[Document]:
+        """Top-k documents for the query, like BM25Retriever.invoke()."""
+        with self._lock:
+            scores = self.get_scores(query)
+            k = min(k, len(self))
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [
+                Document(page_content=self.texts[i], metadata=self.metadatas[i])
+                for i in top
+            ]
+
+    def to_get_result(self) -> GetResult:
+        """Live documents in VECTOR_DB_CLIENT.get() form."""
+        with self._lock:
+            live = np.flatnonzero(self.alive)
+            return GetResult(
+                ids=[[self.ids[i] for i in live]],
+                documents=[[self.documents[i] for i in live]],
+                metadatas=[[self.metadatas[i] for i in live]],
+            )
+
+    def save(self, path: str) -> None:
+        """Write the index to a single .npz file (no pickling)."""
+        with self._lock:
+            self._merge_pending()
+            payload = {
+                "ids": self.ids,
+                "texts": self.texts,
+                # Only stored when enriched texts differ from the raw documents
+                "documents": None if self.documents == self.texts else self.documents,
+                "metadatas": self.metadatas,
+                "vocab": list(self.vocab),
+                "params": [self.k1, self.b, self.epsilon],
+                "version": self.version,
+            }
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    term_offsets=self.term_offsets,
+                    postings_docs=self.postings_docs,
+                    postings_tf=self.postings_tf,
+                    doc_lens=self.doc_lens,
+                    alive=self.alive,
+                    payload=np.frombuffer(json.dumps(payload, default=str).encode(), dtype=np.uint8),
+                )
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            payload = json.loads(data["payload"].tobytes().decode())
+            index = cls(*payload["params"])
+            index.term_offsets = data["term_offsets"]
+            index.postings_docs = data["postings_docs"]
+            index.postings_tf = data["postings_tf"]
+            index.doc_lens = data["doc_lens"]
+            index.alive = data["alive"].copy()
+        index.ids = payload["ids"]
+        index.texts = payload["texts"]
+        index.documents = payload["documents"] or list(index.texts)
+        index.metadatas = payload["metadatas"]
+        index.vocab = {term: i for i, term in enumerate(payload["vocab"])}
+        index.version = payload.get("version")
+        return index
+
+
+class BM25IndexRetriever(BaseRetriever):
+    """BaseRetriever over a BM25Index, a drop-in for BM25Retriever."""
+
+    index: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self.index.search(query, self.k)
+
+
+class BM25IndexCache:
+    """
+    LRU cache of BM25Index per (collection, enriched texts) pair.
+
+    With `persist_dir`, indexes are also written there (batched: at most
+    every `persist_interval` seconds per index, on eviction and on flush())
+    and loaded from there on a cache miss, so a restart does not rebuild
+    them. A per-collection version (a `redis` key, or a version file in
+    `persist_dir`) tags every index; an index whose tag no longer matches
+    is discarded on read.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 32,
+        persist_dir: Optional[str] = None,
+        ttl: Optional[float] = None,
+        persist_interval: float = 5.0,
+        redis=None,
+        key_prefix: str = "open-webui",
+    ):
+        self.max_size = max_size
+        self.persist_dir = persist_dir or None
+        self.redis = redis
+        self.key_prefix = key_prefix
+        self.ttl = ttl or None
+        self.persist_interval = persist_interval
+        # key -> (index, monotonic time it was built or loaded)
+        self._indexes: "OrderedDict[tuple[str, bool], tuple[BM25Index, float]]" = OrderedDict()
+        self._dirty: dict[tuple[str, bool], float] = {}  # key -> first unsaved change (monotonic)
+        self._lock = threading.RLock()
+        if self.persist_dir:
+            os.makedirs(self.persist_dir, exist_ok=True)
+
+    def _safe_name(self, collection_name: str) -> str:
+        return "".join(c if c.isalnum() or c in "-_" else "_" for c in collection_name)
+
+    def _path(self, key: tuple[str, bool]) -> Optional[str]:
+        if not self.persist_dir:
+            return None
+        collection_name, enriched = key
+        safe_name = self._safe_name(collection_name)
+        return os.path.join(self.persist_dir, f"{safe_name}{'.enriched' if enriched else ''}.npz")
+
+    @property
+    def shared(self) -> bool:
+        """Whether changes are visible to other worker processes."""
+        return self.redis is not None or self.persist_dir is not None
+
+    def _version_key(self, collection_name: str) -> str:
+        return f"{self.key_prefix}:bm25:version:{collection_name}"
+
+    def _version_path(self, collection_name: str) -> Optional[str]:
+        if not self.persist_dir:
+            return None
+        return os.path.join(self.persist_dir, f"{self._safe_name(collection_name)}.version")
+
+    def _read_version(self, collection_name: str) -> Optional[str]:
+        """The collection's current version as other processes see it."""
+        if self.redis is not None:
+            try:
+                return self.redis.get(self._version_key(collection_name))
+            except Exception as e:
+                log.debug(f"BM25 index version read failed for {collection_name}: {e}")
+                return None
+        path = self._version_path(collection_name)
+        if not path:
+            return None
+        try:
+            with open(path) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _bump_version(self, collection_name: str) -> Optional[str]:
+        """Record a change to the collection; returns the new version."""
+        version = f"{os.getpid()}-{time.time_ns()}"
+        if self.redis is not None:
+            try:
+                self.redis.set(self._version_key(collection_name), version)
+            except Exception as e:
+                log.warning(f"Could not update BM25 index version for {collection_name}: {e}")
+                return None
+            return version
+        path = self._version_path(collection_name)
+        if not path:
+            return None
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(version)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning(f"Could not update BM25 index version for {collection_name}: {e}")
+            return None
+        return version
+
+    def _put(self, key: tuple[str, bool], index: BM25Index) -> None:
+        self._indexes[key] = (index, time.monotonic())
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > self.max_size:
+            evicted, (evicted_index, _) = self._indexes.popitem(last=False)
+            if evicted in self._dirty:
+                self._persist(evicted, evicted_index)
+            log.debug(f"BM25 index cache: evicted {evicted}")
+
+    def _persist(self, key: tuple[str, bool], index: BM25Index) -> None:
+        self._dirty.pop(key, None)
+        path = self._path(key)
+        if path:
+            try:
+                index.save(path)
+            except Exception as e:
+                log.warning(f"Could not persist BM25 index {key}: {e}")
+
+    def _is_current(self, index: BM25Index, collection_name: str) -> bool:
+        return not self.shared or index.version == self._read_version(collection_name)
+
+    def get(self, collection_name: str, enriched: bool = False) -> Optional[BM25Index]:
+        """Cached (or persisted) index, or None if missing or out of date."""
+        key = (collection_name, enriched)
+        with self._lock:
+            entry = self._indexes.get(key)
+            if entry is not None:
+                index, loaded_at = entry
+                expired = self.ttl is not None and time.monotonic() - loaded_at > self.ttl
+                if not expired and self._is_current(index, collection_name):
+                    self._indexes.move_to_end(key)
+                    return index
+                # Changed elsewhere (or too old to trust): rebuild from the vector DB
+                del self._indexes[key]
+                self._dirty.pop(key, None)
+                if expired:
+                    return None
+
+            path = self._path(key)
+            if path and os.path.exists(path):
+                try:
+                    index = BM25Index.load(path)
+                except Exception as e:
+                    log.warning(f"Discarding unreadable BM25 index {path}: {e}")
+                    os.remove(path)
+                    return None
+                if not self._is_current(index, collection_name):
+                    return None
+                self._put(key, index)
+                return index
+        return None
+
+    def get_or_build(
+        self,
+        collection_name: str,
+        collection_result: GetResult,
+        enriched: bool = False,
+        texts_fn: Optional[Callable[[GetResult], list[str]]] = None,
+    ) -> BM25Index:
+        """Cached index, built from `collection_result` on a miss."""
+        index = self.get(collection_name, enriched)
+        if index is not None:
+            return index
+
+        index = BM25Index.from_get_result(
+            collection_result,
+            texts=texts_fn(collection_result) if texts_fn else None,
+        )
+        key = (collection_name, enriched)
+        with self._lock:
+            index.version = self._read_version(collection_name)
+            if self.shared and index.version is None:
+                index.version = self._bump_version(collection_name)
+            self._put(key, index)
+            self._persist(key, index)
+        log.info(f"BM25 index built for {collection_name} ({len(index)} docs)")
+        return index
+
+    def get_result(self, collection_name: str) -> Optional[GetResult]:
+        """The collection's documents from any cached index, or None."""
+        for enriched in (False, True):
+            index = self.get(collection_name, enriched)
+            if index is not None:
+                return index.to_get_result()
+        return None
+
+    def add(
+        self,
+        collection_name: str,
+        ids: list[str],
+        texts_by_variant: dict[bool, list[str]],
+        documents: list[str],
+        metadatas: list[Any],
+    ) -> None:
+        """Append documents to every cached index of the collection."""
+        with self._lock:
+            indexes = {
+                enriched: self.get(collection_name, enriched) for enriched in texts_by_variant
+            }
+            version = self._bump_version(collection_name)
+            now = time.monotonic()
+            for enriched, texts in texts_by_variant.items():
+                index = indexes[enriched]
+                if index is None:
+                    continue  # built on first query
+                index.add(
+                    ids=ids,
+                    texts=texts,
+                    metadatas=metadatas,
+                    documents=documents if enriched else None,
+                )
+                index.version = version
+                key = (collection_name, enriched)
+                last = self._dirty.setdefault(key, now)
+                if now - last >= self.persist_interval:
+                    self._persist(key, index)
+
+    def flush(self) -> None:
+        """Persist every index with unsaved additions."""
+        with self._lock:
+            for key in list(self._dirty):
+                entry = self._indexes.get(key)
+                if entry is None:
+                    self._dirty.pop(key, None)
+                else:
+                    self._persist(key, entry[0])
+
+    def invalidate(self, collection_name: Optional[str] = None) -> None:
+        """Forget one collection's indexes, or all of them."""
+        with self._lock:
+            keys = [k for k in self._indexes if collection_name is None or k[0] == collection_name]
+            for key in keys:
+                del self._indexes[key]
+                self._dirty.pop(key, None)
+
+            if self.redis is not None:
+                try:
+                    if collection_name is not None:
+                        self.redis.delete(self._version_key(collection_name))
+                    else:
+                        pattern = self._version_key("*")
+                        for key in self.redis.scan_iter(match=pattern):
+                            self.redis.delete(key)
+                except Exception as e:
+                    log.warning(f"Could not invalidate BM25 index version: {e}")
+
+            if self.persist_dir:
+                if collection_name is not None:
+                    paths = [self._path((collection_name, enriched)) for enriched in (False, True)]
+                    paths.append(self._version_path(collection_name))
+                else:
+                    paths = [
+                        os.path.join(self.persist_dir, name)
+                        for name in os.listdir(self.persist_dir)
+                        if name.endswith((".npz", ".version"))
+                    ]
+                for path in paths:
+                    if os.path.exists(path):
+                        os.remove(path)
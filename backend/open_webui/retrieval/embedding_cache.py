@@ -0,0 +1,232 @@
+"""Content-addressed embedding cache.
+
+Embeddings are keyed by (engine, model, prefix, sha256(text)) and kept as
+float32 blobs in a local SQLite file, so re-ingesting the same chunks or
+asking the same question again skips the embedding backend entirely. The
+store is bounded by size; when it grows past ``max_bytes`` the least
+recently used rows are dropped until it is back under ~90% of the limit.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# SQLite's default limit on host parameters is 999 on older builds
+_SQL_CHUNK = 500
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        # Running mean of backend latency per embedded text, used to
+        # estimate how much time each hit saved
+        self._miss_seconds_per_text = None
+
+    @staticmethod
+    def key(engine: str, model: str, prefix: Optional[str], text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{engine}\x1f{model}\x1f{prefix or ''}\x1f{digest}"
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+                "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed)"
+            )
+            self._bytes = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+            ).fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {}
+        if not keys:
+            return found
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            unique = list(dict.fromkeys(keys))
+            for i in range(0, len(unique), _SQL_CHUNK):
+                chunk = unique[i : i + _SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+            if found:
+                conn.executemany(
+                    "UPDATE embeddings SET accessed = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                conn.commit()
+        return found
+
+    def put_many(self, items: dict[str, list[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, blob, len(blob) + len(key), now))
+        with self._lock:
+            conn = self._connect()
+            # Replacing an existing key must not count its size twice
+            for i in range(0, len(rows), _SQL_CHUNK):
+                chunk = [row[0] for row in rows[i : i + _SQL_CHUNK]]
+                placeholders = ",".join("?" * len(chunk))
+                self._bytes -= conn.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchone()[0]
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, accessed) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._bytes += sum(row[2] for row in rows)
+            if self._bytes > self.max_bytes:
+                self._evict(conn, int(self.max_bytes * 0.9))
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, target: int) -> None:
+        evicted = 0
+        cursor = conn.execute("SELECT key, size FROM embeddings ORDER BY accessed, rowid")
+        doomed = []
+        for key, size in cursor:
+            if self._bytes <= target:
+                break
+            doomed.append((key,))
+            self._bytes -= size
+            evicted += 1
+        cursor.close()
+        conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        log.debug(f"Evicted {evicted} embeddings from cache ({self._bytes} bytes left)")
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+            self._bytes = 0
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            self._connect()
+            return self._bytes
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "size_bytes": self._bytes,
+        }
+
+    def _record(self, engine: str, hits: int, misses: int, elapsed: float) -> None:
+        from open_webui.utils.telemetry.metrics import (
+            inc_embedding_cache,
+            record_embedding_cache_saved,
+        )
+
+        if misses:
+            per_text = elapsed / misses
+            if self._miss_seconds_per_text is None:
+                self._miss_seconds_per_text = per_text
+            else:
+                self._miss_seconds_per_text += 0.1 * (
+                    per_text - self._miss_seconds_per_text
+                )
+        saved = hits * (self._miss_seconds_per_text or 0.0)
+
+        self.hits += hits
+        self.misses += misses
+        self.saved_seconds += saved
+        if hits:
+            inc_embedding_cache(engine, "hit", hits)
+            record_embedding_cache_saved(engine, saved * 1000.0)
+        if misses:
+            inc_embedding_cache(engine, "miss", misses)
+
+    def wrap(
+        self, embedding_function: Callable[..., Awaitable], engine: str, model: str
+    ) -> Callable[..., Awaitable]:
+        """Return an async embedding function that only sends cache misses to
+        ``embedding_function``. Accepts and returns the same shapes: a single
+        vector for a string query, a list of vectors for a list of texts."""
+
+        async def cached_embedding_function(query, prefix=None, user=None):
+            single = isinstance(query, str)
+            texts = [query] if single else list(query)
+            keys = [self.key(engine, model, prefix, text) for text in texts]
+
+            try:
+                found = await asyncio.to_thread(self.get_many, keys)
+            except Exception as e:
+                log.warning(f"Embedding cache lookup failed, bypassing cache: {e}")
+                return await embedding_function(query, prefix=prefix, user=user)
+
+            # Duplicate texts within a batch are only embedded once
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in found and key not in missing:
+                    missing[key] = text
+
+            elapsed = 0.0
+            if missing:
+                start = time.perf_counter()
+                if single:
+                    computed = [await embedding_function(query, prefix=prefix, user=user)]
+                else:
+                    computed = await embedding_function(
+                        list(missing.values()), prefix=prefix, user=user
+                    )
+                elapsed = time.perf_counter() - start
+                if computed is None or len(computed) != len(missing):
+                    raise ValueError(
+                        "Embedding function returned "
+                        f"{0 if computed is None else len(computed)} embeddings "
+                        f"for {len(missing)} texts"
+                    )
+                fresh = dict(zip(missing, computed))
+                try:
+                    await asyncio.to_thread(self.put_many, fresh)
+                except Exception as e:
+                    log.warning(f"Embedding cache write failed: {e}")
+                found.update(fresh)
+
+            self._record(engine, len(keys) - len(missing), len(missing), elapsed)
+            embeddings = [found[key] for key in keys]
+            return embeddings[0] if single else embeddings
+
+        return cached_embedding_function
@@ -0,0 +1,212 @@
+"""Bounded-concurrency, adaptive batch scheduler for remote embedding engines.
+
+Texts are cut into batches on the fly and sent to one or more endpoints
+with at most ``max_in_flight`` requests outstanding. The batch size adapts
+to what the backend can take: it grows while batches come back faster than
+``target_latency`` and halves on slow batches or errors. A failed batch is
+split to the current batch size and retried with exponential backoff on
+its own; the rest of the document keeps going. An endpoint that fails is
+rested for a while, so the other endpoints take its share.
+
+One scheduler is meant to be shared by everything that embeds against the
+same endpoints (see get_scheduler): concurrent ``run`` calls share the
+``max_in_flight`` limit, the learned batch size and the endpoint health.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+log = logging.getLogger(__name__)
+
+
+class _Endpoint:
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.failures = 0
+        self.resting_until = 0.0
+
+
+class EmbeddingScheduler:
+    def __init__(
+        self,
+        endpoints: list[str],
+        batch_size: int,
+        max_in_flight: int = 4,
+        target_latency: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        min_batch_size: int = 1,
+        max_batch_size: Optional[int] = None,
+    ):
+        self.endpoints = [_Endpoint(url) for url in endpoints] or [_Endpoint("")]
+        self.max_in_flight = max(1, max_in_flight)
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.min_batch_size = max(1, min_batch_size)
+        self.max_batch_size = max(max_batch_size or batch_size * 4, self.min_batch_size)
+        self.batch_size = min(max(batch_size, self.min_batch_size), self.max_batch_size)
+        self._next = 0
+        # In-flight limit shared by all runs (one semaphore per event loop)
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _slot(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        slot = self._slots.get(loop)
+        if slot is None:
+            slot = self._slots[loop] = asyncio.Semaphore(self.max_in_flight)
+        return slot
+
+    def _observe(self, size: int, latency: Optional[float]) -> None:
+        """Adjust the batch size after a batch of ``size`` finished in
+        ``latency`` seconds (``None`` for a failure)."""
+        if latency is None or latency > self.target_latency:
+            self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+        elif latency < self.target_latency / 2 and size >= self.batch_size:
+            step = max(1, self.batch_size // 4)
+            self.batch_size = min(self.max_batch_size, self.batch_size + step)
+
+    def _pick_endpoint(self) -> _Endpoint:
+        now = time.monotonic()
+        healthy = [e for e in self.endpoints if e.resting_until <= now]
+        candidates = healthy or self.endpoints
+        # Least loaded first; rotate the starting point so ties spread out
+        self._next = (self._next + 1) % len(candidates)
+        rotated = candidates[self._next :] + candidates[: self._next]
+        return min(rotated, key=lambda e: e.in_flight)
+
+    async def run(
+        self,
+        texts: list,
+        embed_batch: Callable[[list, str], Awaitable[Optional[list]]],
+        concurrency: Optional[int] = None,
+    ) -> list:
+        """Embed ``texts`` with ``embed_batch(batch, url)`` and return the
+        embeddings in input order. ``concurrency`` caps this run's own
+        requests below the shared ``max_in_flight``. Raises ValueError once
+        a batch has failed ``max_retries`` times."""
+        results: list = [None] * len(texts)
+        retries: deque = deque()  # (start, end, attempt)
+        cursor = 0
+        in_flight = 0
+        batches = 0
+        idle = asyncio.Condition()
+
+        def next_item():
+            nonlocal cursor
+            if retries:
+                return retries.popleft()
+            if cursor >= len(texts):
+                return None
+            start, cursor = cursor, min(len(texts), cursor + self.batch_size)
+            return start, cursor, 0
+
+        async def worker():
+            nonlocal in_flight, batches
+            while True:
+                async with idle:
+                    item = next_item()
+                    while item is None and in_flight:
+                        # Another worker may still hand back a failed batch
+                        await idle.wait()
+                        item = next_item()
+                    if item is None:
+                        return
+                    in_flight += 1
+
+                start, end, attempt = item
+                error = None
+                async with slot:
+                    endpoint = self._pick_endpoint()
+                    endpoint.in_flight += 1
+                    began = time.monotonic()
+                    try:
+                        embeddings = await embed_batch(texts[start:end], endpoint.url)
+                        if embeddings is None:
+                            error = "embedding service returned None"
+                        elif not isinstance(embeddings, list) or len(embeddings) != end - start:
+                            error = (
+                                f"expected {end - start} embeddings, got "
+                                f"{len(embeddings) if isinstance(embeddings, list) else type(embeddings)}"
+                            )
+                    except Exception as e:
+                        error = f"{type(e).__name__}: {e}"
+                    finally:
+                        endpoint.in_flight -= 1
+
+                if error is None:
+                    results[start:end] = embeddings
+                    endpoint.failures = 0
+                    batches += 1
+                    self._observe(end - start, time.monotonic() - began)
+                else:
+                    endpoint.failures += 1
+                    # Rest the endpoint longer than the retry backoff so the
+                    # retry goes elsewhere when there is somewhere else to go
+                    endpoint.resting_until = time.monotonic() + 5 * self.backoff * (
+                        2 ** min(endpoint.failures - 1, 5)
+                    )
+                    self._observe(end - start, None)
+                    attempt += 1
+                    log.warning(
+                        f"[EMBEDDING] Batch {start}:{end} failed on {endpoint.url or 'default'} "
+                        f"(attempt {attempt}/{self.max_retries}): {error}"
+                    )
+                    if attempt >= self.max_retries:
+                        async with idle:
+                            in_flight -= 1
+                            idle.notify_all()
+                        raise ValueError(
+                            f"Embedding batch {start}:{end} failed after {attempt} attempts - "
+                            f"{error}. Check embedding service logs."
+                        )
+                    await asyncio.sleep(self.backoff * (2 ** (attempt - 1)))
+
+                async with idle:
+                    if error is not None:
+                        # Retry only this batch, re-cut to the (now smaller) batch size
+                        for s in range(start, end, self.batch_size):
+                            retries.append((s, min(end, s + self.batch_size), attempt))
+                    in_flight -= 1
+                    idle.notify_all()
+
+        slot = self._slot()
+        started = time.monotonic()
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(self.max_in_flight, concurrency or self.max_in_flight))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+        log.info(
+            f"[EMBEDDING] Complete: {len(texts)} embeddings in {batches} batches "
+            f"({time.monotonic() - started:.1f}s, max_in_flight={self.max_in_flight}, "
+            f"next batch_size={self.batch_size})"
+        )
+        return results
+
+
+_schedulers: dict[tuple, EmbeddingScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(engine: str, endpoints: list[str], batch_size: int, **kwargs) -> EmbeddingScheduler:
+    """The process-wide scheduler for ``engine`` at ``endpoints``, created on
+    first use. A new ``batch_size`` (a config change) starts a new one."""
+    key = (engine, tuple(endpoints), batch_size)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is None:
+            scheduler = _schedulers[key] = EmbeddingScheduler(endpoints, batch_size, **kwargs)
+        return scheduler
@@ -1,3 +1,4 @@
+import atexit
 import logging
 import os
 from typing import Awaitable, Optional, Union
@@ -16,7 +17,6 @@ from langchain_classic.retrievers import (
     ContextualCompressionRetriever,
     EnsembleRetriever,
 )
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
@@ -31,6 +31,9 @@ from open_webui.models.chats import Chats
 from open_webui.models.notes import Notes
 
 from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.bm25 import BM25IndexCache, BM25IndexRetriever
+from open_webui.retrieval.embedding_cache import EmbeddingCache
+from open_webui.retrieval.embedding_scheduler import get_scheduler
 from open_webui.utils.access_control import has_access
 from open_webui.utils.headers import include_user_info_headers
 from open_webui.utils.misc import get_message_list
@@ -42,16 +45,67 @@ from open_webui.retrieval.loaders.youtube import YoutubeLoader
 from open_webui.env import (
     OFFLINE_MODE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    REDIS_KEY_PREFIX,
+    REDIS_URL,
+    UVICORN_WORKERS,
 )
 from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    RAG_BM25_INDEX_CACHE_SIZE,
+    RAG_BM25_INDEX_DIR,
+    RAG_BM25_INDEX_TTL,
+    ENABLE_RAG_EMBEDDING_CACHE,
+    RAG_EMBEDDING_CACHE_PATH,
+    RAG_EMBEDDING_CACHE_MAX_SIZE_MB,
+    RAG_EMBEDDING_MAX_IN_FLIGHT,
+    RAG_EMBEDDING_TARGET_LATENCY,
+    RAG_EMBEDDING_MAX_RETRIES,
 )
 
 log = logging.getLogger(__name__)
 
 
+def _get_bm25_version_redis():
+    if not REDIS_URL:
+        return None
+    from open_webui.utils.redis import get_redis_client
+
+    return get_redis_client()
+
+
+_bm25_version_redis = _get_bm25_version_redis()
+_bm25_cache_size = RAG_BM25_INDEX_CACHE_SIZE
+if UVICORN_WORKERS > 1 and not (RAG_BM25_INDEX_DIR or _bm25_version_redis):
+    # Invalidations would not reach the other workers, which would keep
+    # serving deleted documents until the TTL ran out
+    log.info(
+        "BM25 index cache disabled: set REDIS_URL or RAG_BM25_INDEX_DIR to share "
+        "invalidations between workers"
+    )
+    _bm25_cache_size = 0
+
+BM25_INDEXES = BM25IndexCache(
+    max_size=_bm25_cache_size,
+    persist_dir=RAG_BM25_INDEX_DIR,
+    ttl=RAG_BM25_INDEX_TTL,
+    redis=_bm25_version_redis,
+    key_prefix=REDIS_KEY_PREFIX,
+)
+# Additions are persisted in batches; write out the rest on shutdown
+atexit.register(BM25_INDEXES.flush)
+
+EMBEDDING_CACHE = (
+    EmbeddingCache(
+        RAG_EMBEDDING_CACHE_PATH,
+        max_bytes=RAG_EMBEDDING_CACHE_MAX_SIZE_MB * 1024 * 1024,
+    )
+    if ENABLE_RAG_EMBEDDING_CACHE
+    else None
+)
+
+
 from typing import Any
 
 from langchain_core.callbacks import CallbackManagerForRetrieverRun
@@ -156,7 +210,9 @@ def query_doc(
 def get_doc(collection_name: str, user: UserModel = None):
     try:
         log.debug(f"get_doc:doc {collection_name}")
-        result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+        result = BM25_INDEXES.get_result(collection_name)
+        if result is None:
+            result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
 
         if result:
             log.info(f"query_doc:result {result.ids} {result.metadatas}")
@@ -205,6 +261,25 @@ def get_enriched_texts(collection_result: GetResult) -> list[str]:
     return enriched_texts
 
 
+def update_bm25_index(
+    collection_name: str, ids: list[str], texts: list[str], metadatas: list[dict]
+) -> None:
+    """Append newly inserted items to the collection's cached BM25 indexes."""
+    added = GetResult(ids=[ids], documents=[texts], metadatas=[metadatas])
+    BM25_INDEXES.add(
+        collection_name,
+        ids=ids,
+        texts_by_variant={False: texts, True: get_enriched_texts(added)},
+        documents=texts,
+        metadatas=metadatas,
+    )
+
+
+def invalidate_bm25_index(collection_name: Optional[str] = None) -> None:
+    """Drop cached BM25 indexes for a collection (or all, after a reset)."""
+    BM25_INDEXES.invalidate(collection_name)
+
+
 async def query_doc_with_hybrid_search(
     collection_name: str,
     collection_result: GetResult,
@@ -238,17 +313,13 @@ async def query_doc_with_hybrid_search(
 
         log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
 
-        bm25_texts = (
-            get_enriched_texts(collection_result)
-            if enable_enriched_texts
-            else collection_result.documents[0]
-        )
-
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=bm25_texts,
-            metadatas=collection_result.metadatas[0],
+        bm25_index = BM25_INDEXES.get_or_build(
+            collection_name,
+            collection_result,
+            enriched=enable_enriched_texts,
+            texts_fn=get_enriched_texts if enable_enriched_texts else None,
         )
-        bm25_retriever.k = k
+        bm25_retriever = BM25IndexRetriever(index=bm25_index, k=k)
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
@@ -469,9 +540,15 @@ async def query_collection_with_hybrid_search(
     error = False
     # Fetch collection data once per collection sequentially
     # Avoid fetching the same data multiple times later
+    # (served from the cached BM25 index when there is one)
     collection_results = {}
     for collection_name in collection_names:
         try:
+            bm25_index = BM25_INDEXES.get(collection_name, enable_enriched_texts)
+            if bm25_index is not None:
+                collection_results[collection_name] = bm25_index.to_get_result()
+                continue
+
             log.debug(
                 f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
             )
@@ -856,6 +933,33 @@ def get_embedding_function(
     embedding_batch_size,
     azure_api_version=None,
     enable_async=True,
+) -> Awaitable:
+    async_embedding_function = _get_embedding_function(
+        embedding_engine,
+        embedding_model,
+        embedding_function,
+        url,
+        key,
+        embedding_batch_size,
+        azure_api_version,
+        enable_async,
+    )
+    if EMBEDDING_CACHE is None or async_embedding_function is None:
+        return async_embedding_function
+    return EMBEDDING_CACHE.wrap(
+        async_embedding_function, embedding_engine, embedding_model
+    )
+
+
+def _get_embedding_function(
+    embedding_engine,
+    embedding_model,
+    embedding_function,
+    url,
+    key,
+    embedding_batch_size,
+    azure_api_version=None,
+    enable_async=True,
 ) -> Awaitable:
     if embedding_engine == "":
         # Sentence transformers: CPU-bound sync operation
@@ -872,7 +976,7 @@ def get_embedding_function(
 
         return async_embedding_function
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
-        embedding_function = lambda query, prefix=None, user=None: generate_embeddings(
+        embedding_function = lambda query, prefix=None, user=None, url=url, **kwargs: generate_embeddings(
             engine=embedding_engine,
             model=embedding_model,
             text=query,
@@ -881,61 +985,45 @@ def get_embedding_function(
             key=key,
             user=user,
             azure_api_version=azure_api_version,
+            **kwargs,
+        )
+
+        # Several Ollama nodes can share the load: "http://a:11434;http://b:11434"
+        endpoints = (
+            [u.strip() for u in url.split(";") if u.strip()]
+            if embedding_engine == "ollama"
+            else [url]
         )
+        # Shared by every caller, so concurrent uploads share one in-flight limit
+        scheduler = get_scheduler(
+            embedding_engine,
+            endpoints,
+            batch_size=embedding_batch_size,
+            max_in_flight=RAG_EMBEDDING_MAX_IN_FLIGHT,
+            target_latency=RAG_EMBEDDING_TARGET_LATENCY,
+            max_retries=RAG_EMBEDDING_MAX_RETRIES,
+        )
+        concurrency = None if enable_async else 1
 
         async def async_embedding_function(query, prefix=None, user=None):
             if isinstance(query, list):
-                # Create batches
-                batches = [
-                    query[i : i + embedding_batch_size]
-                    for i in range(0, len(query), embedding_batch_size)
-                ]
-                
-                total_texts = len(query)
                 log.info(
-                    f"[EMBEDDING] Starting: {total_texts} texts in {len(batches)} batches "
-                    f"(batch_size={embedding_batch_size}, engine={embedding_engine})"
+                    f"[EMBEDDING] Starting: {len(query)} texts "
+                    f"(batch_size={scheduler.batch_size}, max_in_flight={concurrency or scheduler.max_in_flight}, "
+                    f"endpoints={len(scheduler.endpoints)}, engine={embedding_engine})"
                 )
-
-                if enable_async:
-                    log.info(f"[EMBEDDING] Processing {len(batches)} batches in parallel")
-                    # Execute all batches in parallel
-                    tasks = [
-                        embedding_function(batch, prefix=prefix, user=user)
-                        for batch in batches
-                    ]
-                    batch_results = await asyncio.gather(*tasks)
-                else:
-                    log.info(f"[EMBEDDING] Processing {len(batches)} batches sequentially")
-                    batch_results = []
-                    for batch_idx, batch in enumerate(batches):
-                        log.info(f"[EMBEDDING] Batch {batch_idx + 1}/{len(batches)} ({len(batch)} texts)...")
-                        batch_results.append(
-                            await embedding_function(batch, prefix=prefix, user=user)
-                        )
-
-                # Flatten results, checking for failures
-                embeddings = []
-                for batch_idx, batch_embeddings in enumerate(batch_results):
-                    if batch_embeddings is None:
-                        raise ValueError(
-                            f"Embedding batch {batch_idx + 1}/{len(batches)} failed - "
-                            f"embedding service returned None. Check embedding service logs."
-                        )
-                    if isinstance(batch_embeddings, list):
-                        embeddings.extend(batch_embeddings)
-                    else:
-                        raise ValueError(
-                            f"Embedding batch {batch_idx + 1}/{len(batches)} returned unexpected type: "
-                            f"{type(batch_embeddings)}"
-                        )
-
-                log.info(
-                    f"[EMBEDDING] Complete: {len(embeddings)} embeddings from {len(batches)} batches"
+                # The scheduler owns retries, so each request is tried once
+                return await scheduler.run(
+                    query,
+                    lambda batch, endpoint: embedding_function(
+                        batch, prefix=prefix, user=user, url=endpoint, max_retries=1
+                    ),
+                    concurrency=concurrency,
                 )
-                return embeddings
             else:
-                return await embedding_function(query, prefix, user)
+                return await embedding_function(
+                    query, prefix, user, url=endpoints[0] if endpoints else url
+                )
 
         return async_embedding_function
     else:
@@ -968,6 +1056,7 @@ async def generate_embeddings(
                 "key": key,
                 "prefix": prefix,
                 "user": user,
+                "max_retries": kwargs.get("max_retries", 3),
             }
         )
         return embeddings[0] if isinstance(text, str) else embeddings
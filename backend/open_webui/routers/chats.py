@@ -4,7 +4,7 @@ from typing import Optional
 
 
 from open_webui.utils.misc import get_message_list
-from open_webui.socket.main import get_event_emitter
+from open_webui.socket.main import get_event_emitter, finalize_message_tokens
 from open_webui.models.chats import (
     ChatForm,
     ChatImportForm,
@@ -710,6 +710,7 @@ async def update_chat_message_by_id(
             "content": form_data.content,
         },
     )
+    finalize_message_tokens(id, message_id)
 
     event_emitter = get_event_emitter(
         {
@@ -25,6 +25,7 @@ from fastapi.responses import FileResponse, StreamingResponse
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.utils import invalidate_bm25_index
 
 from open_webui.models.channels import Channels
 from open_webui.models.users import Users
@@ -388,6 +389,7 @@ async def delete_all_files(user=Depends(get_admin_user)):
         try:
             Storage.delete_all_files()
             VECTOR_DB_CLIENT.reset()
+            invalidate_bm25_index()
         except Exception as e:
             log.exception(e)
             log.error("Error deleting files")
@@ -559,6 +561,7 @@ async def update_file_data_content_by_id(
                         collection_name=knowledge.id,
                         filter={"file_id": id}
                     )
+                    invalidate_bm25_index(knowledge.id)
                     # Re-add with new content
                     process_file(
                         request,
@@ -788,6 +791,7 @@ async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
             try:
                 Storage.delete_file(file.path)
                 VECTOR_DB_CLIENT.delete(collection_name=f"file-{id}")
+                invalidate_bm25_index(f"file-{id}")
             except Exception as e:
                 log.exception(e)
                 log.error("Error deleting files")
@@ -14,6 +14,7 @@ from open_webui.models.knowledge import (
 )
 from open_webui.models.files import Files, FileModel, FileMetadataResponse
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.utils import invalidate_bm25_index
 from open_webui.routers.retrieval import (
     process_file,
     ProcessFileForm,
@@ -215,6 +216,7 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
                     VECTOR_DB_CLIENT.delete_collection(
                         collection_name=knowledge_base.id
                     )
+                invalidate_bm25_index(knowledge_base.id)
             except Exception as e:
                 log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
                 continue  # Skip, don't raise
@@ -528,6 +530,7 @@ def update_file_from_knowledge_by_id(
     VECTOR_DB_CLIENT.delete(
         collection_name=knowledge.id, filter={"file_id": form_data.file_id}
     )
+    invalidate_bm25_index(knowledge.id)
 
     # Add content to the vector database
     try:
@@ -607,6 +610,7 @@ def remove_file_from_knowledge_by_id(
         log.debug("This was most likely caused by bypassing embedding processing")
         log.debug(e)
         pass
+    invalidate_bm25_index(knowledge.id)
 
     if delete_file:
         try:
@@ -614,6 +618,7 @@ def remove_file_from_knowledge_by_id(
             file_collection = f"file-{form_data.file_id}"
             if VECTOR_DB_CLIENT.has_collection(collection_name=file_collection):
                 VECTOR_DB_CLIENT.delete_collection(collection_name=file_collection)
+            invalidate_bm25_index(file_collection)
         except Exception as e:
             log.debug("This was most likely caused by bypassing embedding processing")
             log.debug(e)
@@ -693,6 +698,7 @@ async def delete_knowledge_by_id(id: str, user=Depends(get_verified_user)):
     except Exception as e:
         log.debug(e)
         pass
+    invalidate_bm25_index(id)
     result = Knowledges.delete_knowledge_by_id(id=id)
     return result
 
@@ -726,6 +732,7 @@ async def reset_knowledge_by_id(id: str, user=Depends(get_verified_user)):
     except Exception as e:
         log.debug(e)
         pass
+    invalidate_bm25_index(id)
 
     knowledge = Knowledges.reset_knowledge_by_id(id=id)
     return knowledge
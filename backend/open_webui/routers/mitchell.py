@@ -6,7 +6,7 @@ Mitchell agents running on client machines.
 Endpoints:
 - POST /api/v1/mitchell/agents/register - Register a new agent
 - POST /api/v1/mitchell/agents/heartbeat - Agent heartbeat
-- GET  /api/v1/mitchell/queries/pending - Get pending query for agent
+- GET  /api/v1/mitchell/queries/pending - Get (or long-poll for) a query for an agent
 - POST /api/v1/mitchell/queries/{query_id}/result - Submit query result
 - POST /api/v1/mitchell/queries - Create a new query (from Autotech AI chat)
 - GET  /api/v1/mitchell/agents - List registered agents
@@ -19,6 +19,7 @@ import asyncio
 import hashlib
 import json
 import logging
+import threading
 import time
 import uuid
 from datetime import datetime, timedelta
@@ -29,6 +30,18 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, Field
 from starlette.concurrency import run_in_threadpool
 
+from open_webui.env import (
+    MITCHELL_AGENT_TIMEOUT,
+    MITCHELL_LONG_POLL_MAX,
+    MITCHELL_QUERY_RETENTION_DAYS,
+)
+from open_webui.models.mitchell import (
+    DEFAULT_TOOL,
+    MITCHELL_RESULT_CACHE,
+    Mitchell,
+    MitchellQueryModel,
+    MitchellResultCache,
+)
 from open_webui.models.users import Users
 from open_webui.models.files import Files, FileForm
 from open_webui.models.knowledge import Knowledges, KnowledgeForm
@@ -51,38 +64,94 @@ SAVED_KNOWLEDGE_NAME = "Saved Automotive Data"
 
 
 # ============================================================================
-# In-Memory Storage (replace with database in production)
+# Work Dispatch
 # ============================================================================
 
-# Registered agents: {agent_id: AgentInfo}
-_agents: dict[str, "AgentInfo"] = {}
+# Agents and queries live in the app database (models/mitchell.py) so every
+# uvicorn worker shares one queue. Long-polling agents wait on an event that
+# create_query sets in this worker; agents parked on other workers re-check
+# the queue every _CROSS_WORKER_POLL seconds.
+_CROSS_WORKER_POLL = 1.0
+
+# Finished queries older than MITCHELL_QUERY_RETENTION_DAYS and expired
+# result cache rows are deleted at most this often (seconds), from the same
+# loop that reclaims stale work
+_PRUNE_INTERVAL = 3600.0
+_last_prune = -_PRUNE_INTERVAL  # first maintenance pass prunes
+
+_work_waiters: set[asyncio.Event] = set()
+# create_query's cache/in-flight check and enqueue run in the threadpool;
+# the lock keeps two requests in this worker from both missing
+_enqueue_lock = threading.Lock()
+
+
+def _notify_work() -> None:
+    for event in list(_work_waiters):
+        event.set()
+
 
-# Pending queries: {query_id: QueryInfo}
-_pending_queries: dict[str, "QueryInfo"] = {}
+async def _wait_for_work(timeout: float) -> None:
+    event = asyncio.Event()
+    _work_waiters.add(event)
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        _work_waiters.discard(event)
+
+
+def _maintain_queue() -> bool:
+    """Reclaim stale assignments and prune old results; True if work was reclaimed."""
+    global _last_prune
+    reclaimed = Mitchell.reclaim_stale(MITCHELL_AGENT_TIMEOUT)
+    now = time.monotonic()
+    if now - _last_prune >= _PRUNE_INTERVAL:
+        _last_prune = now
+        if MITCHELL_QUERY_RETENTION_DAYS:
+            Mitchell.prune_finished(MITCHELL_QUERY_RETENTION_DAYS * 86400)
+        try:
+            MITCHELL_RESULT_CACHE.purge_expired()
+        except Exception as e:
+            log.warning(f"Mitchell result cache purge failed: {e}")
+    return bool(reclaimed)
 
-# Completed queries: {query_id: QueryResult}
-_completed_queries: dict[str, "QueryResultInfo"] = {}
 
-# Agent assignments: {agent_id: query_id} - tracks which agent is working on which query
-_agent_assignments: dict[str, str] = {}
+def _iso(ns: Optional[int]) -> Optional[str]:
+    return datetime.utcfromtimestamp(ns / 1e9).isoformat() if ns else None
+
+
+def _work_item(query: MitchellQueryModel) -> dict:
+    return {
+        "query_id": query.id,
+        "vehicle": query.vehicle,
+        "question": query.question,
+        "priority": query.priority,
+        "metadata": query.meta or {},
+    }
+
+
+def _query_result(query: MitchellQueryModel) -> dict:
+    return {
+        "query_id": query.id,
+        "status": query.status,
+        "vehicle": query.vehicle,
+        "question": query.question,
+        "answer": query.answer,
+        "source_url": query.source_url,
+        "page_title": query.page_title,
+        "breadcrumb": query.breadcrumb,
+        "error": query.error,
+        "processing_time_ms": query.processing_time_ms,
+        "processed_at": _iso(query.processed_at),
+        "ingested_to_rag": query.ingested_to_rag,
+    }
 
 
 # ============================================================================
 # Data Models
 # ============================================================================
 
-class AgentInfo(BaseModel):
-    agent_id: str
-    agent_name: str
-    agent_version: str = "1.0.0"
-    capabilities: list[str] = Field(default_factory=list)
-    hostname: str = ""
-    registered_at: datetime = Field(default_factory=datetime.utcnow)
-    last_heartbeat: datetime = Field(default_factory=datetime.utcnow)
-    status: str = "ready"  # ready, busy, offline
-    current_job_id: Optional[str] = None
-
-
 class AgentRegistrationRequest(BaseModel):
     agent_id: str
     agent_name: str
@@ -99,18 +168,6 @@ class HeartbeatRequest(BaseModel):
     last_job_completed_at: Optional[str] = None
 
 
-class QueryInfo(BaseModel):
-    query_id: str
-    vehicle: dict  # {year, make, model, engine}
-    question: str
-    priority: int = 0
-    metadata: dict = Field(default_factory=dict)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    created_by: Optional[str] = None  # user_id
-    assigned_agent_id: Optional[str] = None
-    assigned_at: Optional[datetime] = None
-
-
 class QueryResultInfo(BaseModel):
     query_id: str
     agent_id: str
@@ -131,6 +188,7 @@ class CreateQueryRequest(BaseModel):
     vehicle: dict  # {year, make, model, engine}
     question: str
     priority: int = 0
+    # tool and params are part of the cache key; no_cache forces a fresh lookup
     metadata: dict = Field(default_factory=dict)
 
 
@@ -138,6 +196,7 @@ class QueryResponse(BaseModel):
     query_id: str
     status: str
     message: str = ""
+    result: Optional[dict] = None  # set when answered from the result cache
 
 
 # ============================================================================
@@ -238,16 +297,15 @@ async def register_agent(
     """Register a Mitchell agent."""
     agent_id = payload.agent_id
     
-    agent = AgentInfo(
-        agent_id=agent_id,
-        agent_name=payload.agent_name,
-        agent_version=payload.agent_version,
+    await run_in_threadpool(
+        Mitchell.upsert_agent,
+        agent_id,
+        name=payload.agent_name,
+        version=payload.agent_version,
         capabilities=payload.capabilities,
         hostname=payload.hostname,
         status="ready",
     )
-    
-    _agents[agent_id] = agent
     log.info(f"Agent registered: {agent_id} ({payload.agent_name})")
     
     return {
@@ -263,20 +321,12 @@ async def agent_heartbeat(
     payload: HeartbeatRequest,
 ) -> dict:
     """Receive heartbeat from agent."""
-    agent_id = payload.agent_id
-    
-    if agent_id not in _agents:
-        # Auto-register unknown agents
-        _agents[agent_id] = AgentInfo(
-            agent_id=agent_id,
-            agent_name=f"Agent-{agent_id[:8]}",
-            status=payload.status,
-        )
-    
-    agent = _agents[agent_id]
-    agent.last_heartbeat = datetime.utcnow()
-    agent.status = payload.status
-    agent.current_job_id = payload.current_job_id
+    await run_in_threadpool(
+        Mitchell.upsert_agent,
+        payload.agent_id,
+        status=payload.status,
+        current_job_id=payload.current_job_id,
+    )
     
     return {"status": "ok"}
 
@@ -287,20 +337,19 @@ async def list_agents(
     user=Depends(get_verified_user),
 ) -> list[dict]:
     """List all registered agents."""
-    now = datetime.utcnow()
+    now = time.time_ns()
     agents = []
     
-    for agent in _agents.values():
-        # Mark agents as offline if no heartbeat in 60 seconds
-        if (now - agent.last_heartbeat).total_seconds() > 60:
-            agent.status = "offline"
+    for agent in await run_in_threadpool(Mitchell.get_agents):
+        # Agents without a heartbeat within MITCHELL_AGENT_TIMEOUT are offline
+        offline = (now - agent.last_heartbeat) / 1e9 > MITCHELL_AGENT_TIMEOUT
         
         agents.append({
-            "agent_id": agent.agent_id,
-            "agent_name": agent.agent_name,
-            "status": agent.status,
+            "agent_id": agent.id,
+            "agent_name": agent.name,
+            "status": "offline" if offline else agent.status,
             "hostname": agent.hostname,
-            "last_heartbeat": agent.last_heartbeat.isoformat(),
+            "last_heartbeat": _iso(agent.last_heartbeat),
             "current_job_id": agent.current_job_id,
         })
     
@@ -311,6 +360,52 @@ async def list_agents(
 # Query Management Endpoints
 # ============================================================================
 
+def _lookup_or_enqueue(payload: CreateQueryRequest, user_id: str) -> tuple[QueryResponse, bool]:
+    """create_query's DB work: answer from cache, join in-flight, or enqueue.
+    Returns ``(response, enqueued)``."""
+    tool = payload.metadata.get("tool") or DEFAULT_TOOL
+    cache_key = MitchellResultCache.key(
+        payload.vehicle, payload.question, tool, payload.metadata.get("params")
+    )
+    with _enqueue_lock:
+        if not payload.metadata.get("no_cache"):
+            cached = MITCHELL_RESULT_CACHE.get(cache_key)
+            if cached is not None:
+                log.info(f"Query answered from cache: {cached['query_id']} - {payload.question[:50]}...")
+                return QueryResponse(
+                    query_id=cached["query_id"],
+                    status=cached["status"],
+                    message="Answered from cache",
+                    result=cached,
+                ), False
+            
+            in_flight = Mitchell.get_in_flight(cache_key)
+            if in_flight is not None:
+                MitchellResultCache.record_lookup("join")
+                log.info(f"Query joined in-flight {in_flight.id} - {payload.question[:50]}...")
+                return QueryResponse(
+                    query_id=in_flight.id,
+                    status="pending",
+                    message="Joined identical query already in progress",
+                ), False
+        
+        query = Mitchell.enqueue(
+            vehicle=payload.vehicle,
+            question=payload.question,
+            priority=payload.priority,
+            meta=payload.metadata,
+            created_by=user_id,
+            cache_key=cache_key,
+        )
+    log.info(f"Query created: {query.id} - {payload.question[:50]}...")
+    
+    return QueryResponse(
+        query_id=query.id,
+        status="pending",
+        message="Query queued for processing",
+    ), True
+
+
 @router.post("/queries")
 async def create_query(
     request: Request,
@@ -321,85 +416,51 @@ async def create_query(
     
     Called by Autotech AI when a user asks a question that requires
     Mitchell/ShopKeyPro data.
-    """
-    query_id = str(uuid.uuid4())
     
-    query = QueryInfo(
-        query_id=query_id,
-        vehicle=payload.vehicle,
-        question=payload.question,
-        priority=payload.priority,
-        metadata=payload.metadata,
-        created_by=user.id,
-    )
-    
-    _pending_queries[query_id] = query
-    log.info(f"Query created: {query_id} - {payload.question[:50]}...")
-    
-    return QueryResponse(
-        query_id=query_id,
-        status="pending",
-        message="Query queued for processing",
-    )
+    A lookup answered before (same vehicle, tool, params and question) is
+    returned from the result cache without queueing. A lookup identical to
+    one still in progress joins it and gets the same query_id, so only one
+    agent does the work.
+    """
+    response, enqueued = await run_in_threadpool(_lookup_or_enqueue, payload, user.id)
+    if enqueued:
+        _notify_work()
+    return response
 
 
 @router.get("/queries/pending")
 async def get_pending_query(
     request: Request,
     agent_id: str,
+    wait: float = 0,
 ) -> Optional[dict]:
     """Get a pending query for an agent to process.
     
-    Returns the highest priority unassigned query, or None if no work is available.
+    Returns the agent's current assignment if it has one, otherwise assigns
+    the highest priority (then oldest) pending query. With ``wait`` > 0 the
+    request long-polls: it blocks up to ``wait`` seconds (capped at
+    MITCHELL_LONG_POLL_MAX) until work arrives, then returns None.
     """
-    if agent_id not in _agents:
+    # Polling counts as a heartbeat, so a parked agent is not reclaimed
+    if not await run_in_threadpool(Mitchell.touch_agent, agent_id):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Agent not registered",
         )
     
-    # Check if agent is already assigned to a query
-    if agent_id in _agent_assignments:
-        existing_query_id = _agent_assignments[agent_id]
-        if existing_query_id in _pending_queries:
-            # Return the already-assigned query
-            query = _pending_queries[existing_query_id]
-            return {
-                "query_id": query.query_id,
-                "vehicle": query.vehicle,
-                "question": query.question,
-                "priority": query.priority,
-                "metadata": query.metadata,
-            }
-    
-    # Find highest priority unassigned query
-    unassigned = [
-        q for q in _pending_queries.values()
-        if q.assigned_agent_id is None
-    ]
-    
-    if not unassigned:
-        return None  # No work available
-    
-    # Sort by priority (higher first), then by creation time (older first)
-    unassigned.sort(key=lambda q: (-q.priority, q.created_at))
-    
-    query = unassigned[0]
-    
-    # Assign to this agent
-    query.assigned_agent_id = agent_id
-    query.assigned_at = datetime.utcnow()
-    _agent_assignments[agent_id] = query.query_id
-    
-    log.info(f"Query {query.query_id} assigned to agent {agent_id}")
-    
-    return {
-        "query_id": query.query_id,
-        "vehicle": query.vehicle,
-        "question": query.question,
-        "priority": query.priority,
-        "metadata": query.metadata,
-    }
+    deadline = time.monotonic() + min(max(wait, 0), MITCHELL_LONG_POLL_MAX)
+    while True:
+        if await run_in_threadpool(_maintain_queue):
+            _notify_work()
+        query = await run_in_threadpool(Mitchell.claim, agent_id)
+        if query is not None:
+            log.info(f"Query {query.id} assigned to agent {agent_id}")
+            return _work_item(query)
+        
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None  # No work available
+        await _wait_for_work(min(remaining, _CROSS_WORKER_POLL))
 
 
 @router.post("/queries/{query_id}/result")
@@ -417,23 +478,18 @@ async def submit_query_result(
     """
     agent_id = payload.get("agent_id", "")
     
-    # Validate query exists
-    if query_id not in _pending_queries:
-        # Check if already completed
-        if query_id in _completed_queries:
-            return {"status": "ok", "message": "Query already completed"}
+    query = await run_in_threadpool(Mitchell.get_query, query_id)
+    if query is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Query not found",
         )
     
-    query = _pending_queries[query_id]
-    
-    # Create result
-    result = QueryResultInfo(
-        query_id=query_id,
-        agent_id=agent_id,
-        status=payload.get("status", "error"),
+    query, already_completed = await run_in_threadpool(
+        Mitchell.complete,
+        query_id,
+        agent_id,
+        payload.get("status", "error"),
         vehicle=payload.get("vehicle", query.vehicle),
         question=payload.get("question", query.question),
         answer=payload.get("answer"),
@@ -443,22 +499,42 @@ async def submit_query_result(
         error=payload.get("error"),
         processing_time_ms=payload.get("processing_time_ms", 0),
     )
+    if already_completed:
+        return {"status": "ok", "message": "Query already completed"}
     
-    # Move from pending to completed
-    del _pending_queries[query_id]
-    _completed_queries[query_id] = result
-    
-    # Clear agent assignment
-    if agent_id in _agent_assignments:
-        del _agent_assignments[agent_id]
+    result = QueryResultInfo(
+        query_id=query_id,
+        agent_id=agent_id,
+        status=query.status,
+        vehicle=query.vehicle,
+        question=query.question,
+        answer=query.answer,
+        source_url=query.source_url,
+        page_title=query.page_title,
+        breadcrumb=query.breadcrumb,
+        error=query.error,
+        processing_time_ms=query.processing_time_ms or 0,
+        processed_at=datetime.utcfromtimestamp(query.processed_at / 1e9),
+    )
     
     log.info(f"Query {query_id} completed with status {result.status}")
     
+    # Cache before RAG ingestion so identical requests stop queueing now
+    if result.status == "ok" and result.answer and query.cache_key:
+        await run_in_threadpool(
+            MITCHELL_RESULT_CACHE.put,
+            query.cache_key,
+            (query.meta or {}).get("tool") or DEFAULT_TOOL,
+            query_id,
+            _query_result(query),
+        )
+    
     # Ingest to RAG if successful
     if result.status == "ok" and result.answer:
         try:
             ingested = await ingest_to_rag(request, result)
             result.ingested_to_rag = ingested
+            await run_in_threadpool(Mitchell.set_ingested, query_id, ingested)
         except Exception as e:
             log.exception(f"RAG ingestion error: {e}")
     
@@ -476,38 +552,22 @@ async def get_query_status(
     user=Depends(get_verified_user),
 ) -> dict:
     """Get the status and result of a query."""
-    # Check pending
-    if query_id in _pending_queries:
-        query = _pending_queries[query_id]
+    query = await run_in_threadpool(Mitchell.get_query, query_id)
+    if query is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Query not found",
+        )
+    
+    if query.status not in ("ok", "error"):
         return {
             "query_id": query_id,
             "status": "pending",
             "assigned_agent_id": query.assigned_agent_id,
-            "created_at": query.created_at.isoformat(),
+            "created_at": _iso(query.created_at),
         }
     
-    # Check completed
-    if query_id in _completed_queries:
-        result = _completed_queries[query_id]
-        return {
-            "query_id": query_id,
-            "status": result.status,
-            "vehicle": result.vehicle,
-            "question": result.question,
-            "answer": result.answer,
-            "source_url": result.source_url,
-            "page_title": result.page_title,
-            "breadcrumb": result.breadcrumb,
-            "error": result.error,
-            "processing_time_ms": result.processing_time_ms,
-            "processed_at": result.processed_at.isoformat() if isinstance(result.processed_at, datetime) else str(result.processed_at),
-            "ingested_to_rag": result.ingested_to_rag,
-        }
-    
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail="Query not found",
-    )
+    return _query_result(query)
 
 
 @router.get("/queries")
@@ -522,29 +582,29 @@ async def list_queries(
     
     # Add pending queries
     if status_filter in (None, "pending"):
-        for query in list(_pending_queries.values())[:limit]:
+        for query in await run_in_threadpool(Mitchell.get_queries, ["pending", "assigned"], limit):
             queries.append({
-                "query_id": query.query_id,
+                "query_id": query.id,
                 "status": "pending",
                 "vehicle": query.vehicle,
                 "question": query.question[:100],
-                "created_at": query.created_at.isoformat(),
+                "created_at": _iso(query.created_at),
                 "assigned_agent_id": query.assigned_agent_id,
             })
     
     # Add completed queries
     if status_filter in (None, "completed", "ok", "error"):
-        for result in list(_completed_queries.values())[:limit]:
-            if status_filter in (None, "completed") or result.status == status_filter:
-                queries.append({
-                    "query_id": result.query_id,
-                    "status": result.status,
-                    "vehicle": result.vehicle,
-                    "question": result.question[:100],
-                    "processed_at": result.processed_at.isoformat() if isinstance(result.processed_at, datetime) else str(result.processed_at),
-                    "processing_time_ms": result.processing_time_ms,
-                    "ingested_to_rag": result.ingested_to_rag,
-                })
+        statuses = ["ok", "error"] if status_filter in (None, "completed") else [status_filter]
+        for query in await run_in_threadpool(Mitchell.get_queries, statuses, limit):
+            queries.append({
+                "query_id": query.id,
+                "status": query.status,
+                "vehicle": query.vehicle,
+                "question": query.question[:100],
+                "processed_at": _iso(query.processed_at),
+                "processing_time_ms": query.processing_time_ms,
+                "ingested_to_rag": query.ingested_to_rag,
+            })
     
     return queries[:limit]
 
@@ -78,6 +78,8 @@ from open_webui.retrieval.web.external import search_external
 from open_webui.retrieval.utils import (
     get_content_from_url,
     get_embedding_function,
+    invalidate_bm25_index,
+    update_bm25_index,
     get_reranking_function,
     get_model_path,
     query_collection,
@@ -1401,12 +1403,16 @@ def save_docs_to_vector_db(
 
             if overwrite:
                 VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+                invalidate_bm25_index(collection_name)
                 log.info(f"deleting existing collection {collection_name}")
             elif add is False:
                 log.info(
                     f"collection {collection_name} already exists, overwrite is False and add is False"
                 )
                 return True
+        else:
+            # A cached index can only be left over from a deleted collection
+            invalidate_bm25_index(collection_name)
 
         log.info(f"generating embeddings for {collection_name}")
         embedding_function = get_embedding_function(
@@ -1472,6 +1478,12 @@ def save_docs_to_vector_db(
             collection_name=collection_name,
             items=items,
         )
+        update_bm25_index(
+            collection_name,
+            ids=[item["id"] for item in items],
+            texts=texts,
+            metadatas=metadatas,
+        )
 
         log.info(f"added {len(items)} items to collection {collection_name}")
         return True
@@ -1520,6 +1532,7 @@ def process_file(
                 except:
                     # Audio file upload pipeline
                     pass
+                invalidate_bm25_index(f"file-{file.id}")
 
                 docs = [
                     Document(
@@ -2434,6 +2447,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
                 collection_name=form_data.collection_name,
                 metadata={"hash": hash},
             )
+            invalidate_bm25_index(form_data.collection_name)
             return {"status": True}
         else:
             return {"status": False}
@@ -2445,6 +2459,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    invalidate_bm25_index()
     Knowledges.delete_all_knowledge()
 
 
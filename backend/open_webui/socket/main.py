@@ -1,4 +1,5 @@
 import asyncio
+import atexit
 import random
 
 import socketio
@@ -37,12 +38,20 @@ from open_webui.env import (
     WEBSOCKET_SERVER_PING_INTERVAL,
     WEBSOCKET_SERVER_LOGGING,
     WEBSOCKET_SERVER_ENGINEIO_LOGGING,
+    CHAT_STREAM_DB_FLUSH_INTERVAL,
+    CHAT_STREAM_DB_FLUSH_MAX_CHARS,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock, YdocManager
+from open_webui.socket.utils import (
+    MessageWriteBuffer,
+    RedisDict,
+    RedisLock,
+    YdocManager,
+)
 from open_webui.tasks import create_task, stop_item_tasks
 from open_webui.utils.redis import get_redis_connection
 from open_webui.utils.access_control import has_access, get_users_with_access
+from open_webui.local_tokenizers import StreamingTokenCounter
 
 
 from open_webui.env import (
@@ -162,6 +171,34 @@ YDOC_MANAGER = YdocManager(
 )
 
 
+# Streamed "message" deltas are coalesced here instead of rewriting the chat row per delta
+MESSAGE_WRITE_BUFFER = MessageWriteBuffer(
+    load=lambda chat_id, message_id: Chats.get_message_by_id_and_message_id(
+        chat_id, message_id
+    ),
+    save=lambda chat_id, message_id, content: Chats.upsert_message_to_chat_by_id_and_message_id(
+        chat_id, message_id, {"content": content}
+    ),
+    flush_interval=CHAT_STREAM_DB_FLUSH_INTERVAL,
+    flush_max_chars=CHAT_STREAM_DB_FLUSH_MAX_CHARS,
+)
+
+
+def flush_message_buffer(chat_id: str, message_id: str):
+    """Write out any buffered deltas for a message and stop buffering it."""
+    try:
+        MESSAGE_WRITE_BUFFER.finalize(chat_id, message_id)
+    except Exception as e:
+        log.warning(f"Failed to flush buffered message {message_id}: {e}")
+
+
+def flush_all_message_buffers():
+    MESSAGE_WRITE_BUFFER.flush_all()
+
+
+atexit.register(flush_all_message_buffers)
+
+
 async def periodic_usage_pool_cleanup():
     max_retries = 2
     retry_delay = random.uniform(
@@ -707,7 +744,10 @@ def get_event_emitter(request_info, update_db=True):
                 # Attempt to retrieve latest message state from DB
                 try:
                     if message_id:
-                        db_message = Chats.get_message_by_id_and_message_id(chat_id, message_id)
+                        # Streaming deltas reuse the buffered copy instead of re-reading the chat row
+                        db_message = MESSAGE_WRITE_BUFFER.get_message(chat_id, message_id)
+                        if db_message is None:
+                            db_message = Chats.get_message_by_id_and_message_id(chat_id, message_id)
                     else:
                         db_message = None
                 except Exception:
@@ -764,10 +804,16 @@ def get_event_emitter(request_info, update_db=True):
 
                                 # Persist alias into DB so subsequent GETs include model_display
                                 try:
-                                    if update_db and message_id and not request_info.get("chat_id", "").startswith("local:"):
+                                    if (
+                                        update_db
+                                        and message_id
+                                        and not request_info.get("chat_id", "").startswith("local:")
+                                        and db_message.get("model_display") != alias_to_use
+                                    ):
                                         Chats.upsert_message_to_chat_by_id_and_message_id(
                                             request_info["chat_id"], request_info["message_id"], {"model_display": alias_to_use}
                                         )
+                                        db_message["model_display"] = alias_to_use
                                 except Exception:
                                     pass
                         except Exception:
@@ -791,6 +837,17 @@ def get_event_emitter(request_info, update_db=True):
             and not request_info.get("chat_id", "").startswith("local:")
         ):
 
+            event_type = event_data.get("type") if isinstance(event_data, dict) else None
+
+            if event_type not in ("message", "replace") and (
+                request_info["chat_id"],
+                request_info["message_id"],
+            ) in MESSAGE_WRITE_BUFFER:
+                # Keep write ordering: buffered content lands before any other update
+                MESSAGE_WRITE_BUFFER.flush(
+                    request_info["chat_id"], request_info["message_id"]
+                )
+
             if "type" in event_data and event_data["type"] == "status":
                 Chats.add_message_status_to_chat_by_id_and_message_id(
                     request_info["chat_id"],
@@ -800,24 +857,15 @@ def get_event_emitter(request_info, update_db=True):
 
 
             if "type" in event_data and event_data["type"] == "message":
-                message = Chats.get_message_by_id_and_message_id(
+                # Append the delta in memory; the buffer writes the row back on its
+                # time/size budget and when the message completes.
+                message = MESSAGE_WRITE_BUFFER.append(
                     request_info["chat_id"],
                     request_info["message_id"],
+                    event_data.get("data", {}).get("content", ""),
                 )
 
                 if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
-
-                    # Persist the updated content
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "content": content,
-                        },
-                    )
-
                     # If the payload includes token usage information, record it and persist to the message
                     try:
                         usage = event_data.get("data", {}).get("usage") or event_data.get("data", {}).get("tokens")
@@ -852,6 +900,9 @@ def get_event_emitter(request_info, update_db=True):
                                     int(total_tokens or 0),
                                     token_source=usage.get("source") if isinstance(usage.get("source"), str) else None,
                                 )
+                                mark_message_usage_recorded(
+                                    request_info["chat_id"], request_info["message_id"]
+                                )
                                 # Check for auto-renew (async, non-blocking)
                                 if uid:
                                     try:
@@ -861,13 +912,9 @@ def get_event_emitter(request_info, update_db=True):
                             except Exception:
                                 # Non-fatal: don't block emitter
                                 pass
-                        else:
-                            # No provider usage supplied: compute tokens from the content and record
-                            try:
-                                if content and isinstance(content, str) and content.strip():
-                                    compute_tokens_and_record_message(request_info.get("user_id"), request_info["chat_id"], request_info["message_id"], content, request_info.get("model"))
-                            except Exception:
-                                pass
+                        # Without provider usage, the upsert hook advances the message's
+                        # token counter whenever the buffer writes content back, and one
+                        # usage record is emitted when the message finalizes.
                     except Exception:
                         pass
 
@@ -881,6 +928,21 @@ def get_event_emitter(request_info, update_db=True):
                         "content": content,
                     },
                 )
+                MESSAGE_WRITE_BUFFER.replace(
+                    request_info["chat_id"], request_info["message_id"], content
+                )
+
+            if event_type in ("chat:completion", "chat:message:error", "chat:tasks:cancel"):
+                data = event_data.get("data", {})
+                if event_type != "chat:completion" or (
+                    isinstance(data, dict) and data.get("done")
+                ):
+                    flush_message_buffer(
+                        request_info["chat_id"], request_info["message_id"]
+                    )
+                    finalize_message_tokens(
+                        request_info["chat_id"], request_info["message_id"]
+                    )
 
             if "type" in event_data and event_data["type"] == "embeds":
                 message = Chats.get_message_by_id_and_message_id(
@@ -971,21 +1033,27 @@ def get_event_call(request_info):
 get_event_caller = get_event_call
 
 
-def compute_tokens_and_record_message(user_id: str, chat_id: str, message_id: str, content: str, model_name: str | None = None):
+def compute_tokens_and_record_message(user_id: str, chat_id: str, message_id: str, content: str, model_name: str | None = None, tokens_total: int | None = None):
     """Compute tokens (fallback) and persist + record usage for a message.
 
     Top-level helper used when provider does not supply token usage info.
+    `tokens_total` skips tokenization when the count is already known (e.g.
+    from a StreamingTokenCounter).
     """
     try:
-        if not content or not isinstance(content, str) or not content.strip():
+        if tokens_total is None and (not content or not isinstance(content, str) or not content.strip()):
             log.debug(f"No content to compute tokens for message {message_id} in chat {chat_id}")
             return
 
+        if tokens_total is not None and tokens_total <= 0:
+            return
+
         from open_webui.local_tokenizers import count_tokens_for_model
 
         from open_webui.models.billing import record_usage_event, check_and_trigger_auto_renew
 
-        tokens_total = int(count_tokens_for_model(content or "", model_name))
+        if tokens_total is None:
+            tokens_total = int(count_tokens_for_model(content or "", model_name))
         tokens_completion = int(tokens_total)
         tokens_prompt = 0
 
@@ -1013,3 +1081,86 @@ def compute_tokens_and_record_message(user_id: str, chat_id: str, message_id: st
         # Non-fatal: don't block emitter
         log.warning(f"Error computing tokens for message {message_id}: {e}")
         pass
+
+
+# Streaming token counters per (chat_id, message_id). Content writes only advance
+# the counter; the single usage record is emitted by finalize_message_tokens().
+MESSAGE_TOKEN_COUNTERS: Dict[tuple, dict] = {}
+MESSAGE_TOKEN_COUNTERS_MAX = 10000
+# Counters not advanced for this long belong to abandoned streams
+MESSAGE_TOKEN_COUNTER_IDLE_TTL = 3600
+
+
+def _evict_message_token_entries():
+    """Make room in MESSAGE_TOKEN_COUNTERS without losing live counts."""
+    now = time.monotonic()
+    for (chat_id, message_id), entry in list(MESSAGE_TOKEN_COUNTERS.items()):
+        if entry["usage_recorded"]:
+            MESSAGE_TOKEN_COUNTERS.pop((chat_id, message_id), None)
+        elif now - entry["updated_at"] > MESSAGE_TOKEN_COUNTER_IDLE_TTL:
+            # Abandoned stream: bill what was counted instead of dropping it
+            finalize_message_tokens(chat_id, message_id)
+
+    # Still full: only live counters left, least recently advanced first
+    while len(MESSAGE_TOKEN_COUNTERS) >= MESSAGE_TOKEN_COUNTERS_MAX:
+        (chat_id, message_id), entry = next(iter(MESSAGE_TOKEN_COUNTERS.items()))
+        MESSAGE_TOKEN_COUNTERS.pop((chat_id, message_id))
+        log.warning(
+            f"Dropping live token counter for chat {chat_id} message {message_id} "
+            f"({entry['counter'].total} tokens): {MESSAGE_TOKEN_COUNTERS_MAX} messages streaming"
+        )
+
+
+def _get_message_token_entry(chat_id: str, message_id: str, user_id: str | None = None, model_name: str | None = None) -> dict:
+    key = (chat_id, message_id)
+    entry = MESSAGE_TOKEN_COUNTERS.pop(key, None)
+    if entry is None:
+        # Messages that never finalize must not grow this without bound
+        if len(MESSAGE_TOKEN_COUNTERS) >= MESSAGE_TOKEN_COUNTERS_MAX:
+            _evict_message_token_entries()
+
+        entry = {
+            "counter": StreamingTokenCounter(model_name),
+            "user_id": user_id,
+            "usage_recorded": False,
+        }
+    else:
+        entry["user_id"] = entry["user_id"] or user_id
+        entry["counter"].model_name = entry["counter"].model_name or model_name
+    # Re-inserted so iteration order is least recently advanced first
+    entry["updated_at"] = time.monotonic()
+    MESSAGE_TOKEN_COUNTERS[key] = entry
+    return entry
+
+
+def track_message_tokens(user_id: str, chat_id: str, message_id: str, content: str, model_name: str | None = None):
+    """Advance the message's token counter to `content`, tokenizing only the new suffix."""
+    try:
+        _get_message_token_entry(chat_id, message_id, user_id, model_name)["counter"].update(content)
+    except Exception as e:
+        log.warning(f"Error tracking tokens for message {message_id}: {e}")
+
+
+def mark_message_usage_recorded(chat_id: str, message_id: str):
+    """Provider-reported usage was recorded; skip the computed record at finalize."""
+    _get_message_token_entry(chat_id, message_id)["usage_recorded"] = True
+
+
+def finalize_message_tokens(chat_id: str, message_id: str):
+    """Emit the one computed usage record for a message and drop its counter."""
+    entry = MESSAGE_TOKEN_COUNTERS.pop((chat_id, message_id), None)
+    if entry is None or entry["usage_recorded"]:
+        return
+
+    counter = entry["counter"]
+    if counter.length == 0:
+        return
+
+    compute_tokens_and_record_message(
+        entry["user_id"],
+        chat_id,
+        message_id,
+        None,
+        counter.model_name,
+        tokens_total=counter.total,
+    )
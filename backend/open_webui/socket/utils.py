@@ -1,10 +1,15 @@
+import asyncio
 import json
+import logging
+import time
 import uuid
 from open_webui.utils.redis import get_redis_connection
 from open_webui.env import REDIS_KEY_PREFIX
 from typing import Optional, List, Tuple
 import pycrdt as Y
 
+log = logging.getLogger(__name__)
+
 
 class RedisLock:
     def __init__(
@@ -225,3 +230,152 @@ class YdocManager:
                 del self._updates[document_id]
             if document_id in self._users:
                 del self._users[document_id]
+
+
+class MessageWriteBuffer:
+    """Write-behind buffer for streamed message content.
+
+    Deltas are appended in memory per (chat_id, message_id) and written back
+    through ``save`` at most once per ``flush_interval`` seconds or every
+    ``flush_max_chars`` buffered characters. A trailing flush is scheduled on
+    the running loop so the last deltas land even if no completion event
+    arrives, and ``finalize``/``flush_all`` write out whatever is left.
+    """
+
+    def __init__(self, load, save, flush_interval=1.0, flush_max_chars=4096):
+        # load(chat_id, message_id) -> message dict (or None/{} if missing)
+        # save(chat_id, message_id, content) -> None
+        self._load = load
+        self._save = save
+        self.flush_interval = flush_interval
+        self.flush_max_chars = flush_max_chars
+        self._entries = {}
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_message(self, chat_id: str, message_id: str) -> Optional[dict]:
+        entry = self._entries.get((chat_id, message_id))
+        return entry["message"] if entry else None
+
+    def get_content(self, chat_id: str, message_id: str) -> Optional[str]:
+        entry = self._entries.get((chat_id, message_id))
+        if entry is None:
+            return None
+        if len(entry["parts"]) > 1:
+            entry["parts"] = ["".join(entry["parts"])]
+        return entry["parts"][0]
+
+    def append(self, chat_id: str, message_id: str, delta: str) -> Optional[dict]:
+        """Buffer a content delta; returns the cached message or None if missing."""
+        key = (chat_id, message_id)
+        entry = self._entries.get(key)
+
+        if entry is None:
+            message = self._load(chat_id, message_id)
+            if not message:
+                return None
+
+            entry = {
+                "message": message,
+                "parts": [message.get("content", "") or ""],
+                "pending": 0,
+                "last_flush": 0.0,
+                "timer": None,
+            }
+            self._entries[key] = entry
+
+        if not delta:
+            return entry["message"]
+
+        entry["parts"].append(delta)
+        entry["pending"] += len(delta)
+
+        if (
+            entry["pending"] >= self.flush_max_chars
+            or time.monotonic() - entry["last_flush"] >= self.flush_interval
+        ):
+            self._flush_entry(key, entry)
+        elif entry["timer"] is None:
+            try:
+                loop = asyncio.get_running_loop()
+                entry["timer"] = loop.call_later(
+                    self.flush_interval, self._flush_timer, key
+                )
+            except RuntimeError:
+                self._flush_entry(key, entry)
+
+        return entry["message"]
+
+    def replace(self, chat_id: str, message_id: str, content: str):
+        """Reset the buffered content after the caller wrote ``content`` itself."""
+        entry = self._entries.get((chat_id, message_id))
+        if entry is None:
+            return
+
+        entry["parts"] = [content or ""]
+        entry["message"]["content"] = content or ""
+        entry["pending"] = 0
+        self._cancel_timer(entry)
+
+    def flush(self, chat_id: str, message_id: str) -> bool:
+        key = (chat_id, message_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        return self._flush_entry(key, entry)
+
+    def finalize(self, chat_id: str, message_id: str) -> Optional[str]:
+        """Flush pending content and drop the entry; returns the final content."""
+        key = (chat_id, message_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        # If the write fails the entry is kept so flush_all() can retry it
+        self._flush_entry(key, entry)
+        self._cancel_timer(entry)
+        self._entries.pop(key, None)
+
+        return entry["parts"][0]
+
+    def flush_all(self):
+        for key in list(self._entries.keys()):
+            try:
+                self.finalize(*key)
+            except Exception as e:
+                log.warning(f"Failed to flush buffered message {key}: {e}")
+
+    def _flush_timer(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry["timer"] = None
+        try:
+            self._flush_entry(key, entry)
+        except Exception as e:
+            log.warning(f"Failed to flush buffered message {key}: {e}")
+
+    def _flush_entry(self, key, entry) -> bool:
+        if entry["pending"] == 0:
+            return False
+
+        self._cancel_timer(entry)
+        content = "".join(entry["parts"])
+        entry["parts"] = [content]
+
+        self._save(key[0], key[1], content)
+
+        entry["message"]["content"] = content
+        entry["pending"] = 0
+        entry["last_flush"] = time.monotonic()
+        return True
+
+    @staticmethod
+    def _cancel_timer(entry):
+        if entry["timer"] is not None:
+            entry["timer"].cancel()
+            entry["timer"] = None
@@ -34,6 +34,7 @@ class TestBillingUsage(AbstractPostgresTest):
         # simulate the emitter recording; call record_usage_event directly for unit behavior
         ts = int(time.time())
         record_usage_event(self.user.id, self.chat_id, "m1", 5, 10, 15, token_source="openai", ts=ts)
+        billing.flush_usage_ledger()
 
         # verify usage_event exists
         with self.postgres_engine.connect() as conn:
@@ -63,6 +64,8 @@ class TestBillingUsage(AbstractPostgresTest):
 
         # Call the helper which should compute tokens, persist to message, and record a usage_event
         main.compute_tokens_and_record_message(self.user.id, self.chat_id, msg_id, content, "gpt-3.5-turbo")
+        from open_webui.models.billing import flush_usage_ledger
+        flush_usage_ledger()
 
         # verify a usage_event exists for the user
         with self.postgres_engine.connect() as conn:
@@ -94,8 +97,14 @@ class TestBillingUsage(AbstractPostgresTest):
         import asyncio
         event_data = {"type": "message", "data": {"content": "Generated response from provider without usage."}}
 
-        # run emitter
-        asyncio.run(emitter(event_data))
+        # run emitter; usage is recorded once the message finalizes
+        async def stream():
+            await emitter(event_data)
+            await emitter({"type": "chat:completion", "data": {"done": True}})
+
+        asyncio.run(stream())
+        from open_webui.models.billing import flush_usage_ledger
+        flush_usage_ledger()
 
         # verify usage_event exists
         with self.postgres_engine.connect() as conn:
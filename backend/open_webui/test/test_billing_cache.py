@@ -0,0 +1,103 @@
+import time
+import uuid
+
+from sqlalchemy import text
+
+from open_webui.internal.db import get_db
+from open_webui.models import billing
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, px=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def _user_with_balance(tokens: int) -> str:
+    uid = f"cache_user_{uuid.uuid4().hex[:8]}"
+    with get_db() as db:
+        db.execute(
+            text("INSERT INTO user_token_balance (user_id, tokens_balance, updated_at) VALUES (:u, :t, :ts)"),
+            {"u": uid, "t": tokens, "ts": int(time.time())},
+        )
+        db.commit()
+    return uid
+
+
+def _set_balance(uid: str, tokens: int):
+    with get_db() as db:
+        db.execute(
+            text("UPDATE user_token_balance SET tokens_balance = :t WHERE user_id = :u"),
+            {"u": uid, "t": tokens},
+        )
+        db.commit()
+
+
+def test_balance_is_cached_until_invalidated(monkeypatch):
+    cache = billing.BillingCache(ttl=60)
+    monkeypatch.setattr(billing, "BILLING_CACHE", cache)
+    uid = _user_with_balance(100)
+
+    lookups = []
+    monkeypatch.setattr(
+        "open_webui.utils.telemetry.metrics.inc_billing_cache",
+        lambda kind, outcome: lookups.append((kind, outcome)),
+    )
+
+    assert billing.get_cached_user_balance(uid) == 100
+    _set_balance(uid, 50)
+    assert billing.get_cached_user_balance(uid) == 100
+    assert lookups == [("balance", "miss"), ("balance", "hit")]
+
+    cache.invalidate(uid)
+    assert billing.get_cached_user_balance(uid) == 50
+
+    # Users without a balance row read as 0 and that answer is cached too
+    assert billing.get_cached_user_balance("no-such-user") == 0
+    assert ("balance", "no-such-user") in cache._local
+
+
+def test_cached_balance_includes_queued_usage_and_flush_invalidates(monkeypatch):
+    cache = billing.BillingCache(ttl=60)
+    ledger = billing.UsageLedger(flush_interval=60)
+    monkeypatch.setattr(billing, "BILLING_CACHE", cache)
+    monkeypatch.setattr(billing, "USAGE_LEDGER", ledger)
+    uid = _user_with_balance(100)
+
+    assert billing.get_cached_user_balance(uid) == 100
+    billing.record_usage_event(uid, None, None, 0, 30, 30)
+    assert billing.get_cached_user_balance(uid) == 70
+
+    ledger.flush()
+    assert ("balance", uid) not in cache._local
+    assert billing.get_cached_user_balance(uid) == 70
+
+
+def test_subscription_cache_is_shared_through_redis(monkeypatch):
+    redis = FakeRedis()
+    cache = billing.BillingCache(ttl=60, redis=redis, key_prefix="test")
+    monkeypatch.setattr(billing, "BILLING_CACHE", cache)
+    uid = f"cache_user_{uuid.uuid4().hex[:8]}"
+
+    assert billing.get_cached_user_subscription(uid) is None
+    assert redis.data[f"test:billing:subscription:{uid}"] == '{"v": null}'
+
+    # Another worker's write goes through set_user_subscription and invalidates
+    billing.set_user_subscription(uid, "pro", status="active")
+    assert f"test:billing:subscription:{uid}" not in redis.data
+
+    sub = billing.get_cached_user_subscription(uid)
+    assert sub.tier_id == "pro"
+
+    # Served from Redis without touching the DB
+    monkeypatch.setattr(billing.Billing, "get_user_subscription", lambda user_id: None)
+    assert billing.get_cached_user_subscription(uid).tier_id == "pro"
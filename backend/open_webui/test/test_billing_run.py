@@ -0,0 +1,72 @@
+import time
+import uuid
+
+from open_webui.internal.db import engine, get_db
+from open_webui.models import billing
+
+
+def _ended_subscription(tier_id: str, period_start: int, period_end: int) -> str:
+    uid = f"run_user_{uuid.uuid4().hex[:8]}"
+    billing.set_user_subscription(uid, tier_id, period_start=period_start, period_end=period_end)
+    return uid
+
+
+def test_run_billing_bills_uninvoiced_ended_periods(monkeypatch):
+    billing.BillingInvoice.__table__.create(bind=engine, checkfirst=True)
+
+    now = int(time.time())
+    period_start, period_end = now - 40 * 86400, now - 10 * 86400
+
+    heavy = _ended_subscription("starter", period_start, period_end)
+    light = _ended_subscription("pro", period_start, period_end)
+    invoiced = _ended_subscription("starter", period_start, period_end)
+    current = _ended_subscription("starter", now - 86400, now + 86400)
+
+    with get_db() as db:
+        db.add(
+            billing.UserTokenUsage(
+                id=str(uuid.uuid4()),
+                user_id=heavy,
+                period_start=period_start,
+                period_end=period_end,
+                tokens_prompt=0,
+                tokens_completion=500_000,
+                tokens_total=500_000,
+                created_at=now,
+                updated_at=now,
+            )
+        )
+        db.commit()
+    billing.Billing.create_invoice(invoiced, period_start, period_end)
+
+    to_bill = {u["user_id"]: u for u in billing.Billing.get_users_to_bill(now)}
+    assert heavy in to_bill and light in to_bill
+    assert invoiced not in to_bill and current not in to_bill
+    assert to_bill[light]["tier_id"] == "pro"
+
+    usage = billing.Billing.get_usage_for_periods(list(to_bill.values()))
+    assert usage[(heavy, period_start, period_end)] == 500_000
+    assert usage[(light, period_start, period_end)] == 0
+
+    charged = []
+
+    def fake_charge(invoice_id, stripe_api_key):
+        charged.append(invoice_id)
+        return {"success": True, "error": None, "payment_intent_id": f"pi_{invoice_id}"}
+
+    monkeypatch.setattr(billing.Billing, "charge_invoice", fake_charge)
+    monkeypatch.setattr(billing.Billing, "grant_monthly_tokens", lambda user_id, tier_id: 0)
+
+    results = billing.Billing.run_billing("sk_test", as_of=now)
+    details = {d["user_id"]: d for d in results["details"]}
+
+    assert results["failed"] == 0
+    assert results["invoiced"] == results["charged"] == len(charged) == results["checked"]
+    assert details[heavy]["status"] == details[light]["status"] == "paid"
+
+    # Same pricing as calculate_monthly_bill: base + 100K tokens over at 5c/1K
+    assert details[heavy]["amount_cents"] == 2000 + 500
+    assert details[light]["amount_cents"] == 3000
+
+    # Periods were advanced, so a second run finds nothing to bill
+    assert not {heavy, light} & {u["user_id"] for u in billing.Billing.get_users_to_bill(now)}
@@ -0,0 +1,195 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from open_webui.retrieval.bm25 import BM25Index, BM25IndexCache
+from open_webui.retrieval.vector.main import GetResult
+
+WORDS = "coolant thermostat stuck open closed fan relay fuse p0128 p0217 sensor wiring pump leak".split()
+WORDS += [f"term{i}" for i in range(300)]  # keep the named terms rare enough for positive IDF
+
+
+def _corpus(n, seed=0):
+    rnd = random.Random(seed)
+    return [" ".join(rnd.choices(WORDS, k=rnd.randint(3, 25))) for _ in range(n)]
+
+
+def _okapi_scores(corpus, query, k1=1.5, b=0.75, epsilon=0.25):
+    """Reference BM25Okapi, written out as rank_bm25 computes it."""
+    docs = [Counter(text.split()) for text in corpus]
+    lens = [sum(d.values()) for d in docs]
+    avgdl = sum(lens) / len(docs)
+    df = Counter(term for d in docs for term in d)
+    idf = {t: math.log(len(docs) - f + 0.5) - math.log(f + 0.5) for t, f in df.items()}
+    eps = epsilon * sum(idf.values()) / len(idf)
+    idf = {t: (eps if v < 0 else v) for t, v in idf.items()}
+    return [
+        sum(
+            idf.get(q, 0) * d[q] * (k1 + 1) / (d[q] + k1 * (1 - b + b * dl / avgdl))
+            for q in query.split()
+        )
+        for d, dl in zip(docs, lens)
+    ]
+
+
+def _result(texts, prefix="id"):
+    return GetResult(
+        ids=[[f"{prefix}{i}" for i in range(len(texts))]],
+        documents=[texts],
+        metadatas=[[{"n": i} for i in range(len(texts))]],
+    )
+
+
+def test_scores_match_bm25_okapi():
+    corpus = _corpus(200)
+    index = BM25Index.from_get_result(_result(corpus))
+    for query in ["coolant leak", "p0217 fan fan relay", "unknown words", "sensor"]:
+        assert index.get_scores(query).tolist() == pytest.approx(_okapi_scores(corpus, query))
+
+    top = index.search("stuck thermostat", k=5)
+    scores = _okapi_scores(corpus, "stuck thermostat")
+    expected = sorted(range(len(corpus)), key=lambda i: -scores[i])[:5]
+    assert len({scores[i] for i in expected}) == 5
+    assert [d.metadata["n"] for d in top] == expected
+    assert top[0].page_content == corpus[expected[0]]
+
+
+def test_incremental_updates_match_rebuild(tmp_path):
+    corpus = _corpus(120, seed=1)
+    index = BM25Index.from_get_result(_result(corpus[:50]))
+    index.search("pump", k=3)  # merge postings before appending more
+    index.add([f"id{i}" for i in range(50, 120)], corpus[50:], [{"n": i} for i in range(50, 120)])
+    assert index.remove(["id3", "id77", "missing"]) == 2
+
+    live = [t for i, t in enumerate(corpus) if i not in (3, 77)]
+    scores = index.get_scores("coolant pump leak")
+    assert [s for i, s in enumerate(scores) if i not in (3, 77)] == pytest.approx(
+        _okapi_scores(live, "coolant pump leak")
+    )
+    assert {d.metadata["n"] for d in index.search("coolant", k=200)} == set(range(120)) - {3, 77}
+    assert index.to_get_result().ids[0] == [f"id{i}" for i in range(120) if i not in (3, 77)]
+
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.get_scores("coolant pump leak").tolist() == scores.tolist()
+    assert loaded.to_get_result() == index.to_get_result()
+
+
+def test_cache_lru_persistence_and_invalidation(tmp_path):
+    cache = BM25IndexCache(max_size=2, persist_dir=str(tmp_path))
+    enriched = lambda result: [f"{t} extra" for t in result.documents[0]]  # noqa: E731
+
+    a = cache.get_or_build("a", _result(["coolant leak"]))
+    cache.get_or_build("a", _result(["coolant leak"]), enriched=True, texts_fn=enriched)
+    cache.get_or_build("b", _result(["fan relay"]))
+    assert cache.get("a") is not a  # evicted from memory, reloaded from disk
+    assert cache.get("a").texts == ["coolant leak"]
+    assert cache.get("a", enriched=True).texts == ["coolant leak extra"]
+    assert cache.get_result("a").documents == [["coolant leak"]]
+
+    cache.add("a", ["new"], {False: ["fuse p0128"], True: ["fuse p0128 extra"]}, ["fuse p0128"], [{}])
+    cache.flush()
+    assert BM25IndexCache(persist_dir=str(tmp_path)).get("a").texts == ["coolant leak", "fuse p0128"]
+    assert cache.get("a", enriched=True).documents == ["coolant leak", "fuse p0128"]
+
+    cache.invalidate("a")
+    assert cache.get("a") is None and cache.get("a", enriched=True) is None
+    assert cache.get("b") is not None
+    cache.invalidate()
+    assert cache.get("b") is None and not list(tmp_path.iterdir())
+
+
+def test_cache_sees_other_workers_changes_and_batches_persists(tmp_path):
+    worker_a = BM25IndexCache(persist_dir=str(tmp_path), persist_interval=60)
+    worker_b = BM25IndexCache(persist_dir=str(tmp_path), persist_interval=60)
+    worker_a.get_or_build("a", _result(["coolant leak"]))
+    assert worker_b.get("a").texts == ["coolant leak"]
+    saved = (tmp_path / "a.npz").stat().st_mtime_ns
+
+    for i in range(3):
+        worker_a.add("a", [f"new{i}"], {False: [f"fan relay {i}"]}, [f"fan relay {i}"], [{}])
+    assert (tmp_path / "a.npz").stat().st_mtime_ns == saved  # not rewritten per insert
+    assert len(worker_a.get("a")) == 4
+
+    # Worker B's copy is out of date; it rebuilds instead of serving stale scores
+    assert worker_b.get("a") is None
+    rebuilt = worker_b.get_or_build("a", _result(["coolant leak", "fan relay 0", "fan relay 1", "fan relay 2"]))
+    assert len(rebuilt) == 4
+    assert worker_a.get("a") is not None  # both now at the same version
+
+    worker_a.flush()
+    assert BM25IndexCache(persist_dir=str(tmp_path)).get("a") is not None
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        return [key for key in list(self.data) if key.startswith(prefix)]
+
+
+def test_cache_invalidation_reaches_other_workers_through_redis():
+    redis = FakeRedis()
+    worker_a = BM25IndexCache(redis=redis)
+    worker_b = BM25IndexCache(redis=redis)
+    assert worker_a.shared and not BM25IndexCache().shared
+    worker_a.get_or_build("a", _result(["coolant leak", "fuse p0128"]))
+    worker_b.get_or_build("a", _result(["coolant leak", "fuse p0128"]))
+    assert worker_b.get_result("a") is not None
+
+    # A document is deleted through worker A
+    worker_a.invalidate("a")
+    assert worker_b.get("a") is None and worker_b.get_result("a") is None
+    worker_b.get_or_build("a", _result(["coolant leak"]))
+
+    worker_a.add("a", ["new"], {False: ["fan relay"]}, ["fan relay"], [{}])
+    assert worker_b.get("a") is None
+    worker_b.get_or_build("a", _result(["coolant leak", "fan relay"]))
+    worker_a.invalidate()
+    assert not redis.data and worker_b.get("a") is None
+
+
+def test_disabled_cache_keeps_nothing():
+    cache = BM25IndexCache(max_size=0)
+    assert len(cache.get_or_build("a", _result(["coolant leak"]))) == 1
+    assert cache.get("a") is None and cache.get_result("a") is None
+
+
+def test_cache_ttl_without_persist_dir(monkeypatch):
+    import open_webui.retrieval.bm25 as bm25
+
+    now = [1000.0]
+    monkeypatch.setattr(bm25.time, "monotonic", lambda: now[0])
+    cache = BM25IndexCache(ttl=60)
+    cache.get_or_build("a", _result(["coolant leak"]))
+    now[0] += 30
+    assert cache.get("a") is not None
+    now[0] += 31
+    assert cache.get("a") is None
+
+
+def test_matches_langchain_bm25_retriever():
+    pytest.importorskip("rank_bm25")
+    from langchain_community.retrievers import BM25Retriever
+
+    corpus = _corpus(300, seed=2)
+    index = BM25Index.from_get_result(_result(corpus))
+    retriever = BM25Retriever.from_texts(corpus, metadatas=[{"n": i} for i in range(300)], k=10)
+    for query in ["coolant leak", "p0128 sensor wiring"]:
+        expected = retriever.vectorizer.get_scores(query.split())
+        assert index.get_scores(query).tolist() == pytest.approx(expected.tolist())
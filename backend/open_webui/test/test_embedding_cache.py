@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from open_webui.retrieval.embedding_cache import EmbeddingCache
+
+
+def _fake_backend(calls):
+    async def embed(query, prefix=None, user=None):
+        calls.append(query)
+        texts = [query] if isinstance(query, str) else query
+        vectors = [[float(len(t)), float(len(prefix or "")), 0.5] for t in texts]
+        return vectors[0] if isinstance(query, str) else vectors
+
+    return embed
+
+
+def test_only_misses_reach_backend(tmp_path, monkeypatch):
+    recorded = []
+    monkeypatch.setattr(
+        "open_webui.utils.telemetry.metrics.inc_embedding_cache",
+        lambda engine, outcome, count=1: recorded.append((engine, outcome, count)),
+    )
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite3"))
+    calls = []
+    embed = cache.wrap(_fake_backend(calls), "openai", "text-embedding-3-small")
+
+    first = asyncio.run(embed(["a", "bb", "a"], prefix="doc: "))
+    assert first == [[1.0, 5.0, 0.5], [2.0, 5.0, 0.5], [1.0, 5.0, 0.5]]
+    assert calls == [["a", "bb"]]
+
+    second = asyncio.run(embed(["bb", "ccc", "a"], prefix="doc: "))
+    assert second == [[2.0, 5.0, 0.5], [3.0, 5.0, 0.5], [1.0, 5.0, 0.5]]
+    assert calls[1] == ["ccc"]
+
+    # A single query, a different prefix and a different model are separate keys
+    assert asyncio.run(embed("bb", prefix="doc: ")) == [2.0, 5.0, 0.5]
+    assert asyncio.run(embed("bb")) == [2.0, 0.0, 0.5]
+    other = cache.wrap(_fake_backend(calls), "openai", "other-model")
+    asyncio.run(other("bb", prefix="doc: "))
+    assert calls[2:] == ["bb", "bb"]
+
+    assert cache.hits == 4 and cache.misses == 5
+    assert ("openai", "hit", 2) in recorded and ("openai", "miss", 1) in recorded
+
+    # Survives a restart
+    reopened = EmbeddingCache(str(tmp_path / "emb.sqlite3"))
+    assert reopened.get_many([EmbeddingCache.key("openai", "other-model", "doc: ", "bb")])
+
+
+def test_vectors_round_trip_as_float32(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite3"))
+    vector = np.random.default_rng(0).standard_normal(384).tolist()
+    cache.put_many({"k": vector})
+    assert cache.get_many(["k", "missing"])["k"] == pytest.approx(vector, rel=1e-6)
+    assert list(cache.get_many(["k"])) == ["k"]
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    row = 64 * 4 + 2  # float32 payload plus key length
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite3"), max_bytes=row * 10)
+    for i in range(10):
+        cache.put_many({f"k{i}": [float(i)] * 64})
+    cache.get_many(["k0"])  # refresh k0 so k1 is the oldest
+
+    cache.put_many({"kx": [1.0] * 64})
+    assert cache.size_bytes() <= row * 9
+    assert "k0" in cache.get_many(["k0"])
+    assert not cache.get_many(["k1", "k2"])
+
+    cache.put_many({"k0": [2.0] * 64})  # replacing a key does not double count
+    assert cache.size_bytes() == len(cache.get_many([f"k{i}" for i in range(10)] + ["kx"])) * row
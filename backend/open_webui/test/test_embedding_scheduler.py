@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from open_webui.retrieval.embedding_scheduler import EmbeddingScheduler, get_scheduler
+
+
+def _run(scheduler, texts, embed):
+    return asyncio.run(scheduler.run(texts, embed))
+
+
+def test_in_flight_limit_and_order_across_endpoints():
+    active, peak, seen = 0, 0, []
+
+    async def embed(batch, url):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        seen.append(url)
+        await asyncio.sleep(0.001)
+        active -= 1
+        return [[float(t)] for t in batch]
+
+    scheduler = EmbeddingScheduler(["http://a", "http://b"], batch_size=4, max_in_flight=3)
+    texts = list(range(103))
+    assert _run(scheduler, texts, embed) == [[float(t)] for t in texts]
+    assert peak == 3
+    assert {"http://a", "http://b"} == set(seen)
+
+
+def test_batch_size_adapts_to_latency_and_errors():
+    scheduler = EmbeddingScheduler(["u"], batch_size=8, target_latency=1.0, max_batch_size=16)
+    scheduler._observe(8, 0.1)
+    assert scheduler.batch_size == 10
+    for _ in range(5):
+        scheduler._observe(scheduler.batch_size, 0.1)
+    assert scheduler.batch_size == 16
+    scheduler._observe(16, 2.0)
+    assert scheduler.batch_size == 8
+    scheduler._observe(8, None)
+    assert scheduler.batch_size == 4
+    scheduler._observe(2, 0.1)  # a short tail batch says nothing about capacity
+    assert scheduler.batch_size == 4
+
+
+def test_only_failed_batches_are_retried():
+    calls = []
+    failed = set()
+
+    async def embed(batch, url):
+        calls.append(list(batch))
+        if 5 in batch and 5 not in failed:
+            failed.add(5)
+            raise RuntimeError("node overloaded")
+        return [[float(t)] for t in batch]
+
+    scheduler = EmbeddingScheduler(["u"], batch_size=4, max_batch_size=4, max_in_flight=2, backoff=0.001)
+    assert _run(scheduler, list(range(12)), embed) == [[float(t)] for t in range(12)]
+
+    with_five = [batch for batch in calls if 5 in batch]
+    assert with_five[0] == [4, 5, 6, 7] and len(with_five) == 2
+    # Re-cut to the (shrunken) current batch size; nothing else is sent twice
+    assert with_five[1][0] == 4 and len(with_five[1]) < 4
+    succeeded = [t for batch in calls for t in batch]
+    succeeded.remove(4), succeeded.remove(5), succeeded.remove(6), succeeded.remove(7)
+    assert sorted(succeeded) == list(range(12))
+
+
+def test_gives_up_after_max_retries():
+    async def embed(batch, url):
+        return None if 0 in batch else [[0.0]] * len(batch)
+
+    scheduler = EmbeddingScheduler(["u"], batch_size=2, max_retries=2, backoff=0.001)
+    with pytest.raises(ValueError, match="failed after 2 attempts"):
+        _run(scheduler, list(range(6)), embed)
+
+
+def test_failing_endpoint_rests_while_others_work():
+    calls = {"bad": 0, "good": 0}
+
+    async def embed(batch, url):
+        calls[url] += len(batch)
+        await asyncio.sleep(0)
+        if url == "bad":
+            raise ConnectionError("refused")
+        return [[1.0]] * len(batch)
+
+    scheduler = EmbeddingScheduler(["bad", "good"], batch_size=1, max_in_flight=1, backoff=0.01)
+    _run(scheduler, list(range(20)), embed)
+    assert calls["bad"] <= 3 and calls["good"] == 20  # texts, not requests
+
+
+def test_concurrent_runs_share_the_in_flight_limit():
+    active, peak = 0, 0
+
+    async def embed(batch, url):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.001)
+        active -= 1
+        return [[float(t)] for t in batch]
+
+    scheduler = get_scheduler("ollama", ["http://node"], batch_size=2, max_in_flight=3)
+    assert get_scheduler("ollama", ["http://node"], batch_size=2) is scheduler
+    assert get_scheduler("ollama", ["http://other"], batch_size=2) is not scheduler
+
+    async def uploads():
+        return await asyncio.gather(
+            *(scheduler.run(list(range(20)), embed) for _ in range(4)),
+            scheduler.run(list(range(20)), embed, concurrency=1),
+        )
+
+    assert all(r == [[float(t)] for t in range(20)] for r in asyncio.run(uploads()))
+    assert peak == 3
+
+
+def test_unknown_embedding_engine_raises():
+    from open_webui.retrieval.utils import _get_embedding_function
+
+    with pytest.raises(ValueError, match="Unknown embedding engine"):
+        _get_embedding_function("openia", "model", None, "http://u", "key", 8)
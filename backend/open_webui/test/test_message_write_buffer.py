@@ -0,0 +1,109 @@
+import asyncio
+
+from open_webui.socket.utils import MessageWriteBuffer
+
+
+def _make_buffer(messages, saves, **kwargs):
+    def load(chat_id, message_id):
+        return dict(messages.get((chat_id, message_id), {}))
+
+    def save(chat_id, message_id, content):
+        saves.append((chat_id, message_id, content))
+        messages[(chat_id, message_id)] = {"content": content}
+
+    return MessageWriteBuffer(load, save, **kwargs)
+
+
+def test_deltas_are_coalesced_until_finalize():
+    messages = {("c1", "m1"): {"content": "Hello"}}
+    saves = []
+    buffer = _make_buffer(messages, saves, flush_interval=60, flush_max_chars=10_000)
+
+    async def run():
+        for delta in [",", " world", "!"] * 10:
+            buffer.append("c1", "m1", delta)
+        # First delta is written straight away, the rest are held in memory
+        assert len(saves) == 1
+        return buffer.finalize("c1", "m1")
+
+    final = asyncio.run(run())
+
+    assert final == "Hello" + ", world!" * 10
+    assert saves[-1] == ("c1", "m1", final)
+    assert len(saves) == 2
+    assert ("c1", "m1") not in buffer
+
+
+def test_size_budget_triggers_flush():
+    messages = {("c1", "m1"): {"content": ""}}
+    saves = []
+    buffer = _make_buffer(messages, saves, flush_interval=60, flush_max_chars=8)
+
+    async def run():
+        for _ in range(9):
+            buffer.append("c1", "m1", "ab")
+
+    asyncio.run(run())
+
+    # 1 leading write, then one per 8 buffered characters
+    assert len(saves) == 1 + 2
+    assert saves[-1][2] == "ab" * 9
+
+
+def test_trailing_timer_flushes_without_completion():
+    messages = {("c1", "m1"): {"content": ""}}
+    saves = []
+    buffer = _make_buffer(messages, saves, flush_interval=0.05, flush_max_chars=10_000)
+
+    async def run():
+        buffer.append("c1", "m1", "a")
+        buffer.append("c1", "m1", "b")
+        buffer.append("c1", "m1", "c")
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+
+    assert saves[-1] == ("c1", "m1", "abc")
+    assert len(saves) == 2
+
+
+def test_missing_message_is_not_buffered():
+    saves = []
+    buffer = _make_buffer({}, saves)
+
+    assert buffer.append("c1", "missing", "delta") is None
+    assert len(buffer) == 0
+    assert saves == []
+
+
+def test_failed_final_flush_is_retried_by_flush_all():
+    messages = {("c1", "m1"): {"content": ""}}
+    saves = []
+    fail = {"on": False}
+
+    def save(chat_id, message_id, content):
+        if fail["on"]:
+            raise RuntimeError("db unavailable")
+        saves.append(content)
+
+    buffer = MessageWriteBuffer(
+        lambda c, m: dict(messages[(c, m)]), save, flush_interval=60
+    )
+
+    async def run():
+        buffer.append("c1", "m1", "a")
+        buffer.append("c1", "m1", "b")
+        fail["on"] = True
+        try:
+            buffer.finalize("c1", "m1")
+        except RuntimeError:
+            pass
+
+    asyncio.run(run())
+    assert ("c1", "m1") in buffer
+
+    fail["on"] = False
+    buffer.flush_all()
+
+    assert saves[-1] == "ab"
+    assert len(buffer) == 0
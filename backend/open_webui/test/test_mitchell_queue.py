@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+
+from open_webui.internal.db import get_db
+from open_webui.models.mitchell import Mitchell, MitchellAgent, MitchellQuery
+from open_webui.routers import mitchell as mitchell_router
+
+
+class FakeUser:
+    id = "user-1"
+
+
+@pytest.fixture(autouse=True)
+def empty_queue():
+    with get_db() as db:
+        db.query(MitchellQuery).delete()
+        db.query(MitchellAgent).delete()
+        db.commit()
+    yield
+
+
+def _enqueue(question, priority=0):
+    return Mitchell.enqueue({"year": 2019, "make": "Ford"}, question, priority=priority).id
+
+
+def test_claims_follow_priority_then_age_and_survive_restart():
+    low = _enqueue("low")
+    high_old = _enqueue("high old", priority=5)
+    high_new = _enqueue("high new", priority=5)
+    mid = _enqueue("mid", priority=2)
+    for agent in ("a1", "a2", "a3", "a4", "a5"):
+        Mitchell.upsert_agent(agent, name=agent)
+
+    assert Mitchell.claim("a1").id == high_old
+    assert Mitchell.claim("a1").id == high_old  # an agent keeps its assignment
+    assert Mitchell.claim("a2").id == high_new
+    assert Mitchell.claim("a3").id == mid
+
+    # State lives in the database, so a fresh table object (another worker,
+    # or the app after a restart) sees the same queue
+    fresh = type(Mitchell)()
+    assert fresh.claim("a4").id == low
+    assert fresh.claim("a5") is None
+
+    query, already = fresh.complete(low, "a4", "ok", answer="torque spec")
+    assert not already and query.status == "ok" and query.answer == "torque spec"
+    assert Mitchell.complete(low, "a4", "error")[1] is True
+    assert Mitchell.claim("a4") is None
+
+
+def test_stale_assignments_are_reclaimed():
+    qid = _enqueue("brake bleed sequence")
+    Mitchell.upsert_agent("dead", name="dead")
+    Mitchell.upsert_agent("alive", name="alive")
+    assert Mitchell.claim("dead").id == qid
+    assert Mitchell.reclaim_stale(60) == 0
+
+    with get_db() as db:
+        db.query(MitchellAgent).filter_by(id="dead").update(
+            {"last_heartbeat": time.time_ns() - int(120e9)}
+        )
+        db.commit()
+    assert Mitchell.reclaim_stale(60) == 1
+    assert Mitchell.claim("alive").id == qid
+
+
+def test_long_poll_wakes_when_work_arrives():
+    Mitchell.upsert_agent("poller", name="poller")
+
+    async def scenario():
+        poll = asyncio.create_task(
+            mitchell_router.get_pending_query(None, agent_id="poller", wait=5)
+        )
+        await asyncio.sleep(0.2)
+        assert not poll.done()
+        started = time.monotonic()
+        created = await mitchell_router.create_query(
+            None,
+            mitchell_router.CreateQueryRequest(vehicle={"year": 2020}, question="firing order"),
+            user=FakeUser(),
+        )
+        work = await poll
+        return created, work, time.monotonic() - started
+
+    created, work, latency = asyncio.run(scenario())
+    assert work["query_id"] == created.query_id and work["question"] == "firing order"
+    assert latency < mitchell_router._CROSS_WORKER_POLL / 2
+
+    # Without wait the endpoint answers immediately
+    assert asyncio.run(mitchell_router.get_pending_query(None, agent_id="poller")) == work
+    with pytest.raises(Exception):
+        asyncio.run(mitchell_router.get_pending_query(None, agent_id="unknown"))
+
+
+def test_finished_queries_are_pruned_and_listed_newest_first():
+    old = _enqueue("old")
+    new = _enqueue("new")
+    pending = _enqueue("still pending")
+    Mitchell.upsert_agent("a1", name="a1")
+    for qid in (old, new):
+        Mitchell.claim("a1")
+        Mitchell.complete(qid, "a1", "ok", answer="done")
+
+    assert [q.id for q in Mitchell.get_queries(["ok"], limit=1)] == [new]
+    assert [q.id for q in Mitchell.get_queries(limit=3)] == [pending, new, old]
+
+    with get_db() as db:
+        db.query(MitchellQuery).filter_by(id=old).update(
+            {"processed_at": time.time_ns() - int(40 * 86400e9)}
+        )
+        db.commit()
+    assert Mitchell.prune_finished(30 * 86400) == 1
+    assert Mitchell.get_query(old) is None
+    assert Mitchell.get_query(new) is not None and Mitchell.get_query(pending) is not None
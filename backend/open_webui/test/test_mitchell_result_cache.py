@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+import pytest
+
+from open_webui.internal.db import get_db
+from open_webui.models.mitchell import (
+    MITCHELL_RESULT_CACHE,
+    Mitchell,
+    MitchellAgent,
+    MitchellQuery,
+    MitchellResult,
+    MitchellResultCache,
+)
+from open_webui.routers import mitchell as mitchell_router
+
+F150 = {"year": 2018, "make": "Ford", "model": "F-150", "engine": "5.0L V8"}
+
+
+class FakeUser:
+    id = "user-1"
+
+
+@pytest.fixture(autouse=True)
+def empty_tables():
+    with get_db() as db:
+        db.query(MitchellResult).delete()
+        db.query(MitchellQuery).delete()
+        db.query(MitchellAgent).delete()
+        db.commit()
+    MITCHELL_RESULT_CACHE.clear_memory()
+    yield
+    MITCHELL_RESULT_CACHE.clear_memory()
+
+
+def _create(question="oil capacity", vehicle=F150, **metadata):
+    return asyncio.run(
+        mitchell_router.create_query(
+            None,
+            mitchell_router.CreateQueryRequest(
+                vehicle=vehicle, question=question, metadata=metadata
+            ),
+            user=FakeUser(),
+        )
+    )
+
+
+def _answer(query_id, answer="7.7 qt with filter"):
+    Mitchell.upsert_agent("agent", name="agent")
+    assert Mitchell.claim("agent").id == query_id
+    return asyncio.run(
+        mitchell_router.submit_query_result(
+            None, query_id, {"agent_id": "agent", "status": "ok", "answer": answer}
+        )
+    )
+
+
+def test_key_normalizes_vehicle_and_question():
+    key = MitchellResultCache.key(F150, "Oil capacity?", "get_fluid_capacities", {"fluid_type": "oil"})
+    same = MitchellResultCache.key(
+        {"make": " ford", "model": "f-150", "engine": "5.0l  v8", "year": "2018", "trim": ""},
+        "oil   CAPACITY",
+        "get_fluid_capacities",
+        {"fluid_type": "oil"},
+    )
+    assert key == same
+    assert key != MitchellResultCache.key(F150, "oil capacity", "get_fluid_capacities", {"fluid_type": "coolant"})
+    assert key != MitchellResultCache.key({**F150, "engine": "3.5L V6"}, "oil capacity", "get_fluid_capacities", {"fluid_type": "oil"})
+
+
+def test_concurrent_identical_requests_share_one_query_then_hit_cache(monkeypatch):
+    monkeypatch.setattr(mitchell_router, "ingest_to_rag", lambda *a: asyncio.sleep(0, False))
+
+    first = _create(tool="get_fluid_capacities")
+    joined = _create(question="Oil capacity?", tool="get_fluid_capacities")
+    other_tool = _create(tool="get_torque_specs")
+    assert joined.query_id == first.query_id and joined.status == "pending"
+    assert other_tool.query_id != first.query_id
+    assert len(Mitchell.get_queries(["pending"])) == 2
+
+    _answer(first.query_id)
+
+    hit = _create(tool="get_fluid_capacities")
+    assert hit.status == "ok" and hit.message == "Answered from cache"
+    assert hit.query_id == first.query_id and hit.result["answer"] == "7.7 qt with filter"
+    # Nothing new was queued for the agent
+    assert [q.id for q in Mitchell.get_queries(["pending"])] == [other_tool.query_id]
+
+    # The persistent tier answers after the in-process tier is gone
+    MITCHELL_RESULT_CACHE.clear_memory()
+    assert _create(tool="get_fluid_capacities").result["answer"] == "7.7 qt with filter"
+
+    fresh = _create(tool="get_fluid_capacities", no_cache=True)
+    assert fresh.status == "pending" and fresh.query_id != first.query_id
+
+
+def test_per_tool_ttls_and_errors_are_not_cached():
+    cache = MitchellResultCache(ttl=60, tool_ttls={"get_tsb_list": 0, "get_dtc_info": 0.05})
+    assert cache.ttl_for("get_fluid_capacities") == 30 * 86400
+    assert cache.ttl_for(None) == 60
+
+    assert not cache.put("tsb", "get_tsb_list", "q1", {"answer": "..."})
+    assert cache.get("tsb") is None
+    assert cache.put("dtc", "get_dtc_info", "q2", {"answer": "P0300"})
+    assert cache.get("dtc") == {"answer": "P0300"}
+    time.sleep(0.1)
+    assert cache.get("dtc") is None
+    assert cache.purge_expired() == 1
+
+    query_id = _create(question="why misfire").query_id
+    Mitchell.upsert_agent("agent", name="agent")
+    Mitchell.claim("agent")
+    asyncio.run(
+        mitchell_router.submit_query_result(
+            None, query_id, {"agent_id": "agent", "status": "error", "error": "timeout"}
+        )
+    )
+    assert _create(question="why misfire").query_id != query_id
+
+
+def test_zero_ttl_disables_built_in_tool_ttls():
+    cache = MitchellResultCache(ttl=0, tool_ttls={"get_tsb_list": 60})
+    assert cache.ttl_for("get_fluid_capacities") == 0
+    assert cache.ttl_for("get_torque_specs") == 0
+    assert not cache.put("oil", "get_fluid_capacities", "q1", {"answer": "7.7 qt"})
+    assert cache.get("oil") is None
+    # An explicit per-tool TTL still applies
+    assert cache.ttl_for("get_tsb_list") == 60
+
+
+def test_queue_maintenance_purges_expired_rows(monkeypatch):
+    cache = MitchellResultCache(ttl=60, tool_ttls={"get_dtc_info": 0.05})
+    cache.put("dtc", "get_dtc_info", "q1", {"answer": "P0300"})
+    cache.put("oil", "get_fluid_capacities", "q2", {"answer": "7.7 qt"})
+    time.sleep(0.1)
+    monkeypatch.setattr(mitchell_router, "MITCHELL_RESULT_CACHE", cache)
+    monkeypatch.setattr(mitchell_router, "_last_prune", -mitchell_router._PRUNE_INTERVAL)
+
+    mitchell_router._maintain_queue()
+
+    with get_db() as db:
+        assert [row.key for row in db.query(MitchellResult).all()] == ["oil"]
@@ -1,6 +1,6 @@
 import pytest
 
-from open_webui.local_tokenizers import count_tokens_for_model
+from open_webui.local_tokenizers import count_tokens_for_model, StreamingTokenCounter
 
 
 
@@ -24,3 +24,31 @@ def test_count_tokens_for_models(model):
     n = count_tokens_for_model(text, model)
     assert isinstance(n, int)
     assert n >= 1
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 17, 200])
+def test_streaming_counter_matches_full_count(chunk):
+    text = (
+        "The coolant temperature sensor reads 212°F at idle, while the ECT "
+        "signal voltage drops to 0.45V. Check connector C101 pin 3 — "
+        "resistance should be 2.5kΩ at 68°F.\n\n"
+    ) * 40
+    counter = StreamingTokenCounter(min_chunk_chars=64)
+    for i in range(0, len(text), chunk):
+        counter.feed(text[i : i + chunk])
+
+    assert counter.length == len(text)
+    assert counter.total == count_tokens_for_model(text)
+
+
+def test_streaming_counter_update_only_feeds_suffix():
+    counter = StreamingTokenCounter(min_chunk_chars=16)
+    content = ""
+    for word in ["alpha ", "beta, ", "gamma! ", "delta"] * 20:
+        content += word
+        counter.update(content)
+    assert counter.total == count_tokens_for_model(content)
+
+    # Content that does not extend what was seen is recounted from scratch
+    counter.update("completely different")
+    assert counter.total == count_tokens_for_model("completely different")
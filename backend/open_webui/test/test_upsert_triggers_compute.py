@@ -19,15 +19,50 @@ def test_upsert_triggers_compute(monkeypatch):
     chats = Chats
     chats.get_chat_by_id = lambda id: FakeChat()
 
-    def fake_compute(user_id, chat_id, message_id, content, model_name=None):
-        calls['compute'] = (user_id, chat_id, message_id, content, model_name)
+    def fake_compute(user_id, chat_id, message_id, content, model_name=None, tokens_total=None):
+        calls.setdefault('compute', []).append((user_id, chat_id, message_id, content, model_name, tokens_total))
 
     monkeypatch.setattr('open_webui.socket.main.compute_tokens_and_record_message', fake_compute)
 
-    # Call upsert which should trigger the compute helper for content without tokens
+    from open_webui.socket.main import finalize_message_tokens
+
+    # Upserts only advance the message's token counter...
     chats.upsert_message_to_chat_by_id_and_message_id('chat-1', 'msg-1', {'content': 'hello there'})
+    chats.upsert_message_to_chat_by_id_and_message_id('chat-1', 'msg-1', {'content': 'hello there, general'})
+    assert 'compute' not in calls
+
+    # ...and finalizing the message records usage exactly once
+    finalize_message_tokens('chat-1', 'msg-1')
+    finalize_message_tokens('chat-1', 'msg-1')
+
+    assert len(calls['compute']) == 1
+    assert calls['compute'][0][0] == 'user123'
+    assert calls['compute'][0][1] == 'chat-1'
+    assert calls['compute'][0][2] == 'msg-1'
+    assert calls['compute'][0][5] >= 4
+
+
+def test_token_counter_eviction_keeps_live_counts(monkeypatch):
+    import open_webui.socket.main as socket_main
+
+    calls = []
+
+    def fake_compute(user_id, chat_id, message_id, content, model_name=None, tokens_total=None):
+        calls.append((chat_id, message_id, tokens_total))
+
+    monkeypatch.setattr(socket_main, 'compute_tokens_and_record_message', fake_compute)
+    monkeypatch.setattr(socket_main, 'MESSAGE_TOKEN_COUNTERS', {})
+    monkeypatch.setattr(socket_main, 'MESSAGE_TOKEN_COUNTERS_MAX', 3)
+
+    socket_main.track_message_tokens('u', 'chat', 'abandoned', 'some old text')
+    socket_main.track_message_tokens('u', 'chat', 'live', 'still streaming')
+    socket_main.mark_message_usage_recorded('chat', 'provider')
+    socket_main.MESSAGE_TOKEN_COUNTERS[('chat', 'abandoned')]['updated_at'] -= socket_main.MESSAGE_TOKEN_COUNTER_IDLE_TTL + 1
+
+    # Full: the provider-billed and the idle entries go, the idle one is billed first
+    socket_main.track_message_tokens('u', 'chat', 'new', 'hello')
+    assert set(socket_main.MESSAGE_TOKEN_COUNTERS) == {('chat', 'live'), ('chat', 'new')}
+    assert [c[:2] for c in calls] == [('chat', 'abandoned')]
 
-    assert 'compute' in calls
-    assert calls['compute'][0] == 'user123'
-    assert calls['compute'][1] == 'chat-1'
-    assert calls['compute'][2] == 'msg-1'
\ No newline at end of file
+    socket_main.finalize_message_tokens('chat', 'live')
+    assert calls[-1][1] == 'live' and calls[-1][2] > 0
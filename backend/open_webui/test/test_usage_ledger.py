@@ -0,0 +1,149 @@
+import time
+import uuid
+
+from sqlalchemy import text
+
+from open_webui.internal.db import get_db
+from open_webui.models import billing
+
+
+def _user_with_balance(tokens: int) -> str:
+    uid = f"ledger_user_{uuid.uuid4().hex[:8]}"
+    with get_db() as db:
+        db.execute(
+            text("INSERT INTO user_token_balance (user_id, tokens_balance, updated_at) VALUES (:u, :t, :ts)"),
+            {"u": uid, "t": tokens, "ts": int(time.time())},
+        )
+        db.commit()
+    return uid
+
+
+def _stored_balance(uid: str) -> int:
+    with get_db() as db:
+        return db.execute(
+            text("SELECT tokens_balance FROM user_token_balance WHERE user_id = :u"), {"u": uid}
+        ).scalar()
+
+
+def test_queued_usage_is_aggregated_in_one_flush(monkeypatch):
+    ledger = billing.UsageLedger(flush_interval=60, flush_max_events=1000)
+    monkeypatch.setattr(billing, "USAGE_LEDGER", ledger)
+
+    uid = _user_with_balance(1000)
+    ts = int(time.time())
+    for i in range(10):
+        billing.record_usage_event(uid, "chat", f"m{i}", 1, 2, 3, token_source="gpt-4o:chat", ts=ts)
+    billing.record_usage_event(uid, "chat", "m-other", 5, 5, 10, token_source="other", ts=ts)
+
+    # Nothing is written yet, but the balance already reflects the queued usage
+    assert len(ledger) == 11
+    with get_db() as db:
+        assert db.query(billing.UsageEvent).filter_by(user_id=uid).count() == 0
+    assert _stored_balance(uid) == 1000
+    assert ledger.pending_balance_delta(uid) == 40
+
+    assert ledger.flush() == 11
+    assert len(ledger) == 0
+    assert ledger.pending_balance_delta(uid) == 0
+    assert _stored_balance(uid) == 1000 - 40
+
+    with get_db() as db:
+        assert db.query(billing.UsageEvent).filter_by(user_id=uid).count() == 11
+
+        usage = db.query(billing.UserTokenUsage).filter_by(user_id=uid).all()
+        assert len(usage) == 1
+        assert (usage[0].tokens_prompt, usage[0].tokens_completion, usage[0].tokens_total) == (15, 25, 40)
+
+        daily = {d.model_id: d for d in db.query(billing.DailyUsage).filter_by(user_id=uid)}
+        assert daily["gpt-4o"].tokens_total == 30
+        assert daily["gpt-4o"].request_count == 10
+        assert daily["other"].tokens_total == 10
+
+    # A second batch adds to the existing aggregate rows
+    billing.record_usage_event(uid, "chat", "m-late", 1, 1, 2, token_source="other", ts=ts)
+    ledger.flush()
+    with get_db() as db:
+        assert db.query(billing.UserTokenUsage).filter_by(user_id=uid).one().tokens_total == 42
+        assert db.query(billing.DailyUsage).filter_by(user_id=uid, model_id="other").one().request_count == 2
+    assert _stored_balance(uid) == 1000 - 42
+
+
+def test_event_budget_and_write_through(monkeypatch):
+    uid = _user_with_balance(100)
+
+    ledger = billing.UsageLedger(flush_interval=60, flush_max_events=3)
+    monkeypatch.setattr(billing, "USAGE_LEDGER", ledger)
+    for _ in range(3):
+        billing.record_usage_event(uid, None, None, 0, 1, 1)
+    assert len(ledger) == 0
+
+    ledger = billing.UsageLedger(flush_interval=0)
+    monkeypatch.setattr(billing, "USAGE_LEDGER", ledger)
+    billing.record_usage_event(uid, None, None, 0, 1, 1)
+    assert len(ledger) == 0
+
+    with get_db() as db:
+        assert db.query(billing.UsageEvent).filter_by(user_id=uid).count() == 4
+    assert _stored_balance(uid) == 96
+
+
+def test_failed_flush_is_requeued(monkeypatch):
+    ledger = billing.UsageLedger(flush_interval=60)
+    monkeypatch.setattr(billing, "USAGE_LEDGER", ledger)
+    uid = _user_with_balance(50)
+
+    billing.record_usage_event(uid, None, None, 0, 5, 5)
+
+    def broken(batch):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(ledger, "_write_batch", broken)
+    try:
+        ledger.flush()
+    except RuntimeError:
+        pass
+    assert len(ledger) == 1
+    assert ledger.pending_balance_delta(uid) == 5
+    assert _stored_balance(uid) == 50
+
+    monkeypatch.undo()
+    monkeypatch.setattr(billing, "USAGE_LEDGER", ledger)
+    assert ledger.flush() == 1
+    assert ledger.pending_balance_delta(uid) == 0
+    assert _stored_balance(uid) == 45
+    ledger._cancel_timer()
+
+
+def test_event_that_keeps_failing_is_dropped_after_retries(monkeypatch):
+    ledger = billing.UsageLedger(flush_interval=60, max_flush_retries=2)
+    monkeypatch.setattr(billing, "USAGE_LEDGER", ledger)
+    uid = _user_with_balance(100)
+
+    for message_id in ("m1", "bad", "m2", "m3"):
+        billing.record_usage_event(uid, "chat", message_id, 0, 5, 5)
+    assert ledger.pending_balance_delta(uid) == 20
+
+    write_batch = billing.UsageLedger._write_batch
+
+    def reject_bad(batch):
+        if any(event["message_id"] == "bad" for event in batch):
+            raise ValueError("bad usage event")
+        return write_batch(batch)
+
+    monkeypatch.setattr(ledger, "_write_batch", reject_bad)
+    try:
+        ledger.flush()
+    except ValueError:
+        pass
+    assert len(ledger) == 4
+
+    # Second failure hits the retry cap: the good events are committed and
+    # the bad one is dropped instead of blocking the queue
+    assert ledger.flush() == 3
+    assert len(ledger) == 0
+    assert ledger.pending_balance_delta(uid) == 0
+    assert _stored_balance(uid) == 85
+    with get_db() as db:
+        stored = {e.message_id for e in db.query(billing.UsageEvent).filter_by(user_id=uid)}
+    assert stored == {"m1", "m2", "m3"}
+    ledger._cancel_timer()
@@ -32,6 +32,8 @@ from open_webui.models.users import Users
 from open_webui.socket.main import (
     get_event_call,
     get_event_emitter,
+    flush_message_buffer,
+    finalize_message_tokens,
 )
 from open_webui.routers.tasks import (
     generate_queries,
@@ -2157,6 +2159,10 @@ async def process_chat_response(
                                     "content": content,
                                 },
                             )
+                            # The done event above fired before the content was saved
+                            finalize_message_tokens(
+                                metadata["chat_id"], metadata["message_id"]
+                            )
 
                             # Send a webhook notification if the user is not active
                             if not Users.is_user_active(user.id):
@@ -3469,6 +3475,9 @@ async def process_chat_response(
                     "title": title,
                 }
 
+                # Buffered "message" deltas must land before the final save below
+                flush_message_buffer(metadata["chat_id"], metadata["message_id"])
+
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
                     Chats.upsert_message_to_chat_by_id_and_message_id(
@@ -3505,7 +3514,7 @@ async def process_chat_response(
                 await background_tasks_handler()
             except asyncio.CancelledError:
                 log.warning("Task was cancelled!")
-                await event_emitter({"type": "chat:tasks:cancel"})
+                flush_message_buffer(metadata["chat_id"], metadata["message_id"])
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
@@ -3517,6 +3526,9 @@ async def process_chat_response(
                         },
                     )
 
+                # Emitted after the save so the cancel finalizes token usage on the saved content
+                await event_emitter({"type": "chat:tasks:cancel"})
+
             if response.background is not None:
                 await response.background()
 
@@ -140,6 +140,26 @@ def inc_reconcile_result(action: str, reason: str | None = None):
     return None
 
 
+def inc_billing_cache(kind: str, outcome: str):
+    """Record a billing cache lookup (no-op until metrics are configured)."""
+    return None
+
+
+def inc_embedding_cache(engine: str, outcome: str, count: int = 1):
+    """Record embedding cache lookups (no-op until metrics are configured)."""
+    return None
+
+
+def record_embedding_cache_saved(engine: str, saved_ms: float):
+    """Record backend latency saved by embedding cache hits (no-op until metrics are configured)."""
+    return None
+
+
+def inc_mitchell_cache(outcome: str):
+    """Record a Mitchell result cache lookup (no-op until metrics are configured)."""
+    return None
+
+
 def setup_metrics(app: FastAPI, resource: Resource) -> None:
     """Attach OTel metrics middleware to *app* and initialise provider.
 
@@ -229,6 +249,32 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
         unit="1",
     )
 
+    billing_cache_counter = meter.create_counter(
+        name="billing.cache.lookups",
+        description="Balance/subscription cache lookups by outcome (hit, miss)",
+        unit="1",
+    )
+
+    # Embedding cache instruments (retrieval/embedding_cache.py)
+    embedding_cache_counter = meter.create_counter(
+        name="rag.embedding_cache.lookups",
+        description="Embedding cache lookups per text by outcome (hit, miss)",
+        unit="1",
+    )
+
+    embedding_cache_saved_counter = meter.create_counter(
+        name="rag.embedding_cache.saved",
+        description="Estimated embedding backend latency saved by cache hits",
+        unit="ms",
+    )
+
+    # Mitchell result cache instruments (models/mitchell.py)
+    mitchell_cache_counter = meter.create_counter(
+        name="mitchell.result_cache.lookups",
+        description="Mitchell result cache lookups by outcome (memory, db, miss, join)",
+        unit="1",
+    )
+
     def observe_pending_purchases(options: metrics.CallbackOptions):
         # Lazy import so module import time isn't heavy
         try:
@@ -264,9 +310,37 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
         except Exception:
             pass
 
+    def inc_billing_cache(kind: str, outcome: str):
+        try:
+            billing_cache_counter.add(1, {"kind": kind, "outcome": outcome})
+        except Exception:
+            pass
+
+    def inc_embedding_cache(engine: str, outcome: str, count: int = 1):
+        try:
+            embedding_cache_counter.add(count, {"engine": engine or "sentence_transformers", "outcome": outcome})
+        except Exception:
+            pass
+
+    def record_embedding_cache_saved(engine: str, saved_ms: float):
+        try:
+            embedding_cache_saved_counter.add(saved_ms, {"engine": engine or "sentence_transformers"})
+        except Exception:
+            pass
+
+    def inc_mitchell_cache(outcome: str):
+        try:
+            mitchell_cache_counter.add(1, {"outcome": outcome})
+        except Exception:
+            pass
+
     # Expose helpers at module level
     globals()["inc_billing_webhook"] = inc_billing_webhook
     globals()["inc_reconcile_result"] = inc_reconcile_result
+    globals()["inc_billing_cache"] = inc_billing_cache
+    globals()["inc_embedding_cache"] = inc_embedding_cache
+    globals()["record_embedding_cache_saved"] = record_embedding_cache_saved
+    globals()["inc_mitchell_cache"] = inc_mitchell_cache
 
     # FastAPI middleware
     @app.middleware("http")
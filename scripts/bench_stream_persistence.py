@@ -0,0 +1,137 @@
+"""Benchmark: DB reads/writes per streamed response in the socket event emitter.
+
+Streams N "message" deltas for one assistant message through
+``get_event_emitter`` and counts chat-row reads (``Chats.get_chat_by_id``),
+writes (``Chats.update_chat_by_id``) and the time spent in them. The "before"
+row replays the old per-delta get + upsert loop against the same database.
+
+Usage: python3 scripts/bench_stream_persistence.py [--deltas 500] [--history 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Run against a throwaway SQLite database
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="bench_stream_"))
+
+# Ensure local 'backend' package is importable when running the script directly
+sys.path.insert(0, os.path.abspath("backend"))
+
+from open_webui.models.chats import Chats, ChatForm
+from open_webui.socket import main as socket_main
+
+
+class Counter:
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.seconds = 0.0
+
+    def install(self):
+        get_chat_by_id = Chats.get_chat_by_id
+        update_chat_by_id = Chats.update_chat_by_id
+
+        def counted_get(id):
+            self.reads += 1
+            start = time.perf_counter()
+            try:
+                return get_chat_by_id(id)
+            finally:
+                self.seconds += time.perf_counter() - start
+
+        def counted_update(id, chat):
+            self.writes += 1
+            start = time.perf_counter()
+            try:
+                return update_chat_by_id(id, chat)
+            finally:
+                self.seconds += time.perf_counter() - start
+
+        Chats.get_chat_by_id = counted_get
+        Chats.update_chat_by_id = counted_update
+
+
+def make_chat(history: int) -> tuple[str, str]:
+    messages = {}
+    parent = None
+    for i in range(history):
+        mid = f"hist-{i}"
+        messages[mid] = {
+            "id": mid,
+            "parentId": parent,
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20,
+        }
+        parent = mid
+
+    message_id = "streamed"
+    messages[message_id] = {"id": message_id, "parentId": parent, "role": "assistant", "content": ""}
+
+    chat = Chats.insert_new_chat(
+        "bench-user",
+        ChatForm(chat={"title": "bench", "history": {"messages": messages, "currentId": message_id}}),
+    )
+    return chat.id, message_id
+
+
+def run_before(chat_id, message_id, deltas):
+    for delta in deltas:
+        message = Chats.get_message_by_id_and_message_id(chat_id, message_id)
+        if message:
+            Chats.upsert_message_to_chat_by_id_and_message_id(
+                chat_id, message_id, {"content": message.get("content", "") + delta}
+            )
+
+
+async def run_after(chat_id, message_id, deltas, delay):
+    emitter = socket_main.get_event_emitter(
+        {"user_id": "bench-user", "chat_id": chat_id, "message_id": message_id}
+    )
+    for delta in deltas:
+        await emitter({"type": "message", "data": {"content": delta}})
+        if delay:
+            await asyncio.sleep(delay)
+    await emitter({"type": "chat:completion", "data": {"done": True}})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--deltas", type=int, default=500)
+    parser.add_argument("--history", type=int, default=200, help="messages already in the chat")
+    parser.add_argument("--delay", type=float, default=0.002, help="seconds between deltas")
+    args = parser.parse_args()
+
+    # Token accounting is not what is measured here
+    socket_main.compute_tokens_and_record_message = lambda *a, **kw: None
+    # The emitter imports the app lazily; keep that out of the measurement
+    import open_webui.main  # noqa: F401
+
+    counter = Counter()
+    counter.install()
+    deltas = [f"tok{i} " for i in range(args.deltas)]
+
+    results = {}
+    for name in ("before", "after"):
+        chat_id, message_id = make_chat(args.history)
+        counter.reads = counter.writes = 0
+        counter.seconds = 0.0
+        if name == "before":
+            run_before(chat_id, message_id, deltas)
+        else:
+            asyncio.run(run_after(chat_id, message_id, deltas, args.delay))
+
+        content = Chats.get_message_by_id_and_message_id(chat_id, message_id).get("content")
+        assert content == "".join(deltas), f"{name}: persisted content mismatch"
+        results[name] = (counter.reads, counter.writes, counter.seconds)
+
+    print(f"{args.deltas} deltas, {args.history} history messages")
+    print(f"{'':8}{'reads':>8}{'writes':>8}{'db s':>10}")
+    for name, (reads, writes, elapsed) in results.items():
+        print(f"{name:8}{reads:>8}{writes:>8}{elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
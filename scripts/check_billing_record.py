@@ -1,5 +1,5 @@
 import time, uuid
-from open_webui.models.billing import record_usage_event
+from open_webui.models.billing import record_usage_event, flush_usage_ledger
 from open_webui.internal.db import get_db
 from open_webui.models.users import Users
 
@@ -10,6 +10,7 @@ print('Inserted user', uid)
 
 # Call record_usage_event
 record_usage_event(uid, 'chat-test', 'msg-1', 3, 7, 10, token_source='test', ts=int(time.time()))
+flush_usage_ledger()
 print('Recorded usage event')
 
 # Query usage_event and user_token_usage
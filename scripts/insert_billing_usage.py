@@ -7,7 +7,7 @@ import time
 import os
 
 from open_webui.models.users import Users
-from open_webui.models.billing import record_usage_event, list_user_token_usage, compute_cost_for_tokens, _billing_period_for_timestamp, UsageEvent
+from open_webui.models.billing import record_usage_event, flush_usage_ledger, list_user_token_usage, compute_cost_for_tokens, _billing_period_for_timestamp, UsageEvent
 from open_webui.internal.db import get_db
 
 
@@ -32,6 +32,7 @@ def main():
         record_usage_event(u.id, None, f'smoke-{i}', prompt, completion, total, token_source='test', ts=now)
         print(f'Inserted for {e}: tokens_total={total}')
 
+    flush_usage_ledger()
     period_start, period_end = _billing_period_for_timestamp(now)
     items, total_count = list_user_token_usage(period_start, period_end, page=1, page_size=100)
 